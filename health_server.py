@@ -1,31 +1,73 @@
 """
 Simple health check server to keep Render happy
 Runs alongside the main bot
+
+Endpoints:
+    /health, /     - liveness ("OK")
+    /metrics       - Prometheus metrics
+    /health/deep   - JSON status of every registered subsystem
+    /debug/tasks   - live asyncio tasks grouped by coroutine
+
+Everything except liveness is served from cached snapshots
+(see src/utils/health_snapshot.py).
+
+The server listens on the public port, so /health/deep and /debug/tasks
+expose internals: they are only served when HEALTH_AUTH_TOKEN is set, and
+require "Authorization: Bearer <token>" (or ?token=). /debug/tasks also
+needs HEALTH_DEBUG_TASKS_ENABLED=true.
 """
 
 from aiohttp import web
 import asyncio
+import hmac
 import logging
 
+from src.config import Config
+from src.utils.health_snapshot import health_snapshot
+
 logger = logging.getLogger(__name__)
 
 async def health_check(request):
     """Simple health endpoint"""
     return web.Response(text="OK", status=200)
 
+def _authorized(request, token: str) -> bool:
+    auth = request.headers.get('Authorization', '')
+    supplied = auth[7:] if auth.startswith('Bearer ') else request.query.get('token', '')
+    return hmac.compare_digest(supplied.encode(), token.encode())
+
+def _snapshot_handler(kind: str, token: str = ''):
+    async def handler(request):
+        if token and not _authorized(request, token):
+            return web.Response(text="Unauthorized", status=401)
+        status, body, content_type = await health_snapshot.get(kind)
+        return web.Response(body=body, status=status, headers={'Content-Type': content_type})
+    handler.__name__ = f"{kind}_snapshot"
+    return handler
+
 async def start_health_server(port=10000):
     """Start a simple health check server"""
     app = web.Application()
     app.router.add_get('/health', health_check)
     app.router.add_get('/', health_check)
-    
+    app.router.add_get('/metrics', _snapshot_handler('metrics'))
+    endpoints = ['/metrics']
+
+    token = getattr(Config, 'HEALTH_AUTH_TOKEN', '')
+    if token:
+        app.router.add_get('/health/deep', _snapshot_handler('deep', token))
+        endpoints.append('/health/deep')
+        if getattr(Config, 'HEALTH_DEBUG_TASKS_ENABLED', False):
+            app.router.add_get('/debug/tasks', _snapshot_handler('tasks', token))
+            endpoints.append('/debug/tasks')
+
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, '0.0.0.0', port)
     await site.start()
-    
-    logger.info(f"Health check server running on port {port}")
-    
+
+    logger.info(f"Health check server running on port {port} ({', '.join(endpoints)})")
+
     # Keep running forever
     while True:
         await asyncio.sleep(3600)
@@ -28,23 +28,42 @@ from src.data_fetcher import DataFetcher
 from src.options_analyzer import OptionsAnalyzer
 from src.utils.cache import cache_manager
 from src.utils.monitoring import metrics
+from src.utils.chart_renderer import chart_renderer
+from src.utils.flow_aggregates import flow_aggregates
+from src.utils.volume_cache import volume_cache
+from src.utils.options_parser import parse_cache_stats
+from src.utils.logging_setup import setup_logging, stop_logging, get_logging_stats
+from src.utils.logging_setup import queue_depth as log_queue_depth
+from src.utils.loop_monitor import loop_monitor
+from src.utils.health_snapshot import health_snapshot
+from src.utils.scan_scheduler import scan_scheduler
+from src.utils.webhook_delivery import webhook_delivery
+from src.utils.tracing import event_tracer, mark
 from src.core import HedgeHunter, ContextManager
 
-# Setup logging FIRST (before any logger calls)
 log_dir = Path(__file__).parent / "logs"
-log_dir.mkdir(exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_dir / f"orakl_{datetime.now().strftime('%Y%m%d')}.log"),
-        logging.StreamHandler()
-    ]
-)
 
 logger = logging.getLogger(__name__)
 
+
+def _setup_logging():
+    """
+    Configure logging for the bot process (call before any logger calls).
+
+    Only the real entry point runs this: spawned chart workers re-import this
+    module as __mp_main__ and must not open the daily log file or start a
+    second writer thread.
+    """
+    log_dir.mkdir(exist_ok=True)
+    # Handlers run on a background writer thread; the event loop only enqueues records
+    setup_logging(
+        handlers=[
+            logging.FileHandler(log_dir / f"orakl_{datetime.now().strftime('%Y%m%d')}.log"),
+            logging.StreamHandler()
+        ],
+        level=logging.INFO
+    )
+
 def _get_running_commit() -> str:
     """
     Best-effort commit identifier for diagnostics (helps confirm redeploys on Render).
@@ -182,6 +201,7 @@ class ORAKLRunner:
         bot_task = None
         heartbeat_task = None
         discord_task = None
+        flow_snapshot_task = None
 
         try:
             logger.info("Starting ORAKL Bot...")
@@ -190,6 +210,13 @@ class ORAKLRunner:
             logger.info("Starting cache manager...")
             await cache_manager.start()
 
+            # Event-loop lag / task / queue instrumentation
+            if Config.LOOP_MONITOR_ENABLED:
+                loop_monitor.register_queue('log_records', log_queue_depth)
+                loop_monitor.register_queue('chart_renders', lambda: chart_renderer.pending)
+                loop_monitor.register_queue('webhook_delivery', lambda: webhook_delivery.depth)
+                loop_monitor.start()
+
             # Initialize auto-posting bots with enhanced features
             logger.info("Initializing enhanced auto-posting bot system...")
             
@@ -202,10 +229,12 @@ class ORAKLRunner:
             # Initialize ORAKL v3.0 "Brain" modules (State-Aware Engine)
             hedge_hunter = HedgeHunter(fetcher) if Config.HEDGE_CHECK_ENABLED else None
             context_manager = ContextManager(fetcher)
+            loop_monitor.register_queue('gex_refreshes', lambda: context_manager.refreshes_in_flight)
             
             # Start Context Manager background loop (GEX Engine)
             gex_task = asyncio.create_task(context_manager.run_loop())
-            logger.info("✓ GEX Engine started (updates every %ds)", Config.GEX_UPDATE_INTERVAL)
+            logger.info("✓ GEX Engine started (updates every %ds, %s every %ds)", Config.GEX_UPDATE_INTERVAL,
+                        ",".join(Config.GEX_FAST_TICKERS), Config.GEX_FAST_INTERVAL)
             if hedge_hunter:
                 logger.info("✓ Hedge Hunter enabled (checks trades > $%dk)", Config.HEDGE_CHECK_MIN_PREMIUM // 1000)
 
@@ -216,6 +245,7 @@ class ORAKLRunner:
                 hedge_hunter=hedge_hunter,
                 context_manager=context_manager
             )
+            self._register_health_sources(fetcher, context_manager)
 
             # Log memory before starting bots
             process = psutil.Process()
@@ -240,6 +270,13 @@ class ORAKLRunner:
                 # Initialize Trade Enricher
                 self.trade_enricher = TradeEnricher(fetcher)
                 logger.info("✓ Trade Enricher initialized")
+
+                # Rolling flow aggregates (serve query commands from the stream)
+                flow_aggregates.load_snapshot()
+                flow_snapshot_task = asyncio.create_task(
+                    flow_aggregates.run_snapshot_loop(Config.FLOW_AGG_SNAPSHOT_INTERVAL)
+                )
+                logger.info("✓ Flow aggregate store started")
                 
                 # Initialize UOA Bot (stream filter - no watchlist)
                 if Config.UOA_ENABLED and Config.UOA_WEBHOOK:
@@ -265,6 +302,12 @@ class ORAKLRunner:
                     on_disconnect=self._on_kafka_disconnect,
                     on_reconnect=self._on_kafka_reconnect
                 )
+                self._register_kafka_consumers()
+                loop_monitor.register_queue(
+                    'kafka_dispatch',
+                    lambda: self.kafka_listener.pending_dispatches if self.kafka_listener else 0
+                )
+                loop_monitor.register_queue('gamma_triggers', lambda: self.bot_manager.gamma_refresh.in_flight)
                 
                 # Start Kafka consumer
                 kafka_task = asyncio.create_task(self._run_kafka_consumer())
@@ -360,7 +403,8 @@ class ORAKLRunner:
             
             # Cancel background tasks
             for task, name in [(discord_task, "Discord"), (heartbeat_task, "Heartbeat"), 
-                               (gex_task, "GEX"), (bot_task, "BotManager")]:
+                               (gex_task, "GEX"), (bot_task, "BotManager"),
+                               (flow_snapshot_task, "FlowSnapshot")]:
                 if task and not task.done():
                     task.cancel()
                     try:
@@ -391,9 +435,34 @@ class ORAKLRunner:
             try:
                 all_stats = cache_manager.get_all_stats()
                 logger.debug(f"Cache stats: {all_stats.get('market', {}).get('hit_rate', 0):.1%} hit rate")
+                parse_stats = parse_cache_stats()
+                logger.debug("Parse cache hit rates: " + ", ".join(
+                    f"{name} {stats['hit_rate']:.1%}" for name, stats in parse_stats.items()
+                ))
+                suppressed = sum(s['suppressed'] for s in get_logging_stats().values())
+                if suppressed:
+                    logger.info(f"Hot-path log lines suppressed by rate limit: {suppressed:,}")
             except:
                 pass
 
+            # Flush alerts still queued for Discord
+            try:
+                await webhook_delivery.stop()
+            except Exception as e:
+                logger.debug(f"Error stopping webhook delivery: {e}")
+
+            await loop_monitor.stop()
+
+            # Persist rolling flow aggregates for a warm restart
+            if flow_snapshot_task:
+                flow_aggregates.save_snapshot()
+
+            # Stop chart renderer workers
+            try:
+                chart_renderer.shutdown()
+            except Exception as e:
+                logger.debug(f"Error stopping chart renderer: {e}")
+
             # Close data fetcher
             if fetcher:
                 try:
@@ -438,6 +507,7 @@ class ORAKLRunner:
         heartbeat_count = 0
         process = psutil.Process()
         start_time = time.time()
+        last_loop_report = start_time
         
         while self.running:
             try:
@@ -466,11 +536,94 @@ class ORAKLRunner:
                         uptime_mins = int((time.time() - start_time) / 60)
                         memory_mb = process.memory_info().rss / 1024 / 1024
                         logger.info(f"✅ Bot operational for {uptime_mins} minutes | Memory: {memory_mb:.1f}MB | Status: Healthy")
+                        self._log_loop_health(last_loop_report)
+                        self._log_scan_budget()
+                        self._log_webhook_delivery()
+                        last_loop_report = time.time()
+                        self._log_dispatch_stats()
                     
             except Exception as e:
                 logger.error(f"Heartbeat error: {e}")
                 await asyncio.sleep(5)
     
+    def _register_health_sources(self, fetcher: DataFetcher, context_manager: ContextManager):
+        """Status sources behind /health/deep (components created later are read at snapshot time)"""
+        health_snapshot.register('bots', self.bot_manager.get_bots_health)
+        health_snapshot.register('dispatch', self.bot_manager.get_event_stats)
+        health_snapshot.register(
+            'kafka', lambda: self.kafka_listener.get_health() if self.kafka_listener else {'enabled': False}
+        )
+        health_snapshot.register(
+            'enricher', lambda: self.trade_enricher.get_stats() if self.trade_enricher else {'enabled': False}
+        )
+        health_snapshot.register('fetcher', fetcher.get_stats)
+        health_snapshot.register('gex', context_manager.get_status)
+        health_snapshot.register('loop', loop_monitor.get_stats)
+        health_snapshot.register('flow_aggregates', flow_aggregates.get_stats)
+        health_snapshot.register('volume_baselines', volume_cache.get_stats)
+        health_snapshot.register('charts', chart_renderer.get_stats)
+        health_snapshot.register('contract_parser', parse_cache_stats)
+        health_snapshot.register('tracing', event_tracer.get_stats)
+        health_snapshot.register('scans', scan_scheduler.get_stats)
+        health_snapshot.register('webhooks', webhook_delivery.get_stats)
+        health_snapshot.register('logging', lambda: {'queue_depth': log_queue_depth(), 'hot_paths': get_logging_stats()})
+    
+    def _log_loop_health(self, since: float):
+        """Loop lag / task / queue summary for the heartbeat (warns on stalls)"""
+        if not Config.LOOP_MONITOR_ENABLED:
+            return
+        line = loop_monitor.summary_line(since=since)
+        if loop_monitor.lag_percentiles()['p99'] > Config.LOOP_LAG_WARN_MS:
+            logger.warning(f"⚠️ Event loop lagging - {line}")
+        else:
+            logger.info(f"⏱️ {line}")
+    
+    def _log_scan_budget(self):
+        """Shared Polygon budget use and per-bot scan cost for the heartbeat"""
+        if not any(bot['scans'] for bot in scan_scheduler.get_stats()['bots'].values()):
+            return
+        logger.info(f"🗓️ {scan_scheduler.summary_line()}")
+    
+    def _log_webhook_delivery(self):
+        """Discord queue depth and delivery latency for the heartbeat"""
+        stats = webhook_delivery.get_stats()
+        if not stats['webhooks']:
+            return
+        line = webhook_delivery.summary_line()
+        if stats['depth'] > Config.WEBHOOK_QUEUE_MAX // 2:
+            logger.warning(f"⚠️ Discord backlog - {line}")
+        else:
+            logger.info(f"📮 {line}")
+    
+    def _log_dispatch_stats(self):
+        """Per-consumer Kafka throughput for the heartbeat"""
+        if not (self.kafka_mode_active and self.bot_manager):
+            return
+        stats = self.bot_manager.dispatch_graph.get_stats()
+        if not stats['events']:
+            return
+        consumers = ", ".join(
+            f"{name} {c['events']}/{c['alerts']}a/{c['avg_ms']:.0f}ms"
+            for name, c in stats['consumers'].items()
+        )
+        logger.info(
+            f"📬 Dispatch: {stats['events']} events ({stats['gated']} gated), "
+            f"{stats['in_flight']} in flight | {consumers}"
+        )
+        triggers = self.bot_manager.gamma_refresh.get_stats()
+        if triggers['triggers']:
+            logger.info(
+                f"🌉 Gamma bridge: {triggers['triggers']} triggers -> {triggers['runs']} refreshes "
+                f"({triggers['coalesced']} coalesced, {triggers['absorbed']} covered by schedule)"
+            )
+        latency = event_tracer.get_stats()['print_to_alert']
+        if latency:
+            per_bot = ", ".join(
+                f"{name} p50 {s['p50']:.1f}s/p95 {s['p95']:.1f}s ({s['count']})"
+                for name, s in latency.items()
+            )
+            logger.info(f"⏲️ Print-to-alert: {per_bot}")
+
     # =========================================================================
     # ORAKL v2.0: Kafka Event-Driven Methods
     # =========================================================================
@@ -500,43 +653,47 @@ class ORAKLRunner:
                 logger.info(f"Retrying Kafka connection in {wait_time}s...")
                 await asyncio.sleep(wait_time)
     
+    def _register_kafka_consumers(self):
+        """Add the non-bot Kafka consumers to the dispatch graph (bots register themselves)"""
+        graph = self.bot_manager.dispatch_graph
+        # Fold into rolling per-underlying aggregates and volume baselines (no I/O)
+        graph.add_ingest('flow_aggregates', flow_aggregates.record)
+        graph.add_ingest('volume_cache', volume_cache.record_print)
+        if self.bot_manager.context_manager:
+            graph.add_ingest('live_gex', self.bot_manager.context_manager.apply_print)
+        # UOA Bot: unusual activity on any ticker, ahead of the gate with its own
+        # blocklist handling (alerts are not reported back)
+        if self.uoa_bot:
+            graph.add_consumer(self.uoa_bot.name, self.uoa_bot.process_event, collect=False, gated=False)
+    
     async def _handle_kafka_event(self, trade_data: dict):
         """
         Handle a single trade event from Kafka.
         
         Flow:
         1. Enrich with Polygon snapshot (Greeks, OI, Bid/Ask)
-        2. Dispatch to UOA Bot (stream filter - any ticker)
-        3. Dispatch to flow bots (watchlist-based)
-        4. Log any alerts generated
+        2. Dispatch through BotManager.dispatch_graph (ingest folds, flow
+           bots, stream filters, UOA - see _register_kafka_consumers)
+        3. Log any alerts generated
         """
         try:
             symbol = trade_data.get('symbol', 'UNKNOWN')
             premium = trade_data.get('premium', 0)
             
-            logger.debug(f"Kafka event received: {symbol} ${premium:,.0f}")
+            logger.debug("Kafka event received: %s $%.0f", symbol, premium or 0)
             
             # Enrich with Polygon data (Just-in-Time fetch)
             if self.trade_enricher:
                 enriched = await self.trade_enricher.enrich(trade_data)
+                mark('enriched')
                 if not enriched:
-                    logger.debug(f"Enrichment failed for {symbol}, using raw data")
+                    logger.debug("Enrichment failed for %s, using raw data", symbol)
                     enriched = trade_data
             else:
                 enriched = trade_data
-            
-            # Stream Filters: Process EVERY event (no watchlist restriction)
-            # UOA Bot: Unusual activity detector
-            if self.uoa_bot:
-                asyncio.create_task(self.uoa_bot.process_event(enriched))
-            
-            # 99 Cent Store + other stream filters: sub-$1 plays on any ticker
-            if self.bot_manager:
-                for stream_bot in self.bot_manager.get_stream_filter_bots():
-                    if stream_bot.running and hasattr(stream_bot, 'process_event'):
-                        asyncio.create_task(stream_bot.process_event(enriched))
-            
-            # Dispatch to flow bots (watchlist-based)
+
+            # One pass through the dispatch graph: aggregates/baselines/live GEX,
+            # then flow bots, stream filters and UOA, each exactly once
             if self.bot_manager:
                 alerts = await self.bot_manager.process_single_event(enriched)
                 
@@ -544,10 +701,9 @@ class ORAKLRunner:
                     logger.info(f"Generated {len(alerts)} alert(s) from {symbol} event")
                     
                     # Bridge: Trigger Gamma update on massive flow
+                    # (coalesced per symbol - bursts don't stack refreshes)
                     if premium >= 500000:  # $500K+ triggers GEX refresh
-                        asyncio.create_task(
-                            self.bot_manager.trigger_gamma_update(symbol)
-                        )
+                        self.bot_manager.trigger_gamma_update(symbol)
                         
         except Exception as e:
             logger.error(f"Error handling Kafka event: {e}")
@@ -650,6 +806,7 @@ class ORAKLRunner:
         logger.info("ORAKL Bot stopped")
 
 if __name__ == "__main__":
+    _setup_logging()
     runner = ORAKLRunner()
     
     try:
@@ -657,4 +814,6 @@ if __name__ == "__main__":
     except Exception as e:
         logger.critical(f"Fatal error: {e}")
         sys.exit(1)
+    finally:
+        stop_logging()
 
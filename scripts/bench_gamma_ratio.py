@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized gamma ratio engine against the per-contract loop.
+
+Builds synthetic chains shaped like transform_polygon_snapshot output,
+checks that compute_gamma_ratio matches compute_gamma_ratio_scalar within
+tolerance and prints timings for each chain size:
+
+    python scripts/bench_gamma_ratio.py
+    python scripts/bench_gamma_ratio.py --sizes 1000 5000 20000 --rounds 5 --rtol 1e-9
+"""
+
+import argparse
+import logging
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.gamma_ratio import compute_gamma_ratio, compute_gamma_ratio_scalar  # noqa: E402
+
+
+def synthetic_chain(n: int, spot: float, seed: int = 11) -> list:
+    """Standardized chain: weekly + monthly expiries, strikes around spot"""
+    rng = random.Random(seed)
+    today = datetime.now().date()
+    expirations = [(today + timedelta(days=d)).isoformat() for d in (0, 1, 2, 7, 14, 21, 30, 45, 60, 90, 180, 365)]
+    chain = []
+    for i in range(n):
+        strike = round(spot * rng.uniform(0.6, 1.4) * 2) / 2
+        chain.append({
+            'type': 'call' if i % 2 == 0 else 'put',
+            'strike': strike,
+            'expiration': rng.choice(expirations),
+            # Thin tails and some junk so the filters do real work
+            'open_interest': rng.choice([0, None, rng.randint(1, 99)]) if rng.random() < 0.15 else rng.randint(100, 60000),
+        })
+    return chain
+
+
+def check(vectorized: dict, scalar: dict, rtol: float) -> list:
+    problems = []
+    if vectorized['contracts_analyzed'] != scalar['contracts_analyzed']:
+        problems.append(f"contracts_analyzed {vectorized['contracts_analyzed']} != {scalar['contracts_analyzed']}")
+    for key in ('call_gamma', 'put_gamma', 'total_gamma'):
+        # Results are rounded to cents; allow one unit of rounding on top of rtol
+        if not math.isclose(vectorized[key], scalar[key], rel_tol=rtol, abs_tol=0.011):
+            problems.append(f"{key} {vectorized[key]} != {scalar[key]}")
+    if not math.isclose(vectorized['G'], scalar['G'], abs_tol=1.1e-4):
+        problems.append(f"G {vectorized['G']} != {scalar['G']}")
+    if vectorized['bias'] != scalar['bias'] and abs(scalar['G'] - 0.5) < 0.149:
+        problems.append(f"bias {vectorized['bias']} != {scalar['bias']}")
+    return problems
+
+
+def timed(fn, rounds: int, *args, **kwargs):
+    best = float('inf')
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--spot', type=float, default=500.0)
+    parser.add_argument('--rounds', type=int, default=5, help='Best-of timing rounds')
+    parser.add_argument('--rtol', type=float, default=1e-9, help='Relative tolerance on gamma totals')
+    args = parser.parse_args()
+
+    # compute_gamma_ratio logs a per-call filter summary at INFO
+    logging.basicConfig(level=logging.WARNING)
+
+    failed = False
+    for n in args.sizes:
+        chain = synthetic_chain(n, args.spot)
+        # Same valuation time for both, 0DTE gamma moves with the clock
+        now = datetime.now()
+        scalar, scalar_ms = timed(compute_gamma_ratio_scalar, args.rounds, chain, args.spot, now=now)
+        vectorized, vector_ms = timed(compute_gamma_ratio, args.rounds, chain, args.spot, now=now)
+        problems = check(vectorized, scalar, args.rtol)
+        status = "OK" if not problems else f"{len(problems)} MISMATCHES"
+        print(f"{n:>6} contracts ({scalar['contracts_analyzed']} analyzed): {status} | "
+              f"scalar {scalar_ms:8.2f}ms vs vectorized {vector_ms:6.2f}ms ({scalar_ms / vector_ms:5.1f}x) | "
+              f"G={vectorized['G']:.4f}")
+        for problem in problems:
+            print(f"   {problem}")
+        failed = failed or bool(problems)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark the batched IV / Greeks solver against the scalar functions.
+
+For synthetic contracts priced at a known volatility, checks that
+implied_volatility_batch recovers it, that black_scholes_batch and
+greeks_batch match black_scholes_price_and_vega / calculate_all_greeks, and
+times fill_missing_greeks on a whole Polygon-shaped chain:
+
+    python scripts/bench_greeks_batch.py
+    python scripts/bench_greeks_batch.py --sizes 1000 5000 20000 --rounds 5
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.calculations import (  # noqa: E402
+    black_scholes_batch, black_scholes_price_and_vega, calculate_all_greeks,
+    fill_missing_greeks, greeks_batch, implied_volatility_batch,
+)
+
+RATE = 0.02
+
+
+def synthetic_contracts(n: int, spot: float, seed: int = 17):
+    rng = random.Random(seed)
+    K = np.array([round(spot * rng.uniform(0.7, 1.3)) for _ in range(n)], dtype=np.float64)
+    T = np.array([rng.choice((1, 2, 7, 14, 30, 60, 120, 365)) / 365 for _ in range(n)])
+    vol = np.array([rng.uniform(0.1, 1.2) for _ in range(n)])
+    is_call = np.array([i % 2 == 0 for i in range(n)])
+    return K, T, vol, is_call
+
+
+def synthetic_chain(n: int, spot: float, now: datetime, seed: int = 19) -> list:
+    """Polygon-shaped chain with greeks stripped from every contract"""
+    rng = random.Random(seed)
+    K, _, vol, is_call = synthetic_contracts(n, spot, seed)
+    expirations = [(now.date() + timedelta(days=d)).isoformat() for d in (1, 2, 7, 14, 30, 60)]
+    chain = []
+    for i in range(n):
+        expiration = rng.choice(expirations)
+        T = ((datetime.strptime(expiration, '%Y-%m-%d') + timedelta(hours=16)) - now).total_seconds() / (365.25 * 86400)
+        price, _ = black_scholes_batch(spot, K[i], T, is_call[i], RATE, vol[i])
+        chain.append({
+            'details': {'strike_price': K[i], 'expiration_date': expiration,
+                        'contract_type': 'call' if is_call[i] else 'put'},
+            'last_quote': {'bid': max(float(price) - 0.01, 0.0), 'ask': float(price) + 0.01},
+            'greeks': {},
+            'underlying_asset': {'price': spot},
+            '_true_vol': vol[i],
+        })
+    return chain
+
+
+def timed(fn, rounds: int, *args, **kwargs):
+    best, result = float('inf'), None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--spot', type=float, default=500.0)
+    parser.add_argument('--rounds', type=int, default=5, help='Best-of timing rounds')
+    parser.add_argument('--scalar-limit', type=int, default=2000, help='Contracts checked against the scalar functions')
+    args = parser.parse_args()
+
+    failed = False
+    for n in args.sizes:
+        spot = args.spot
+        K, T, vol, is_call = synthetic_contracts(n, spot)
+        prices, _ = black_scholes_batch(spot, K, T, is_call, RATE, vol)
+        problems = []
+
+        # Scalar reference on a prefix (the scalar path is the slow one)
+        m = min(n, args.scalar_limit)
+        greeks = greeks_batch(spot, K, T, is_call, RATE, vol)
+        start = time.perf_counter()
+        for i in range(m):
+            option_type = 'CALL' if is_call[i] else 'PUT'
+            price, vega = black_scholes_price_and_vega(spot, K[i], T[i], RATE, vol[i], option_type)
+            scalar = calculate_all_greeks(spot, K[i], T[i], RATE, vol[i], option_type)
+            if not math.isclose(price, prices[i], rel_tol=1e-9, abs_tol=1e-9):
+                problems.append(f"price[{i}] {prices[i]} != {price}")
+            for key in scalar:
+                # calculate_all_greeks rounds to 4 decimals
+                if abs(round(float(greeks[key][i]), 4) - scalar[key]) > 1.01e-4:
+                    problems.append(f"{key}[{i}] {greeks[key][i]} != {scalar[key]}")
+        scalar_ms = (time.perf_counter() - start) * 1000 * n / m
+
+        # IV must reprice within the solver tolerance (vol itself is ill-posed where vega ~ 0)
+        iv, iv_ms = timed(implied_volatility_batch, args.rounds, prices, spot, K, T, is_call, RATE)
+        solved = np.isfinite(iv)
+        repriced, _ = black_scholes_batch(spot, K[solved], T[solved], is_call[solved], RATE, iv[solved])
+        worst = float(np.max(np.abs(repriced - prices[solved]))) if solved.any() else 0.0
+        if worst > 0.0011:
+            problems.append(f"IV reprices off by ${worst:.4f}")
+        _, vega = black_scholes_batch(spot, K, T, is_call, RATE, vol)
+        sensitive = solved & (vega > 0.01)
+        vol_error = float(np.max(np.abs(iv[sensitive] - vol[sensitive]))) if sensitive.any() else 0.0
+
+        now = datetime.now()
+        chain = synthetic_chain(n, spot, now)
+        fill_ms = float('inf')
+        for _ in range(args.rounds):
+            stripped = [dict(c, greeks={}) for c in chain]
+            start = time.perf_counter()
+            filled = fill_missing_greeks(stripped, now=now)
+            fill_ms = min(fill_ms, (time.perf_counter() - start) * 1000)
+        if filled < 0.95 * n:
+            problems.append(f"only {filled}/{n} contracts backfilled")
+
+        status = "OK" if not problems else f"{len(problems)} MISMATCHES"
+        print(f"{n:>6} contracts: {status} | IV {iv_ms:.1f}ms ({int(solved.sum())} solved, "
+              f"max vol error {vol_error:.2e} where vega > 1c) | "
+              f"fill_missing_greeks {fill_ms:.1f}ms ({filled} filled) | scalar greeks ~{scalar_ms:.0f}ms")
+        for problem in problems[:10]:
+            print(f"   {problem}")
+        failed = failed or bool(problems)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Measure event-loop time spent logging the Kafka hot path.
+
+Replays the log calls made per Kafka event (event received, parsed,
+"Fetching Snapshot", enriched) and per gamma-ratio symbol scan, 10k events
+by default, under three setups:
+
+    sync      - handlers on the root logger, eager f-strings (old behaviour)
+    queue     - QueueHandler + writer thread, lazy %-style arguments
+    queue+hot - as queue, with the hot-path rate limit / sampling filter
+
+Only the time spent on the calling thread is counted (that is what the event
+loop pays); draining the writer thread is reported separately. A slow sink
+(a blocked terminal or log collector pipe) can be simulated per flush:
+
+    python scripts/bench_logging.py --events 10000
+    python scripts/bench_logging.py --events 10000 --sink-latency-us 50
+
+src.config is imported, so the usual .env (or environment) must be present.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import Config  # noqa: E402
+from src.utils.logging_setup import RateLimitFilter, setup_logging, stop_logging  # noqa: E402
+
+
+class SlowStream:
+    """File-like sink whose flush blocks for a fixed time, like a full pipe"""
+
+    def __init__(self, stream, latency_s: float):
+        self.stream = stream
+        self.latency_s = latency_s
+
+    def write(self, data):
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+
+def run_events(n: int, eager: bool, log: logging.Logger, hot: logging.Logger):
+    """The log calls made for n Kafka events and n / 10 symbol scans"""
+    for i in range(n):
+        symbol, contract, premium = 'AAPL', f"O:AAPL250117C{i % 400:05d}000", 125000.0 + i
+        if eager:
+            log.debug(f"Kafka parsed: {symbol} | Contract: {contract} | Premium: ${premium:,.0f}")
+            log.debug(f"Kafka event received: {symbol} ${premium:,.0f}")
+            hot.info(f"Fetching Snapshot -> Underlying: {symbol} | Contract: {contract}")
+            log.debug(f"Enriched {symbol} trade: premium=${premium:,.0f}, OI={1200}, delta={0.41:.2f}")
+        else:
+            log.debug("Kafka parsed: %s | Contract: %s | Premium: $%.0f", symbol, contract, premium)
+            log.debug("Kafka event received: %s $%.0f", symbol, premium)
+            hot.info("Fetching Snapshot -> Underlying: %s | Contract: %s", symbol, contract)
+            log.debug("Enriched %s trade: premium=$%.0f, OI=%s, delta=%.2f", symbol, premium, 1200, 0.41)
+
+        if i % 10 == 0:
+            G, call_gamma, put_gamma = 0.4123, 1.2e6, 1.7e6
+            total = call_gamma + put_gamma
+            if eager:
+                hot.info(f"[DEBUG_SCAN] >>> ENTERING _scan_symbol for {symbol}")
+                hot.info(f"[DEBUG_SCAN] {symbol} | Contracts_Fetched={750} | Has_Data={True}")
+                hot.info(f"[DEBUG_SCAN] {symbol} | Standardized={742} | Raw={750}")
+                hot.info(f"[DEBUG_SCAN] {symbol} | G={G:.4f} | CallGamma={call_gamma:.0f} | "
+                         f"PutGamma={put_gamma:.0f} | TotalGamma={total:.0f} | Contracts_Analyzed={410} | Bias=PUT")
+                hot.info(f"[DEBUG_SCAN] {symbol} | Gamma_Filter_Check | TotalGamma={total:.0f} | "
+                         f"Min_Required={1000} | Will_Filter={total < 1000}")
+                hot.info(f"[DEBUG_SCAN] {symbol} | Alert_Check_Result | G={G:.4f} | Alert_Count={0} | Has_Alerts={False}")
+            else:
+                hot.info("[DEBUG_SCAN] >>> ENTERING _scan_symbol for %s", symbol)
+                hot.info("[DEBUG_SCAN] %s | Contracts_Fetched=%d | Has_Data=%s", symbol, 750, True)
+                hot.info("[DEBUG_SCAN] %s | Standardized=%d | Raw=%d", symbol, 742, 750)
+                hot.info("[DEBUG_SCAN] %s | G=%.4f | CallGamma=%.0f | PutGamma=%.0f | TotalGamma=%.0f | "
+                         "Contracts_Analyzed=%s | Bias=%s", symbol, G, call_gamma, put_gamma, total, 410, 'PUT')
+                hot.info("[DEBUG_SCAN] %s | Gamma_Filter_Check | TotalGamma=%.0f | Min_Required=%s | Will_Filter=%s",
+                         symbol, total, 1000, total < 1000)
+                hot.info("[DEBUG_SCAN] %s | Alert_Check_Result | G=%.4f | Alert_Count=%d | Has_Alerts=%s",
+                         symbol, G, 0, False)
+
+
+def bench(mode: str, n: int, latency_s: float, workdir: str):
+    Config.LOG_QUEUE_ENABLED = mode != 'sync'
+    log_file = os.path.join(workdir, f"{mode}.log")
+    stream = SlowStream(open(os.path.join(workdir, f"{mode}.out"), 'w'), latency_s)
+    setup_logging([logging.FileHandler(log_file), logging.StreamHandler(stream)], level=logging.INFO)
+
+    log = logging.getLogger(f"bench.{mode}")
+    hot = logging.getLogger(f"bench.{mode}.hot")
+    rate_filter = None
+    if mode == 'queue+hot':
+        rate_filter = RateLimitFilter(Config.LOG_HOT_PATH_RATE, Config.LOG_HOT_PATH_BURST, Config.LOG_HOT_PATH_SAMPLE)
+        hot.addFilter(rate_filter)
+
+    start = time.perf_counter()
+    run_events(n, eager=(mode == 'sync'), log=log, hot=hot)
+    loop_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    stop_logging()
+    drain_ms = (time.perf_counter() - start) * 1000
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    stream.stream.close()
+    with open(log_file) as f:
+        lines = sum(1 for _ in f)
+    return loop_ms, drain_ms, lines, rate_filter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--sink-latency-us', type=float, default=0.0,
+                        help='Simulated blocking time per stdout flush')
+    args = parser.parse_args()
+
+    latency_s = args.sink_latency_us / 1e6
+    print(f"{args.events:,} events ({args.events // 10:,} symbol scans), "
+          f"sink latency {args.sink_latency_us:.0f}us per flush")
+    with tempfile.TemporaryDirectory() as workdir:
+        baseline = None
+        for mode in ('sync', 'queue', 'queue+hot'):
+            loop_ms, drain_ms, lines, rate_filter = bench(mode, args.events, latency_s, workdir)
+            baseline = baseline or loop_ms
+            per_10k = loop_ms * 10000 / args.events
+            extra = f" | suppressed {rate_filter.get_stats()['suppressed']:,}" if rate_filter else ""
+            print(f"  {mode:<10} loop {loop_ms:8.1f}ms ({per_10k:7.1f}ms / 10k events, "
+                  f"saved {baseline - loop_ms:7.1f}ms) | writer drain {drain_ms:7.1f}ms | "
+                  f"{lines:,} lines written{extra}")
+
+
+if __name__ == '__main__':
+    main()
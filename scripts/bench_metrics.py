@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark and check the metrics core (src/utils/monitoring.py).
+
+Times one observation per metric type, through a pre-bound child (the hot
+path) and through a labels dict (resolved per call), and checks:
+
+    - histogram export is cumulative, ends with le="+Inf" == _count
+    - sketch p50/p95/p99 are within the sketch accuracy of the exact values
+    - counters/gauges export the current value per label set
+
+    python scripts/bench_metrics.py
+    python scripts/bench_metrics.py --observations 500000 --budget-ns 1000
+
+Exits non-zero when a bound-child observation exceeds the budget or a check
+fails. src is imported, so the usual .env (or environment) must be present.
+"""
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.monitoring import MetricsRegistry  # noqa: E402
+
+
+def per_call_ns(fn, n: int) -> float:
+    # Best of three runs to keep scheduler noise out
+    return min(timeit.repeat(fn, number=n, repeat=3)) / n * 1e9
+
+
+def bench(n: int):
+    registry = MetricsRegistry()
+    counter = registry.register_counter('bench_events_total', 'Events', labels=['bot'])
+    gauge = registry.register_gauge('bench_queue_depth', 'Depth', labels=['queue'])
+    histogram = registry.register_histogram('bench_latency_seconds', 'Latency', labels=['stage'])
+    unlabeled = registry.register_histogram('bench_lag_seconds', 'Lag')
+
+    bound_counter = counter.labels(bot='sweeps')
+    bound_gauge = gauge.labels(queue='kafka')
+    bound_histogram = histogram.labels(stage='enrich')
+
+    return [
+        ('counter child .inc()', True, per_call_ns(bound_counter.inc, n)),
+        ('gauge child .set(v)', True, per_call_ns(lambda: bound_gauge.set(3), n)),
+        ('histogram child .observe(v)', True, per_call_ns(lambda: bound_histogram.observe(0.0123), n)),
+        ('histogram .observe(v) unlabeled', True, per_call_ns(lambda: unlabeled.observe(0.0123), n)),
+        ('counter .inc(labels=dict)', False, per_call_ns(lambda: counter.inc(labels={'bot': 'sweeps'}), n)),
+        ('gauge .set(v, dict)', False, per_call_ns(lambda: gauge.set(3, {'queue': 'kafka'}), n)),
+        ('histogram .observe(v, dict)', False, per_call_ns(lambda: histogram.observe(0.0123, {'stage': 'enrich'}), n)),
+        ('histogram .get_percentile(99)', False, per_call_ns(lambda: unlabeled.get_percentile(99), 2000)),
+    ]
+
+
+def check_export() -> list:
+    failures = []
+    registry = MetricsRegistry()
+    histogram = registry.register_histogram('check_latency_seconds', 'Latency', labels=['stage'])
+    counter = registry.register_counter('check_events_total', 'Events', labels=['bot'])
+    gauge = registry.register_gauge('check_depth', 'Depth', labels=['queue'])
+
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(-4, 1.2) for _ in range(50000)]
+    child = histogram.labels(stage='enrich')
+    for value in samples:
+        child.observe(value)
+    counter.inc(3, labels={'bot': 'sweeps'})
+    counter.labels(bot='sweeps').inc(2)
+    gauge.set(4, {'queue': 'kafka "main"'})
+
+    text = registry.export_prometheus()
+    buckets = [(le, int(count)) for le, count in
+               re.findall(r'check_latency_seconds_bucket\{le="([^"]+)",stage="enrich"\} (\d+)', text)]
+    counts = [count for _, count in buckets]
+    total = int(re.search(r'check_latency_seconds_count\{stage="enrich"\} (\d+)', text).group(1))
+    if counts != sorted(counts):
+        failures.append('histogram buckets not cumulative')
+    if not buckets or buckets[-1] != ('+Inf', len(samples)) or total != len(samples):
+        failures.append('+Inf bucket / _count mismatch')
+    for le, count in buckets[:-1]:
+        exact = sum(1 for value in samples if value <= float(le))
+        if exact != count:
+            failures.append(f'bucket le={le}: {count} != {exact}')
+    if 'check_events_total{bot="sweeps"} 5' not in text:
+        failures.append('counter value')
+    if 'check_depth{queue="kafka \\"main\\""} 4' not in text:
+        failures.append('gauge value / label escaping')
+
+    ordered = sorted(samples)
+    accuracy = child.sketch.accuracy
+    for pct in (50, 95, 99):
+        exact = ordered[int(pct / 100 * (len(ordered) - 1))]
+        estimate = histogram.get_percentile(pct, {'stage': 'enrich'})
+        error = abs(estimate - exact) / exact
+        print(f"  p{pct}: sketch {estimate * 1000:.3f}ms, exact {exact * 1000:.3f}ms, error {error:.2%}")
+        if error > accuracy * 1.05:
+            failures.append(f'p{pct} error {error:.2%} > {accuracy:.0%}')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--observations', type=int, default=200000)
+    parser.add_argument('--budget-ns', type=float, default=1000.0,
+                        help='Max time per observation on a bound child')
+    args = parser.parse_args()
+
+    print(f"Per-observation cost ({args.observations:,} calls, best of 3)")
+    over_budget = []
+    for name, hot, ns in bench(args.observations):
+        flag = ''
+        if hot:
+            flag = 'ok' if ns <= args.budget_ns else 'OVER BUDGET'
+            if ns > args.budget_ns:
+                over_budget.append(name)
+        print(f"  {name:<34} {ns:8.0f} ns  {flag}")
+
+    print("Export / quantile checks")
+    failures = check_export()
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    if over_budget or failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Benchmark REST-mode scan cycles against the local Polygon stand-in.
+
+Starts scripts/polygon_standin.py in-process, points DataFetcher at it
+(POLYGON_BASE_URL) and every webhook at a local 204 sink, then runs each
+bot's scan_and_post for a few cycles and the watchlist refresh
+(WatchlistManager._fetch_all_tickers + liquidity filter). Per cycle it
+reports wall time, Polygon requests (total and by route, counted by the
+stand-in), pages, 429s, client errors and webhook posts. The first cycle
+is cold; later ones hit DataFetcher's caches and the volume baselines.
+
+    python scripts/bench_rest_scans.py
+    python scripts/bench_rest_scans.py --bots sweeps lotto --cycles 3 --latency-ms 40 --jitter-ms 20
+    python scripts/bench_rest_scans.py --polygon polygon.jsonl --synthetic --json rest.json
+    python scripts/bench_rest_scans.py --error-rate 0.02 --baseline rest.json
+
+Recordings (--polygon) take precedence; without any, responses are
+synthetic. The client-side Polygon rate limiter (5 req/s) is replaced by
+an unlimited one unless --rate-limit is given, since it only turns the
+request count into wall time; market hours are treated as open unless
+--market-hours is given. Bot state lives in a temp directory. src is
+imported, so the usual .env (or environment) must be present.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from polygon_standin import PolygonStandIn, SyntheticMarket, add_standin_arguments  # noqa: E402
+from replay_kafka import WebhookSink, peak_rss_mb  # noqa: E402
+from src.config import Config  # noqa: E402
+from src.utils.webhook_delivery import webhook_delivery  # noqa: E402
+
+logger = logging.getLogger('bench_rest_scans')
+
+
+def select_bots(bots: List, wanted: List[str]) -> List:
+    if not wanted:
+        return bots
+    wanted = [name.lower() for name in wanted]
+    return [bot for bot in bots if any(name in bot.name.lower() for name in wanted)]
+
+
+async def measure(standin: PolygonStandIn, sink: WebhookSink, fetcher, run) -> Dict:
+    standin.reset_counters()
+    posts_before = sum(sink.posts.values())
+    errors_before = fetcher._error_count
+    started = time.perf_counter()
+    await run()
+    await webhook_delivery.drain(timeout=300)
+    return {
+        'seconds': time.perf_counter() - started,
+        'requests': standin.total_requests,
+        'by_route': dict(standin.requests.most_common()),
+        'pages': standin.pages,
+        'rate_limited': standin.rate_limited,
+        'not_found': standin.not_found,
+        'client_errors': fetcher._error_count - errors_before,
+        'posts': sum(sink.posts.values()) - posts_before,
+    }
+
+
+async def run(args) -> Dict:
+    standin = PolygonStandIn(
+        recordings=args.polygon,
+        synthetic=SyntheticMarket(seed=args.seed, chain_size=args.chain_size) if args.synthetic else None,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, page_size=args.page_size,
+        error_rate=args.error_rate, throttle_rps=args.throttle_rps, seed=args.seed,
+    )
+    await standin.start()
+    sink = WebhookSink(latency=args.sink_latency_ms / 1000.0)
+    await sink.start()
+    Config.POLYGON_BASE_URL = standin.url
+
+    # Imported late: STATE_DB_PATH / POLYGON_BASE_URL must be set before these are built
+    import src.data_fetcher as data_fetcher_module
+    from src.bot_manager import BotManager
+    from src.core import ContextManager, HedgeHunter
+    from src.data_fetcher import DataFetcher
+    from src.options_analyzer import OptionsAnalyzer
+    from src.utils.market_hours import MarketHours
+    from src.utils.resilience import RateLimiter, api_circuit_breaker
+
+    if not args.rate_limit:
+        data_fetcher_module.polygon_rate_limiter = RateLimiter(calls_per_second=1e6, burst_capacity=1_000_000)
+    if not args.market_hours:
+        MarketHours.is_market_open = staticmethod(lambda *a, **k: True)
+
+    fetcher = DataFetcher(Config.POLYGON_API_KEY or 'standin')
+    bot_manager = BotManager(
+        Config.DISCORD_WEBHOOK_URL, fetcher, OptionsAnalyzer(),
+        hedge_hunter=HedgeHunter(fetcher) if Config.HEDGE_CHECK_ENABLED else None,
+        context_manager=ContextManager(fetcher),
+    )
+    bots = select_bots(bot_manager.bots, args.bots)
+    if args.no_pacing:
+        webhook_delivery.min_interval = 0.0
+    results: Dict[str, List[Dict]] = {}
+    try:
+        for bot in bots:
+            bot.webhook_url = sink.url(bot.name)
+            await bot.start_event_mode()   # session + running, without the scan loop
+            results[bot.name] = []
+            for cycle in range(args.cycles):
+                result = await measure(standin, sink, fetcher, bot.scan_and_post)
+                result['symbols'] = len(getattr(bot, 'watchlist', []) or [])
+                result['circuit'] = api_circuit_breaker.state
+                results[bot.name].append(result)
+                logger.info("%s cycle %d: %.2fs, %d requests", bot.name, cycle + 1,
+                            result['seconds'], result['requests'])
+
+        if args.watchlist:
+            manager = bot_manager.watchlist_manager
+            manager.mode = 'ALL_MARKET'
+            results['Watchlist refresh'] = []
+            for _ in range(args.cycles):
+                result = await measure(standin, sink, fetcher, manager.refresh_watchlist)
+                result['symbols'] = len(manager.watchlist)
+                result['circuit'] = api_circuit_breaker.state
+                results['Watchlist refresh'].append(result)
+    finally:
+        for bot in bots:
+            await bot.stop()
+        await webhook_delivery.stop()
+        await fetcher.close()
+        await sink.stop()
+        await standin.stop()
+
+    return {
+        'settings': {k: getattr(args, k) for k in ('latency_ms', 'jitter_ms', 'page_size', 'error_rate',
+                                                    'throttle_rps', 'chain_size', 'rate_limit', 'cycles')},
+        'cycles': results,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def print_report(report: Dict):
+    print(f"{'Scan cycle':<28}{'#':>3}{'symbols':>9}{'seconds':>10}{'requests':>10}{'pages':>7}"
+          f"{'429s':>6}{'errors':>8}{'posts':>7}  top routes")
+    for name, cycles in report['cycles'].items():
+        for i, c in enumerate(cycles, 1):
+            routes = ", ".join(f"{route} {count}" for route, count in list(c['by_route'].items())[:3])
+            circuit = '' if str(c['circuit']).lower() == 'closed' else f"  [circuit {c['circuit']}]"
+            print(f"{name:<28}{i:>3}{c['symbols']:>9}{c['seconds']:>10.2f}{c['requests']:>10}{c['pages']:>7}"
+                  f"{c['rate_limited']:>6}{c['client_errors']:>8}{c['posts']:>7}  {routes}{circuit}")
+    total = sum(c['requests'] for cycles in report['cycles'].values() for c in cycles)
+    print(f"\nTotal Polygon requests: {total:,} | peak RSS {report['peak_rss_mb']:.1f} MB")
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Cycles slower, or making more Polygon requests, than the baseline beyond tolerance"""
+    problems = []
+    print(f"\nAgainst baseline (tolerance {tolerance:.0%}):")
+    for name, cycles in report['cycles'].items():
+        for i, (now, then) in enumerate(zip(cycles, baseline.get('cycles', {}).get(name, [])), 1):
+            for key in ('seconds', 'requests'):
+                if not then[key]:
+                    continue
+                change = (now[key] - then[key]) / then[key]
+                flag = 'REGRESSION' if change > tolerance else 'ok'
+                print(f"  {name} #{i} {key:<9} {then[key]:10.2f} -> {now[key]:10.2f}  ({change:+.1%})  {flag}")
+                if change > tolerance:
+                    problems.append(f"{name} #{i} {key} {change:+.1%}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_standin_arguments(parser)
+    parser.add_argument('--bots', nargs='*', default=[], help='Bot name substrings (default: every bot)')
+    parser.add_argument('--cycles', type=int, default=2)
+    parser.add_argument('--no-watchlist', dest='watchlist', action='store_false',
+                        help='Skip the watchlist refresh benchmark')
+    parser.add_argument('--rate-limit', action='store_true', help='Keep the 5 req/s client rate limiter')
+    parser.add_argument('--market-hours', action='store_true', help='Respect market hours (scans skip when closed)')
+    parser.add_argument('--sink-latency-ms', type=float, default=0.0, help='Simulated Discord round trip')
+    parser.add_argument('--no-pacing', action='store_true', help='Disable the per-webhook post spacing')
+    parser.add_argument('--json', help='Write the report here')
+    parser.add_argument('--baseline', help='Report from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed regression vs the baseline')
+    parser.add_argument('--verbose', action='store_true', help='Show INFO logs from the bots')
+    args = parser.parse_args()
+    if not args.polygon:
+        args.synthetic = True
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    with tempfile.TemporaryDirectory(prefix='orakl_bench_') as state_dir:
+        Config.STATE_DB_PATH = str(Path(state_dir) / 'bot_state.db')
+        report = asyncio.run(run(args))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        if problems:
+            print(f"FAIL: {', '.join(problems)}")
+            sys.exit(1)
+        print("OK")
+
+
+if __name__ == '__main__':
+    main()
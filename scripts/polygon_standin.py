@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Polygon REST API.
+
+Serves recorded responses (the JSON lines written by scripts/replay_kafka.py
+--record: {"endpoint", "params", "response"}) and, with --synthetic,
+generated ones for the routes the scanners use:
+
+    /v3/snapshot/options/{underlying}[/{contract}]   option chain / contract snapshot
+    /v2/snapshot/options/contracts/{contract}
+    /v2/snapshot/locale/us/markets/stocks/tickers[/{symbol}]
+    /v2/aggs/ticker/{symbol}/range/...              minute/day bars
+    /v3/trades/{ticker}                             stock or option trades
+    /v3/reference/tickers, /v3/reference/options/contracts, /v1/marketstatus/now
+
+List responses are paginated like Polygon (limit + next_url with a cursor),
+and every response can be delayed (latency + jitter) or answered with a 429
+(random error rate, or a server-side requests/second budget). Synthetic
+chains trade between calls so volume-delta flow detection finds flow.
+
+Point DataFetcher at it with POLYGON_BASE_URL:
+
+    python scripts/polygon_standin.py --port 8765 --synthetic --latency-ms 40
+    POLYGON_BASE_URL=http://127.0.0.1:8765 python main.py
+
+scripts/bench_rest_scans.py runs it in-process.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+IGNORED_PARAMS = {'apiKey', 'cursor'}
+
+
+def params_key(params: Dict[str, Any]) -> str:
+    return json.dumps({k: str(v) for k, v in params.items() if k not in IGNORED_PARAMS}, sort_keys=True)
+
+
+def route_of(path: str) -> str:
+    """Route family for counters: the path with tickers, dates and numbers collapsed"""
+    parts = path.strip('/').split('/')
+    if parts[:2] == ['v2', 'aggs']:
+        return '/v2/aggs'
+    if parts[:2] == ['v3', 'snapshot'] and len(parts) > 3:
+        return '/v3/snapshot/options/{underlying}/{contract}' if len(parts) > 4 else '/v3/snapshot/options/{underlying}'
+    if parts[:2] == ['v3', 'trades']:
+        return '/v3/trades/{option}' if parts[2].startswith('O:') else '/v3/trades/{stock}'
+    if path.startswith('/v2/snapshot/locale/us/markets/stocks/tickers/'):
+        return '/v2/snapshot/.../tickers/{symbol}'
+    if path.startswith('/v2/snapshot/locale/us/markets/stocks/tickers'):
+        return '/v2/snapshot/.../tickers'
+    if path.startswith('/v2/snapshot/options/contracts/'):
+        return '/v2/snapshot/options/contracts/{contract}'
+    return path
+
+
+def _rng(*parts: Any) -> random.Random:
+    """Deterministic per-key generator (stable across processes, unlike hash())"""
+    return random.Random(zlib.crc32('|'.join(str(p) for p in parts).encode()))
+
+
+class SyntheticMarket:
+    """Polygon-shaped responses for any ticker, stable per ticker and moving between calls"""
+
+    def __init__(self, seed: int = 7, chain_size: int = 600, universe: int = 1500):
+        self.seed = seed
+        self.chain_size = chain_size
+        self.universe = universe
+        self._chain_calls: Counter = Counter()
+        self.routes: List[Tuple[re.Pattern, Callable[..., Optional[Dict]]]] = [
+            (re.compile(r'^/v3/snapshot/options/([^/]+)/([^/]+)$'), self.contract_snapshot),
+            (re.compile(r'^/v2/snapshot/options/contracts/([^/]+)$'), lambda contract, **_: self.contract_snapshot(
+                self.underlying_of(contract), contract)),
+            (re.compile(r'^/v3/snapshot/options/([^/]+)$'), self.chain_snapshot),
+            (re.compile(r'^/v2/snapshot/locale/us/markets/stocks/tickers/([^/]+)$'), self.stock_snapshot),
+            (re.compile(r'^/v2/snapshot/locale/us/markets/stocks/tickers$'), self.stock_snapshots),
+            (re.compile(r'^/v2/aggs/ticker/([^/]+)/range/(\d+)/(\w+)/([^/]+)/([^/]+)$'), self.aggregates),
+            (re.compile(r'^/v3/trades/([^/]+)$'), self.trades),
+            (re.compile(r'^/v3/reference/tickers$'), self.reference_tickers),
+            (re.compile(r'^/v3/reference/options/contracts$'), self.reference_contracts),
+            (re.compile(r'^/v1/marketstatus/now$'), self.market_status),
+        ]
+
+    def respond(self, path: str, params: Dict[str, str]) -> Optional[Dict]:
+        for pattern, build in self.routes:
+            match = pattern.match(path)
+            if match:
+                return build(*match.groups(), params=params)
+        return None
+
+    # ------------------------------------------------------------------
+    # Building blocks
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def underlying_of(contract: str) -> str:
+        match = re.match(r'^O:([A-Z.]+?)\d{6}[CP]\d{8}$', contract)
+        return match.group(1) if match else contract
+
+    def spot(self, symbol: str) -> float:
+        return round(_rng(self.seed, 'spot', symbol).uniform(15, 650), 2)
+
+    def _contracts(self, underlying: str) -> List[Dict]:
+        """Static part of an underlying's chain (strikes, expiries, OI)"""
+        rng = _rng(self.seed, 'chain', underlying)
+        spot = self.spot(underlying)
+        today = date.today()
+        expiries = [today + timedelta(days=d) for d in (0, 1, 2, 4, 7, 14, 21, 30, 45, 60, 90, 180)]
+        step = 0.5 if spot < 25 else 1 if spot < 100 else 2.5 if spot < 250 else 5
+        strikes_per_side = max(1, self.chain_size // (2 * len(expiries)))
+        contracts = []
+        for expiry in expiries:
+            for k in range(-strikes_per_side // 2, strikes_per_side - strikes_per_side // 2):
+                strike = round(round(spot / step) * step + k * step, 2)
+                if strike <= 0:
+                    continue
+                for kind in ('call', 'put'):
+                    contracts.append({
+                        'ticker': f"O:{underlying}{expiry:%y%m%d}{kind[0].upper()}{int(strike * 1000):08d}",
+                        'strike': strike,
+                        'expiry': expiry.isoformat(),
+                        'type': kind,
+                        'oi': rng.randint(0, 40000) if rng.random() > 0.1 else 0,
+                        'base_volume': 0 if rng.random() < 0.5 else int(rng.lognormvariate(3, 1.5)),
+                        'hot': rng.random() < 0.04,
+                    })
+        return contracts[:self.chain_size]
+
+    def _snapshot(self, underlying: str, c: Dict, calls: int) -> Dict:
+        spot = self.spot(underlying)
+        rng = _rng(self.seed, c['ticker'], calls)
+        moneyness = (spot - c['strike']) if c['type'] == 'call' else (c['strike'] - spot)
+        dte = max((date.fromisoformat(c['expiry']) - date.today()).days, 0)
+        price = round(max(0.01, moneyness) + spot * 0.004 * (dte + 1) ** 0.5 * rng.uniform(0.8, 1.2), 2)
+        # Hot strikes take size on every call, so each scan sees a volume delta
+        volume = c['base_volume'] + (calls * rng.randint(200, 3000) if c['hot'] else calls * rng.randint(0, 5))
+        delta = max(0.01, min(0.99, 0.5 + moneyness / (spot * 0.2)))
+        return {
+            'ticker': c['ticker'],
+            'details': {'contract_type': c['type'], 'strike_price': c['strike'], 'expiration_date': c['expiry'],
+                        'ticker': c['ticker'], 'shares_per_contract': 100, 'exercise_style': 'american'},
+            'day': {'volume': volume, 'close': price, 'open': price, 'high': round(price * 1.05, 2),
+                    'low': round(price * 0.95, 2), 'vwap': price, 'last_updated': int(time.time() * 1e9)},
+            'open_interest': c['oi'],
+            'implied_volatility': round(rng.uniform(0.2, 1.1), 4),
+            'greeks': {'delta': round(delta if c['type'] == 'call' else delta - 1, 4),
+                       'gamma': round(rng.uniform(0.001, 0.06), 5),
+                       'theta': round(-rng.uniform(0.01, 0.6), 4), 'vega': round(rng.uniform(0.01, 0.5), 4)},
+            'last_quote': {'bid': round(price * 0.97, 2), 'ask': round(price * 1.03, 2), 'midpoint': price,
+                           'bid_size': rng.randint(1, 300), 'ask_size': rng.randint(1, 300)},
+            'last_trade': {'price': price, 'size': rng.randint(1, 500), 'sip_timestamp': int(time.time() * 1e9)},
+            'underlying_asset': {'ticker': underlying, 'price': spot},
+        }
+
+    # ------------------------------------------------------------------
+    # Routes
+    # ------------------------------------------------------------------
+
+    def chain_snapshot(self, underlying: str, params: Dict[str, str]) -> Dict:
+        if 'cursor' not in params:
+            self._chain_calls[underlying] += 1
+        calls = self._chain_calls[underlying]
+        contracts = self._contracts(underlying)
+        if params.get('contract_type'):
+            contracts = [c for c in contracts if c['type'] == params['contract_type']]
+        if params.get('expiration_date.lte'):
+            contracts = [c for c in contracts if c['expiry'] <= params['expiration_date.lte']]
+        return {'status': 'OK', 'results': [self._snapshot(underlying, c, calls) for c in contracts]}
+
+    def contract_snapshot(self, underlying: str, contract: str, params: Dict[str, str] = None) -> Optional[Dict]:
+        underlying = underlying.replace('I:', '')
+        for c in self._contracts(underlying):
+            if c['ticker'] == contract:
+                return {'status': 'OK', 'results': self._snapshot(underlying, c, self._chain_calls[underlying])}
+        return None
+
+    def _stock(self, symbol: str) -> Dict:
+        rng = _rng(self.seed, 'stock', symbol, int(time.time() // 60))
+        spot = self.spot(symbol)
+        volume = int(_rng(self.seed, 'adv', symbol).lognormvariate(14.5, 1.3))
+        return {
+            'ticker': symbol,
+            'day': {'o': spot, 'h': round(spot * 1.01, 2), 'l': round(spot * 0.99, 2), 'c': spot,
+                    'v': volume, 'vw': spot},
+            'prevDay': {'c': round(spot * rng.uniform(0.97, 1.03), 2), 'v': volume, 'vw': spot},
+            'lastTrade': {'p': spot, 's': 100, 't': int(time.time() * 1e9)},
+            'lastQuote': {'p': round(spot - 0.01, 2), 'P': round(spot + 0.01, 2)},
+            'todaysChangePerc': round(rng.uniform(-3, 3), 2),
+            'updated': int(time.time() * 1e9),
+        }
+
+    def stock_snapshot(self, symbol: str, params: Dict[str, str]) -> Dict:
+        return {'status': 'OK', 'ticker': self._stock(symbol)}
+
+    def stock_snapshots(self, params: Dict[str, str]) -> Dict:
+        symbols = [s for s in params.get('tickers', '').split(',') if s] or self._universe()[:250]
+        return {'status': 'OK', 'tickers': [self._stock(symbol) for symbol in symbols]}
+
+    def aggregates(self, symbol: str, multiplier: str, timespan: str, start: str, end: str,
+                   params: Dict[str, str]) -> Dict:
+        rng = _rng(self.seed, 'aggs', symbol, timespan, start, end)
+        spot = self.spot(symbol)
+        seconds = {'minute': 60, 'hour': 3600, 'day': 86400}.get(timespan, 60) * int(multiplier)
+        try:
+            begin = datetime.fromisoformat(start).replace(tzinfo=timezone.utc)
+        except ValueError:
+            begin = datetime.now(timezone.utc) - timedelta(days=1)
+        count = min(int(params.get('limit', 5000)), 390 if timespan == 'minute' else 60)
+        bars, price = [], spot
+        for i in range(count):
+            move = price * rng.gauss(0, 0.002)
+            high, low = max(price, price + move) * 1.001, min(price, price + move) * 0.999
+            bars.append({'t': int((begin.timestamp() + i * seconds) * 1000), 'o': round(price, 2),
+                         'h': round(high, 2), 'l': round(low, 2), 'c': round(price + move, 2),
+                         'v': rng.randint(1000, 200000), 'vw': round(price + move / 2, 2), 'n': rng.randint(10, 900)})
+            price += move
+        return {'status': 'OK', 'ticker': symbol, 'resultsCount': len(bars), 'results': bars}
+
+    def trades(self, ticker: str, params: Dict[str, str]) -> Dict:
+        rng = _rng(self.seed, 'trades', ticker, int(time.time() // 60))
+        is_option = ticker.startswith('O:')
+        price = 2.5 if is_option else self.spot(ticker)
+        now_ns = int(time.time() * 1e9)
+        count = min(int(params.get('limit', 1000)), 200 if is_option else 1000)
+        results = [{
+            'sip_timestamp': now_ns - (count - i) * 250_000_000,
+            'participant_timestamp': now_ns - (count - i) * 250_000_000 - 1000,
+            'price': round(price * rng.uniform(0.98, 1.02), 2),
+            'size': rng.choice([1, 5, 10, 25, 50, 100, 500]) * (1 if is_option else 100),
+            'exchange': rng.randint(1, 20),
+            'conditions': [rng.choice([209, 219, 227, 233])] if is_option else [rng.choice([0, 12, 37])],
+        } for i in range(count)]
+        return {'status': 'OK', 'results': results}
+
+    def _universe(self) -> List[str]:
+        rng = _rng(self.seed, 'universe')
+        letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        symbols = set()
+        while len(symbols) < self.universe:
+            symbols.add(''.join(rng.choice(letters) for _ in range(rng.randint(2, 4))))
+        return sorted(symbols)
+
+    def reference_tickers(self, params: Dict[str, str]) -> Dict:
+        return {'status': 'OK', 'results': [
+            {'ticker': symbol, 'name': f'{symbol} Inc', 'market': 'stocks', 'type': 'CS', 'active': True,
+             'market_cap': int(_rng(self.seed, 'cap', symbol).lognormvariate(22, 1.5))}
+            for symbol in self._universe()
+        ]}
+
+    def reference_contracts(self, params: Dict[str, str]) -> Dict:
+        underlying = params.get('underlying_ticker', 'SPY')
+        return {'status': 'OK', 'results': [
+            {'ticker': c['ticker'], 'underlying_ticker': underlying, 'contract_type': c['type'],
+             'strike_price': c['strike'], 'expiration_date': c['expiry'], 'shares_per_contract': 100}
+            for c in self._contracts(underlying)
+        ]}
+
+    def market_status(self, params: Dict[str, str]) -> Dict:
+        return {'market': 'open', 'serverTime': datetime.now(timezone.utc).isoformat(),
+                'exchanges': {'nyse': 'open', 'nasdaq': 'open'}}
+
+
+class PolygonStandIn:
+    """
+    aiohttp app serving recorded / synthetic Polygon responses.
+
+    Usage:
+        standin = PolygonStandIn(synthetic=SyntheticMarket(), latency_ms=40, error_rate=0.01)
+        await standin.start()           # standin.url -> POLYGON_BASE_URL
+        standin.reset_counters()
+        ...
+        await standin.stop()
+    """
+
+    def __init__(self, recordings: Optional[List[str]] = None, synthetic: Optional[SyntheticMarket] = None,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, page_size: int = 250,
+                 error_rate: float = 0.0, throttle_rps: float = 0.0, seed: int = 7):
+        self.synthetic = synthetic
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self.throttle_rps = throttle_rps
+        self._rng = random.Random(seed)
+        # path -> {params key -> body}; the last recording of a path also serves other params
+        self._fixtures: Dict[str, Dict[str, Dict]] = {}
+        for path in recordings or []:
+            self.load(path)
+        self._window_start = 0.0
+        self._window_count = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ''
+        self.reset_counters()
+
+    def load(self, path: str):
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if 'response' not in entry:
+                    continue
+                by_params = self._fixtures.setdefault(entry['endpoint'], {})
+                by_params[params_key(entry.get('params') or {})] = entry['response']
+                by_params[''] = entry['response']
+
+    def reset_counters(self):
+        self.requests: Counter = Counter()
+        self.rate_limited = 0
+        self.not_found = 0
+        self.pages = 0
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    def _lookup(self, path: str, params: Dict[str, str]) -> Optional[Dict]:
+        by_params = self._fixtures.get(path)
+        if by_params:
+            return by_params.get(params_key(params), by_params[''])
+        if self.synthetic is not None:
+            return self.synthetic.respond(path, params)
+        return None
+
+    def _throttled(self) -> bool:
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return True
+        if self.throttle_rps:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            return self._window_count > self.throttle_rps
+        return False
+
+    def _paginate(self, request: web.Request, body: Dict, params: Dict[str, str]) -> Dict:
+        results = body.get('results')
+        if not isinstance(results, list):
+            return body
+        try:
+            limit = min(int(params.get('limit', self.page_size)), self.page_size) or self.page_size
+            offset = int(params.get('cursor', 0))
+        except ValueError:
+            limit, offset = self.page_size, 0
+        if offset == 0 and len(results) <= limit:
+            return body
+        page = dict(body, results=results[offset:offset + limit])
+        if offset + limit < len(results):
+            query = dict(params, cursor=str(offset + limit))
+            query.pop('apiKey', None)
+            page['next_url'] = str(request.url.with_query(query))
+        else:
+            page.pop('next_url', None)
+        self.pages += 1
+        return page
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        path = request.path
+        params = dict(request.query)
+        self.requests[route_of(path)] += 1
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self._throttled():
+            self.rate_limited += 1
+            return web.json_response({'status': 'ERROR', 'error': 'You\'ve exceeded the maximum requests per minute'},
+                                     status=429, headers={'Retry-After': '1'})
+        body = self._lookup(path, params)
+        if body is None:
+            self.not_found += 1
+            return web.json_response({'status': 'NOT_FOUND', 'message': f'No data for {path}'}, status=404)
+        return web.json_response(self._paginate(request, body, params))
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0):
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.total_requests,
+            'by_route': dict(self.requests.most_common()),
+            'rate_limited': self.rate_limited,
+            'not_found': self.not_found,
+            'pages': self.pages,
+        }
+
+
+async def serve(args):
+    standin = PolygonStandIn(
+        recordings=args.polygon,
+        synthetic=SyntheticMarket(seed=args.seed, chain_size=args.chain_size) if args.synthetic else None,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, page_size=args.page_size,
+        error_rate=args.error_rate, throttle_rps=args.throttle_rps, seed=args.seed,
+    )
+    await standin.start(args.host, args.port)
+    print(f"Polygon stand-in on {standin.url} (POLYGON_BASE_URL={standin.url})")
+    try:
+        while True:
+            await asyncio.sleep(60)
+            print(f"  {json.dumps(standin.get_stats())}")
+    finally:
+        await standin.stop()
+
+
+def add_standin_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--polygon', nargs='*', default=[], help='Polygon recordings (JSON lines)')
+    parser.add_argument('--synthetic', action='store_true', help='Generate responses for unrecorded requests')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--chain-size', type=int, default=600, help='Contracts per synthetic option chain')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform extra latency up to this')
+    parser.add_argument('--page-size', type=int, default=250, help='Max results per page')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--throttle-rps', type=float, default=0.0, help='429 above this many requests/second')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_standin_arguments(parser)
+    args = parser.parse_args()
+    if not args.polygon and not args.synthetic:
+        parser.error("give --polygon recordings and/or --synthetic")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
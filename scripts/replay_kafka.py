@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Replay recorded Kafka flow through the event pipeline and benchmark it.
+
+Feeds processed-flows messages (one JSON document per line, as written with
+KAFKA_CAPTURE_PATH set) through the production path:
+
+    KafkaFlowListener._parse_message -> pre-filter -> TradeEnricher.enrich
+    -> BotManager.process_single_event (ingest folds, flow bots, stream filters, UOA)
+
+with Polygon served from a recording and every webhook pointed at a local
+sink that answers 204. Reports events/sec, per-stage latency percentiles
+(the orakl_event_stage_seconds histograms), alerts per bot, webhook posts
+(messages and the embeds packed into them) and peak RSS; --json / --baseline save a run and compare against one.
+
+Polygon recordings are JSON lines {"endpoint", "params", "response"} (or
+"error") keyed on endpoint + params, served through DataFetcher._make_request
+so parsing and caching run as in production. Requests with no recording fail
+like a Polygon 404. Record them once against the live API:
+
+    python scripts/replay_kafka.py flows.jsonl --record polygon.jsonl
+    python scripts/replay_kafka.py flows.jsonl --polygon polygon.jsonl --speed 0 --json base.json
+    python scripts/replay_kafka.py flows.jsonl --polygon polygon.jsonl --speed 0 --baseline base.json
+    python scripts/replay_kafka.py --synthetic 5000 --speed 0
+
+--speed 1 replays at the recorded pace (message timestamps), 0 as fast as
+possible. Messages are fed in file order and bot state (cooldowns, dedup)
+starts empty in a temp directory, so a run is repeatable for a given
+recording and trading day; DTE and market-hours checks still follow the
+wall clock. The GEX refresh loop and the $500K Gamma bridge are not run
+(state bots are not replayed). src is imported, so the usual .env (or
+environment) must be present; --record also needs POLYGON_API_KEY.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import Config  # noqa: E402
+from src.data_fetcher import DataFetcher  # noqa: E402
+from src.utils.exceptions import APIException  # noqa: E402
+from src.utils.tracing import current_trace, event_tracer, mark, source_time  # noqa: E402
+from src.utils.webhook_delivery import webhook_delivery  # noqa: E402
+
+logger = logging.getLogger('replay_kafka')
+
+STAGE_ORDER = ['parsed', 'filtered', 'scheduled', 'polygon', 'enriched', 'ingested', 'gated',
+               'slot', 'hedge_check', 'evaluated', 'queued', 'done', 'delivered']
+
+
+def request_key(endpoint: str, params: Optional[Dict]) -> str:
+    params = {k: v for k, v in (params or {}).items() if k != 'apiKey'}
+    return endpoint + '?' + json.dumps(params, sort_keys=True, default=str)
+
+
+class RecordedDataFetcher(DataFetcher):
+    """DataFetcher answering every Polygon request from a recording (no network)"""
+
+    def __init__(self, recordings: Dict[str, Tuple[Optional[str], Optional[str]]], latency: float = 0.0):
+        super().__init__('replay')
+        self.recordings = recordings    # key -> (response JSON text, error)
+        self.latency = latency
+        self.hits = 0
+        self.misses: Counter = Counter()
+
+    async def ensure_session(self):
+        return None
+
+    async def _make_request(self, endpoint: str, params: Dict = None):
+        self._request_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        entry = self.recordings.get(request_key(endpoint, params))
+        if entry is None:
+            # Group misses by route, not by contract
+            self.misses['/'.join(endpoint.split('/')[:4])] += 1
+            raise APIException(f"Client error: 404 - no recording for {endpoint}", {'status': 404})
+        self.hits += 1
+        response, error = entry
+        if error is not None:
+            raise APIException(error, {'status': 'recorded'})
+        # Parse per request, like response.json() in production
+        return json.loads(response)
+
+
+class RecordingDataFetcher(DataFetcher):
+    """Live DataFetcher that appends every request/response to a recording"""
+
+    def __init__(self, api_key: str, path: str):
+        super().__init__(api_key)
+        self._out = open(path, 'a')
+        self.recorded = 0
+
+    async def _make_request(self, endpoint: str, params: Dict = None):
+        clean = {k: v for k, v in (params or {}).items() if k != 'apiKey'}
+        entry = {'endpoint': endpoint, 'params': clean}
+        try:
+            data = await super()._make_request(endpoint, params)
+            entry['response'] = data
+            return data
+        except Exception as e:
+            entry['error'] = str(e)
+            raise
+        finally:
+            self._out.write(json.dumps(entry, default=str) + '\n')
+            self.recorded += 1
+
+    async def close(self):
+        self._out.close()
+        await super().close()
+
+
+def load_recordings(paths: List[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    recordings = {}
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                key = request_key(entry['endpoint'], entry.get('params'))
+                if 'error' in entry:
+                    recordings[key] = (None, entry['error'])
+                else:
+                    recordings[key] = (json.dumps(entry.get('response')), None)
+    return recordings
+
+
+def load_messages(path: str) -> List[bytes]:
+    with open(path, 'rb') as f:
+        return [line.rstrip(b'\r\n') for line in f if line.strip()]
+
+
+def synthetic_flow(n: int, seed: int = 7) -> Tuple[List[bytes], Dict[str, Tuple[Optional[str], Optional[str]]]]:
+    """processed-flows messages plus matching contract snapshots, over the bot watchlists"""
+    rng = random.Random(seed)
+    symbols = sorted(set(Config.SWEEPS_WATCHLIST) | set(Config.GOLDEN_SWEEPS_WATCHLIST) | set(Config.LOTTO_WATCHLIST))
+    spots = {symbol: rng.uniform(20, 600) for symbol in symbols}
+    today = date.today()
+    messages, recordings = [], {}
+    ts = datetime.combine(today, dt_time(14, 30), tzinfo=timezone.utc).timestamp() * 1000   # the open, in UTC
+    for i in range(n):
+        symbol = rng.choice(symbols)
+        spot = spots[symbol] * rng.uniform(0.995, 1.005)
+        is_call = rng.random() < 0.55
+        expiry = today + timedelta(days=rng.choice([1, 2, 3, 7, 10, 14, 21, 30, 45, 60]))
+        strike = round(spot * rng.uniform(0.85, 1.2))
+        contract = f"O:{symbol}{expiry:%y%m%d}{'C' if is_call else 'P'}{int(strike * 1000):08d}"
+        price = max(0.05, round(abs(spot - strike) * 0.2 + rng.uniform(0.05, 8), 2))
+        size = rng.choice([50, 100, 250, 500, 1000, 2500, 5000])
+        ts += rng.expovariate(50) * 1000   # ~50 prints/sec
+        messages.append(json.dumps({
+            'id': f"{contract}-{int(ts)}-{i}",
+            'ticker': symbol,
+            'premiumValue': round(price * size * 100, 2),
+            'strike': strike,
+            'exp': expiry.isoformat(),
+            'type': 'call' if is_call else 'put',
+            'size': size,
+            'price': price,
+            'side': rng.choice(['ask', 'bid', 'mid']),
+            'is_sweep': rng.random() < 0.4,
+            'timestamp': int(ts),
+        }).encode())
+
+        key = request_key(f"/v3/snapshot/options/{symbol}/{contract}", {})
+        if key not in recordings:
+            oi = rng.randint(10, 40000)
+            snapshot = {
+                'details': {'ticker': contract, 'strike_price': strike, 'expiration_date': expiry.isoformat(),
+                            'contract_type': 'call' if is_call else 'put'},
+                'greeks': {'delta': rng.uniform(0.05, 0.95) * (1 if is_call else -1),
+                           'gamma': rng.uniform(0.001, 0.08), 'theta': -rng.uniform(0.01, 0.5),
+                           'vega': rng.uniform(0.01, 0.4)},
+                'implied_volatility': rng.uniform(0.2, 1.2),
+                'last_quote': {'bid': round(price * 0.97, 2), 'ask': round(price * 1.03, 2),
+                               'bid_size': rng.randint(1, 200), 'ask_size': rng.randint(1, 200)},
+                'day': {'volume': rng.randint(size, size * 20)},
+                'open_interest': oi,
+                'underlying_asset': {'price': spot, 'ticker': symbol},
+            }
+            recordings[key] = (json.dumps({'status': 'OK', 'results': snapshot}), None)
+    return messages, recordings
+
+
+def schedule_offsets(messages: List[bytes]) -> List[float]:
+    """Seconds after the first message at which each message was produced (0 when unknown)"""
+    offsets, first = [], None
+    for raw in messages:
+        try:
+            ts = source_time(json.loads(raw).get('timestamp'))
+        except (ValueError, AttributeError):
+            ts = None
+        if ts is not None and first is None:
+            first = ts
+        offsets.append(max(0.0, ts - first) if ts is not None and first is not None else 0.0)
+    return offsets
+
+
+class WebhookSink:
+    """Local stand-in for Discord webhooks: counts posts (and embeds) per bot and answers 204"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.posts: Counter = Counter()
+        self.embeds: Counter = Counter()
+        self._runner: Optional[web.AppRunner] = None
+        self.port = 0
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        self.posts[request.match_info['bot']] += 1
+        try:
+            self.embeds[request.match_info['bot']] += len(json.loads(body).get('embeds') or [])
+        except (ValueError, AttributeError):
+            pass
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.Response(status=204)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post('/{bot}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def url(self, bot_name: str) -> str:
+        return f"http://127.0.0.1:{self.port}/{bot_name.replace(' ', '_')}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+class ReplayPipeline:
+    """The Kafka-mode objects main.py builds, wired to the replay fetcher and sink"""
+
+    def __init__(self, fetcher: DataFetcher, sink: WebhookSink, pacing: bool = True):
+        # Imported late: STATE_DB_PATH must point at the temp dir before bots open their stores
+        from src.bot_manager import BotManager
+        from src.bots.uoa_bot import UOABot
+        from src.core import ContextManager, HedgeHunter
+        from src.kafka_listener import KafkaFlowListener
+        from src.options_analyzer import OptionsAnalyzer
+        from src.trade_enricher import TradeEnricher
+        from src.utils.flow_aggregates import flow_aggregates
+        from src.utils.volume_cache import volume_cache
+
+        self.fetcher = fetcher
+        self.sink = sink
+        self.pacing = pacing
+        hedge_hunter = HedgeHunter(fetcher) if Config.HEDGE_CHECK_ENABLED else None
+        context_manager = ContextManager(fetcher)
+        self.bot_manager = BotManager(
+            Config.DISCORD_WEBHOOK_URL, fetcher, OptionsAnalyzer(),
+            hedge_hunter=hedge_hunter, context_manager=context_manager,
+        )
+        self.enricher = TradeEnricher(fetcher)
+        self.listener = KafkaFlowListener(callback=self.handle)
+        self.uoa_bot = UOABot(sink.url('UOA Bot')) if Config.UOA_ENABLED else None
+
+        # Same ingest folds and extra consumer as ORAKLRunner._register_kafka_consumers
+        graph = self.bot_manager.dispatch_graph
+        graph.add_ingest('flow_aggregates', flow_aggregates.record)
+        graph.add_ingest('volume_cache', volume_cache.record_print)
+        graph.add_ingest('live_gex', context_manager.apply_print)
+        if self.uoa_bot:
+            graph.add_consumer(self.uoa_bot.name, self.uoa_bot.process_event, collect=False)
+
+        self.alerts = 0
+        self.event_seconds: List[float] = []
+
+    async def start(self):
+        for bot in self.bot_manager.bots:
+            bot.webhook_url = self.sink.url(bot.name)
+        if not self.pacing:
+            webhook_delivery.min_interval = 0.0
+        await self.bot_manager.start_kafka_event_bots()
+        self.bot_manager.running = True
+
+    async def handle(self, trade_data: Dict):
+        """ORAKLRunner._handle_kafka_event without the Gamma bridge"""
+        enriched = await self.enricher.enrich(trade_data)
+        mark('enriched')
+        if not enriched:
+            enriched = trade_data
+        alerts = await self.bot_manager.process_single_event(enriched)
+        self.alerts += len(alerts)
+        trace = current_trace()
+        if trace is not None:
+            self.event_seconds.append(time.perf_counter() - trace.marks[0][1])
+
+    async def feed(self, messages: List[bytes], offsets: List[float], speed: float, max_pending: int) -> Dict:
+        """Consumer loop of KafkaFlowListener.start with the broker replaced by the message list"""
+        listener = self.listener
+        counts = Counter()
+        started = time.perf_counter()
+        for raw, offset in zip(messages, offsets):
+            if speed > 0:
+                delay = offset / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            while len(listener._pending) >= max_pending:
+                await asyncio.sleep(0.001)
+            counts['messages'] += 1
+            listener.health.record_message()
+
+            trade_data = listener._parse_message(raw)
+            if trade_data is None:
+                event_tracer.detach()
+                counts['unparseable'] += 1
+                continue
+            if not listener._passes_filter(trade_data):
+                event_tracer.detach()
+                counts['filtered'] += 1
+                continue
+            mark('filtered')
+            counts['dispatched'] += 1
+            task = asyncio.create_task(listener._safe_dispatch(trade_data))
+            event_tracer.detach()
+            listener._pending.add(task)
+            task.add_done_callback(listener._pending.discard)
+            # Let dispatches run between messages, as the poll await does
+            await asyncio.sleep(0)
+
+        if listener._pending:
+            await asyncio.gather(*list(listener._pending), return_exceptions=True)
+        await webhook_delivery.drain(timeout=300)
+        counts['seconds'] = time.perf_counter() - started
+        return counts
+
+    async def stop(self):
+        await self.bot_manager.stop_all()
+        await webhook_delivery.stop()
+        # Let in-flight UOA posts (own sessions) settle before the sink goes away
+        await asyncio.sleep(0.1)
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * (len(ordered) - 1)))]  # noqa: E731
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99)}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+async def run(args, messages: List[bytes], recordings) -> Dict:
+    event_tracer.enabled = True
+    if args.record:
+        fetcher = RecordingDataFetcher(Config.POLYGON_API_KEY, args.record)
+    else:
+        fetcher = RecordedDataFetcher(recordings, latency=args.polygon_latency_ms / 1000.0)
+    sink = WebhookSink(latency=args.sink_latency_ms / 1000.0)
+    await sink.start()
+    pipeline = ReplayPipeline(fetcher, sink, pacing=not args.no_pacing)
+    await pipeline.start()
+    try:
+        counts = await pipeline.feed(messages, schedule_offsets(messages), args.speed, args.max_pending)
+    finally:
+        await pipeline.stop()
+        await sink.stop()
+        await fetcher.close()
+
+    dispatch = pipeline.bot_manager.dispatch_graph.get_stats()
+    stages = event_tracer.stage_summary()
+    for owner in stages.values():
+        owner.pop('ingest', None)   # producer clock -> now is meaningless for a recording
+    report = {
+        'messages': counts['messages'],
+        'dispatched': counts['dispatched'],
+        'filtered': counts['filtered'],
+        'unparseable': counts['unparseable'],
+        'seconds': counts['seconds'],
+        'events_per_sec': counts['messages'] / counts['seconds'] if counts['seconds'] else 0.0,
+        'event_latency': percentiles(pipeline.event_seconds),
+        'alerts': pipeline.alerts,
+        'alerts_by_bot': {name: c['alerts'] for name, c in dispatch['consumers'].items() if c['alerts']},
+        'webhook_posts': dict(sink.posts),
+        'webhook_embeds': dict(sink.embeds),
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': stages,
+    }
+    if isinstance(fetcher, RecordedDataFetcher):
+        report['polygon'] = {'hits': fetcher.hits, 'misses': dict(fetcher.misses.most_common())}
+    else:
+        report['polygon'] = {'recorded': fetcher.recorded, 'path': args.record}
+    return report
+
+
+def ms(value: Optional[float]) -> str:
+    return f"{value * 1000:10.2f}" if value is not None else f"{'-':>10}"
+
+
+def print_report(report: Dict):
+    print(f"Replayed {report['messages']:,} messages in {report['seconds']:.2f}s "
+          f"-> {report['events_per_sec']:,.0f} events/s "
+          f"({report['dispatched']:,} dispatched, {report['filtered']:,} pre-filtered, "
+          f"{report['unparseable']:,} unparseable)")
+    latency = report['event_latency']
+    print(f"Event latency (parse -> dispatch done): p50 {ms(latency['p50']).strip()}ms "
+          f"p95 {ms(latency['p95']).strip()}ms p99 {ms(latency['p99']).strip()}ms")
+    by_bot = ", ".join(f"{name} {count}" for name, count in sorted(report['alerts_by_bot'].items()))
+    print(f"Alerts: {report['alerts']} collected ({by_bot or 'none'}) | "
+          f"webhook posts: {sum(report['webhook_posts'].values())} "
+          f"({sum(report.get('webhook_embeds', {}).values())} embeds)")
+    polygon = report['polygon']
+    if 'hits' in polygon:
+        misses = ", ".join(f"{route} {count}" for route, count in list(polygon['misses'].items())[:5])
+        print(f"Polygon stand-in: {polygon['hits']:,} hits, {sum(polygon['misses'].values()):,} misses"
+              + (f" ({misses})" if misses else ""))
+    else:
+        print(f"Polygon: recorded {polygon['recorded']:,} requests to {polygon['path']}")
+    print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+    print(f"\n{'Stage latency (ms)':<36}{'count':>8}{'p50':>11}{'p95':>11}{'p99':>11}")
+    owners = sorted(report['stages'], key=lambda owner: (owner != 'pipeline', owner))
+    for owner in owners:
+        stages = report['stages'][owner]
+        for stage in sorted(stages, key=lambda s: STAGE_ORDER.index(s) if s in STAGE_ORDER else len(STAGE_ORDER)):
+            s = stages[stage]
+            print(f"  {owner + ' ' + stage:<34}{s['count']:>8} {ms(s['p50'])} {ms(s['p95'])} {ms(s['p99'])}")
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions beyond tolerance (throughput, event latency, memory) and changed alert counts"""
+    problems = []
+    print(f"\nAgainst baseline (tolerance {tolerance:.0%}):")
+
+    def check(label: str, now: Optional[float], then: Optional[float], higher_is_better: bool):
+        if not now or not then:
+            return
+        change = (now - then) / then
+        worse = -change if higher_is_better else change
+        flag = 'REGRESSION' if worse > tolerance else 'ok'
+        print(f"  {label:<24} {then:12.4f} -> {now:12.4f}  ({change:+.1%})  {flag}")
+        if worse > tolerance:
+            problems.append(f"{label} {change:+.1%}")
+
+    check('events/sec', report['events_per_sec'], baseline.get('events_per_sec'), True)
+    for q in ('p50', 'p95', 'p99'):
+        check(f'event latency {q} (s)', report['event_latency'][q], baseline.get('event_latency', {}).get(q), False)
+    check('peak RSS (MB)', report['peak_rss_mb'], baseline.get('peak_rss_mb'), False)
+
+    if report['messages'] == baseline.get('messages') and report['alerts_by_bot'] != baseline.get('alerts_by_bot'):
+        print(f"  alerts changed: {baseline.get('alerts_by_bot')} -> {report['alerts_by_bot']}")
+        problems.append('alerts changed')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('messages', nargs='?', help='Recorded processed-flows messages (JSON lines)')
+    parser.add_argument('--polygon', nargs='*', default=[], help='Polygon recordings (JSON lines)')
+    parser.add_argument('--record', help='Call live Polygon and append every request to this recording')
+    parser.add_argument('--synthetic', type=int, default=0, help='Generate N messages with matching snapshots')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--speed', type=float, default=0.0, help='1 = recorded pace, 0 = as fast as possible')
+    parser.add_argument('--max-pending', type=int, default=2000, help='Dispatches in flight before feeding pauses')
+    parser.add_argument('--polygon-latency-ms', type=float, default=0.0, help='Simulated Polygon round trip')
+    parser.add_argument('--sink-latency-ms', type=float, default=0.0, help='Simulated Discord round trip')
+    parser.add_argument('--no-pacing', action='store_true', help='Disable the per-webhook post spacing')
+    parser.add_argument('--json', help='Write the report here')
+    parser.add_argument('--baseline', help='Report from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed regression vs the baseline')
+    parser.add_argument('--verbose', action='store_true', help='Show INFO logs from the pipeline')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    messages, recordings = [], load_recordings(args.polygon)
+    if args.messages:
+        messages = load_messages(args.messages)
+    if args.synthetic:
+        synthetic_messages, synthetic_recordings = synthetic_flow(args.synthetic, args.seed)
+        messages += synthetic_messages
+        recordings.update(synthetic_recordings)
+    if not messages:
+        parser.error("give a recorded messages file and/or --synthetic N")
+    if args.record and not Config.POLYGON_API_KEY:
+        parser.error("--record needs POLYGON_API_KEY")
+
+    with tempfile.TemporaryDirectory(prefix='orakl_replay_') as state_dir:
+        Config.STATE_DB_PATH = str(Path(state_dir) / 'bot_state.db')
+        report = asyncio.run(run(args, messages, recordings))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        if problems:
+            print(f"FAIL: {', '.join(problems)}")
+            sys.exit(1)
+        print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Check the one-pass chain analytics kernel against the per-consumer loops.
+
+The reference implementations are the loops the kernel replaced:
+ContextManager._calculate_gex / _find_flip_level, the WallsBot OI-wall
+loop, transform_polygon_snapshot + compute_gamma_ratio and
+compute_gamma_profile. Every metric is compared on recorded chains
+(Polygon /v3/snapshot/options JSON) and/or a synthetic chain, then timed:
+
+    python scripts/verify_chain_analytics.py chains/SPY.json --spot 501.2
+    python scripts/verify_chain_analytics.py --synthetic 5000 --rounds 10
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.chain_analytics import ChainAnalytics  # noqa: E402
+from src.utils.gamma_profile import compute_gamma_profile  # noqa: E402
+from src.utils.gamma_ratio import compute_gamma_ratio, transform_polygon_snapshot  # noqa: E402
+
+
+# ----------------------------------------------------------------------
+# Reference loops (as they were in ContextManager and WallsBot)
+# ----------------------------------------------------------------------
+def legacy_gex(contracts, spot_price, expiry_limit):
+    contracts = [c for c in contracts
+                 if (c.get('details', {}) or {}).get('expiration_date', '')
+                 and (c.get('details', {}) or {}).get('expiration_date', '') <= expiry_limit]
+    total_gex = 0.0
+    gex_by_strike, call_oi_by_strike, put_oi_by_strike = {}, {}, {}
+    for contract in contracts:
+        details = contract.get('details', {}) or {}
+        greeks = contract.get('greeks', {}) or {}
+        gamma = greeks.get('gamma', 0)
+        oi = contract.get('open_interest', 0)
+        strike = details.get('strike_price', 0)
+        contract_type = details.get('contract_type', '').lower()
+        if not gamma or not oi or not strike:
+            continue
+        gex_value = gamma * oi * 100 * spot_price
+        if contract_type == 'put':
+            gex_value = -gex_value
+        total_gex += gex_value
+        gex_by_strike[strike] = gex_by_strike.get(strike, 0) + gex_value
+        if contract_type == 'call':
+            call_oi_by_strike[strike] = call_oi_by_strike.get(strike, 0) + oi
+        else:
+            put_oi_by_strike[strike] = put_oi_by_strike.get(strike, 0) + oi
+
+    flip_level = 0.0
+    if gex_by_strike:
+        sorted_strikes = sorted(gex_by_strike.keys())
+        cumulative_gex = 0.0
+        flip_level = None
+        for strike in sorted_strikes:
+            prev_gex = cumulative_gex
+            cumulative_gex += gex_by_strike[strike]
+            if (prev_gex < 0 and cumulative_gex > 0) or (prev_gex > 0 and cumulative_gex < 0):
+                flip_level = strike
+                break
+        if flip_level is None:
+            flip_level = min(sorted_strikes, key=lambda s: abs(s - spot_price), default=0.0)
+
+    return {
+        'regime': "POSITIVE_GAMMA" if total_gex > 0 else "NEGATIVE_GAMMA",
+        'net_gex': total_gex,
+        'flip_level': flip_level,
+        'call_wall': max(sorted(call_oi_by_strike), key=lambda k: call_oi_by_strike[k], default=0),
+        'put_wall': max(sorted(put_oi_by_strike), key=lambda k: put_oi_by_strike[k], default=0),
+    }, len(contracts)
+
+
+def legacy_walls(contracts, expiry_cutoff):
+    call_oi, put_oi = {}, {}
+    for contract in contracts:
+        details = contract.get('details', {}) or {}
+        oi = contract.get('open_interest', 0)
+        if not oi or oi < 100:
+            continue
+        strike = details.get('strike_price', 0)
+        expiration = details.get('expiration_date', '')
+        contract_type = details.get('contract_type', '').lower()
+        if not strike or not expiration or expiration > expiry_cutoff:
+            continue
+        if contract_type == 'call':
+            call_oi[strike] = call_oi.get(strike, 0) + oi
+        elif contract_type == 'put':
+            put_oi[strike] = put_oi.get(strike, 0) + oi
+    if not call_oi or not put_oi:
+        return None
+    call_wall = max(sorted(call_oi), key=lambda k: call_oi[k])
+    put_wall = max(sorted(put_oi), key=lambda k: put_oi[k])
+    return {'call_wall': call_wall, 'call_oi': call_oi[call_wall],
+            'put_wall': put_wall, 'put_oi': put_oi[put_wall]}
+
+
+def legacy_all(contracts, spot, expiry_limit):
+    gex, n = legacy_gex(contracts, spot, expiry_limit)
+    in_window = [c for c in contracts
+                 if (c.get('details') or {}).get('expiration_date', '')
+                 and (c.get('details') or {}).get('expiration_date', '') <= expiry_limit]
+    return {
+        'contracts': n,
+        'gex': gex,
+        'walls': legacy_walls(contracts, expiry_limit),
+        'gamma_ratio': compute_gamma_ratio(transform_polygon_snapshot(in_window), spot),
+        'profile': compute_gamma_profile(in_window, spot),
+    }
+
+
+# ----------------------------------------------------------------------
+# Inputs
+# ----------------------------------------------------------------------
+def load_chain(path: str) -> list:
+    with open(path) as f:
+        data = json.load(f)
+    return data.get('results', []) if isinstance(data, dict) else data
+
+
+def synthetic_chain(n: int, spot: float, seed: int = 5) -> list:
+    rng = random.Random(seed)
+    today = datetime.now().date()
+    expirations = [(today + timedelta(days=d)).isoformat() for d in (0, 1, 2, 7, 14, 21, 28, 45, 90)]
+    chain = []
+    for i in range(n):
+        is_call = i % 2 == 0
+        strike = round(spot * rng.uniform(0.7, 1.3))
+        expiration = rng.choice(expirations)
+        contract = {
+            'ticker': f"O:XYZ{expiration[2:].replace('-', '')}{'C' if is_call else 'P'}{strike * 1000:08d}",
+            'details': {
+                'contract_type': 'call' if is_call else 'put',
+                'strike_price': strike,
+                'expiration_date': expiration,
+            },
+            'open_interest': rng.choice([0, None, rng.randint(1, 99)]) if rng.random() < 0.2 else rng.randint(100, 40000),
+            'greeks': {'gamma': rng.choice([0, None]) if rng.random() < 0.05 else rng.uniform(0.0001, 0.08)},
+            'implied_volatility': rng.uniform(0.1, 0.9) if rng.random() > 0.05 else None,
+            'underlying_asset': {'price': spot},
+        }
+        if rng.random() < 0.02:
+            contract['details']['contract_type'] = ''
+        chain.append(contract)
+    return chain
+
+
+# ----------------------------------------------------------------------
+# Comparison
+# ----------------------------------------------------------------------
+def close(a, b) -> bool:
+    # G ratio totals are rounded to cents and 0DTE gamma moves with the clock
+    # between the two calls, so large totals get a small relative tolerance
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(a, b, rel_tol=1e-6, abs_tol=0.011)
+    return a == b
+
+
+def diff(path: str, old, new, problems: list):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            diff(f"{path}.{key}", old[key], new.get(key), problems)
+    elif isinstance(old, list) and isinstance(new, list):
+        if len(old) != len(new):
+            problems.append(f"{path}: {len(old)} items vs {len(new)}")
+            return
+        for i, (a, b) in enumerate(zip(old, new)):
+            diff(f"{path}[{i}]", a, b, problems)
+    elif not close(old, new):
+        problems.append(f"{path}: legacy={old!r} kernel={new!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('chains', nargs='*', help='Recorded chain snapshot JSON files')
+    parser.add_argument('--spot', type=float, help='Spot price for recorded chains (default: from the chain)')
+    parser.add_argument('--synthetic', type=int, default=0, help='Also check a synthetic chain of N contracts')
+    parser.add_argument('--dte', type=int, default=30, help='Expiry window in days')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    # compute_gamma_ratio logs a per-call filter summary at INFO
+    logging.basicConfig(level=logging.WARNING)
+
+    cases = []
+    for path in args.chains:
+        chain = load_chain(path)
+        spot = args.spot or next(((c.get('underlying_asset') or {}).get('price') for c in chain
+                                  if (c.get('underlying_asset') or {}).get('price')), 0)
+        cases.append((path, chain, float(spot)))
+    if args.synthetic:
+        cases.append((f"synthetic[{args.synthetic}]", synthetic_chain(args.synthetic, 500.0), 500.0))
+    if not cases:
+        parser.error("give recorded chain files and/or --synthetic N")
+
+    expiry_limit = (datetime.now() + timedelta(days=args.dte)).strftime('%Y-%m-%d')
+    failed = False
+    for name, chain, spot in cases:
+        legacy = legacy_all(chain, spot, expiry_limit)
+        kernel = ChainAnalytics().analyze('X', chain, spot, max_expiry=expiry_limit)
+        problems = []
+        diff('', legacy, kernel, problems)
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            legacy_all(chain, spot, expiry_limit)
+        legacy_ms = (time.perf_counter() - start) / args.rounds * 1000
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            ChainAnalytics().analyze('X', chain, spot, max_expiry=expiry_limit)
+        cold_ms = (time.perf_counter() - start) / args.rounds * 1000
+
+        analytics = ChainAnalytics()
+        analytics.analyze('X', chain, spot, max_expiry=expiry_limit)
+        copy = [dict(c) for c in chain]  # new list, same contents
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            analytics.analyze('X', copy, spot, max_expiry=expiry_limit)
+        unchanged_ms = (time.perf_counter() - start) / args.rounds * 1000
+
+        status = "OK" if not problems else f"{len(problems)} MISMATCHES"
+        print(f"{name} ({len(chain)} contracts, {legacy['contracts']} in window): {status} | "
+              f"legacy {legacy_ms:.1f}ms, kernel {cold_ms:.1f}ms ({legacy_ms / cold_ms:.1f}x), "
+              f"unchanged chain {unchanged_ms:.2f}ms")
+        for problem in problems[:20]:
+            print(f"   {problem}")
+        failed = failed or bool(problems)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Check the vectorized unusual-flow detector against the legacy loop.
+
+Runs both implementations in src/utils/flow_detection.py over recorded
+option chain snapshots and reports any mismatching flow, plus timings. The
+columnar volume baseline store is checked against the dict baseline too.
+
+Recorded chains are the JSON bodies of Polygon /v3/snapshot/options/{underlying}
+(either the raw response with 'results' or a plain list of contracts). An
+optional second recording of the same chain can be given as the baseline to
+exercise volume deltas. A chain that gains a contract between scans is
+always checked against the baseline store:
+
+    python scripts/verify_unusual_flow.py chains/SPY_0945.json --baseline chains/SPY_0940.json
+    python scripts/verify_unusual_flow.py --synthetic 3000 --rounds 20
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.flow_detection import ChainColumns, detect_flows_columnar, detect_flows_legacy  # noqa: E402
+from src.utils.volume_cache import VolumeBaselineStore  # noqa: E402
+
+IGNORED_FIELDS = {'timestamp'}
+
+
+def load_chain(path: str) -> list:
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return data.get('results', [])
+    return data
+
+
+def volume_map(chain: list) -> dict:
+    volumes = {}
+    for contract in chain:
+        details = contract.get('details', {}) or {}
+        ticker = contract.get('ticker') or details.get('ticker', '')
+        volume = (contract.get('day', {}) or {}).get('volume', 0)
+        if ticker and volume > 0:
+            volumes[ticker] = volume
+    return volumes
+
+
+def synthetic_chain(n: int, seed: int = 7) -> list:
+    """Polygon-shaped chain with the awkward cases the fallbacks handle"""
+    rng = random.Random(seed)
+    chain = []
+    for i in range(n):
+        is_call = i % 2 == 0
+        strike = 400 + (i // 2) % 200
+        # One expiry per 200 strikes so tickers are unique, as in a real chain
+        expiration = datetime(2025, 1, 17).toordinal() + 7 * (i // 400)
+        expiration = datetime.fromordinal(expiration)
+        ticker = f"O:SPY{expiration:%y%m%d}{'C' if is_call else 'P'}{int(strike * 1000):08d}"
+        # Most of a real chain barely trades; a handful of strikes carry the flow
+        volume = 0 if rng.random() < 0.6 else int(rng.lognormvariate(3, 1.6))
+        day = {'volume': volume}
+        roll = rng.random()
+        if roll < 0.9:
+            day['close'] = round(rng.lognormvariate(0, 1.2), 2)
+        elif roll < 0.95:
+            day.update(open=1.2, high=1.5, low=0.9)
+        contract = {
+            'ticker': ticker if rng.random() > 0.01 else '',
+            'details': {
+                'contract_type': 'call' if is_call else 'put',
+                'strike_price': strike if rng.random() > 0.01 else 0,
+                'expiration_date': f"{expiration:%Y-%m-%d}",
+            },
+            'day': day,
+            'open_interest': rng.choice([0, rng.randint(1, 50000), None]) if rng.random() < 0.05 else rng.randint(0, 50000),
+            'last_quote': {'bid': round(rng.uniform(0.01, 30), 2), 'ask': round(rng.uniform(0.01, 30), 2),
+                           'midpoint': rng.choice([None, 1.1]), 'bid_size': 10, 'ask_size': 12},
+            'last_trade': {'price': rng.choice([None, 2.5]), 'sip_timestamp': 1736000000000000000 + i},
+            'greeks': {'delta': 0.5, 'gamma': 0.01, 'theta': -0.1, 'vega': 0.2},
+            'implied_volatility': 0.3,
+            'underlying_asset': {'price': 500.0},
+        }
+        chain.append(contract)
+    return chain
+
+
+def convert_ts(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        v = int(value)
+        seconds = v / 1e9 if v > 1e18 else v / 1e6 if v > 1e15 else v / 1e3 if v > 1e12 else v
+        return datetime.fromtimestamp(seconds)
+    return None
+
+
+def same(a, b) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        try:
+            return math.isclose(float(a), float(b), rel_tol=1e-12, abs_tol=1e-12)
+        except (TypeError, ValueError):
+            return False
+    return a == b
+
+
+def compare(chain: list, baseline: dict, min_premium: float, min_volume_delta: int) -> list:
+    legacy, _ = detect_flows_legacy(chain, baseline, 'X', min_premium, min_volume_delta, convert_ts)
+    columns = ChainColumns(chain)
+    vectorized, _ = detect_flows_columnar(
+        columns, columns.baseline_from_mapping(baseline), 'X', min_premium, min_volume_delta, convert_ts
+    )
+
+    problems = []
+    if len(legacy) != len(vectorized):
+        problems.append(f"flow count differs: legacy={len(legacy)} vectorized={len(vectorized)}")
+    for old, new in zip(legacy, vectorized):
+        for key in old:
+            if key in IGNORED_FIELDS:
+                continue
+            if not same(old[key], new.get(key)):
+                problems.append(f"{old['ticker']}.{key}: legacy={old[key]!r} vectorized={new.get(key)!r}")
+    if volume_map(chain) != columns.volume_map():
+        problems.append("volume baseline maps differ")
+
+    # The columnar baseline store must line up with the dict lookup
+    store = VolumeBaselineStore(snapshot_path=None)
+    store.update_from_mapping('X', baseline)
+    if not np.array_equal(store.baseline_for('X', columns.tickers), columns.baseline_from_mapping(baseline)):
+        problems.append("baseline store alignment differs from dict lookup")
+    store.update('X', columns.tickers, columns.volume)
+    if store.get_volumes('X') != volume_map(chain):
+        problems.append("baseline store contents differ from volume map")
+    return problems
+
+
+def check_new_contracts() -> list:
+    """A chain that gains a contract between scans must store it (regression)"""
+    store = VolumeBaselineStore(snapshot_path=None)
+    store.update('A', ['O:A1', 'O:A2'], [100, 200])
+    chain = ['O:A1', 'O:A2', 'O:A3']
+    baseline = store.baseline_for('A', chain)
+    problems = []
+    if baseline.tolist() != [100, 200, 0]:
+        problems.append(f"baseline before rescan: {baseline.tolist()}")
+    store.update('A', chain, [110, 210, 500])
+    if store.get_volumes('A') != {'O:A1': 110, 'O:A2': 210, 'O:A3': 500}:
+        problems.append(f"new contract not stored: {store.get_volumes('A')}")
+    if store.baseline_for('A', chain).tolist() != [110, 210, 500]:
+        problems.append(f"baseline after rescan: {store.baseline_for('A', chain).tolist()}")
+    return problems
+
+
+def bench(chain: list, baseline: dict, rounds: int, min_premium: float, min_volume_delta: int):
+    """
+    Per-scan cost of each DataFetcher.detect_unusual_flow path, baseline
+    store included: (legacy ms, vectorized ms, of which ChainColumns ms)
+    """
+    # The columnar store is seeded through update() with the same chain
+    # order, as it is between two live scans (alignment is then a gather)
+    aligned = ChainColumns(chain)
+    aligned = (aligned.tickers, aligned.baseline_from_mapping(baseline))
+    legacy_s = vector_s = columns_s = 0.0
+    for _ in range(rounds):
+        legacy_store = VolumeBaselineStore(snapshot_path=None)
+        vector_store = VolumeBaselineStore(snapshot_path=None)
+        if baseline:
+            legacy_store.update_from_mapping('X', baseline)
+            vector_store.update('X', *aligned)
+        start = time.perf_counter()
+        detect_flows_legacy(chain, legacy_store.get_volumes('X'), 'X', min_premium, min_volume_delta, convert_ts)
+        legacy_store.update_from_mapping('X', volume_map(chain))
+        legacy_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        columns = ChainColumns(chain)
+        columns_s += time.perf_counter() - start
+        detect_flows_columnar(columns, vector_store.baseline_for('X', columns.tickers), 'X',
+                              min_premium, min_volume_delta, convert_ts)
+        vector_store.update('X', columns.tickers, columns.volume)
+        vector_s += time.perf_counter() - start
+    return legacy_s / rounds * 1000, vector_s / rounds * 1000, columns_s / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('chains', nargs='*', help='Recorded chain snapshot JSON files')
+    parser.add_argument('--baseline', help='Earlier recording of the same chain (volume baseline)')
+    parser.add_argument('--synthetic', type=int, default=0, help='Also check a synthetic chain of N contracts')
+    parser.add_argument('--min-premium', type=float, default=10000)
+    parser.add_argument('--min-volume-delta', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=10, help='Timing rounds per chain')
+    parser.add_argument('--baseline-fraction', type=float, default=0.97,
+                        help='Synthetic baseline = this fraction of current volume (a scan a few minutes earlier)')
+    args = parser.parse_args()
+
+    cases = [(path, load_chain(path)) for path in args.chains]
+    if args.synthetic:
+        cases.append((f"synthetic[{args.synthetic}]", synthetic_chain(args.synthetic)))
+    if not cases:
+        parser.error("give recorded chain files and/or --synthetic N")
+
+    recorded_baseline = volume_map(load_chain(args.baseline)) if args.baseline else None
+
+    problems = check_new_contracts()
+    print(f"baseline store, contract added between scans: {'OK' if not problems else 'FAILED'}")
+    for problem in problems:
+        print(f"   {problem}")
+    failed = bool(problems)
+    for name, chain in cases:
+        baselines = {'first scan': {}}
+        if recorded_baseline is not None:
+            baselines['recorded baseline'] = recorded_baseline
+        else:
+            # Pretend the previous scan saw most of today's volume already
+            baselines['synthetic baseline'] = {
+                t: int(v * args.baseline_fraction) for t, v in volume_map(chain).items()
+            }
+
+        for label, baseline in baselines.items():
+            problems = compare(chain, baseline, args.min_premium, args.min_volume_delta)
+            legacy_ms, vector_ms, columns_ms = bench(chain, baseline, args.rounds, args.min_premium,
+                                                     args.min_volume_delta)
+            status = "OK" if not problems else f"{len(problems)} MISMATCHES"
+            print(f"{name} ({len(chain)} contracts, {label}): {status} | "
+                  f"legacy {legacy_ms:.2f}ms vs vectorized {vector_ms:.2f}ms ({legacy_ms / vector_ms:.2f}x, "
+                  f"{columns_ms:.2f}ms building ChainColumns)")
+            for problem in problems[:20]:
+                print(f"   {problem}")
+            failed = failed or bool(problems)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -19,6 +19,8 @@ from src.data_fetcher import DataFetcher
 from src.options_analyzer import OptionsAnalyzer
 from src.config import Config
 from src.watchlist_manager import SmartWatchlistManager
+from src.core.dispatch import DispatchGraph
+from src.core.refresh_coalescer import RefreshCoalescer
 from src.bots import BullseyeBot, SweepsBot, GoldenSweepsBot, SpreadBot, GammaRatioBot, RollingThunderBot, WallsBot, LottoBot
 
 logger = logging.getLogger(__name__)
@@ -92,10 +94,24 @@ class BotManager:
         self.state_bots: List[Any] = []  # League B: Scheduled pollers
         self.stream_filter_bots: List[Any] = []  # Stream filters: process ALL events
         
+        # Kafka fan-out: every event consumer is registered here once
+        self.dispatch_graph = DispatchGraph(
+            default_concurrency=getattr(Config, 'KAFKA_CONSUMER_CONCURRENCY', 8)
+        )
+        self.dispatch_graph.set_gate(self.prepare_event)
+        
+        # Out-of-cycle Gamma refreshes: one per symbol at a time, rate limited,
+        # and skipped when the regular scan already covered the trigger
+        self.gamma_refresh = RefreshCoalescer(
+            'gamma_bridge',
+            self._run_gamma_update,
+            min_interval=getattr(Config, 'GAMMA_TRIGGER_MIN_INTERVAL', 60),
+            max_concurrency=getattr(Config, 'GAMMA_TRIGGER_CONCURRENCY', 4),
+            last_refreshed=self._gamma_last_scan,
+        )
+        
         # Event processing stats
         self.events_processed = 0
-        self.events_dispatched = 0
-        self.events_alerted = 0
         self._premium_bucket_counts: Dict[str, int] = {}
         self._last_premium_bucket_log_ts: float = 0.0
 
@@ -256,6 +272,7 @@ class BotManager:
             return
 
         logger.info(f"Starting {len(event_bots)} event-driven bots (Kafka mode)...")
+        self._register_event_consumers(event_bots)
 
         for bot in event_bots:
             try:
@@ -267,6 +284,28 @@ class BotManager:
             except Exception as e:
                 logger.error(f"Failed to start Kafka event bot {getattr(bot, 'name', str(bot))}: {e}")
 
+    def _register_event_consumers(self, event_bots: List[Any]) -> None:
+        """Add each event bot to the dispatch graph once (idempotent across reconnects)"""
+        for bot in event_bots:
+            if not hasattr(bot, 'process_event'):
+                logger.debug(f"{bot.name} has no process_event method, skipping")
+                continue
+            if self.dispatch_graph.has_consumer(bot.name):
+                continue
+            # Stream filters see every event, ahead of the index blocklist (as before the graph)
+            self.dispatch_graph.add_consumer(
+                bot.name, bot.process_event, enabled=lambda bot=bot: bot.running,
+                gated=bot not in self.stream_filter_bots
+            )
+
+    @property
+    def events_dispatched(self) -> int:
+        return self.dispatch_graph.dispatched
+
+    @property
+    def events_alerted(self) -> int:
+        return self.dispatch_graph.alerts
+
     async def start_all(self):
         """Start all bots with dynamic watchlist"""
         if self.running:
@@ -363,9 +402,18 @@ class BotManager:
         # Stop all bots
         for bot in self.bots:
             await bot.stop()
+        await self.gamma_refresh.stop()
 
         logger.info("All bots stopped")
 
+    async def get_bots_health(self) -> Dict[str, Dict]:
+        """BaseAutoBot.get_health() for every bot, keyed by bot name"""
+        reports = await asyncio.gather(*(bot.get_health() for bot in self.bots), return_exceptions=True)
+        return {
+            bot.name: report if not isinstance(report, Exception) else {'error': str(report)}
+            for bot, report in zip(self.bots, reports)
+        }
+
     def get_bot_status(self) -> dict:
         """Get status of all bots"""
         status = {
@@ -440,9 +488,10 @@ class BotManager:
         """
         Process a single enriched trade event from Kafka.
         
-        Dispatches the event to all League A (Flow) bots that have a
-        process_event() method. Each bot applies its own filters and
-        may or may not generate an alert.
+        Runs the event through the dispatch graph: ingest folds, then
+        prepare_event() (normalization + global rules), then every
+        registered consumer (flow bots, stream filters, UOA) exactly once.
+        Each bot applies its own filters and may or may not generate an alert.
         
         Args:
             enriched_trade: Trade data enriched with Greeks, OI, etc.
@@ -450,8 +499,14 @@ class BotManager:
         Returns:
             List of alert payloads generated by bots
         """
+        return await self.dispatch_graph.dispatch(enriched_trade)
+    
+    def prepare_event(self, enriched_trade: Dict) -> bool:
+        """
+        Dispatch gate: normalize the event schema in place and apply global
+        rules. Returns False when no bot may see the event.
+        """
         self.events_processed += 1
-        alerts = []
 
         # Normalize event schema so bots can share assumptions across Kafka/REST paths.
         # Kafka-enriched events use `symbol` + `underlying_price`; some bots expect `ticker` + `current_price`.
@@ -574,7 +629,7 @@ class BotManager:
                     or (underlying_upper.replace("I:", "") in blocked)
                     or any(contract_ticker.startswith(f"O:{root}") for root in blocked if root)
                 ):
-                    return []
+                    return False
             except Exception:
                 # If something weird happens, don't kill the whole pipeline.
                 pass
@@ -610,58 +665,10 @@ class BotManager:
             self._last_premium_bucket_log_ts = now_ts
         
         logger.debug(
-            f"Processing event: {symbol} premium=${premium:,.0f} "
-            f"dispatching to {len(self.flow_bots)} flow bots"
+            "Processing event: %s premium=$%.0f dispatching to %d consumers",
+            symbol, premium_val, len(self.dispatch_graph.consumer_names)
         )
-        
-        # TEMPORARY: Info log to confirm dispatch is working
-        # This will show up in your logs even if no alert is generated
-        # if premium > 50000:
-        #     logger.info(f"🔎 Dispatching {symbol} trade (${premium:,.0f}) to {len(self.flow_bots)} bots...")
-        
-        # Dispatch to all flow bots (watchlist-style bots)
-        for bot in self.flow_bots:
-            if not bot.running:
-                continue
-            
-            # Check if bot has process_event method
-            if not hasattr(bot, 'process_event'):
-                logger.debug(f"{bot.name} has no process_event method, skipping")
-                continue
-            
-            try:
-                self.events_dispatched += 1
-                result = await bot.process_event(enriched_trade)
-                
-                if result:
-                    alerts.append(result)
-                    self.events_alerted += 1
-                    logger.info(f"Alert generated by {bot.name} for {symbol}")
-                    
-            except Exception as e:
-                logger.error(f"Error dispatching to {bot.name}: {e}")
-
-        # Dispatch to stream filter bots (process ALL events, no watchlist restriction)
-        for bot in self.stream_filter_bots:
-            if not bot.running:
-                continue
-
-            if not hasattr(bot, 'process_event'):
-                logger.debug(f"{bot.name} has no process_event method, skipping")
-                continue
-
-            try:
-                self.events_dispatched += 1
-                result = await bot.process_event(enriched_trade)
-
-                if result:
-                    alerts.append(result)
-                    self.events_alerted += 1
-                    logger.info(f"Alert generated by {bot.name} for {symbol}")
-            except Exception as e:
-                logger.error(f"Error dispatching to {bot.name}: {e}")
-        
-        return alerts
+        return True
     
     async def start_state_bots(self):
         """
@@ -741,27 +748,39 @@ class BotManager:
         except Exception as e:
             logger.error(f"Flow bot (REST) error: {e}")
     
-    async def trigger_gamma_update(self, symbol: str):
+    def trigger_gamma_update(self, symbol: str) -> Optional[str]:
         """
         Trigger an out-of-cycle Gamma Bot update for a specific symbol.
         
         Called by Flow bots when they detect massive flow that warrants
-        an immediate GEX recalculation (the "Bridge" pattern).
+        an immediate GEX recalculation (the "Bridge" pattern). Triggers are
+        coalesced per symbol: a burst of prints yields one refresh now and at
+        most one trailing refresh after GAMMA_TRIGGER_MIN_INTERVAL.
         
         Args:
             symbol: Ticker to update (e.g., "NVDA")
-        """
-        if not self.gamma_ratio_bot:
-            return
         
-        if not hasattr(self.gamma_ratio_bot, '_scan_symbol'):
-            return
+        Returns:
+            'started', 'deferred' or 'coalesced', or None if there is no Gamma Bot
+        """
+        gamma_bot = getattr(self, 'gamma_ratio_bot', None)
+        if not gamma_bot or not hasattr(gamma_bot, '_scan_symbol'):
+            return None
         
-        try:
-            logger.info(f"Triggering out-of-cycle Gamma update for {symbol}")
-            await self.gamma_ratio_bot._scan_symbol(symbol)
-        except Exception as e:
-            logger.error(f"Error in triggered Gamma update for {symbol}: {e}")
+        outcome = self.gamma_refresh.trigger(symbol)
+        logger.debug("Gamma update trigger for %s: %s", symbol, outcome)
+        return outcome
+    
+    async def _run_gamma_update(self, symbol: str):
+        """Coalesced refresh: rescan the G ratio (one chain fetch; GEX context keeps its own schedule)"""
+        logger.info(f"Triggering out-of-cycle Gamma update for {symbol}")
+        await self.gamma_ratio_bot._scan_symbol(symbol)
+    
+    def _gamma_last_scan(self, symbol: str) -> Optional[float]:
+        gamma_bot = getattr(self, 'gamma_ratio_bot', None)
+        if gamma_bot and hasattr(gamma_bot, 'last_scan_started'):
+            return gamma_bot.last_scan_started(symbol)
+        return None
     
     def get_flow_bot_names(self) -> List[str]:
         """Get names of all flow bots"""
@@ -785,5 +804,7 @@ class BotManager:
             'events_processed': self.events_processed,
             'events_dispatched': self.events_dispatched,
             'events_alerted': self.events_alerted,
-            'alert_rate': self.events_alerted / max(1, self.events_processed)
+            'alert_rate': self.events_alerted / max(1, self.events_processed),
+            'dispatch': self.dispatch_graph.get_stats(),
+            'gamma_triggers': self.gamma_refresh.get_stats()
         }
@@ -1,7 +1,6 @@
 """Base class for auto-posting bots"""
 import asyncio
 import aiohttp
-import json
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Any, List
@@ -16,9 +15,13 @@ import math
 
 from src.config import Config
 from src.utils.exceptions import BotException, BotNotRunningException, WebhookException
-from src.utils.resilience import exponential_backoff_retry, BoundedDeque
+from src.utils.resilience import BoundedDeque
 from src.utils.validation import DataValidator
 from src.utils.market_hours import MarketHours
+from src.utils.scan_queue import scan_queue_for
+from src.utils.scan_scheduler import scan_scheduler
+from src.utils.tracing import mark
+from src.utils.webhook_delivery import webhook_delivery
 
 logger = logging.getLogger(__name__)
 
@@ -79,18 +82,12 @@ class BaseAutoBot(ABC):
         self._filter_last_report_ts: float = time.time()
         self.concurrency_limit = getattr(Config, 'MAX_CONCURRENT_REQUESTS', 10)
         self.symbol_scan_timeout = getattr(Config, 'SYMBOL_SCAN_TIMEOUT', 20)
+        self.scan_queue = scan_queue_for(name)
         self._state_lock = threading.Lock()
         self._state_db: Optional[sqlite3.Connection] = None
         self._state_db_path: Optional[Path] = None
         self._low_performers: set[str] = set()
 
-        # Webhook posting can be very bursty in Kafka/event-driven mode. Use a per-bot
-        # lock + pacing to avoid Discord 429 storms and to prevent concurrent POSTs.
-        self._webhook_post_lock: Optional[asyncio.Lock] = None
-        self._last_webhook_post_ts: float = 0.0
-        self._webhook_min_interval_seconds: float = float(
-            getattr(Config, "DISCORD_WEBHOOK_MIN_INTERVAL_SECONDS", 0.25)
-        )
         
         # ORAKL v3.0 Brain modules
         self.hedge_hunter = hedge_hunter
@@ -421,6 +418,7 @@ class BaseAutoBot(ABC):
                     sentiment=sentiment,
                     premium=premium
                 )
+                mark('hedge_check')
                 
                 if is_hedged:
                     logger.info(f"🚫 {self.name} Filtered Synthetic {symbol}: {reason}")
@@ -448,6 +446,8 @@ class BaseAutoBot(ABC):
                 metadata["G"] = context.get('G', 0.5)
                 metadata["call_wall"] = context.get('call_wall', 0)
                 metadata["put_wall"] = context.get('put_wall', 0)
+                metadata["context_age"] = context.get('age_seconds')
+                metadata["context_stale"] = context.get('stale', True)
                 metadata["brain_validated"] = True
             except Exception as e:
                 logger.warning(f"[{self.name}] ContextManager check failed for {symbol}: {e}")
@@ -530,6 +530,7 @@ class BaseAutoBot(ABC):
     async def _scan_loop(self):
         """Main scanning loop with error recovery"""
         recovery_attempts = 0
+        await scan_scheduler.wait_phase(self.name, self.scan_interval)
         while True:  # Keep running even if self.running becomes False
             try:
                 # Check if we need to restart
@@ -556,10 +557,10 @@ class BaseAutoBot(ABC):
                     await asyncio.sleep(sleep_time)
                     continue
 
-                scan_start = time.time()
-                
-                # Perform scan
-                await self._perform_scan()
+                # Perform scan (admitted against the shared Polygon budget, requests billed to this bot)
+                async with scan_scheduler.scan(self.name, self.scan_interval):
+                    scan_start = time.time()
+                    await self._perform_scan()
                 
                 # Record metrics
                 scan_duration = time.time() - scan_start
@@ -571,8 +572,8 @@ class BaseAutoBot(ABC):
                 self._consecutive_errors = 0
                 recovery_attempts = 0
                 
-                # Wait for next scan
-                await asyncio.sleep(self.scan_interval)
+                # Wait for next scan (adapted to rate-limit headroom and market activity)
+                await asyncio.sleep(scan_scheduler.next_interval(self.name))
                 
             except Exception as e:
                 await self._handle_scan_error(e)
@@ -666,54 +667,12 @@ class BaseAutoBot(ABC):
         if not hasattr(self, '_scan_symbol'):
             raise NotImplementedError("Either implement scan_and_post or _scan_symbol")
 
-        full_watchlist = getattr(self, 'watchlist', [])
-        batch_watchlist = full_watchlist
-        batch_limit = getattr(self, 'scan_batch_size', 0)
-        if batch_limit and len(full_watchlist) > batch_limit:
-            batches = (len(full_watchlist) + batch_limit - 1) // batch_limit
-            batch_index = self.metrics.scan_count % batches
-            start = batch_index * batch_limit
-            batch_watchlist = full_watchlist[start:start + batch_limit]
-            logger.info(
-                "%s starting concurrent scan batch %d/%d: %d of %d symbols (max %d concurrent)",
-                self.name,
-                batch_index + 1,
-                batches,
-                len(batch_watchlist),
-                len(full_watchlist),
-                self.concurrency_limit,
-            )
-        else:
-            logger.info(
-                "%s starting concurrent scan of %d symbols (max %d concurrent)",
-                self.name,
-                len(batch_watchlist),
-                self.concurrency_limit,
-            )
-
-        watchlist = batch_watchlist
-        total_symbols = len(watchlist)
-
-        if total_symbols == 0:
+        if not getattr(self, 'watchlist', []):
             logger.debug(f"{self.name} watchlist empty, skipping scan")
             return
 
-        semaphore = asyncio.Semaphore(max(1, self.concurrency_limit))
         all_signals: List[Dict] = []
-
-        async def run_symbol(symbol: str):
-            async with semaphore:
-                return await self._scan_symbol_safe(symbol)
-
-        results = []
-        batch_size = max(1, self.concurrency_limit)
-        for offset in range(0, total_symbols, batch_size):
-            batch = watchlist[offset:offset + batch_size]
-            batch_results = await asyncio.gather(
-                *(run_symbol(symbol) for symbol in batch),
-                return_exceptions=True
-            )
-            results.extend(batch_results)
+        results = await self._scan_watchlist(self._scan_symbol_safe)
 
         for result in results:
             if isinstance(result, list):
@@ -728,6 +687,42 @@ class BaseAutoBot(ABC):
             except Exception as e:
                 logger.error(f"{self.name} error posting signal: {e}")
     
+    def _symbols_per_cycle(self, total: int) -> int:
+        """Symbols to scan this cycle: scan_batch_size, else SCAN_WATCHLIST_FRACTION of the watchlist"""
+        batch_limit = getattr(self, 'scan_batch_size', 0)
+        if batch_limit:
+            return min(batch_limit, total)
+        fraction = getattr(Config, 'SCAN_WATCHLIST_FRACTION', 1.0)
+        return total if fraction >= 1.0 else max(1, math.ceil(total * fraction))
+
+    async def _scan_watchlist(self, scan, symbols: Optional[List[str]] = None) -> List[Any]:
+        """
+        Scan the watchlist highest priority first, keeping concurrency_limit
+        symbol scans in flight (see utils.scan_queue).
+
+        Args:
+            scan: Coroutine function scanning one symbol
+            symbols: Candidates (defaults to the watchlist)
+
+        Returns:
+            Per-symbol results in completion order, exceptions included
+        """
+        symbols = getattr(self, 'watchlist', []) if symbols is None else symbols
+        limit = self._symbols_per_cycle(len(symbols))
+        if limit < len(symbols):
+            logger.info(
+                "%s scanning top %d of %d symbols by priority (max %d concurrent)",
+                self.name, limit, len(symbols), self.concurrency_limit,
+            )
+        else:
+            logger.info(
+                "%s starting concurrent scan of %d symbols (max %d concurrent)",
+                self.name, len(symbols), self.concurrency_limit,
+            )
+        return await self.scan_queue.run(
+            symbols, scan, self.concurrency_limit, limit=limit, cycle=self.scan_interval
+        )
+
     async def _scan_symbol_safe(self, symbol: str):
         """Safely scan a symbol with error handling"""
         try:
@@ -742,25 +737,20 @@ class BaseAutoBot(ABC):
             logger.error(f"{self.name} error scanning {symbol}: {e}")
             return []
 
-    @exponential_backoff_retry(
-        max_retries=3,
-        base_delay=1.0,
-        exceptions=(aiohttp.ClientError, asyncio.TimeoutError)
-    )
     async def post_to_discord(self, embed: Dict) -> bool:
         """
-        Post embed to Discord webhook with retry logic
+        Queue an embed for this bot's webhook (see utils.webhook_delivery).
+
+        Pacing, Discord rate limits, batching and retries happen in the
+        delivery service, so this never waits on Discord; the outcome is
+        counted in the bot metrics by _record_delivery.
 
         Args:
             embed: Discord embed dictionary
             
         Returns:
-            True if successful, False otherwise
+            True if the embed was queued, False if it was rejected
         """
-        if not self.session:
-            logger.error("Session not initialized")
-            return False
-
         try:
             # Validate embed structure
             if not isinstance(embed, dict) or 'title' not in embed:
@@ -800,72 +790,30 @@ class BaseAutoBot(ABC):
                             self.name,
                         )
 
-            payload = {
-                "embeds": [embed],
-                "username": f"ORAKL {self.name}"
-            }
-
-            # Lazily create lock (safe in both scan + event-driven modes).
-            if self._webhook_post_lock is None:
-                self._webhook_post_lock = asyncio.Lock()
-
-            # Single-file posts per bot + pacing prevents 429 storms when many events trigger at once.
-            async with self._webhook_post_lock:
-                max_attempts = 5
-                for attempt in range(1, max_attempts + 1):
-                    # Enforce a minimum spacing between posts to this webhook.
-                    now = time.monotonic()
-                    sleep_for = (self._last_webhook_post_ts + self._webhook_min_interval_seconds) - now
-                    if sleep_for > 0:
-                        await asyncio.sleep(sleep_for)
-
-                    async with self.session.post(self.webhook_url, json=payload) as response:
-                        if response.status == 204:
-                            self._last_webhook_post_ts = time.monotonic()
-                            logger.debug(f"{self.name} posted successfully")
-                            self.metrics.webhook_success_count += 1
-                            self.metrics.last_signal_time = datetime.now()
-                            self.metrics.signal_count += 1
-                            return True
-
-                        error_text = await response.text()
-                        logger.error(f"{self.name} webhook error {response.status}: {error_text}")
-                        self.metrics.webhook_failure_count += 1
-
-                        if response.status == 429:  # Rate limited
-                            # Discord returns fractional seconds in either header or body
-                            retry_after_header = response.headers.get('X-RateLimit-Reset-After')
-                            retry_after = None
-                            if retry_after_header:
-                                try:
-                                    retry_after = float(retry_after_header)
-                                except ValueError:
-                                    retry_after = None
-                            if retry_after is None:
-                                try:
-                                    error_json = json.loads(error_text)
-                                    retry_after = float(error_json.get('retry_after', 1.0))
-                                except (ValueError, TypeError, json.JSONDecodeError):
-                                    retry_after = 1.0
-                            retry_after = max(retry_after, 0.1)
-                            logger.warning(
-                                "%s rate limited by Discord; sleeping for %.2fs before retry (attempt %d/%d)",
-                                self.name,
-                                retry_after,
-                                attempt,
-                                max_attempts,
-                            )
-                            await asyncio.sleep(retry_after + 0.10)  # small safety buffer
-                            continue
-
-                        return False
-
-                return False
+            mark('evaluated')
+            queued = webhook_delivery.enqueue(
+                self.webhook_url, embed, f"ORAKL {self.name}",
+                name=self.name, on_result=self._record_delivery,
+            )
+            mark('queued')
+            if not queued:
+                logger.error(f"{self.name} webhook delivery unavailable; alert not queued")
+            return queued
         except Exception as e:
             logger.error(f"{self.name} post error: {e}")
             self.metrics.webhook_failure_count += 1
             return False
 
+    def _record_delivery(self, delivered: bool):
+        """Delivery outcome from the webhook queue"""
+        if delivered:
+            logger.debug(f"{self.name} posted successfully")
+            self.metrics.webhook_success_count += 1
+            self.metrics.last_signal_time = datetime.now()
+            self.metrics.signal_count += 1
+        else:
+            self.metrics.webhook_failure_count += 1
+
     def _sanitize_value(self, value, placeholder: str = "--") -> str:
         """Sanitize value for Discord embed"""
         if value is None:
@@ -1111,7 +1059,7 @@ class BaseAutoBot(ABC):
         # 3. Either has successful webhooks OR hasn't needed to send any yet
         # Use max(scan_interval * 3, 180) for tolerance - ensures at least 3 min grace
         # This prevents false "unhealthy" states for high-frequency bots (e.g., 60s interval)
-        health_tolerance = max(self.scan_interval * 3, 180)
+        health_tolerance = max(scan_scheduler.current_interval(self.name, self.scan_interval) * 3, 180)
         scan_healthy = time_since_last_scan < health_tolerance
         error_healthy = self._consecutive_errors < 5
 
@@ -1163,7 +1111,8 @@ class BaseAutoBot(ABC):
             ),
             'last_scan_time': self.metrics.last_scan_time.isoformat() if self.metrics.last_scan_time else None,
             'last_signal_time': self.metrics.last_signal_time.isoformat() if self.metrics.last_signal_time else None,
-            'last_error_time': self.metrics.last_error_time.isoformat() if self.metrics.last_error_time else None
+            'last_error_time': self.metrics.last_error_time.isoformat() if self.metrics.last_error_time else None,
+            'scan_queue': self.scan_queue.get_stats()
         }
     
     def get_status(self) -> str:
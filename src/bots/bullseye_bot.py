@@ -903,15 +903,8 @@ class BullseyeBot(BaseAutoBot):
         all_candidates: List[Dict[str, Any]] = []
         max_alerts = 10  # Limit alerts per cycle
         
-        # Full scan - all symbols at once with concurrency control
-        semaphore = asyncio.Semaphore(self.concurrency_limit)
-        
-        async def scan_with_limit(symbol: str):
-            async with semaphore:
-                return await self._fast_scan_symbol(symbol)
-        
-        tasks = [scan_with_limit(symbol) for symbol in self.watchlist]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Full scan - highest priority symbols first, concurrency_limit in flight
+        results = await self._scan_watchlist(self._fast_scan_symbol)
         
         for result in results:
             if isinstance(result, list):
@@ -949,9 +942,6 @@ class BullseyeBot(BaseAutoBot):
                 if success:
                     posted_symbols.add(symbol)
                     alerts_posted += 1
-                    # Add delay between posts to avoid Discord rate limits
-                    if alerts_posted < max_alerts:
-                        await asyncio.sleep(1.5)
                     if alerts_posted >= max_alerts:
                         break
             except Exception as e:
@@ -1,4 +1,5 @@
 import logging
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
@@ -15,11 +16,13 @@ from src.utils.gamma_ratio import (
     get_regime_emoji,
     GAMMA_THRESHOLDS,
 )
-from src.utils.plotly_charts import ProfessionalCharts
+from src.utils.chart_renderer import chart_renderer
 from src.utils.enhanced_analysis import EnhancedAnalyzer
+from src.utils.logging_setup import hot_path_logger
 
 
 logger = logging.getLogger(__name__)
+hot_logger = hot_path_logger(__name__)  # Per-symbol scan diagnostics (rate limited)
 
 
 class GammaAlertManager:
@@ -69,9 +72,6 @@ class GammaAlertManager:
         # Get previous state for this symbol
         prev_G = self.last_G.get(symbol, 0.5)
         last_alerted = self.last_alerted_G.get(symbol)
-        # #region agent log
-        import logging; logging.getLogger(__name__).info(f"[DEBUG_ALERT] {symbol} | AlertMgr_State | G={G:.4f} | Prev_G={prev_G:.4f} | Last_Alerted={last_alerted if last_alerted else 'None'} | Extreme_Call_Thresh={self.ULTRA_EXTREME_CALL} | Extreme_Put_Thresh={self.ULTRA_EXTREME_PUT}")
-        # #endregion
         
         # Determine current regime
         current_regime, priority = classify_gamma_regime(G)
@@ -232,23 +232,22 @@ class GammaRatioBot(BaseAutoBot):
         self.scan_batch_size = 0  # 0 = no batching, scan full watchlist
         self.concurrency_limit = 30  # High concurrency for speed
         
+        # Monotonic start of each symbol's last scan (scheduled or triggered)
+        self._scan_started: Dict[str, float] = {}
+        
         logger.info(
             f"{self.name} initialized with {len(watchlist)} symbols, "
             f"interval={scan_interval}s, vol={self.constant_vol}"
         )
-        # #region agent log
-        logger.info(f"[DEBUG_SCAN] >>> {self.name} webhook_url={webhook_url[:50]}... | thresholds={self.thresholds}")
-        # #endregion
     
     @timed()
     async def scan_and_post(self):
         """Scan all watchlist symbols for gamma ratio changes."""
-        logger.info(f"[DEBUG_SCAN] >>> {self.name} scan_and_post() CALLED - watchlist={len(self.watchlist)} symbols")
         logger.info(f"{self.name} starting gamma ratio scan")
         
         # Only scan during market hours
         if not MarketHours.is_market_open(include_extended=False):
-            logger.info(f"[DEBUG_SCAN] >>> {self.name} SKIPPED - Market closed")
+            logger.debug(f"{self.name} skipped - market closed")
             return
         
         # Skip first 15 minutes after open to avoid opening noise
@@ -260,10 +259,9 @@ class GammaRatioBot(BaseAutoBot):
         market_open_time = now_et.replace(hour=9, minute=45, second=0, microsecond=0)
         
         if now_et < market_open_time:
-            logger.info(f"[DEBUG_SCAN] >>> {self.name} SKIPPED - Before 9:45 AM ET ({now_et.strftime('%H:%M:%S')})")
+            logger.debug(f"{self.name} skipped - before 9:45 AM ET ({now_et.strftime('%H:%M:%S')})")
             return
         
-        logger.info(f"[DEBUG_SCAN] >>> {self.name} PROCEEDING with scan at {now_et.strftime('%H:%M:%S')} ET")
         # Use base class concurrent implementation
         await super().scan_and_post()
     
@@ -273,9 +271,7 @@ class GammaRatioBot(BaseAutoBot):
         
         Returns list of alert signals to post.
         """
-        # #region agent log - ENTRY POINT
-        logger.info(f"[DEBUG_SCAN] >>> ENTERING _scan_symbol for {symbol}")
-        # #endregion
+        self._scan_started[symbol] = time.monotonic()
         try:
             # Get options chain snapshot - OPTIMIZED for gamma calculation:
             # 1. Limit contracts (default 750, ~3 pages) - enough for accurate G ratio
@@ -290,9 +286,6 @@ class GammaRatioBot(BaseAutoBot):
                 max_contracts=max_contracts,
                 expiration_date_lte=expiry_cutoff
             )
-            # #region agent log
-            logger.info(f"[DEBUG_SCAN] {symbol} | Contracts_Fetched={len(contracts) if contracts else 0} | Has_Data={bool(contracts)}")
-            # #endregion
             if not contracts:
                 logger.debug(f"{self.name} - No options data for {symbol}")
                 return []
@@ -318,9 +311,6 @@ class GammaRatioBot(BaseAutoBot):
             
             # Transform Polygon snapshot to standard format
             standardized = transform_polygon_snapshot(contracts)
-            # #region agent log
-            logger.info(f"[DEBUG_SCAN] {symbol} | Standardized={len(standardized) if standardized else 0} | Raw={len(contracts)}")
-            # #endregion
             
             if not standardized:
                 logger.debug(f"{self.name} - No valid contracts for {symbol}")
@@ -340,28 +330,19 @@ class GammaRatioBot(BaseAutoBot):
             call_gamma = gamma_data.get('call_gamma', 0)
             put_gamma = gamma_data.get('put_gamma', 0)
             total_gamma = call_gamma + put_gamma
-            # #region agent log
-            logger.info(f"[DEBUG_SCAN] {symbol} | G={G:.4f} | CallGamma={call_gamma:.0f} | PutGamma={put_gamma:.0f} | TotalGamma={total_gamma:.0f} | Contracts_Analyzed={gamma_data.get('contracts_analyzed',0)} | Bias={gamma_data.get('bias','')}")
-            # #endregion
             
             logger.debug(
-                f"{self.name} - {symbol}: G={G:.3f}, bias={gamma_data['bias']}, "
-                f"contracts={gamma_data['contracts_analyzed']}, total_gamma={total_gamma:.0f}"
+                "%s - %s: G=%.3f, bias=%s, contracts=%s, total_gamma=%.0f",
+                self.name, symbol, G, gamma_data['bias'], gamma_data['contracts_analyzed'], total_gamma
             )
             
             # Filter: Minimum total gamma (filter out illiquid/low-volume names)
-            # #region agent log
-            logger.info(f"[DEBUG_SCAN] {symbol} | Gamma_Filter_Check | TotalGamma={total_gamma:.0f} | Min_Required={self.min_total_gamma} | Will_Filter={total_gamma < self.min_total_gamma}")
-            # #endregion
             if total_gamma < self.min_total_gamma:
-                logger.info(f"[DEBUG_SCAN] {symbol} | **FILTERED** | Reason=Low_TotalGamma | {total_gamma:.0f} < {self.min_total_gamma}")
+                hot_logger.debug("%s filtered: total gamma %.0f < %s", symbol, total_gamma, self.min_total_gamma)
                 return []
             
             # Check for alerts
             alerts = self.alert_manager.check_alerts(symbol, G, gamma_data)
-            # #region agent log
-            logger.info(f"[DEBUG_SCAN] {symbol} | Alert_Check_Result | G={G:.4f} | Alert_Count={len(alerts)} | Has_Alerts={bool(alerts)}")
-            # #endregion
             
             # Log when we find alertable conditions
             if alerts:
@@ -416,7 +397,7 @@ class GammaRatioBot(BaseAutoBot):
                     return f"{val:.2f}"
 
             # Generate gamma chart
-            chart_image = ProfessionalCharts.create_gamma_chart(G, symbol, regime)
+            chart_image = await chart_renderer.render('gamma', symbol, G, symbol, regime)
             
             # Regime-specific styling
             if 'ULTRA_EXTREME_PUT' in regime:
@@ -544,6 +525,10 @@ class GammaRatioBot(BaseAutoBot):
             logger.error(f"{self.name} - Error posting alert: {e}")
             return False
     
+    def last_scan_started(self, symbol: str) -> Optional[float]:
+        """Monotonic time the symbol's last scan started, or None if never scanned"""
+        return self._scan_started.get(symbol)
+    
     def get_symbol_gamma(self, symbol: str) -> Optional[Dict]:
         """
         Get cached gamma state for a symbol.
@@ -3,7 +3,6 @@
 Independent scanning - each bot scans its own watchlist directly.
 Uses base class batching for efficient concurrent API calls.
 """
-import asyncio
 import logging
 from datetime import datetime
 from typing import List, Dict, Any, Optional
@@ -102,20 +101,16 @@ class GoldenSweepsBot(SweepsBot):
         all_sweeps = []
         max_alerts = 5  # Limit alerts per cycle to avoid Discord rate limits
         
-        semaphore = asyncio.Semaphore(self.concurrency_limit)
-        
-        async def scan_symbol_with_limit(symbol: str) -> List[Dict]:
-            async with semaphore:
-                try:
-                    sweeps = await self._scan_sweeps(symbol)
-                    # Filter to golden only ($1M+)
-                    return [s for s in sweeps if s.get('premium', 0) >= self.MIN_SWEEP_PREMIUM]
-                except Exception as e:
-                    logger.debug(f"{self.name} error scanning {symbol}: {e}")
-                    return []
+        async def scan_symbol(symbol: str) -> List[Dict]:
+            try:
+                sweeps = await self._scan_sweeps(symbol)
+                # Filter to golden only ($1M+)
+                return [s for s in sweeps if s.get('premium', 0) >= self.MIN_SWEEP_PREMIUM]
+            except Exception as e:
+                logger.debug(f"{self.name} error scanning {symbol}: {e}")
+                return []
         
-        tasks = [scan_symbol_with_limit(symbol) for symbol in self.watchlist]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await self._scan_watchlist(scan_symbol)
         
         for result in results:
             if isinstance(result, list):
@@ -155,9 +150,6 @@ class GoldenSweepsBot(SweepsBot):
                 success = await self._post_signal(sweep)
                 if success:
                     posted += 1
-                    # Add delay between posts to avoid Discord rate limits
-                    if posted < max_alerts:
-                        await asyncio.sleep(1.5)
             except Exception as e:
                 logger.error(f"{self.name} error posting signal: {e}")
         
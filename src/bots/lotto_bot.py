@@ -312,18 +312,14 @@ class LottoBot(BaseAutoBot):
         
         all_lottos: List[LottoCandidate] = []
         
-        semaphore = asyncio.Semaphore(self.concurrency_limit)
-        
         async def scan_symbol(symbol: str) -> List[LottoCandidate]:
-            async with semaphore:
-                try:
-                    return await self._find_lottos_for_symbol(symbol)
-                except Exception as e:
-                    logger.debug(f"{self.name} error scanning {symbol}: {e}")
-                    return []
+            try:
+                return await self._find_lottos_for_symbol(symbol)
+            except Exception as e:
+                logger.debug(f"{self.name} error scanning {symbol}: {e}")
+                return []
         
-        tasks = [scan_symbol(symbol) for symbol in self.watchlist]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await self._scan_watchlist(scan_symbol)
         
         for result in results:
             if isinstance(result, list):
@@ -19,7 +19,6 @@ Logic:
 5. If a BUY matches a SELL within 5 seconds, trigger "Rolling Thunder" alert
 """
 
-import asyncio
 import logging
 import time
 from datetime import datetime, timedelta, timezone
@@ -353,19 +352,15 @@ class RollingThunderBot(BaseAutoBot):
         
         rolls_found = 0
         
-        # Scan symbols concurrently
-        semaphore = asyncio.Semaphore(self.concurrency_limit)
-        
+        # Scan symbols concurrently, highest priority first
         async def scan_symbol(symbol: str) -> int:
-            async with semaphore:
-                try:
-                    return await self._detect_rolls_for_symbol(symbol)
-                except Exception as e:
-                    logger.debug(f"{self.name} error scanning {symbol}: {e}")
-                    return 0
+            try:
+                return await self._detect_rolls_for_symbol(symbol)
+            except Exception as e:
+                logger.debug(f"{self.name} error scanning {symbol}: {e}")
+                return 0
         
-        tasks = [scan_symbol(symbol) for symbol in self.watchlist]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await self._scan_watchlist(scan_symbol)
         
         for result in results:
             if isinstance(result, int):
@@ -622,9 +617,12 @@ class RollingThunderBot(BaseAutoBot):
                 regime = context.get('regime', 'NEUTRAL')
                 if regime != 'NEUTRAL':
                     gex_emoji = "🟢" if regime == "POSITIVE_GAMMA" else "🔴"
+                    gex_text = f"{gex_emoji} {regime.replace('_', ' ').title()}"
+                    if context.get('stale'):
+                        gex_text += f"\n⏱️ {context['age_seconds'] / 60:.0f}m old"
                     gex_field = {
                         "name": "GEX Regime",
-                        "value": f"{gex_emoji} {regime.replace('_', ' ').title()}",
+                        "value": gex_text,
                         "inline": True
                     }
             except:
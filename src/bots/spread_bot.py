@@ -316,14 +316,7 @@ class SpreadBot(BaseAutoBot):
         all_signals: List[Dict] = []
         max_alerts = self.max_alerts_per_scan  # Limit alerts per cycle (from config)
         
-        semaphore = asyncio.Semaphore(self.concurrency_limit)
-        
-        async def scan_with_limit(symbol: str):
-            async with semaphore:
-                return await self._scan_symbol(symbol)
-        
-        tasks = [scan_with_limit(symbol) for symbol in self.watchlist]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await self._scan_watchlist(self._scan_symbol)
         
         for result in results:
             if isinstance(result, list):
@@ -344,9 +337,6 @@ class SpreadBot(BaseAutoBot):
                 success = await self._post_signal(signal)
                 if success:
                     posted += 1
-                    # Add delay between posts to avoid Discord rate limits
-                    if posted < max_alerts:
-                        await asyncio.sleep(1.5)
             except Exception as e:
                 logger.error(f"{self.name} error posting signal: {e}")
         
@@ -3,7 +3,6 @@
 Independent scanning - each bot scans its own watchlist directly.
 Uses base class batching for efficient concurrent API calls.
 """
-import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
@@ -17,6 +16,7 @@ from src.utils.exceptions import DataException, handle_exception
 from src.utils.enhanced_analysis import EnhancedAnalyzer, SmartDeduplicator
 from src.utils.market_hours import MarketHours
 from src.utils.option_contract_format import format_option_contract_pretty
+from src.utils.options_parser import parse_expiration
 # Removed FlowCache - each bot scans independently now
 
 logger = logging.getLogger(__name__)
@@ -340,14 +340,7 @@ class SweepsBot(BaseAutoBot):
         all_sweeps = []
         max_alerts = self.max_alerts_per_scan  # Limit alerts per cycle (from config)
         
-        semaphore = asyncio.Semaphore(self.concurrency_limit)
-        
-        async def scan_with_limit(symbol: str):
-            async with semaphore:
-                return await self._scan_symbol(symbol)
-        
-        tasks = [scan_with_limit(symbol) for symbol in self.watchlist]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await self._scan_watchlist(self._scan_symbol)
         
         for result in results:
             if isinstance(result, list):
@@ -364,9 +357,6 @@ class SweepsBot(BaseAutoBot):
                 success = await self._post_signal(sweep)
                 if success:
                     posted += 1
-                    # Add delay between posts to avoid Discord rate limits
-                    if posted < max_alerts:
-                        await asyncio.sleep(1.5)
             except Exception as e:
                 logger.error(f"{self.name} error posting signal: {e}")
         
@@ -586,7 +576,9 @@ class SweepsBot(BaseAutoBot):
                     pass
 
                 # Calculate DTE
-                exp_date = datetime.strptime(expiration, '%Y-%m-%d')
+                exp_date = parse_expiration(expiration) if isinstance(expiration, str) else None
+                if exp_date is None:
+                    continue
                 days_to_expiry = (exp_date - datetime.now()).days
 
                 # Filter: Valid DTE range (1-90 days)
@@ -745,6 +737,8 @@ class SweepsBot(BaseAutoBot):
                     "net_gex": context.get('net_gex', 0),
                     "flip_level": context.get('flip_level', 0),
                     "G": context.get('G', 0.5),
+                    "context_age": context.get('age_seconds'),
+                    "context_stale": context.get('stale', True),
                     "brain_validated": True
                 }
             except Exception as e:
@@ -21,6 +21,8 @@ from collections import defaultdict
 
 from src.config import Config
 from src.uoa_detector import UnusualActivityDetector, UOASignal
+from src.utils.tracing import mark
+from src.utils.webhook_delivery import webhook_delivery
 from src.utils.option_contract_format import (
     format_option_contract_sentence,
 )
@@ -120,12 +122,11 @@ class UOABot:
             logger.debug(f"UOA suppressed for {signal.symbol} (cooldown/rate limit)")
             return None
         
-        # Post alert
+        # Post alert (queued; alerts_sent is counted on delivery)
         success = await self._post_alert(signal)
         
         if success:
             self._mark_alert(signal)
-            self.alerts_sent += 1
             return signal.to_dict()
         
         return None
@@ -184,10 +185,8 @@ class UOABot:
         self.global_alert_timestamps.append(now)
     
     async def _post_alert(self, signal: UOASignal) -> bool:
-        """Post UOA alert to Discord webhook."""
+        """Queue UOA alert for the Discord webhook (see utils.webhook_delivery)."""
         try:
-            import aiohttp
-
             contract_sentence = format_option_contract_sentence(
                 signal.strike,
                 signal.side,
@@ -281,34 +280,31 @@ class UOABot:
                 "timestamp": signal.timestamp
             }
             
-            payload = {
-                "embeds": [embed],
-                "username": "ORAKL UOA Bot"
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.webhook_url,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status == 204:
-                        logger.info(
-                            f"UOA ALERT: {signal.symbol} {signal.side.upper()} "
-                            f"${signal.premium:,.0f} [{signal.severity}]"
-                        )
-                        return True
-                    elif response.status == 429:
-                        logger.warning("UOA webhook rate limited")
-                        return False
-                    else:
-                        logger.error(f"UOA webhook error: {response.status}")
-                        return False
+            mark('evaluated')
+            queued = webhook_delivery.enqueue(
+                self.webhook_url, embed, "ORAKL UOA Bot", name="UOA Bot",
+                on_result=lambda delivered: self._record_delivery(signal, delivered)
+            )
+            mark('queued')
+            if not queued:
+                logger.error("UOA webhook delivery unavailable; alert not queued")
+            return queued
                         
         except Exception as e:
             logger.error(f"UOA post error: {e}")
             return False
     
+    def _record_delivery(self, signal: UOASignal, delivered: bool):
+        """Delivery outcome from the webhook queue"""
+        if delivered:
+            self.alerts_sent += 1
+            logger.info(
+                f"UOA ALERT: {signal.symbol} {signal.side.upper()} "
+                f"${signal.premium:,.0f} [{signal.severity}]"
+            )
+        else:
+            logger.error(f"UOA webhook delivery failed: {signal.symbol} {signal.side.upper()}")
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get bot statistics."""
         return {
@@ -14,7 +14,6 @@ These levels act as magnets AND barriers. Price is drawn to them,
 then often reverses when it hits them.
 """
 
-import asyncio
 import logging
 import time
 from datetime import datetime, timedelta
@@ -25,6 +24,8 @@ from .base_bot import BaseAutoBot
 from src.config import Config
 from src.data_fetcher import DataFetcher
 from src.utils.market_hours import MarketHours
+from src.utils.chain_analytics import chain_analytics
+from src.utils.strike_exposure import StrikeExposure
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +76,9 @@ class WallsBot(BaseAutoBot):
         # Cache walls to track changes
         self.walls_cache: Dict[str, Dict] = {}  # {symbol: {'call_wall': strike, 'put_wall': strike}}
         
+        # Per-strike OI profile per symbol, rebuilt only when the chain version changes
+        self._exposure: Dict[str, Tuple[int, StrikeExposure]] = {}
+        
         # Scan settings
         self.scan_batch_size = 0
         self.concurrency_limit = 15
@@ -97,18 +101,14 @@ class WallsBot(BaseAutoBot):
         
         alerts_sent = 0
         
-        semaphore = asyncio.Semaphore(self.concurrency_limit)
-        
         async def scan_symbol(symbol: str) -> int:
-            async with semaphore:
-                try:
-                    return await self._find_and_check_walls(symbol)
-                except Exception as e:
-                    logger.debug(f"{self.name} error scanning {symbol}: {e}")
-                    return 0
+            try:
+                return await self._find_and_check_walls(symbol)
+            except Exception as e:
+                logger.debug(f"{self.name} error scanning {symbol}: {e}")
+                return 0
         
-        tasks = [scan_symbol(symbol) for symbol in self.watchlist]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await self._scan_watchlist(scan_symbol)
         
         for result in results:
             if isinstance(result, int):
@@ -140,45 +140,18 @@ class WallsBot(BaseAutoBot):
         if not price:
             return 0
         
-        # Calculate expiry cutoff
+        # OI walls over near-term contracts (where gamma/pinning matters)
         expiry_cutoff = (datetime.now() + timedelta(days=self.max_dte_days)).strftime('%Y-%m-%d')
-        
-        # Map OI by strike
-        call_oi: Dict[float, int] = {}
-        put_oi: Dict[float, int] = {}
-        
-        for contract in contracts:
-            details = contract.get('details', {}) or {}
-            oi = contract.get('open_interest', 0)
-            
-            if not oi or oi < 100:
-                continue
-            
-            strike = details.get('strike_price', 0)
-            expiration = details.get('expiration_date', '')
-            contract_type = details.get('contract_type', '').lower()
-            
-            if not strike or not expiration:
-                continue
-            
-            # Only include near-term contracts (where gamma/pinning matters)
-            if expiration > expiry_cutoff:
-                continue
-            
-            if contract_type == 'call':
-                call_oi[strike] = call_oi.get(strike, 0) + oi
-            elif contract_type == 'put':
-                put_oi[strike] = put_oi.get(strike, 0) + oi
-        
-        if not call_oi or not put_oi:
+        analytics = chain_analytics.analyze(symbol, contracts, price, max_expiry=expiry_cutoff)
+        exposure = self._get_exposure(symbol, analytics)
+        if exposure is None:
             return 0
         
-        # Find walls (max OI strikes)
-        call_wall_strike = max(call_oi.keys(), key=lambda k: call_oi[k])
-        call_wall_oi = call_oi[call_wall_strike]
-        
-        put_wall_strike = max(put_oi.keys(), key=lambda k: put_oi[k])
-        put_wall_oi = put_oi[put_wall_strike]
+        call_wall_strike, call_wall_oi = exposure.wall('call')
+        put_wall_strike, put_wall_oi = exposure.wall('put')
+        call_wall_oi, put_wall_oi = int(call_wall_oi), int(put_wall_oi)
+        resistance = exposure.wall_above(price, 'call')
+        support = exposure.wall_below(price, 'put')
         
         # Update cache
         self.walls_cache[symbol] = {
@@ -186,6 +159,10 @@ class WallsBot(BaseAutoBot):
             'call_oi': call_wall_oi,
             'put_wall': put_wall_strike,
             'put_oi': put_wall_oi,
+            'resistance': resistance[0] if resistance else 0,
+            'support': support[0] if support else 0,
+            'top_call_strikes': exposure.top_strikes('call', 3),
+            'top_put_strikes': exposure.top_strikes('put', 3),
             'price': price,
             'updated': time.time()
         }
@@ -222,6 +199,19 @@ class WallsBot(BaseAutoBot):
         
         return alerts
     
+    def _get_exposure(self, symbol: str, analytics: Dict) -> Optional[StrikeExposure]:
+        """Per-strike OI profile for this chain version (None if a side has no walls)"""
+        walls = analytics['walls']
+        if not walls:
+            self._exposure.pop(symbol, None)
+            return None
+        cached = self._exposure.get(symbol)
+        if cached and cached[0] == analytics['version']:
+            return cached[1]
+        exposure = StrikeExposure.from_arrays(walls['by_strike'])
+        self._exposure[symbol] = (analytics['version'], exposure)
+        return exposure
+    
     async def _get_current_price(self, symbol: str, contracts: List[Dict]) -> Optional[float]:
         """Get current underlying price"""
         # Try from snapshot first
@@ -299,6 +289,8 @@ class WallsBot(BaseAutoBot):
                     flip = context.get('flip_level', 0)
                     if flip > 0:
                         gex_text += f"\nFlip: ${flip:.0f}"
+                    if context.get('stale'):
+                        gex_text += f"\n⏱️ {context['age_seconds'] / 60:.0f}m old"
                     gex_field = {"name": "GEX Regime", "value": gex_text, "inline": True}
             except:
                 pass
@@ -312,6 +304,13 @@ class WallsBot(BaseAutoBot):
         if gex_field:
             fields.append(gex_field)
         
+        # Largest call OI above price / put OI below it (may differ from the max walls)
+        levels = self.walls_cache.get(symbol) or {}
+        if levels.get('resistance') or levels.get('support'):
+            above = f"${levels['resistance']:.0f}" if levels.get('resistance') else "—"
+            below = f"${levels['support']:.0f}" if levels.get('support') else "—"
+            fields.append({"name": "Nearest Walls", "value": f"⬆️ {above} / ⬇️ {below}", "inline": True})
+        
         embed = self.create_signal_embed_with_disclaimer(
             title=f"{emoji} {symbol} Approaching {wall_type} Wall",
             description=description,
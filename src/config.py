@@ -26,6 +26,9 @@ class Config:
     
     # API Keys - Using provided credentials
     POLYGON_API_KEY = os.getenv('POLYGON_API_KEY')
+    POLYGON_BASE_URL = os.getenv('POLYGON_BASE_URL', 'https://api.polygon.io')  # Point at scripts/polygon_standin.py for local runs
+    POLYGON_RATE_LIMIT = float(os.getenv('POLYGON_RATE_LIMIT', '5'))  # Client-side Polygon requests per second (shared by every bot)
+    POLYGON_RATE_BURST = int(os.getenv('POLYGON_RATE_BURST', '10'))  # Requests allowed in a burst above the rate
     DISCORD_BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN', '')
     DISCORD_WEBHOOK_URL = os.getenv('DISCORD_WEBHOOK_URL')
     
@@ -331,6 +334,37 @@ class Config:
     AUTO_START = os.getenv('AUTO_START', 'true').lower() == 'true'
     RESTART_ON_ERROR = os.getenv('RESTART_ON_ERROR', 'true').lower() == 'true'
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_QUEUE_ENABLED = os.getenv('LOG_QUEUE_ENABLED', 'true').lower() == 'true'  # Write logs from a background thread
+    LOG_HOT_PATH_RATE = float(os.getenv('LOG_HOT_PATH_RATE', '20'))  # Per-event/per-symbol log lines per second
+    LOG_HOT_PATH_BURST = int(os.getenv('LOG_HOT_PATH_BURST', '100'))  # Hot-path lines allowed in a burst
+    LOG_HOT_PATH_SAMPLE = int(os.getenv('LOG_HOT_PATH_SAMPLE', '100'))  # Keep 1 in N hot-path lines over budget
+    LOOP_MONITOR_ENABLED = os.getenv('LOOP_MONITOR_ENABLED', 'true').lower() == 'true'  # Event-loop lag / task / queue monitor
+    LOOP_MONITOR_INTERVAL = float(os.getenv('LOOP_MONITOR_INTERVAL', '0.5'))  # Lag probe period (seconds)
+    LOOP_SLOW_CALLBACK_MS = float(os.getenv('LOOP_SLOW_CALLBACK_MS', '100'))  # Loop callbacks slower than this are recorded (0 = off)
+    LOOP_LAG_WARN_MS = float(os.getenv('LOOP_LAG_WARN_MS', '250'))  # Heartbeat warns when p99 lag exceeds this
+    HEALTH_SNAPSHOT_TTL = float(os.getenv('HEALTH_SNAPSHOT_TTL', '5'))  # Max age of cached /metrics, /health/deep, /debug/tasks bodies
+    HEALTH_SOURCE_TIMEOUT = float(os.getenv('HEALTH_SOURCE_TIMEOUT', '2'))  # Per-subsystem timeout when building /health/deep
+    HEALTH_AUTH_TOKEN = os.getenv('HEALTH_AUTH_TOKEN', '')  # Bearer token for /health/deep and /debug/tasks (unset = not served)
+    HEALTH_DEBUG_TASKS_ENABLED = os.getenv('HEALTH_DEBUG_TASKS_ENABLED', 'false').lower() == 'true'  # Serve /debug/tasks (frames, source paths)
+    TRACE_ENABLED = os.getenv('TRACE_ENABLED', 'true').lower() == 'true'  # Per-event stage latency tracing (Kafka print -> Discord 204)
+    TRACE_SLOW_MS = float(os.getenv('TRACE_SLOW_MS', '3000'))  # Alerts slower than this print-to-alert are logged with their stage breakdown
+    SCAN_SCHEDULER_ENABLED = os.getenv('SCAN_SCHEDULER_ENABLED', 'true').lower() == 'true'  # Phase offsets, budget admission and adaptive intervals for REST scans
+    SCAN_BUDGET_SECONDS = float(os.getenv('SCAN_BUDGET_SECONDS', '120'))  # Scans start together only while their expected requests fit in this many seconds of Polygon rate
+    SCAN_PHASE_MAX_SECONDS = float(os.getenv('SCAN_PHASE_MAX_SECONDS', '90'))  # Upper bound on a bot's first-scan phase offset
+    SCAN_INTERVAL_MIN_FACTOR = float(os.getenv('SCAN_INTERVAL_MIN_FACTOR', '0.5'))  # Shortest adaptive interval, as a fraction of the bot's configured one
+    SCAN_INTERVAL_MAX_FACTOR = float(os.getenv('SCAN_INTERVAL_MAX_FACTOR', '3.0'))  # Longest adaptive interval, as a multiple of the bot's configured one
+    SCAN_INTERVAL_JITTER = float(os.getenv('SCAN_INTERVAL_JITTER', '0.1'))  # +/- fraction of random jitter on every interval
+    SCAN_ACTIVE_FLOW_PER_MIN = float(os.getenv('SCAN_ACTIVE_FLOW_PER_MIN', '300'))  # Kafka prints/min above which the market counts as busy
+    SCAN_QUIET_FLOW_PER_MIN = float(os.getenv('SCAN_QUIET_FLOW_PER_MIN', '20'))  # Kafka prints/min below which (with Kafka running) it counts as quiet
+    SCAN_WATCHLIST_FRACTION = float(os.getenv('SCAN_WATCHLIST_FRACTION', '1.0'))  # Share of the watchlist scanned per cycle (highest priority first) by bots without scan_batch_size
+    SCAN_PRIORITY_FLOW_MINUTES = int(os.getenv('SCAN_PRIORITY_FLOW_MINUTES', '15'))  # Kafka flow look-back when ranking symbols for a scan
+    SCAN_PRIORITY_FLOW_WEIGHT = float(os.getenv('SCAN_PRIORITY_FLOW_WEIGHT', '1.0'))  # Weight of recent flow premium (log10 of $100K units) in symbol priority
+    SCAN_PRIORITY_HIT_WEIGHT = float(os.getenv('SCAN_PRIORITY_HIT_WEIGHT', '2.0'))  # Weight of a symbol's recent signal hit rate in its priority
+    DISCORD_WEBHOOK_MIN_INTERVAL_SECONDS = float(os.getenv('DISCORD_WEBHOOK_MIN_INTERVAL_SECONDS', '0.25'))  # Minimum spacing between posts to one webhook
+    WEBHOOK_MAX_EMBEDS = int(os.getenv('WEBHOOK_MAX_EMBEDS', '10'))  # Queued alerts packed into one Discord message (Discord max 10)
+    WEBHOOK_QUEUE_MAX = int(os.getenv('WEBHOOK_QUEUE_MAX', '500'))  # Per-webhook backlog; the oldest alert is dropped beyond this
+    WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', '5'))  # Delivery attempts per alert (429 / 5xx / connection errors)
+    WEBHOOK_TIMEOUT = float(os.getenv('WEBHOOK_TIMEOUT', '10'))  # Seconds per webhook POST
     
     # Performance Settings
     MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', '10'))  # Increased for faster scanning
@@ -339,6 +373,10 @@ class Config:
     RETRY_DELAY = int(os.getenv('RETRY_DELAY', '5'))
     MAX_CONSECUTIVE_ERRORS = int(os.getenv('MAX_CONSECUTIVE_ERRORS', '10'))
     SYMBOL_SCAN_TIMEOUT = int(os.getenv('SYMBOL_SCAN_TIMEOUT', '60'))  # Per-symbol scan guardrail (seconds)
+    FLOW_DETECT_VECTORIZED = os.getenv('FLOW_DETECT_VECTORIZED', 'true').lower() == 'true'  # NumPy unusual-flow path
+    TOPFLOW_CONCURRENCY = int(os.getenv('TOPFLOW_CONCURRENCY', '8'))  # Tickers fetched in parallel for topflow
+    TOPFLOW_CACHE_TTL = int(os.getenv('TOPFLOW_CACHE_TTL', '120'))  # Leaderboard served as-is for 2 minutes
+    TOPFLOW_MAX_STALE = int(os.getenv('TOPFLOW_MAX_STALE', '600'))  # Serve stale + background refresh up to 10 min
     
     # Cache Settings
     CACHE_TTL_API = int(os.getenv('CACHE_TTL_API', '60'))  # 1 minute
@@ -377,6 +415,11 @@ class Config:
     CHART_WIDTH = int(os.getenv('CHART_WIDTH', '10'))
     CHART_HEIGHT = int(os.getenv('CHART_HEIGHT', '6'))
     CHART_SIZE = (CHART_WIDTH, CHART_HEIGHT)
+    # Off-loop rendering (see utils/chart_renderer.py)
+    CHART_RENDER_WORKERS = int(os.getenv('CHART_RENDER_WORKERS', '2'))  # Warm renderer processes
+    CHART_RENDER_TIMEOUT = float(os.getenv('CHART_RENDER_TIMEOUT', '30'))  # Per-chart guardrail (seconds)
+    CHART_CACHE_SIZE = int(os.getenv('CHART_CACHE_SIZE', '64'))  # Rendered PNGs kept in LRU
+    CHART_CACHE_TTL = int(os.getenv('CHART_CACHE_TTL', '120'))  # 2 minutes
     
     # Health Check Settings
     HEALTH_CHECK_INTERVAL = int(os.getenv('HEALTH_CHECK_INTERVAL', '60'))  # 1 minute
@@ -393,6 +436,17 @@ class Config:
     ).split(',')
     GEX_UPDATE_INTERVAL = int(os.getenv('GEX_UPDATE_INTERVAL', '300'))  # 5 minutes
     GEX_MAX_DTE_DAYS = int(os.getenv('GEX_MAX_DTE_DAYS', '30'))  # Only include < 30 DTE
+    GEX_FAST_TICKERS = os.getenv('GEX_FAST_TICKERS', 'SPY,QQQ').split(',')  # Refreshed every GEX_FAST_INTERVAL
+    GEX_FAST_INTERVAL = int(os.getenv('GEX_FAST_INTERVAL', '60'))  # 1 minute
+    GEX_HOT_FLOW_PREMIUM = float(os.getenv('GEX_HOT_FLOW_PREMIUM', '2000000'))  # Recent stream premium that promotes a ticker to the fast lane
+    GEX_HOT_FLOW_MINUTES = int(os.getenv('GEX_HOT_FLOW_MINUTES', '5'))  # Look-back for the hot-flow check
+    GEX_MAX_CONCURRENCY = int(os.getenv('GEX_MAX_CONCURRENCY', '4'))  # Chain refreshes in flight
+    GEX_REFRESHES_PER_MINUTE = int(os.getenv('GEX_REFRESHES_PER_MINUTE', '20'))  # Chain-fetch budget for the GEX engine
+    GEX_INCREMENTAL_ENABLED = os.getenv('GEX_INCREMENTAL_ENABLED', 'true').lower() == 'true'  # Move GEX with live Kafka prints between refreshes
+    GREEKS_BACKFILL_ENABLED = os.getenv('GREEKS_BACKFILL_ENABLED', 'true').lower() == 'true'  # Estimate missing Greeks from IV / option prices
+    OPTIONS_CHAIN_MAX_CONTRACTS = int(os.getenv('OPTIONS_CHAIN_MAX_CONTRACTS', '1000'))  # Chain snapshot cap for options summaries/trades
+    OPTIONS_TRADES_CONTRACTS = int(os.getenv('OPTIONS_TRADES_CONTRACTS', '20'))  # Most active contracts fetched by get_options_trades
+    OPTIONS_FETCH_CONCURRENCY = int(os.getenv('OPTIONS_FETCH_CONCURRENCY', '10'))  # Per-contract bar fetches in flight per symbol
     
     # Hedge Hunter Settings
     HEDGE_CHECK_ENABLED = os.getenv('HEDGE_CHECK_ENABLED', 'true').lower() == 'true'
@@ -471,6 +525,22 @@ class Config:
     FILTER_REPORT_INTERVAL_SECONDS = int(os.getenv('FILTER_REPORT_INTERVAL_SECONDS', '60'))
     KAFKA_FALLBACK_TIMEOUT = int(os.getenv('KAFKA_FALLBACK_TIMEOUT', '120'))  # 2 min before REST fallback
     KAFKA_ENRICHMENT_TIMEOUT = float(os.getenv('KAFKA_ENRICHMENT_TIMEOUT', '5.0'))  # Polygon fetch timeout
+    KAFKA_CONSUMER_CONCURRENCY = int(os.getenv('KAFKA_CONSUMER_CONCURRENCY', '8'))  # Events one bot may evaluate at once
+    KAFKA_CAPTURE_PATH = os.getenv('KAFKA_CAPTURE_PATH', '')  # Append raw messages here (JSON lines) for scripts/replay_kafka.py
+    GAMMA_TRIGGER_MIN_INTERVAL = float(os.getenv('GAMMA_TRIGGER_MIN_INTERVAL', '60'))  # Min seconds between flow-triggered Gamma refreshes per symbol
+    GAMMA_TRIGGER_CONCURRENCY = int(os.getenv('GAMMA_TRIGGER_CONCURRENCY', '4'))  # Flow-triggered Gamma refreshes running at once
+
+    # Rolling flow aggregates built from the stream (see utils/flow_aggregates.py)
+    FLOW_AGG_BUCKET_SECONDS = int(os.getenv('FLOW_AGG_BUCKET_SECONDS', '60'))  # 1 minute buckets
+    FLOW_AGG_WINDOW_MINUTES = int(os.getenv('FLOW_AGG_WINDOW_MINUTES', '390'))  # One regular session
+    FLOW_AGG_PRINTS_PER_BUCKET = int(os.getenv('FLOW_AGG_PRINTS_PER_BUCKET', '25'))  # Largest prints kept per bucket
+    FLOW_AGG_MIN_EVENTS = int(os.getenv('FLOW_AGG_MIN_EVENTS', '5'))  # Prints needed before commands skip REST
+    FLOW_AGG_SNAPSHOT_PATH = os.getenv('FLOW_AGG_SNAPSHOT_PATH', 'state/flow_aggregates.json')
+    FLOW_AGG_SNAPSHOT_INTERVAL = int(os.getenv('FLOW_AGG_SNAPSHOT_INTERVAL', '60'))  # seconds
+    VOLUME_BASELINE_TTL = int(os.getenv('VOLUME_BASELINE_TTL', '14400'))  # Previous-scan volumes kept 4 hours
+    VOLUME_BASELINE_STREAM_UPDATES = os.getenv('VOLUME_BASELINE_STREAM_UPDATES', 'true').lower() == 'true'  # Fold Kafka prints in between scans
+    VOLUME_BASELINE_SNAPSHOT_PATH = os.getenv('VOLUME_BASELINE_SNAPSHOT_PATH', 'state/volume_baselines.npz')
+    VOLUME_BASELINE_SNAPSHOT_INTERVAL = int(os.getenv('VOLUME_BASELINE_SNAPSHOT_INTERVAL', '60'))  # seconds
     
     # =============================================================================
     # Unusual Options Activity (UOA) Bot - Stream Filter on Kafka
@@ -4,10 +4,14 @@ ORAKL Core Module - The "Brain" of the State-Aware Market Engine
 This module contains the validation sidecars that run alongside the bots:
 - HedgeHunter: Detects synthetic hedging (stock traded against options)
 - ContextManager: Maintains live market state (GEX regimes)
+- DispatchGraph: Single fan-out point for enriched Kafka events
+- RefreshCoalescer: Debounced, coalesced per-symbol refresh triggers
 """
 
 from src.core.hedge_hunter import HedgeHunter
 from src.core.market_state import ContextManager
+from src.core.dispatch import DispatchGraph
+from src.core.refresh_coalescer import RefreshCoalescer
 
-__all__ = ['HedgeHunter', 'ContextManager']
+__all__ = ['HedgeHunter', 'ContextManager', 'DispatchGraph', 'RefreshCoalescer']
 
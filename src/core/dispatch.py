@@ -0,0 +1,244 @@
+"""
+Kafka event dispatch graph.
+
+Every consumer of an enriched trade event is registered here exactly once,
+and the graph owns fan-out, ordering and concurrency:
+
+    1. ingest   - synchronous folds (flow aggregates, volume baselines, live
+                  GEX), run in registration order on every event
+    2. gate     - normalization + global rules (index blocklist); a falsy
+                  return stops the event here for gated consumers
+    3. bots     - async process_event() consumers, run concurrently, each
+                  behind its own concurrency limit, all awaited (no orphan
+                  tasks). Consumers registered with gated=False (UOA and the
+                  stream filters, which apply their own rules to any ticker)
+                  also get events the gate drops; they still see the
+                  normalized event
+
+Per-consumer throughput (events, alerts, errors, latency, waits on the
+concurrency limit) is kept for status reporting and exported as
+orakl_kafka_events_total / orakl_dispatch_consumer_seconds /
+orakl_dispatch_alerts_total.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.utils.monitoring import dispatch_alerts, dispatch_latency, kafka_events
+from src.utils.tracing import event_tracer, mark
+
+logger = logging.getLogger(__name__)
+
+_events_gated = kafka_events.labels(outcome='gated')
+_events_dispatched = kafka_events.labels(outcome='dispatched')
+
+
+@dataclass
+class ConsumerStats:
+    """Throughput counters for one registered consumer"""
+    events: int = 0
+    alerts: int = 0
+    errors: int = 0
+    skipped: int = 0          # Consumer disabled (bot not running) when the event arrived
+    waits: int = 0            # Event had to wait for the concurrency limit
+    in_flight: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'events': self.events,
+            'alerts': self.alerts,
+            'errors': self.errors,
+            'skipped': self.skipped,
+            'waits': self.waits,
+            'in_flight': self.in_flight,
+            'avg_ms': round(self.total_seconds / self.events * 1000, 2) if self.events else 0.0,
+            'max_ms': round(self.max_seconds * 1000, 2),
+        }
+
+
+@dataclass
+class _Consumer:
+    name: str
+    handler: Callable[[Dict], Awaitable[Optional[Dict]]]
+    enabled: Callable[[], bool]
+    collect: bool
+    gated: bool
+    semaphore: asyncio.Semaphore
+    latency: Any            # Bound orakl_dispatch_consumer_seconds child
+    alerts: Any             # Bound orakl_dispatch_alerts_total child
+    stats: ConsumerStats = field(default_factory=ConsumerStats)
+
+
+class DispatchGraph:
+    """
+    Single fan-out point for enriched Kafka events.
+
+    Usage:
+        graph = DispatchGraph()
+        graph.add_ingest('flow_aggregates', flow_aggregates.record)
+        graph.set_gate(bot_manager.prepare_event)
+        graph.add_consumer(bot.name, bot.process_event, enabled=lambda: bot.running)
+        alerts = await graph.dispatch(enriched)
+    """
+
+    def __init__(self, default_concurrency: int = 8):
+        self.default_concurrency = default_concurrency
+        self._ingest: Dict[str, Callable[[Dict], Any]] = {}
+        self._ingest_errors: Dict[str, int] = {}
+        self._gate: Optional[Callable[[Dict], bool]] = None
+        self._consumers: Dict[str, _Consumer] = {}
+        self.events = 0
+        self.gated = 0
+        self.dispatched = 0
+        self.alerts = 0
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def add_ingest(self, name: str, fn: Callable[[Dict], Any]):
+        """Synchronous fold run on every event before the gate (no I/O)"""
+        if name in self._ingest:
+            raise ValueError(f"Ingest step {name} already registered")
+        self._ingest[name] = fn
+        self._ingest_errors[name] = 0
+
+    def set_gate(self, gate: Callable[[Dict], bool]):
+        """Normalize the event in place; return False to drop it before the bots"""
+        self._gate = gate
+
+    def add_consumer(self, name: str, handler: Callable[[Dict], Awaitable[Optional[Dict]]], *,
+                     enabled: Callable[[], bool] = lambda: True, collect: bool = True,
+                     gated: bool = True, max_concurrency: Optional[int] = None):
+        """
+        Register an async consumer (e.g. a bot's process_event).
+
+        Args:
+            name: Unique consumer name (bot name)
+            handler: Coroutine function taking the event, returning an alert or None
+            enabled: Checked per event; disabled consumers are skipped
+            collect: Whether returned alerts are reported back to the caller
+            gated: False to also receive events the gate drops
+            max_concurrency: Events this consumer may evaluate at once
+        """
+        if name in self._consumers:
+            raise ValueError(f"Consumer {name} already registered")
+        self._consumers[name] = _Consumer(
+            name=name,
+            handler=handler,
+            enabled=enabled,
+            collect=collect,
+            gated=gated,
+            semaphore=asyncio.Semaphore(max_concurrency or self.default_concurrency),
+            latency=dispatch_latency.labels(consumer=name),
+            alerts=dispatch_alerts.labels(consumer=name),
+        )
+
+    def remove_consumer(self, name: str):
+        self._consumers.pop(name, None)
+
+    def has_consumer(self, name: str) -> bool:
+        return name in self._consumers
+
+    @property
+    def consumer_names(self) -> List[str]:
+        return list(self._consumers)
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    async def dispatch(self, event: Dict) -> List[Dict]:
+        """Run ingest, gate and every enabled consumer once; returns collected alerts"""
+        self.events += 1
+
+        for name, fn in self._ingest.items():
+            try:
+                fn(event)
+            except Exception as e:
+                self._ingest_errors[name] += 1
+                logger.debug(f"Ingest step {name} failed: {e}")
+        mark('ingested')
+
+        passed = self._gate is None or self._gate(event)
+        if passed:
+            mark('gated')
+        else:
+            self.gated += 1
+            _events_gated.inc()
+
+        runs = []
+        for consumer in self._consumers.values():
+            if consumer.gated and not passed:
+                continue
+            if consumer.enabled():
+                runs.append(self._run(consumer, event))
+            else:
+                consumer.stats.skipped += 1
+        if passed:
+            _events_dispatched.inc()
+        if not runs:
+            return []
+
+        self.dispatched += len(runs)
+        alerts = [alert for alert in await asyncio.gather(*runs) if alert]
+        self.alerts += len(alerts)
+        return alerts
+
+    async def _run(self, consumer: _Consumer, event: Dict) -> Optional[Dict]:
+        # Runs in its own task (gather), so the trace fork stays local to this consumer
+        trace = event_tracer.fork(consumer.name)
+        stats = consumer.stats
+        if consumer.semaphore.locked():
+            stats.waits += 1
+        async with consumer.semaphore:
+            mark('slot')
+            stats.in_flight += 1
+            start = time.perf_counter()
+            try:
+                result = await consumer.handler(event)
+            except Exception as e:
+                stats.errors += 1
+                logger.error(f"Error dispatching to {consumer.name}: {e}")
+                result = None
+            finally:
+                elapsed = time.perf_counter() - start
+                stats.in_flight -= 1
+                stats.events += 1
+                stats.total_seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+                consumer.latency.observe(elapsed)
+                event_tracer.finish(trace)
+
+        if result:
+            stats.alerts += 1
+            consumer.alerts.inc()
+            symbol = event.get('symbol', 'UNKNOWN')
+            logger.info(f"Alert generated by {consumer.name} for {symbol}")
+            if consumer.collect:
+                return result
+        return None
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    @property
+    def in_flight(self) -> int:
+        return sum(c.stats.in_flight for c in self._consumers.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'events': self.events,
+            'gated': self.gated,
+            'dispatched': self.dispatched,
+            'alerts': self.alerts,
+            'in_flight': self.in_flight,
+            'ingest_errors': dict(self._ingest_errors),
+            'consumers': {name: c.stats.as_dict() for name, c in self._consumers.items()},
+        }
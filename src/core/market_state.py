@@ -9,6 +9,15 @@ Net GEX (Gamma Exposure) determines market behavior:
 - NEGATIVE_GAMMA: Dealers are short gamma → Market amplifies moves, high vol
 
 The "Flip Level" is where Net GEX crosses zero - a critical support/resistance level.
+
+Tickers are refreshed concurrently on their own cadence: index ETFs (and any
+ticker with heavy live flow) every GEX_FAST_INTERVAL, the rest every
+GEX_UPDATE_INTERVAL, all within a shared chain-fetch budget. Every context
+carries its age so consumers can tell how stale the regime is.
+
+Between refreshes, enriched Kafka prints are applied to a per-strike exposure
+profile (apply_print) so regime, flip level and walls move with live flow;
+each full refresh reconciles the profile against the new snapshot.
 """
 
 import asyncio
@@ -17,7 +26,10 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 from src.config import Config
-from src.utils.gamma_ratio import transform_polygon_snapshot, compute_gamma_ratio
+from src.utils.chain_analytics import chain_analytics
+from src.utils.flow_aggregates import flow_aggregates
+from src.utils.resilience import TokenBucket
+from src.utils.strike_exposure import StrikeExposure
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +46,13 @@ class ContextManager:
             'flip_level': float,        # Strike where GEX crosses zero
             'call_wall': float,         # Strike with max call OI
             'put_wall': float,          # Strike with max put OI
-            'last_updated': float       # Unix timestamp
+            'resistance': float,        # Max call OI strike at/above spot
+            'support': float,           # Max put OI strike at/below spot
+            'last_updated': float,      # Unix timestamp
+            'live_updated': float,      # Last Kafka print applied since the snapshot (None if none)
+            'prints_applied': int,      # Kafka prints folded in since the snapshot
+            'age_seconds': float,       # Seconds since last_updated (None if never)
+            'stale': bool               # Older than twice the ticker's refresh interval
         }
     
     Usage:
@@ -62,29 +80,95 @@ class ContextManager:
         self.update_interval = getattr(Config, 'GEX_UPDATE_INTERVAL', 300)  # 5 minutes
         self.max_dte_days = getattr(Config, 'GEX_MAX_DTE_DAYS', 30)  # Only include < 30 DTE
         
+        # Per-ticker scheduling: fast lane for index ETFs and tickers with heavy live flow
+        self.fast_tickers = {t.strip().upper() for t in getattr(Config, 'GEX_FAST_TICKERS', ['SPY', 'QQQ']) if t.strip()}
+        self.fast_interval = min(getattr(Config, 'GEX_FAST_INTERVAL', 60), self.update_interval)
+        self.hot_flow_premium = getattr(Config, 'GEX_HOT_FLOW_PREMIUM', 2_000_000)
+        self.hot_flow_minutes = getattr(Config, 'GEX_HOT_FLOW_MINUTES', 5)
+        self.max_concurrency = max(1, getattr(Config, 'GEX_MAX_CONCURRENCY', 4))
+        
+        # Chain fetches share one budget so refreshes never starve the scanners
+        refreshes_per_minute = max(1, getattr(Config, 'GEX_REFRESHES_PER_MINUTE', 20))
+        self._budget = TokenBucket(capacity=self.max_concurrency, refill_rate=refreshes_per_minute / 60.0)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
         # State storage: {'SPY': {...}, 'QQQ': {...}}
         self.state: Dict[str, Dict] = {}
         
+        # Incremental mode: per-strike exposure seeded by each full refresh, moved by live prints
+        self.incremental = getattr(Config, 'GEX_INCREMENTAL_ENABLED', True)
+        self._exposure: Dict[str, StrikeExposure] = {}
+        self._expiry_limits: Dict[str, str] = {}
+        self._drift: Dict[str, float] = {}
+        self.prints_applied = 0
+        self.prints_ignored = 0
+        
+        # Schedule: next due time, in-flight refreshes and per-ticker counters
+        self._next_due: Dict[str, float] = {}
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._failures: Dict[str, int] = {}
+        self._refresh_stats: Dict[str, Dict] = {}
+        
         # Running flag for graceful shutdown
         self._running = False
         self._last_full_update: Optional[float] = None
         
+    def interval_for(self, ticker: str) -> int:
+        """Refresh cadence for a ticker: fast for index ETFs and tickers with heavy live flow"""
+        if ticker.upper() in self.fast_tickers or self._has_hot_flow(ticker):
+            return self.fast_interval
+        return self.update_interval
+    
+    def _has_hot_flow(self, ticker: str) -> bool:
+        """Whether the Kafka stream saw heavy premium in this ticker recently"""
+        try:
+            summary = flow_aggregates.get_summary(ticker, minutes=self.hot_flow_minutes)
+        except Exception:
+            return False
+        return bool(summary) and summary['total_premium'] >= self.hot_flow_premium
+    
+    def _stagger_schedule(self, now: float):
+        """Spread the first refreshes over one fast interval, fast tickers first"""
+        ordered = sorted(self.tickers, key=lambda t: t.upper() not in self.fast_tickers)
+        step = self.fast_interval / max(1, len(ordered))
+        for i, ticker in enumerate(ordered):
+            self._next_due.setdefault(ticker, now + i * step)
+    
     async def run_loop(self):
-        """Background task entry point - runs continuously with BULLETPROOF error handling"""
-        logger.info(f"🔄 [ContextManager] Starting GEX Engine for {len(self.tickers)} tickers...")
+        """Background task entry point - schedules per-ticker refreshes with BULLETPROOF error handling"""
+        logger.info(
+            f"🔄 [ContextManager] Starting GEX Engine for {len(self.tickers)} tickers "
+            f"(fast={self.fast_interval}s, base={self.update_interval}s, concurrency={self.max_concurrency})..."
+        )
         self._running = True
         
         # Initial delay to let other services stabilize (avoid startup race conditions)
         await asyncio.sleep(10)
         
-        consecutive_failures = 0
-        max_consecutive_failures = 5
+        self._stagger_schedule(time.time())
+        last_summary = time.time()
         
         while self._running:
             try:
-                await self.update_all_contexts()
-                self._last_full_update = time.time()
-                consecutive_failures = 0  # Reset on success
+                now = time.time()
+                due = sorted(
+                    (t for t in self.tickers if t not in self._in_flight and self._next_due.get(t, 0) <= now),
+                    key=lambda t: self._next_due.get(t, 0)
+                )
+                for ticker in due:
+                    # Most overdue first; whatever the budget can't cover waits for the next tick
+                    if not await self._budget.acquire():
+                        break
+                    self._in_flight[ticker] = asyncio.create_task(self._refresh(ticker, budgeted=True))
+                
+                if now - last_summary >= self.update_interval:
+                    self._log_summary(now - last_summary)
+                    last_summary = now
+                
+                # Sleep until the next ticker is due (short ticks so hot-flow promotions apply promptly)
+                waiting = [self._next_due.get(t, now) for t in self.tickers if t not in self._in_flight]
+                delay = (min(waiting) - now) if waiting else 1.0
+                await asyncio.sleep(min(max(delay, 0.25), 5.0))
                 
             except asyncio.CancelledError:
                 # Task is being cancelled - exit gracefully
@@ -93,54 +177,88 @@ class ContextManager:
                 
             except Exception as e:
                 # CRITICAL: Never let ANY error crash the GEX engine
-                consecutive_failures += 1
-                error_type = type(e).__name__
-                logger.warning(f"[ContextManager] Update cycle error ({consecutive_failures}/{max_consecutive_failures}): {error_type} - {str(e)[:150]}")
-                
-                # If too many consecutive failures, add extra delay
-                if consecutive_failures >= max_consecutive_failures:
-                    logger.error(f"[ContextManager] Too many failures, adding 60s cooldown")
-                    await asyncio.sleep(60)
-                    consecutive_failures = 0  # Reset after cooldown
-            
-            # Wait for next update cycle
-            try:
-                await asyncio.sleep(self.update_interval)
-            except asyncio.CancelledError:
-                break
+                logger.warning(f"[ContextManager] Scheduler error: {type(e).__name__} - {str(e)[:150]}")
+                await asyncio.sleep(5)
         
+        await self._cancel_in_flight()
         logger.info("[ContextManager] GEX Engine stopped")
     
     async def stop(self):
         """Stop the background loop"""
         self._running = False
+        await self._cancel_in_flight()
+    
+    async def _cancel_in_flight(self):
+        tasks = list(self._in_flight.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+    async def _refresh(self, ticker: str, budgeted: bool = False) -> bool:
+        """Refresh one ticker within the concurrency and rate budget, then reschedule it"""
+        stats = self._refresh_stats.setdefault(ticker, {'refreshes': 0, 'failures': 0, 'last_duration': None})
+        ok = False
+        try:
+            if not budgeted:
+                await self._budget.wait_for_tokens(1)
+            async with self._semaphore:
+                started = time.monotonic()
+                try:
+                    await self._update_ticker_context(ticker)
+                    ok = True
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # CRITICAL: Catch ALL exceptions - never let GEX engine crash the bot
+                    # Only log at debug level to avoid log spam - these are expected for some tickers
+                    logger.debug(f"[ContextManager] Skipping {ticker}: {type(e).__name__} - {str(e)[:100]}")
+                stats['last_duration'] = time.monotonic() - started
+        finally:
+            interval = self.interval_for(ticker)
+            if ok:
+                self._failures[ticker] = 0
+                stats['refreshes'] += 1
+                self._last_full_update = time.time()
+            else:
+                # Back off failing tickers, capped at the base interval
+                failures = self._failures.get(ticker, 0) + 1
+                self._failures[ticker] = failures
+                stats['failures'] += 1
+                interval = min(interval * 2 ** (failures - 1), max(interval, self.update_interval))
+            self._next_due[ticker] = time.time() + interval
+            self._in_flight.pop(ticker, None)
+        return ok
+    
+    def _log_summary(self, window: float):
+        ages = [age for age in (self.context_age(t) for t in self.tickers) if age is not None]
+        failing = [t for t in self.tickers if self._failures.get(t)]
+        oldest = f"{max(ages):.0f}s" if ages else "n/a"
+        if failing:
+            logger.warning(
+                f"⚠️ [ContextManager] {len(ages)}/{len(self.tickers)} contexts live, oldest {oldest}; "
+                f"failing: {', '.join(failing[:5])}"
+            )
+        else:
+            logger.info(f"✅ [ContextManager] {len(ages)}/{len(self.tickers)} contexts live, oldest {oldest}")
         
     async def update_all_contexts(self):
-        """Update GEX context for all tracked tickers - BULLETPROOF error handling"""
+        """Refresh every tracked ticker now (concurrently, within the refresh budget)"""
         logger.info(f"🔄 [ContextManager] Updating GEX profiles for {len(self.tickers)} tickers...")
         
-        success_count = 0
-        error_count = 0
-        
-        for ticker in self.tickers:
-            try:
-                await self._update_ticker_context(ticker)
-                success_count += 1
-            except Exception as e:
-                # CRITICAL: Catch ALL exceptions - never let GEX engine crash the bot
-                error_count += 1
-                error_type = type(e).__name__
-                # Only log at debug level to avoid log spam - these are expected for some tickers
-                logger.debug(f"[ContextManager] Skipping {ticker}: {error_type} - {str(e)[:100]}")
-                
-                # Continue to next ticker - DO NOT re-raise
-                continue
+        results = await asyncio.gather(
+            *(self._refresh(ticker) for ticker in self.tickers if ticker not in self._in_flight),
+            return_exceptions=True
+        )
+        success_count = sum(1 for r in results if r is True)
+        error_count = len(results) - success_count
+        self._last_full_update = time.time()
         
         # Log summary
         if error_count > 0:
-            logger.warning(f"⚠️ [ContextManager] Update complete: {success_count}/{len(self.tickers)} OK, {error_count} skipped")
+            logger.warning(f"⚠️ [ContextManager] Update complete: {success_count}/{len(results)} OK, {error_count} skipped")
         else:
-            logger.info(f"✅ [ContextManager] Update complete: {success_count}/{len(self.tickers)} tickers")
+            logger.info(f"✅ [ContextManager] Update complete: {success_count}/{len(results)} tickers")
     
     async def _update_ticker_context(self, ticker: str):
         """Update GEX context for a single ticker - with defensive error handling"""
@@ -164,24 +282,31 @@ class ContextManager:
                 logger.debug(f"[ContextManager] No spot price for {ticker}")
                 return
             
-            # 3. Filter contracts by DTE (only include < 30 days where gamma matters most)
+            # 3-5. Net GEX, walls and G ratio for contracts < max DTE (where gamma
+            # matters most), computed in one pass over the snapshot
             expiry_limit = (datetime.now() + timedelta(days=self.max_dte_days)).strftime('%Y-%m-%d')
-            filtered_contracts = self._filter_by_expiry(snapshot, expiry_limit)
+            analytics = chain_analytics.analyze(ticker, snapshot, spot_price, max_expiry=expiry_limit)
             
-            if not filtered_contracts:
+            if not analytics['contracts']:
                 logger.debug(f"[ContextManager] No contracts within {self.max_dte_days} DTE for {ticker}")
                 return
             
-            # 4. Calculate Net GEX and related metrics
-            gex_data = self._calculate_gex(filtered_contracts, spot_price)
+            gex_data = analytics['gex']
+            gamma_ratio_data = analytics['gamma_ratio']
             
-            # 5. Calculate G ratio using existing utility (wrap in try for safety)
-            try:
-                standardized = transform_polygon_snapshot(filtered_contracts)
-                gamma_ratio_data = compute_gamma_ratio(standardized, spot_price)
-            except Exception as e:
-                logger.debug(f"[ContextManager] G ratio calc failed for {ticker}: {e}")
-                gamma_ratio_data = {'G': 0.5}  # Neutral default
+            # Reconcile the live profile: how far had incremental updates drifted?
+            previous = self.state.get(ticker)
+            if previous and previous.get('prints_applied') and gex_data['net_gex']:
+                drift = (previous['net_gex'] - gex_data['net_gex']) / abs(gex_data['net_gex'])
+                self._drift[ticker] = drift
+                logger.debug(
+                    f"[ContextManager] {ticker}: reconciled after {previous['prints_applied']} live prints "
+                    f"(net GEX drift {drift:+.1%})"
+                )
+            exposure = StrikeExposure.from_arrays(gex_data['by_strike'])
+            levels = exposure.summary(spot_price)
+            self._exposure[ticker] = exposure
+            self._expiry_limits[ticker] = expiry_limit
             
             # 6. Update state
             self.state[ticker] = {
@@ -191,9 +316,13 @@ class ContextManager:
                 'flip_level': gex_data['flip_level'],
                 'call_wall': gex_data['call_wall'],
                 'put_wall': gex_data['put_wall'],
+                'resistance': levels['resistance'],
+                'support': levels['support'],
                 'spot_price': spot_price,
-                'contracts_analyzed': len(filtered_contracts),
-                'last_updated': time.time()
+                'contracts_analyzed': analytics['contracts'],
+                'last_updated': time.time(),
+                'live_updated': None,
+                'prints_applied': 0
             }
             
             logger.debug(
@@ -207,17 +336,56 @@ class ContextManager:
             # Re-raise to be caught by update_all_contexts - but this provides inner logging
             raise
     
-    def _filter_by_expiry(self, contracts: List[Dict], expiry_limit: str) -> List[Dict]:
-        """Filter contracts to only include those expiring before the limit"""
-        filtered = []
-        for contract in contracts:
-            details = contract.get('details', {}) or {}
-            exp_date = details.get('expiration_date', '')
-            
-            if exp_date and exp_date <= expiry_limit:
-                filtered.append(contract)
+    def apply_print(self, event: Dict) -> bool:
+        """
+        Fold an enriched Kafka print into the ticker's live GEX profile.
+        
+        The print is treated as new open interest: gamma x size x 100 x spot
+        (negative for puts) is added at its strike, and its size to that
+        strike's call/put OI. Regime, net GEX, flip level and walls are
+        re-read from the profile in O(log strikes). G is left to the next
+        full refresh. No-op for tickers without a reconciled snapshot.
+        
+        Returns:
+            True if the print moved the context
+        """
+        if not self.incremental:
+            return False
+        ticker = str(event.get('underlying') or event.get('symbol') or '').upper()
+        exposure = self._exposure.get(ticker)
+        context = self.state.get(ticker)
+        if exposure is None or context is None:
+            return False
         
-        return filtered
+        try:
+            gamma = float(event.get('gamma') or 0)
+            size = int(event.get('trade_size') or 0)
+            strike = float(event.get('strike_price') or 0)
+            expiration = event.get('expiration_date') or ''
+            contract_type = str(event.get('contract_type') or '').lower()
+            spot = float(event.get('underlying_price') or 0) or context['spot_price']
+        except (TypeError, ValueError):
+            self.prints_ignored += 1
+            return False
+        
+        # Same rows the snapshot counts: gamma, size and strike present, inside the DTE window
+        if not gamma or size <= 0 or not strike or not expiration or expiration > self._expiry_limits[ticker]:
+            self.prints_ignored += 1
+            return False
+        
+        gex_value = gamma * size * 100 * spot
+        if contract_type == 'put':
+            gex_value = -gex_value
+        if contract_type == 'call':
+            exposure.add(strike, gex=gex_value, call_oi=size)
+        else:
+            exposure.add(strike, gex=gex_value, put_oi=size)
+        
+        context.update(exposure.summary(context['spot_price']))
+        context['live_updated'] = time.time()
+        context['prints_applied'] += 1
+        self.prints_applied += 1
+        return True
     
     async def _get_spot_price(self, ticker: str, snapshot: List[Dict]) -> Optional[float]:
         """Extract spot price from snapshot or fetch separately"""
@@ -235,97 +403,6 @@ class ContextManager:
         except Exception:
             return None
     
-    def _calculate_gex(self, contracts: List[Dict], spot_price: float) -> Dict:
-        """
-        Calculate Net Gamma Exposure (GEX) from options chain.
-        
-        GEX Formula per strike:
-            Call GEX = Gamma × OI × 100 × Spot Price
-            Put GEX = Gamma × OI × 100 × Spot Price × -1 (negative)
-        
-        Net GEX > 0: Dealers are long gamma (stabilizing)
-        Net GEX < 0: Dealers are short gamma (amplifying)
-        """
-        total_gex = 0.0
-        gex_by_strike: Dict[float, float] = {}
-        call_oi_by_strike: Dict[float, int] = {}
-        put_oi_by_strike: Dict[float, int] = {}
-        
-        for contract in contracts:
-            # Extract data from Polygon snapshot format
-            details = contract.get('details', {}) or {}
-            greeks = contract.get('greeks', {}) or {}
-            
-            gamma = greeks.get('gamma', 0)
-            oi = contract.get('open_interest', 0)
-            strike = details.get('strike_price', 0)
-            contract_type = details.get('contract_type', '').lower()
-            
-            # Skip if missing critical data
-            if not gamma or not oi or not strike:
-                continue
-            
-            # Calculate dollar GEX
-            # Using strike as proxy (could use spot, but strike is more accurate for that strike's gamma)
-            gex_value = gamma * oi * 100 * spot_price
-            
-            if contract_type == 'put':
-                gex_value = -gex_value  # Puts are negative dealer gamma
-            
-            total_gex += gex_value
-            
-            # Accumulate by strike for flip level calculation
-            gex_by_strike[strike] = gex_by_strike.get(strike, 0) + gex_value
-            
-            # Track OI for wall detection
-            if contract_type == 'call':
-                call_oi_by_strike[strike] = call_oi_by_strike.get(strike, 0) + oi
-            else:
-                put_oi_by_strike[strike] = put_oi_by_strike.get(strike, 0) + oi
-        
-        # Determine regime
-        regime = "POSITIVE_GAMMA" if total_gex > 0 else "NEGATIVE_GAMMA"
-        
-        # Find Zero Gamma Flip Level (where cumulative GEX crosses zero)
-        flip_level = self._find_flip_level(gex_by_strike, spot_price)
-        
-        # Find Walls (strikes with max OI)
-        call_wall = max(call_oi_by_strike.keys(), key=lambda k: call_oi_by_strike[k], default=0)
-        put_wall = max(put_oi_by_strike.keys(), key=lambda k: put_oi_by_strike[k], default=0)
-        
-        return {
-            'regime': regime,
-            'net_gex': total_gex,
-            'flip_level': flip_level,
-            'call_wall': call_wall,
-            'put_wall': put_wall
-        }
-    
-    def _find_flip_level(self, gex_by_strike: Dict[float, float], spot_price: float) -> float:
-        """
-        Find the strike price where cumulative GEX flips from negative to positive.
-        
-        This is a critical level - below flip = amplified moves, above flip = stabilized.
-        """
-        if not gex_by_strike:
-            return 0.0
-        
-        sorted_strikes = sorted(gex_by_strike.keys())
-        cumulative_gex = 0.0
-        
-        for strike in sorted_strikes:
-            prev_gex = cumulative_gex
-            cumulative_gex += gex_by_strike[strike]
-            
-            # If sign changes, we crossed zero
-            if prev_gex < 0 and cumulative_gex > 0:
-                return strike
-            elif prev_gex > 0 and cumulative_gex < 0:
-                return strike
-        
-        # If no flip found, return closest strike to spot
-        return min(sorted_strikes, key=lambda s: abs(s - spot_price), default=0.0)
-    
     def get_context(self, ticker: str) -> Dict:
         """
         Get current market context for a ticker.
@@ -334,36 +411,80 @@ class ContextManager:
             ticker: Symbol to look up
         
         Returns:
-            Context dict with regime, GEX values, etc.
+            Context dict with regime, GEX values, age_seconds and stale.
             Returns neutral defaults if ticker not tracked.
         """
-        return self.state.get(ticker, {
-            'regime': 'NEUTRAL',
-            'net_gex': 0,
-            'G': 0.5,
-            'flip_level': 0,
-            'call_wall': 0,
-            'put_wall': 0,
-            'spot_price': 0,
-            'contracts_analyzed': 0,
-            'last_updated': 0
-        })
+        context = self.state.get(ticker)
+        if context is None:
+            return {
+                'regime': 'NEUTRAL',
+                'net_gex': 0,
+                'G': 0.5,
+                'flip_level': 0,
+                'call_wall': 0,
+                'put_wall': 0,
+                'resistance': 0,
+                'support': 0,
+                'spot_price': 0,
+                'contracts_analyzed': 0,
+                'last_updated': 0,
+                'age_seconds': None,
+                'stale': True
+            }
+        age = max(0.0, time.time() - context['last_updated'])
+        return {**context, 'age_seconds': age, 'stale': age > 2 * self.interval_for(ticker)}
+    
+    def get_exposure(self, ticker: str) -> Optional[StrikeExposure]:
+        """Live per-strike exposure profile for ticker (None until its first refresh)"""
+        return self._exposure.get(ticker)
+    
+    def context_age(self, ticker: str) -> Optional[float]:
+        """Seconds since ticker's context was refreshed, or None if it never was"""
+        context = self.state.get(ticker)
+        if context is None:
+            return None
+        return max(0.0, time.time() - context['last_updated'])
     
     def get_all_contexts(self) -> Dict[str, Dict]:
         """Get all tracked ticker contexts"""
-        return self.state.copy()
+        return {ticker: self.get_context(ticker) for ticker in self.state}
     
     def is_negative_gamma(self, ticker: str) -> bool:
         """Check if ticker is in negative gamma regime (high vol environment)"""
         return self.get_context(ticker).get('regime') == 'NEGATIVE_GAMMA'
     
+    @property
+    def refreshes_in_flight(self) -> int:
+        """Chain refreshes currently running"""
+        return len(self._in_flight)
+    
     def get_status(self) -> Dict:
         """Get engine status for monitoring"""
+        now = time.time()
+        ages = [age for age in (self.context_age(t) for t in self.tickers) if age is not None]
         return {
             'running': self._running,
             'tickers_tracked': len(self.tickers),
             'tickers_with_data': len(self.state),
             'update_interval': self.update_interval,
-            'last_update': self._last_full_update
+            'fast_interval': self.fast_interval,
+            'max_concurrency': self.max_concurrency,
+            'in_flight': sorted(self._in_flight),
+            'oldest_context_age': max(ages) if ages else None,
+            'last_update': self._last_full_update,
+            'incremental': self.incremental,
+            'prints_applied': self.prints_applied,
+            'prints_ignored': self.prints_ignored,
+            'tickers': {
+                ticker: {
+                    'age_seconds': self.context_age(ticker),
+                    'interval': self.interval_for(ticker),
+                    'next_due_in': (self._next_due[ticker] - now) if ticker in self._next_due else None,
+                    'prints_applied': self.state.get(ticker, {}).get('prints_applied', 0),
+                    'last_drift': self._drift.get(ticker),
+                    **self._refresh_stats.get(ticker, {'refreshes': 0, 'failures': 0, 'last_duration': None}),
+                }
+                for ticker in self.tickers
+            }
         }
 
@@ -0,0 +1,167 @@
+"""
+Per-key debounced, coalesced refresh triggers.
+
+Out-of-cycle refreshes (the $500K+ flow "Bridge" to the Gamma bot) can be
+requested many times a second for the same symbol during a burst of prints.
+The coalescer turns that into at most one refresh per key at a time:
+
+    - a trigger while a refresh is running marks one trailing run
+    - triggers inside min_interval of the last refresh are deferred to
+      last + min_interval and merged into that single trailing run
+    - a deferred run is dropped if the regular schedule refreshed the key
+      after the trigger arrived (last_refreshed hook)
+
+    coalescer = RefreshCoalescer('gamma', scan_symbol, min_interval=60)
+    coalescer.trigger('NVDA')   # never blocks, never launches duplicates
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Outcomes returned by trigger()
+STARTED = 'started'
+DEFERRED = 'deferred'
+COALESCED = 'coalesced'
+
+
+class RefreshCoalescer:
+    """
+    One in-flight refresh per key, rate limited by min_interval, with
+    trailing runs for triggers that arrive mid-refresh.
+
+    Usage:
+        coalescer = RefreshCoalescer(
+            'gamma', bot._scan_symbol, min_interval=60,
+            last_refreshed=bot.last_scan_started
+        )
+        coalescer.trigger('NVDA')
+        await coalescer.stop()
+    """
+
+    def __init__(self, name: str, refresh: Callable[[str], Awaitable[Any]], min_interval: float = 60.0,
+                 max_concurrency: int = 4, last_refreshed: Optional[Callable[[str], Optional[float]]] = None):
+        """
+        Args:
+            name: Label for logs and stats
+            refresh: Coroutine function refreshing one key
+            min_interval: Minimum seconds between refresh starts for a key
+            max_concurrency: Refreshes running at once across all keys
+            last_refreshed: Monotonic start time of the key's last refresh by
+                another path (e.g. the regular scan), or None
+        """
+        self.name = name
+        self.refresh = refresh
+        self.min_interval = min_interval
+        self.last_refreshed = last_refreshed
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[str, float] = {}     # key -> monotonic time of the latest unserved trigger
+        self._last_run: Dict[str, float] = {}    # key -> monotonic start of our last refresh
+        self._running: Set[str] = set()
+        self.triggers = 0
+        self.runs = 0
+        self.coalesced = 0
+        self.deferred = 0
+        self.absorbed = 0
+        self.errors = 0
+
+    def trigger(self, key: str) -> str:
+        """Request a refresh of key; returns STARTED, DEFERRED or COALESCED"""
+        self.triggers += 1
+        now = time.monotonic()
+        already_pending = key in self._pending
+        self._pending[key] = now
+
+        if already_pending or key in self._running:
+            self.coalesced += 1
+            return COALESCED
+
+        if key in self._workers:
+            # Worker is between runs (waiting on the concurrency limit)
+            self.coalesced += 1
+            return COALESCED
+
+        self._workers[key] = asyncio.create_task(self._drain(key), name=f"{self.name}_refresh:{key}")
+        if self._wait_for(key, now) > 0:
+            self.deferred += 1
+            return DEFERRED
+        return STARTED
+
+    def _last_start(self, key: str) -> Optional[float]:
+        last = self._last_run.get(key)
+        if self.last_refreshed is not None:
+            try:
+                external = self.last_refreshed(key)
+            except Exception:
+                external = None
+            if external is not None and (last is None or external > last):
+                last = external
+        return last
+
+    def _wait_for(self, key: str, now: float) -> float:
+        last = self._last_start(key)
+        if last is None:
+            return 0.0
+        return max(0.0, last + self.min_interval - now)
+
+    async def _drain(self, key: str):
+        """Serve the key's pending trigger until none is left"""
+        try:
+            while key in self._pending:
+                wait = self._wait_for(key, time.monotonic())
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+
+                requested = self._pending.pop(key)
+                last = self._last_start(key)
+                if last is not None and last >= requested:
+                    # A scheduled refresh started after the trigger arrived
+                    self.absorbed += 1
+                    continue
+
+                async with self._semaphore:
+                    self._running.add(key)
+                    self._last_run[key] = time.monotonic()
+                    self.runs += 1
+                    try:
+                        await self.refresh(key)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        self.errors += 1
+                        logger.error(f"[{self.name}] Triggered refresh for {key} failed: {e}")
+                    finally:
+                        self._running.discard(key)
+        finally:
+            self._workers.pop(key, None)
+            self._pending.pop(key, None)
+
+    async def stop(self):
+        """Cancel pending and running refreshes"""
+        tasks = list(self._workers.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @property
+    def in_flight(self) -> int:
+        """Keys with a running or scheduled refresh"""
+        return len(self._workers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'triggers': self.triggers,
+            'runs': self.runs,
+            'coalesced': self.coalesced,
+            'deferred': self.deferred,
+            'absorbed': self.absorbed,
+            'errors': self.errors,
+            'running': sorted(self._running),
+            'scheduled': sorted(set(self._workers) - self._running),
+        }
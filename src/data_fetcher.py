@@ -13,6 +13,8 @@ import logging
 from asyncio import Semaphore
 import json
 import time
+import numpy as np
+from dateutil.tz import tzlocal
 
 from src.config import Config
 from src.utils.resilience import exponential_backoff_retry, polygon_rate_limiter, api_circuit_breaker
@@ -24,7 +26,10 @@ from src.utils.validation import DataValidator, SafeCalculations
 from src.utils.cache import cached, cache_manager, MarketDataCache
 from src.utils.ticker_translation import translate_ticker
 from src.utils.volume_cache import volume_cache
-from src.utils.gamma_profile import compute_gamma_profile
+from src.utils.chain_analytics import chain_analytics
+from src.utils.calculations import fill_missing_greeks
+from src.utils.flow_detection import ChainColumns, detect_flows_columnar, detect_flows_legacy
+from src.utils.scan_scheduler import scan_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +38,7 @@ class DataFetcher:
     
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.base_url = "https://api.polygon.io"
+        self.base_url = getattr(Config, 'POLYGON_BASE_URL', 'https://api.polygon.io').rstrip('/')
         self.session = None
         self.connector = None
         self.semaphore = Semaphore(5)  # Additional concurrency control
@@ -202,6 +207,7 @@ class DataFetcher:
         
         # Apply rate limiting
         await polygon_rate_limiter.acquire()
+        scan_scheduler.record_request()
         
         # Check circuit breaker
         try:
@@ -224,6 +230,7 @@ class DataFetcher:
                 async with self.session.get(url, params=params) as response:
                     # Handle rate limiting
                     if response.status == 429:
+                        scan_scheduler.record_rate_limited()
                         retry_after = int(response.headers.get('Retry-After', 60))
                         raise RateLimitException(
                             f"Rate limit exceeded. Retry after {retry_after} seconds",
@@ -587,56 +594,60 @@ class DataFetcher:
             return []
 
     async def get_options_trades(self, symbol: str, date: Optional[str] = None) -> pd.DataFrame:
-        """Get options trades for a symbol with concurrent fetching"""
+        """
+        Get minute-bar options trades for a symbol's most active contracts.
+        
+        One chain snapshot (columnar) picks the OPTIONS_TRADES_CONTRACTS
+        contracts with the highest day volume; their minute bars are then
+        fetched concurrently (OPTIONS_FETCH_CONCURRENCY at a time, under the
+        API rate limiter).
+        """
         try:
             if not date:
                 date = datetime.now().strftime('%Y-%m-%d')
             
-            # Get options contracts first
-            contracts = await self.get_options_chain(symbol)
-            if contracts.empty:
+            contracts = await self.get_option_chain_snapshot(
+                symbol, max_contracts=getattr(Config, 'OPTIONS_CHAIN_MAX_CONTRACTS', 1000)
+            )
+            if not contracts:
+                return pd.DataFrame()
+            
+            # Select most active contracts by day volume (vectorized over the chain)
+            columns = ChainColumns(contracts)
+            rows = columns.top_by_volume(getattr(Config, 'OPTIONS_TRADES_CONTRACTS', 20))
+            if not len(rows):
                 return pd.DataFrame()
+            is_call, _ = columns.contract_sides(rows)
             
-            # Select most active contracts based on available data
-            # Try volume first, fall back to other fields if not available
-            if 'volume' in contracts.columns and contracts['volume'].notna().any():
-                active_contracts = contracts.nlargest(20, 'volume', keep='all').head(30)
-            elif 'open_interest' in contracts.columns and contracts['open_interest'].notna().any():
-                active_contracts = contracts.nlargest(20, 'open_interest', keep='all').head(30)
-            else:
-                # Just take first 20 if no volume/OI data
-                active_contracts = contracts.head(20)
+            semaphore = asyncio.Semaphore(getattr(Config, 'OPTIONS_FETCH_CONCURRENCY', 10))
             
-            # Fetch trades concurrently for better performance
-            tasks = []
-            for _, contract in active_contracts.iterrows():
-                ticker = contract.get('ticker', '')
-                if ticker:
-                    task = self._fetch_contract_trades(
-                        symbol, ticker, contract, date
+            async def fetch(row: int, call: bool) -> pd.DataFrame:
+                details = contracts[row].get('details', {}) or {}
+                async with semaphore:
+                    return await self._fetch_contract_trades(
+                        symbol, columns.tickers[row], 'CALL' if call else 'PUT',
+                        details.get('strike_price', 0), details.get('expiration_date', ''), date
                     )
-                    tasks.append(task)
             
-            # Wait for all trades with timeout
-            try:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-            except asyncio.TimeoutError:
-                logger.warning(f"Timeout fetching options trades for {symbol}")
-                results = []
+            results = await asyncio.gather(
+                *(fetch(row, call) for row, call in zip(rows.tolist(), is_call.tolist())),
+                return_exceptions=True
+            )
             
             # Combine results
-            all_trades = []
+            frames = []
             for result in results:
-                if isinstance(result, list):
-                    all_trades.extend(result)
+                if isinstance(result, pd.DataFrame):
+                    if not result.empty:
+                        frames.append(result)
                 elif isinstance(result, Exception):
                     logger.debug(f"Error in trade fetch: {result}")
             
-            if not all_trades:
+            if not frames:
                 return pd.DataFrame()
             
             # Create DataFrame with validation
-            df = pd.DataFrame(all_trades)
+            df = pd.concat(frames, ignore_index=True)
             df = DataValidator.validate_dataframe(
                 df,
                 required_columns=['symbol', 'contract', 'type', 'strike', 'expiration', 
@@ -663,93 +674,79 @@ class DataFetcher:
     
     @cached(cache_name='market', ttl_seconds=60)
     async def _fetch_contract_trades(
-        self, symbol: str, ticker: str, contract: pd.Series, date: str
-    ) -> List[Dict]:
-        """Fetch trades for a single contract"""
+        self, symbol: str, ticker: str, contract_type: str, strike: float, expiration: str, date: str
+    ) -> pd.DataFrame:
+        """Minute bars for a single contract as trade rows (built column-wise)"""
         try:
             endpoint = f"/v2/aggs/ticker/{ticker}/range/1/minute/{date}/{date}"
             params = {'adjusted': 'true', 'sort': 'desc', 'limit': 5000}
             
             data = await self._make_request(endpoint, params)
+            if not data or not data.get('results'):
+                return pd.DataFrame()
             
-            trades = []
-            if data and 'results' in data:
-                for bar in data['results']:
-                    try:
-                        # Validate bar data
-                        if bar.get('v', 0) > 0 and bar.get('c', 0) > 0:
-                            trade = {
-                                'symbol': symbol,
-                                'contract': ticker,
-                                'type': 'CALL' if (isinstance(ticker, str) and 'C' in ticker) else 'PUT',
-                                'strike': DataValidator.validate_price(
-                                    contract.get('strike_price', 0), 'strike'
-                                ),
-                                'expiration': contract.get('expiration_date', ''),
-                                'timestamp': datetime.fromtimestamp(bar['t'] / 1000),
-                                'price': DataValidator.validate_price(bar['c'], 'price'),
-                                'volume': DataValidator.validate_volume(bar['v']),
-                                'vwap': bar.get('vw', bar['c']),
-                                'size': bar['v'],
-                                'premium': bar['v'] * bar['c'] * 100  # Contract multiplier
-                            }
-                            trades.append(trade)
-                    except DataValidationException as e:
-                        logger.debug(f"Skipping invalid trade data: {e}")
-                        continue
+            try:
+                strike = DataValidator.validate_price(strike, 'strike')
+            except DataValidationException as e:
+                logger.debug(f"Skipping {ticker}: {e}")
+                return pd.DataFrame()
             
-            return trades
+            bars = pd.DataFrame.from_records(data['results'], columns=['t', 'c', 'v', 'vw'])
+            close = pd.to_numeric(bars['c'], errors='coerce')
+            volume = pd.to_numeric(bars['v'], errors='coerce')
+            # Same rules as the per-bar validators: positive finite price, traded volume
+            keep = (volume > 0) & (close > 0) & np.isfinite(close) & bars['t'].notna()
+            bars, close, volume = bars[keep], close[keep], volume[keep]
+            if bars.empty:
+                return pd.DataFrame()
+            
+            timestamps = (pd.to_datetime(bars['t'].astype('int64'), unit='ms', utc=True)
+                          .dt.tz_convert(tzlocal()).dt.tz_localize(None))
+            return pd.DataFrame({
+                'symbol': symbol,
+                'contract': ticker,
+                'type': contract_type,
+                'strike': strike,
+                'expiration': expiration,
+                'timestamp': timestamps.to_numpy(),
+                'price': close.to_numpy(dtype=np.float64),
+                'volume': volume.to_numpy().astype(np.int64),
+                'vwap': pd.to_numeric(bars['vw'], errors='coerce').fillna(close).to_numpy(),
+                'size': volume.to_numpy(),
+                'premium': (volume * close * 100).to_numpy(),  # Contract multiplier
+            })
             
         except Exception as e:
             logger.debug(f"Error fetching trades for {ticker}: {e}")
-            return []
+            return pd.DataFrame()
         
     async def get_options_snapshot(self, symbol: str) -> Dict:
-        """Get current options snapshot"""
-        # Get underlying price first
-        underlying_price = await self.get_stock_price(symbol)
+        """
+        Get current options snapshot: call/put volume, open interest and P/C ratio.
         
-        # Get options chain
-        contracts = await self.get_options_chain(symbol)
+        Built from one chain snapshot (paginated, capped at
+        OPTIONS_CHAIN_MAX_CONTRACTS) fetched alongside the underlying price,
+        instead of one contract snapshot request per contract.
+        """
+        underlying_price, contracts = await asyncio.gather(
+            self.get_stock_price(symbol),
+            self.get_option_chain_snapshot(
+                symbol, max_contracts=getattr(Config, 'OPTIONS_CHAIN_MAX_CONTRACTS', 1000)
+            )
+        )
         
-        if contracts.empty:
+        if not contracts:
             return {}
-            
-        # Calculate metrics
-        total_call_volume = 0
-        total_put_volume = 0
-        total_call_oi = 0
-        total_put_oi = 0
         
-        # Get snapshot for each contract
-        for _, contract in contracts.head(50).iterrows():
-            ticker = contract.get('ticker', '')
-            if not ticker:
-                continue
-                
-            endpoint = f"/v2/snapshot/options/contracts/{ticker}"
-            data = await self._make_request(endpoint)
-            
-            if data and 'results' in data:
-                result = data['results']
-                volume = result.get('day', {}).get('volume', 0)
-                oi = result.get('open_interest', 0)
-                
-                if isinstance(ticker, str) and 'C' in ticker:
-                    total_call_volume += volume
-                    total_call_oi += oi
-                else:
-                    total_put_volume += volume
-                    total_put_oi += oi
-                    
+        totals = ChainColumns(contracts).side_totals()
         return {
             'symbol': symbol,
             'underlying_price': underlying_price,
-            'total_call_volume': total_call_volume,
-            'total_put_volume': total_put_volume,
-            'total_call_oi': total_call_oi,
-            'total_put_oi': total_put_oi,
-            'put_call_ratio': total_put_volume / max(total_call_volume, 1),
+            'total_call_volume': totals['call_volume'],
+            'total_put_volume': totals['put_volume'],
+            'total_call_oi': totals['call_oi'],
+            'total_put_oi': totals['put_oi'],
+            'put_call_ratio': totals['put_volume'] / max(totals['call_volume'], 1),
             'timestamp': datetime.now()
         }
         
@@ -805,7 +802,8 @@ class DataFetcher:
         underlying: str,
         contract_type: Optional[str] = None,
         max_contracts: Optional[int] = None,
-        expiration_date_lte: Optional[str] = None
+        expiration_date_lte: Optional[str] = None,
+        fill_greeks: bool = False
     ) -> List[Dict]:
         """
         Get complete snapshot of all options contracts for an underlying ticker.
@@ -824,6 +822,9 @@ class DataFetcher:
             contract_type: Filter by 'call' or 'put', None for both
             max_contracts: Maximum number of contracts to fetch (stops pagination early)
             expiration_date_lte: Only fetch contracts expiring on or before this date (YYYY-MM-DD)
+            fill_greeks: Estimate Greeks in place for contracts Polygon sent without
+                them (greeks['estimated']); off by default so chain consumers only
+                see Polygon's Greeks unless they ask
 
         Returns:
             List of contract dictionaries with complete market data
@@ -905,6 +906,14 @@ class DataFetcher:
                     f"Retrieved option chain snapshot for {underlying}: "
                     f"{len(all_results)} contracts"
                 )
+                if fill_greeks and getattr(Config, 'GREEKS_BACKFILL_ENABLED', True):
+                    # Best effort: a bad contract must not cost the caller the whole chain
+                    try:
+                        filled = fill_missing_greeks(all_results)
+                        if filled:
+                            logger.debug(f"{underlying}: estimated Greeks for {filled} contracts")
+                    except Exception as e:
+                        logger.warning(f"{underlying}: Greeks backfill failed, returning chain as fetched: {e}")
                 return all_results
 
             logger.debug(f"No option contracts found for {underlying}")
@@ -1006,7 +1015,7 @@ class DataFetcher:
             if not spot_price:
                 return None
 
-            return compute_gamma_profile(contracts, spot_price)
+            return chain_analytics.analyze(underlying, contracts, spot_price)['profile']
         except Exception as exc:
             logger.error(f"Error computing gamma profile for {underlying}: {exc}")
             return None
@@ -1120,226 +1129,46 @@ class DataFetcher:
             
             logger.debug(f"{underlying}: Got {len(current_snapshot)} contracts from snapshot")
 
-            # Step 2: Get volume data from cache for comparison
-            cached_volumes = {}
-            volume_cache_key = f"{underlying}_volumes"
-            volume_cache = cache_manager.get_cache('volume')  # Get cache instance
-            cached_data = await volume_cache.get(volume_cache_key)
-            if cached_data:
-                cached_volumes = cached_data
-                logger.debug(f"{underlying}: Found cached volumes for {len(cached_volumes)} contracts")
-            else:
+            # Step 2: Previous-scan volumes from the baseline store
+            if not volume_cache.has(underlying):
                 logger.info(f"{underlying}: No cached volumes, first scan")
 
-            # Step 3: Aggregate trades for each contract
-            flows = []
-            max_results = 25
-
-            # Diagnostic counters
-            total_contracts = len(current_snapshot)
-            contracts_with_trades = 0
-            contracts_with_delta = 0
-            contracts_with_premium = 0
-
-            for contract in current_snapshot:
-                try:
-                    # Extract contract data with validation
+            # Steps 3-5: Volume deltas, vol/OI, premium and intensity per contract
+            # Step 6: Replace the baseline with this scan's volumes
+            if getattr(Config, 'FLOW_DETECT_VECTORIZED', True):
+                columns = ChainColumns(current_snapshot)
+                flows, diagnostics = detect_flows_columnar(
+                    columns,
+                    volume_cache.baseline_for(underlying, columns.tickers),
+                    underlying,
+                    min_premium,
+                    min_volume_delta,
+                    self._convert_polygon_timestamp,
+                )
+                volume_cache.update(underlying, columns.tickers, columns.volume)
+            else:
+                flows, diagnostics = detect_flows_legacy(
+                    current_snapshot,
+                    volume_cache.get_volumes(underlying),
+                    underlying,
+                    min_premium,
+                    min_volume_delta,
+                    self._convert_polygon_timestamp,
+                )
+                new_volumes = {}
+                for contract in current_snapshot:
                     details = contract.get('details', {}) or {}
                     ticker = contract.get('ticker') or details.get('ticker', '')
-                    if not ticker:
-                        continue
-
-                    day_data = contract.get('day', {}) or {}
-                    last_trade = contract.get('last_trade') or {}
-                    last_quote = contract.get('last_quote') or {}
-                    current_day_volume = day_data.get('volume', 0)
-
-                    if current_day_volume > 0:
-                        contracts_with_trades += 1
-
-                    # Derive last traded price with sensible fallbacks
-                    last_price = day_data.get('close')
-                    if not last_price or last_price <= 0:
-                        quote_last = last_quote.get('last')
-
-                        price_candidates = [
-                            last_trade.get('price'),
-                            last_trade.get('p'),
-                        ]
-
-                        if isinstance(quote_last, dict):
-                            price_candidates.extend([
-                                quote_last.get('price'),
-                                quote_last.get('p'),
-                            ])
-
-                        price_candidates.extend([
-                            last_quote.get('midpoint'),
-                            last_quote.get('bid'),
-                            last_quote.get('ask'),
-                            day_data.get('open'),
-                            day_data.get('high'),
-                            day_data.get('low'),
-                        ])
-
-                        for candidate in price_candidates:
-                            if candidate and candidate > 0:
-                                last_price = candidate
-                                break
-
-                    # Skip if no usable price data
-                    if not last_price or last_price <= 0:
-                        continue
-                    last_price = DataValidator.validate_price(last_price, 'price')
-
-                    # Step 4: Calculate volume delta by comparing with cached volume
-                    cached_volume = cached_volumes.get(ticker, 0)
-                    volume_delta = current_day_volume - cached_volume
-                    
-                    # If first scan or negative delta (market reset), use current volume
-                    # Cap at 5000 to prevent extreme values while allowing institutional flows through
-                    if volume_delta <= 0:
-                        volume_delta = min(current_day_volume, 5000)
-
-                    # Filter: Must have significant volume
-                    if volume_delta < min_volume_delta:
-                        continue
-
-                    contracts_with_delta += 1
-
-                    # Calculate flow intensity based on volume/OI ratio and premium
-                    flow_intensity = "NORMAL"
-                    vol_oi_ratio = 0.0
-                    
-                    # Get open interest for ratio calculation
-                    open_interest = contract.get('open_interest', 0)
-                    
-                    if open_interest > 0:
-                        vol_oi_ratio = volume_delta / open_interest
-                        if vol_oi_ratio >= 0.5:
-                            flow_intensity = "AGGRESSIVE"  # 50%+ of OI
-                        elif vol_oi_ratio >= 0.2:
-                            flow_intensity = "STRONG"      # 20-50% of OI
-                        elif vol_oi_ratio >= 0.1:
-                            flow_intensity = "MODERATE"    # 10-20% of OI
-
-                    # Calculate premium for the delta volume
-                    premium = volume_delta * last_price * 100  # Options multiplier
-
-                    # Filter: Must meet premium threshold
-                    if premium < min_premium:
-                        continue
-
-                    contracts_with_premium += 1
-
-                    # Get contract details
-                    strike = details.get('strike_price', 0)
-                    expiration = details.get('expiration_date', '')
-                    contract_type = details.get('contract_type', '')
-
-                    # Get Greeks
-                    greeks = contract.get('greeks', {})
-                    delta_greek = greeks.get('delta', 0)
-                    gamma = greeks.get('gamma', 0)
-                    theta = greeks.get('theta', 0)
-                    vega = greeks.get('vega', 0)
-
-                    # Get additional metrics
-                    implied_vol = contract.get('implied_volatility', 0)
-
-                    # Get underlying price
-                    underlying_asset = contract.get('underlying_asset', {})
-                    underlying_price = underlying_asset.get('price', 0)
-
-                    # Determine option type - ensure ticker is string
-                    if not isinstance(ticker, str):
-                        logger.warning(f"Ticker is not a string: {ticker} (type: {type(ticker)})")
-                        ticker = str(ticker) if ticker else ''
-                    
-                    option_type = 'CALL' if contract_type == 'call' or (isinstance(ticker, str) and 'C' in ticker) else 'PUT'
-
-                    # Extract quote-based metrics for downstream consumers
-                    bid_price = last_quote.get('bid')
-                    if isinstance(bid_price, dict):
-                        bid_price = bid_price.get('price') or bid_price.get('p') or bid_price.get('midpoint')
-                    if bid_price:
-                        try:
-                            bid_price = DataValidator.validate_price(bid_price, 'bid')
-                        except DataValidationException:
-                            bid_price = None
-
-                    ask_price = last_quote.get('ask')
-                    if isinstance(ask_price, dict):
-                        ask_price = ask_price.get('price') or ask_price.get('p') or ask_price.get('midpoint')
-                    if ask_price:
-                        try:
-                            ask_price = DataValidator.validate_price(ask_price, 'ask')
-                        except DataValidationException:
-                            ask_price = None
-
-                    bid_size = last_quote.get('bid_size') or last_quote.get('bidSize') or 0
-                    ask_size = last_quote.get('ask_size') or last_quote.get('askSize') or 0
-
-                    last_trade_timestamp = self._convert_polygon_timestamp(
-                        last_trade.get('timestamp') or
-                        last_trade.get('sip_timestamp') or
-                        last_trade.get('participant_timestamp') or
-                        last_trade.get('t')
-                    )
-                    if not last_trade_timestamp:
-                        last_trade_timestamp = self._convert_polygon_timestamp(day_data.get('last_updated'))
-
-                    # Create flow signal
-                    flow = {
-                        'ticker': ticker,
-                        'underlying': underlying,
-                        'type': option_type,
-                        'strike': DataValidator.validate_price(strike, 'strike'),
-                        'expiration': expiration,
-                        'volume_delta': volume_delta,
-                        'total_volume': current_day_volume,
-                        'open_interest': open_interest,
-                        'vol_oi_ratio': vol_oi_ratio,
-                        'last_price': last_price,
-                        'premium': premium,
-                        'implied_volatility': implied_vol,
-                        'delta': delta_greek,
-                        'gamma': gamma,
-                        'theta': theta,
-                        'vega': vega,
-                        'underlying_price': underlying_price,
-                        'timestamp': datetime.now(),
-                        'last_trade_timestamp': last_trade_timestamp,
-                        'flow_intensity': flow_intensity,
-                        'bid': bid_price or 0,
-                        'ask': ask_price or 0,
-                        'bid_size': int(bid_size) if isinstance(bid_size, (int, float)) and bid_size is not None else 0,
-                        'ask_size': int(ask_size) if isinstance(ask_size, (int, float)) and ask_size is not None else 0,
-                    }
-
-                    flows.append(flow)
-                    if len(flows) >= max_results:
-                        break
-
-                except DataValidationException as e:
-                    logger.debug(f"Skipping invalid contract data: {e}")
-                    continue
-                except Exception as e:
-                    logger.debug(f"Error processing contract {ticker}: {e}")
-                    continue
-
-            # Step 6: Update volume cache with current volumes
-            new_volumes = {}
-            for contract in current_snapshot:
-                details = contract.get('details', {}) or {}
-                ticker = contract.get('ticker') or details.get('ticker', '')
-                day_data = contract.get('day', {})
-                volume = day_data.get('volume', 0)
-                if ticker and volume > 0:
-                    new_volumes[ticker] = volume
-            
-            # Save to cache
-            await volume_cache.set(volume_cache_key, new_volumes, ttl_seconds=14400)  # 4 hours
+                    day_data = contract.get('day', {})
+                    volume = day_data.get('volume', 0)
+                    if ticker and volume > 0:
+                        new_volumes[ticker] = volume
+                volume_cache.update_from_mapping(underlying, new_volumes)
+
+            total_contracts = diagnostics['total_contracts']
+            contracts_with_trades = diagnostics['contracts_with_trades']
+            contracts_with_delta = diagnostics['contracts_with_delta']
+            contracts_with_premium = diagnostics['contracts_with_premium']
             
             # Step 7: Sort by premium (highest first) and return
             flows_sorted = sorted(flows, key=lambda x: x['premium'], reverse=True)
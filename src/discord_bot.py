@@ -12,7 +12,10 @@ from typing import Dict
 from src.data_fetcher import DataFetcher
 from src.options_analyzer import OptionsAnalyzer
 from src.flow_scanner import ORAKLFlowScanner
+from src.flow_leaderboard import FlowLeaderboard
 from src.config import Config
+from src.utils.chart_renderer import chart_renderer
+from src.utils.flow_aggregates import flow_aggregates
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +33,7 @@ class ORAKLBot(commands.Bot):
         self.fetcher = DataFetcher(Config.POLYGON_API_KEY)
         self.analyzer = OptionsAnalyzer()
         self.scanner = ORAKLFlowScanner(self.fetcher, self.analyzer)
+        self.flow_leaderboard = FlowLeaderboard(self.fetcher, self.analyzer, flow_aggregates=flow_aggregates)
         self.start_time = datetime.now()
         
         # Register commands
@@ -48,6 +52,11 @@ class ORAKLBot(commands.Bot):
             )
         )
         
+        # Spawn chart workers now so the first chart command isn't a cold start
+        if not getattr(self, '_charts_warmed', False):
+            self._charts_warmed = True
+            asyncio.create_task(chart_renderer.warm_up())
+
         # Start status update task (if not already running)
         if not self.status_update.is_running():
             self.status_update.start()
@@ -0,0 +1,183 @@
+"""
+ORAKL Flow Leaderboard - Cached Top Flow Service
+
+Backs the `topflow` command. Instead of walking the watchlist one ticker
+at a time (each get_options_trades call is a chain fetch plus up to 30
+minute-aggregate calls), the leaderboard:
+
+- Prefers rolling Kafka flow aggregates for a ticker when an aggregate
+  source is attached and has enough prints for that ticker
+- Falls back to REST for the rest, gathered concurrently (Polygon calls are
+  still paced by the shared polygon_rate_limiter inside DataFetcher)
+- Serves a short-TTL precomputed result; slightly stale results are served
+  immediately while a single background rebuild runs
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Any
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class FlowLeaderboard:
+    """
+    Short-TTL leaderboard of per-ticker flow sentiment.
+
+    Usage:
+        leaderboard = FlowLeaderboard(fetcher, analyzer)
+        results = await leaderboard.get_leaderboard(Config.WATCHLIST[:30])
+    """
+
+    def __init__(self, fetcher, analyzer, flow_aggregates=None):
+        """
+        Initialize leaderboard.
+
+        Args:
+            fetcher: DataFetcher used for the REST fallback
+            analyzer: OptionsAnalyzer used to score REST trades
+            flow_aggregates: Optional rolling aggregate source exposing
+                get_sentiment(symbol) -> Optional[Dict]
+        """
+        self.fetcher = fetcher
+        self.analyzer = analyzer
+        self.flow_aggregates = flow_aggregates
+
+        self.ttl = getattr(Config, 'TOPFLOW_CACHE_TTL', 120)
+        self.max_stale = getattr(Config, 'TOPFLOW_MAX_STALE', 600)
+        self.concurrency = getattr(Config, 'TOPFLOW_CONCURRENCY', 8)
+        self.ticker_timeout = getattr(Config, 'SYMBOL_SCAN_TIMEOUT', 60)
+
+        self._results: List[Dict] = []
+        self._tickers_key: Optional[tuple] = None
+        self._built_at = 0.0
+        self._build_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'builds': 0,
+            'cache_hits': 0,
+            'stale_served': 0,
+            'from_stream': 0,
+            'from_rest': 0,
+            'last_build_seconds': 0.0,
+        }
+
+    def set_flow_aggregates(self, flow_aggregates):
+        """Attach a rolling aggregate source (e.g. fed by the Kafka stream)"""
+        self.flow_aggregates = flow_aggregates
+
+    async def get_leaderboard(self, tickers: List[str], force: bool = False) -> List[Dict]:
+        """
+        Get sentiment results for tickers.
+
+        Args:
+            tickers: Tickers to rank
+            force: Rebuild even when a fresh result is cached
+
+        Returns:
+            List of {'ticker', 'sentiment', 'score', 'source'} dicts
+        """
+        key = tuple(tickers)
+        age = time.time() - self._built_at
+        same_universe = key == self._tickers_key
+
+        if not force and same_universe and self._results:
+            if age <= self.ttl:
+                self.stats['cache_hits'] += 1
+                return list(self._results)
+            if age <= self.max_stale:
+                # Serve stale immediately, refresh once in the background
+                self.stats['stale_served'] += 1
+                self._ensure_build(key)
+                return list(self._results)
+
+        task = self._ensure_build(key)
+        return list(await asyncio.shield(task))
+
+    def _ensure_build(self, key: tuple) -> asyncio.Task:
+        """Start a rebuild unless one is already running for this universe"""
+        task = self._build_task
+        if task is None or task.done() or getattr(task, 'tickers_key', None) != key:
+            task = asyncio.create_task(self._build(key))
+            task.tickers_key = key
+            self._build_task = task
+        return task
+
+    async def _build(self, key: tuple) -> List[Dict]:
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def score(ticker: str) -> Optional[Dict]:
+            result = self._score_from_stream(ticker)
+            if result:
+                self.stats['from_stream'] += 1
+                return result
+            async with semaphore:
+                result = await self._score_from_rest(ticker)
+            if result:
+                self.stats['from_rest'] += 1
+            return result
+
+        scored = await asyncio.gather(*(score(t) for t in key), return_exceptions=True)
+        results = [r for r in scored if isinstance(r, dict)]
+
+        self._results = results
+        self._tickers_key = key
+        self._built_at = time.time()
+        self.stats['builds'] += 1
+        self.stats['last_build_seconds'] = round(time.perf_counter() - start, 2)
+
+        logger.info(
+            f"📊 Top flow leaderboard built: {len(results)}/{len(key)} tickers "
+            f"in {self.stats['last_build_seconds']:.1f}s"
+        )
+        return results
+
+    def _score_from_stream(self, ticker: str) -> Optional[Dict]:
+        if self.flow_aggregates is None:
+            return None
+        try:
+            sentiment = self.flow_aggregates.get_sentiment(ticker)
+        except Exception as e:
+            logger.debug(f"Flow aggregate lookup failed for {ticker}: {e}")
+            return None
+        if not sentiment:
+            return None
+        return {
+            'ticker': ticker,
+            'sentiment': sentiment['sentiment'],
+            'score': sentiment['score'],
+            'source': 'stream',
+        }
+
+    async def _score_from_rest(self, ticker: str) -> Optional[Dict]:
+        try:
+            trades = await asyncio.wait_for(
+                self.fetcher.get_options_trades(ticker),
+                timeout=self.ticker_timeout
+            )
+            if trades.empty:
+                return None
+            sentiment = self.analyzer.calculate_flow_sentiment(ticker, trades)
+            return {
+                'ticker': ticker,
+                'sentiment': sentiment['sentiment'],
+                'score': sentiment['score'],
+                'source': 'rest',
+            }
+        except asyncio.TimeoutError:
+            logger.debug(f"Top flow fetch timed out for {ticker}")
+        except Exception as e:
+            logger.debug(f"Top flow fetch failed for {ticker}: {e}")
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Leaderboard statistics"""
+        return {
+            **self.stats,
+            'cached_tickers': len(self._results),
+            'age_seconds': round(time.time() - self._built_at, 1) if self._built_at else None,
+        }
@@ -12,6 +12,7 @@ import pandas as pd
 from src.config import Config
 from src.data_fetcher import DataFetcher
 from src.options_analyzer import OptionsAnalyzer
+from src.utils.flow_aggregates import flow_aggregates
 
 logger = logging.getLogger(__name__)
 
@@ -35,27 +36,36 @@ class ORAKLFlowScanner:
                 logger.warning(f"Could not get price for {symbol}")
                 return signals
                 
-            # Get options trades
-            trades = await self.fetcher.get_options_trades(symbol)
-            if trades.empty:
-                return signals
+            # Per-contract totals: exact running totals from the Kafka stream
+            # (its trades frame keeps only the top prints per bucket), REST otherwise
+            if flow_aggregates.has_flow(symbol):
+                flow_analysis = flow_aggregates.get_flow_analysis(symbol)
+                contracts = flow_aggregates.get_contracts_frame(symbol)
+                if contracts.empty:
+                    return signals
+                contracts = contracts[contracts['volume'] >= Config.MIN_VOLUME]
+            else:
+                trades = await self.fetcher.get_options_trades(symbol)
+                if trades.empty:
+                    return signals
+                    
+                # Analyze flow
+                flow_analysis = self.analyzer.analyze_flow(trades)
                 
-            # Analyze flow
-            flow_analysis = self.analyzer.analyze_flow(trades)
-            
-            # Filter for significant trades
-            significant_trades = trades[
-                (trades['premium'] >= Config.MIN_PREMIUM) &
-                (trades['volume'] >= Config.MIN_VOLUME)
-            ]
+                # Filter for significant trades, then group by contract
+                significant_trades = trades[
+                    (trades['premium'] >= Config.MIN_PREMIUM) &
+                    (trades['volume'] >= Config.MIN_VOLUME)
+                ]
+                contracts = significant_trades.groupby(
+                    ['contract', 'type', 'strike', 'expiration'], as_index=False
+                ).agg(premium=('premium', 'sum'), volume=('volume', 'sum'), price=('price', 'mean'))
             
-            # Group by contract
-            for (contract, option_type, strike, expiration), group in significant_trades.groupby(
-                ['contract', 'type', 'strike', 'expiration']
-            ):
-                total_premium = group['premium'].sum()
-                total_volume = group['volume'].sum()
-                avg_price = group['price'].mean()
+            for row in contracts.itertuples(index=False):
+                contract, option_type, strike, expiration = row.contract, row.type, row.strike, row.expiration
+                total_premium = row.premium
+                total_volume = row.volume
+                avg_price = row.price
                 
                 # Check for minimum thresholds
                 if total_premium < Config.MIN_PREMIUM:
@@ -253,7 +263,11 @@ class ORAKLFlowScanner:
                     del self.alert_history[symbol]
                     
     async def get_flow_summary(self, symbol: str) -> Dict:
-        """Get comprehensive flow summary for a symbol"""
+        """Get comprehensive flow summary for a symbol (Kafka stream first, REST otherwise)"""
+        summary = flow_aggregates.get_flow_summary(symbol)
+        if summary:
+            return summary
+            
         try:
             # Get trades
             trades = await self.fetcher.get_options_trades(symbol)
@@ -16,10 +16,12 @@ import json
 import logging
 import time
 from datetime import datetime
-from typing import Callable, Dict, Optional, Any
+from typing import Callable, Dict, Optional, Any, Set
 from confluent_kafka import Consumer, KafkaError, KafkaException
 
 from src.config import Config
+from src.utils.options_parser import parse_contract_ticker
+from src.utils.tracing import current_trace, event_tracer, mark, source_time
 
 logger = logging.getLogger(__name__)
 
@@ -140,6 +142,11 @@ class KafkaFlowListener:
         self._fallback_triggered = False
         self._last_stats_log_ts: float = time.time()
         self._stats_log_interval_seconds: int = int(getattr(Config, "KAFKA_STATS_LOG_INTERVAL_SECONDS", 60))
+        # Dispatches still running (strong refs, so fire-and-forget tasks are not collected)
+        self._pending: Set[asyncio.Task] = set()
+        # Optional raw message capture (JSON lines) for scripts/replay_kafka.py
+        self._capture_path: str = getattr(Config, 'KAFKA_CAPTURE_PATH', '')
+        self._capture = None
         
     def _get_kafka_config(self) -> Dict[str, str]:
         """
@@ -184,6 +191,8 @@ class KafkaFlowListener:
         Returns:
             Parsed trade dict in ORAKL format, or None if invalid
         """
+        # Latency trace for this event; stays active while the message is handed off
+        trace = event_tracer.begin()
         try:
             raw_data = json.loads(msg_value.decode('utf-8'))
 
@@ -287,10 +296,14 @@ class KafkaFlowListener:
                 trade_data['event_timestamp'] = datetime.utcnow().isoformat()
             
             logger.debug(
-                f"Kafka parsed: {trade_data['symbol']} | "
-                f"Contract: {trade_data['contract_ticker']} | "
-                f"Premium: ${trade_data['premium']:,.0f}"
+                "Kafka parsed: %s | Contract: %s | Premium: $%.0f",
+                trade_data['symbol'], trade_data['contract_ticker'], trade_data['premium']
             )
+            if trace is not None:
+                trace.source_ts = source_time(raw_data.get('timestamp'))
+                trace.symbol = symbol_value
+                trace.contract = option_symbol
+                trace.mark('parsed')
             
             return trade_data
             
@@ -314,21 +327,10 @@ class KafkaFlowListener:
         Returns:
             Root symbol (e.g., "AAPL", "SPXW") - NOT normalized
         """
-        ticker = contract_ticker
-        
-        # Strip O: prefix if present
-        if ticker.startswith('O:'):
-            ticker = ticker[2:]
-        
-        # Extract letters at the beginning
-        root = ''
-        for char in ticker:
-            if char.isalpha():
-                root += char
-            else:
-                break
-        
-        return root if root else ticker[:4]
+        root = parse_contract_ticker(contract_ticker).root
+        if root:
+            return root
+        return (contract_ticker[2:] if contract_ticker.startswith('O:') else contract_ticker)[:4]
     
     def _passes_filter(self, trade_data: Dict) -> bool:
         """
@@ -394,6 +396,8 @@ class KafkaFlowListener:
                 # Record successful message receipt
                 self.health.record_message()
                 self._maybe_log_stats()
+                if self._capture_path:
+                    self._capture_message(msg.value())
                 
                 # Check for reconnection after fallback
                 if self._fallback_triggered:
@@ -405,15 +409,22 @@ class KafkaFlowListener:
                 # Parse message
                 trade_data = self._parse_message(msg.value())
                 if trade_data is None:
+                    event_tracer.detach()
                     continue
                 
                 # Apply pre-filter
                 if not self._passes_filter(trade_data):
+                    event_tracer.detach()
                     continue
+                mark('filtered')
                 
                 # FIRE AND FORGET: Dispatch without awaiting
                 # This prevents slow enrichment from blocking the consumer
-                asyncio.create_task(self._safe_dispatch(trade_data))
+                # (the task inherits the active trace; the consumer loop drops it)
+                task = asyncio.create_task(self._safe_dispatch(trade_data))
+                event_tracer.detach()
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
                 
         except KafkaException as e:
             logger.error(f"Kafka exception: {e}")
@@ -442,16 +453,31 @@ class KafkaFlowListener:
         )
         self._last_stats_log_ts = now
     
+    def _capture_message(self, value: bytes) -> None:
+        """Append one raw message to the capture file (one JSON document per line)"""
+        try:
+            if self._capture is None:
+                self._capture = open(self._capture_path, 'ab')
+                logger.info(f"Capturing raw Kafka messages to {self._capture_path}")
+            # Raw newlines can only be JSON whitespace, so flattening keeps the document intact
+            self._capture.write(value.replace(b'\n', b' ') + b'\n')
+        except Exception as e:
+            logger.warning(f"Kafka capture disabled: {e}")
+            self._capture_path = ''
+    
     async def _safe_dispatch(self, trade_data: Dict):
         """
         Safely dispatch trade event to callback with error handling.
         """
+        mark('scheduled')
         try:
             result = self.callback(trade_data)
             if asyncio.iscoroutine(result):
                 await result
         except Exception as e:
             logger.error(f"Error dispatching trade event: {e}")
+        finally:
+            event_tracer.finish_pipeline(current_trace())
     
     async def _safe_callback(self, callback: Callable):
         """
@@ -490,14 +516,24 @@ class KafkaFlowListener:
             finally:
                 self.consumer = None
         
+        if self._capture is not None:
+            self._capture.close()
+            self._capture = None
+        
         self.health.connected = False
         logger.info("Kafka listener stopped")
     
+    @property
+    def pending_dispatches(self) -> int:
+        """Events handed to the callback that have not finished yet"""
+        return len(self._pending)
+    
     def get_health(self) -> Dict[str, Any]:
         """Get listener health status"""
         return {
             'running': self.running,
             'fallback_triggered': self._fallback_triggered,
+            'pending_dispatches': len(self._pending),
             **self.health.get_stats()
         }
 
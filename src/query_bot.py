@@ -6,6 +6,9 @@ import asyncio
 import logging
 import pandas as pd
 
+from src.utils.chart_renderer import chart_renderer
+from src.utils.flow_aggregates import flow_aggregates
+
 logger = logging.getLogger(__name__)
 
 def setup_bot_commands(bot):
@@ -84,30 +87,16 @@ def setup_bot_commands(bot):
         """Most bullish and bearish stocks with professional chart"""
         async with ctx.typing():
             from src.config import Config
-            from src.utils.flow_charts import FlowChartGenerator
-            
-            results = []
-            
-            for ticker in Config.WATCHLIST[:30]:
-                try:
-                    trades = await bot.fetcher.get_options_trades(ticker)
-                    if not trades.empty:
-                        sentiment = bot.analyzer.calculate_flow_sentiment(ticker, trades)
-                        results.append({
-                            'ticker': ticker,
-                            'sentiment': sentiment['sentiment'],
-                            'score': sentiment['score']
-                        })
-                except:
-                    continue
+
+            # Concurrent + cached (stream aggregates first, REST fallback)
+            results = await bot.flow_leaderboard.get_leaderboard(Config.WATCHLIST[:30])
         
         if not results:
             await ctx.send("No flow data available currently")
             return
         
-        # Create professional chart (fast, non-blocking)
-        from src.utils.flow_charts import FlowChartGenerator
-        chart_buffer = FlowChartGenerator.create_topflow_chart(results)
+        # Render off the event loop (process pool + PNG cache)
+        chart_buffer = await chart_renderer.render('topflow', 'ALL', results)
         
         if chart_buffer:
             file = discord.File(chart_buffer, filename='topflow.png')
@@ -129,17 +118,20 @@ def setup_bot_commands(bot):
         symbol = symbol.upper()
         
         async with ctx.typing():
-            from src.utils.flow_charts import FlowChartGenerator
-            
-            trades = await bot.fetcher.get_options_trades(symbol)
+            # Kafka stream already has today's big prints - only hit REST without it.
+            # The stream frame keeps only the top prints per bucket: fine for this
+            # top-10 table, never for totals (use get_summary/get_flow_analysis)
+            if flow_aggregates.has_flow(symbol):
+                trades = flow_aggregates.get_trades_frame(symbol)
+            else:
+                trades = await bot.fetcher.get_options_trades(symbol)
         
         if trades.empty:
             await ctx.send(f"No trades found for {symbol}")
             return
         
-        # Create professional table (fast, non-blocking)
-        from src.utils.flow_charts import FlowChartGenerator
-        table_buffer = FlowChartGenerator.create_bigflow_table(trades, symbol)
+        # Render off the event loop (process pool + PNG cache)
+        table_buffer = await chart_renderer.render('bigflow', symbol, trades, symbol)
         
         if table_buffer:
             file = discord.File(table_buffer, filename='bigflow.png')
@@ -189,17 +181,14 @@ def setup_bot_commands(bot):
         symbol = symbol.upper()
         
         async with ctx.typing():
-            from src.utils.flow_charts import FlowChartGenerator
-            
             summary = await bot.scanner.get_flow_summary(symbol)
         
         if not summary:
             await ctx.send(f"Could not get flow summary for {symbol}")
             return
         
-        # Create professional dashboard (fast, non-blocking)
-        from src.utils.flow_charts import FlowChartGenerator
-        dashboard_buffer = FlowChartGenerator.create_flowsum_dashboard(summary, symbol)
+        # Render off the event loop (process pool + PNG cache)
+        dashboard_buffer = await chart_renderer.render('flowsum', symbol, summary, symbol)
         
         if dashboard_buffer:
             file = discord.File(dashboard_buffer, filename='flowsum.png')
@@ -239,8 +228,6 @@ def setup_bot_commands(bot):
         symbol = symbol.upper()
         
         async with ctx.typing():
-            from src.utils.flow_charts import FlowChartGenerator
-            
             trades = await bot.fetcher.get_options_trades(symbol)
             current_price = await bot.fetcher.get_stock_price(symbol)
         
@@ -248,9 +235,8 @@ def setup_bot_commands(bot):
             await ctx.send(f"No options flow data for {symbol}")
             return
         
-        # Create professional heatmap (fast, non-blocking)
-        from src.utils.flow_charts import FlowChartGenerator
-        chart_buffer = FlowChartGenerator.create_flow_heatmap(trades, symbol)
+        # Render off the event loop (process pool + PNG cache)
+        chart_buffer = await chart_renderer.render('heatmap', symbol, trades, symbol)
         
         if chart_buffer:
             file = discord.File(chart_buffer, filename='heatmap.png')
@@ -272,7 +258,6 @@ def setup_bot_commands(bot):
         symbol = symbol.upper()
 
         async with ctx.typing():
-            from src.utils.flow_charts import FlowChartGenerator
             from datetime import timedelta
 
             # Get 1 week of stock trades for darkpool analysis
@@ -293,10 +278,9 @@ def setup_bot_commands(bot):
             # Convert to DataFrame
             trades_df = pd.DataFrame(trades_list)
 
-        # Create professional darkpool table
-        from src.utils.flow_charts import FlowChartGenerator
-        chart_buffer = FlowChartGenerator.create_darkpool_table(
-            trades_df, symbol, current_price
+        # Create professional darkpool table (off the event loop)
+        chart_buffer = await chart_renderer.render(
+            'darkpool', symbol, trades_df, symbol, current_price
         )
 
         if chart_buffer:
@@ -319,7 +303,6 @@ def setup_bot_commands(bot):
         symbol = symbol.upper()
 
         async with ctx.typing():
-            from src.utils.flow_charts import FlowChartGenerator
             from datetime import timedelta
 
             # Get 1 week of stock trades for darkpool analysis
@@ -340,10 +323,9 @@ def setup_bot_commands(bot):
             # Convert to DataFrame
             trades_df = pd.DataFrame(trades_list)
 
-        # Create professional chart showing PREMIUM by price level
-        from src.utils.flow_charts import FlowChartGenerator
-        chart_buffer = FlowChartGenerator.create_darkpool_premium_levels(
-            trades_df, symbol, current_price
+        # Create professional chart showing PREMIUM by price level (off the event loop)
+        chart_buffer = await chart_renderer.render(
+            'dplevels', symbol, trades_df, symbol, current_price
         )
 
         if chart_buffer:
@@ -373,7 +355,6 @@ def setup_bot_commands(bot):
             return
 
         async with ctx.typing():
-            from src.utils.flow_charts import FlowChartGenerator
             from datetime import timedelta
 
             # Get current price
@@ -423,24 +404,22 @@ def setup_bot_commands(bot):
                 await ctx.send(f"No price data available for {symbol}")
                 return
 
-        # Create chart based on timeframe
-        from src.utils.flow_charts import FlowChartGenerator
-
+        # Create chart based on timeframe (rendered off the event loop)
         if timeframe == 'all':
-            chart_buffer = FlowChartGenerator.create_sr_levels_tradingview(
-                symbol, data_1h, data_4h, data_daily, current_price
+            chart_buffer = await chart_renderer.render(
+                'srlevels_tv', symbol, symbol, data_1h, data_4h, data_daily, current_price
             )
             tf_text = "1H · 4H · Daily"
         else:
             # Single timeframe chart
             if timeframe == '1h':
-                chart_buffer = FlowChartGenerator.create_sr_levels_chart(symbol, data_1h, current_price)
+                chart_buffer = await chart_renderer.render('srlevels', symbol, symbol, data_1h, current_price)
                 tf_text = "1 Hour"
             elif timeframe == '4h':
-                chart_buffer = FlowChartGenerator.create_sr_levels_chart(symbol, data_4h, current_price)
+                chart_buffer = await chart_renderer.render('srlevels', symbol, symbol, data_4h, current_price)
                 tf_text = "4 Hour"
             else:  # 1d
-                chart_buffer = FlowChartGenerator.create_sr_levels_chart(symbol, data_daily, current_price)
+                chart_buffer = await chart_renderer.render('srlevels', symbol, symbol, data_daily, current_price)
                 tf_text = "Daily"
 
         if chart_buffer:
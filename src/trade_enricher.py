@@ -19,15 +19,18 @@ Only 1 Polygon API call per trade that passes the pre-filter.
 
 import asyncio
 import logging
-import re
 from datetime import datetime
 from typing import Dict, Optional, Any, Tuple
 
 from src.config import Config
 from src.data_fetcher import DataFetcher
-from src.utils.ticker_translation import translate_ticker
+from src.utils.logging_setup import hot_path_logger
+from src.utils.options_parser import parse_contract_ticker, parse_expiration, parse_cache_stats
+from src.utils.calculations import greeks_batch, implied_volatility_batch, years_to_expiry
+from src.utils.tracing import mark
 
 logger = logging.getLogger(__name__)
+hot_logger = hot_path_logger(__name__)
 
 
 class TradeEnricher:
@@ -83,39 +86,12 @@ class TradeEnricher:
             "O:AAPL240216C00150000" -> ("AAPL", "O:AAPL240216C00150000")
             "GS241220C00500000"     -> ("GS", "O:GS241220C00500000")
         """
-        # 1. Ensure we have the full contract ID (Keep O: prefix)
-        contract_id = ticker if ticker.startswith("O:") else f"O:{ticker}"
-        
-        # 2. Extract the alpha characters for the root (Remove O: prefix and Date/Strike)
-        # Regex: Look after 'O:', take letters until the first digit
-        clean_ticker = contract_id[2:] if contract_id.startswith("O:") else contract_id
-        match = re.match(r"([A-Z]+)", clean_ticker)
-        
-        if not match:
+        # Cached per distinct ticker: root letters, translation and index mapping
+        # (SPX/SPXW -> I:SPX, VIX, NDX, ...) are resolved once
+        parsed = parse_contract_ticker(ticker)
+        if parsed.underlying is None:
             logger.warning(f"Could not parse root symbol from ticker: {ticker}")
-            return None, contract_id
-        
-        root = translate_ticker(match.group(1))
-        
-        # 3. Index Mapping (Critical for SPX, VIX, NDX)
-        # SPX and SPXW both belong to underlying "I:SPX"
-        if root in ['SPX', 'SPXW']:
-            return "I:SPX", contract_id
-        if root in ['VIX', 'VIXW']:
-            return "I:VIX", contract_id
-        if root in ['NDX', 'NDXW', 'NQX', 'NDXP']:
-            return "I:NDX", contract_id
-        if root in ['DJX', 'DJXW']:
-            return "I:DJX", contract_id
-        if root in ['RUT', 'RUTW']:
-            return "I:RUT", contract_id
-        if root == 'XSP':
-            return "I:XSP", contract_id
-        if root == 'OEX':
-            return "I:OEX", contract_id
-        
-        # 4. Standard Stocks (AAPL, GS, PLAB) -> Just return the root
-        return root, contract_id
+        return parsed.underlying, parsed.contract_id
     
     async def enrich(self, trade_data: Dict) -> Optional[Dict]:
         """
@@ -160,7 +136,7 @@ class TradeEnricher:
             return self._build_minimal_enriched(trade_data, raw_ticker[:4])
         
         # DEBUG LOG - Critical for diagnosing API issues
-        logger.info(f"Fetching Snapshot -> Underlying: {underlying} | Contract: {contract_id}")
+        hot_logger.info("Fetching Snapshot -> Underlying: %s | Contract: %s", underlying, contract_id)
         
         try:
             # Fetch single contract snapshot with timeout
@@ -170,9 +146,10 @@ class TradeEnricher:
                 self.fetcher.get_single_option_snapshot(underlying, contract_id),
                 timeout=self.timeout
             )
+            mark('polygon')
             
             if not snapshot:
-                logger.debug(f"No snapshot data for {api_ticker}")
+                logger.debug("No snapshot data for %s", contract_id)
                 self.failed_enrichments += 1
                 # Return original data without enrichment
                 minimal = self._build_minimal_enriched(trade_data, underlying)
@@ -184,8 +161,9 @@ class TradeEnricher:
             self.successful_enrichments += 1
             
             logger.debug(
-                f"Enriched {underlying} trade: premium=${trade_data.get('premium', 0):,.0f}, "
-                f"OI={enriched.get('open_interest', 0)}, delta={enriched.get('delta', 0):.2f}"
+                "Enriched %s trade: premium=$%.0f, OI=%s, delta=%.2f",
+                underlying, trade_data.get('premium', 0) or 0,
+                enriched.get('open_interest', 0), enriched.get('delta', 0) or 0
             )
             
             return enriched
@@ -200,7 +178,7 @@ class TradeEnricher:
             return minimal
             
         except Exception as e:
-            logger.error(f"Error enriching {underlying} ({api_ticker}): {e}")
+            logger.error(f"Error enriching {underlying} ({contract_id}): {e}")
             self.failed_enrichments += 1
             minimal = self._build_minimal_enriched(trade_data, underlying)
             await self._maybe_fill_underlying_price(minimal, underlying, trade_data)
@@ -240,6 +218,49 @@ class TradeEnricher:
                 enriched["underlying_price"] = float(price)
         except Exception:
             return
+        self._backfill_greeks(enriched)
+    
+    def _backfill_greeks(self, enriched: Dict) -> bool:
+        """
+        Estimate Greeks (and IV) for a trade whose snapshot had none.
+        
+        Uses the snapshot IV when present, else the IV implied by the quote
+        mid (or the trade price). Estimated values are flagged with
+        greeks_estimated so consumers can tell them from Polygon's.
+        
+        Returns:
+            True if Greeks were filled in
+        """
+        if not getattr(Config, 'GREEKS_BACKFILL_ENABLED', True) or enriched.get('gamma'):
+            return False
+        try:
+            spot = float(enriched.get('underlying_price') or 0)
+            strike = float(enriched.get('strike_price') or 0)
+            contract_type = str(enriched.get('contract_type') or '').lower()
+            bid = float(enriched.get('current_bid') or 0)
+            ask = float(enriched.get('current_ask') or 0)
+            price = (bid + ask) / 2 if bid > 0 and ask >= bid else float(enriched.get('trade_price') or 0)
+            iv = float(enriched.get('iv') or 0)
+        except (TypeError, ValueError):
+            return False
+        if spot <= 0 or strike <= 0 or contract_type not in ('call', 'put') or not enriched.get('expiration_date'):
+            return False
+        
+        T = years_to_expiry([enriched['expiration_date']])
+        is_call = contract_type == 'call'
+        if iv <= 0:
+            iv = float(implied_volatility_batch(price, spot, strike, T, is_call)[0])
+            if not iv > 0:
+                return False
+        greeks = greeks_batch(spot, strike, T, is_call, volatility=iv)
+        if not greeks['gamma'][0]:
+            return False
+        
+        for key in ('delta', 'gamma', 'theta', 'vega'):
+            enriched[key] = float(greeks[key][0])
+        enriched['iv'] = iv
+        enriched['greeks_estimated'] = True
+        return True
     
     def _merge_data(self, trade_data: Dict, snapshot: Dict, underlying: str) -> Dict:
         """
@@ -324,15 +345,16 @@ class TradeEnricher:
         
         # Calculate DTE if we have expiration
         if enriched.get('expiration_date'):
-            try:
-                exp = datetime.strptime(enriched['expiration_date'], '%Y-%m-%d')
-                now = datetime.now()
-                enriched['dte'] = max(0, (exp - now).days)
-            except (ValueError, TypeError):
-                enriched['dte'] = 0
+            expiration = enriched['expiration_date']
+            exp = parse_expiration(expiration) if isinstance(expiration, str) else None
+            enriched['dte'] = max(0, (exp - datetime.now()).days) if exp else 0
         else:
             enriched['dte'] = 0
         
+        # Fresh strikes often come back without Greeks
+        if not enriched['gamma']:
+            self._backfill_greeks(enriched)
+        
         return enriched
     
     def _build_minimal_enriched(self, trade_data: Dict, underlying: str) -> Dict:
@@ -359,6 +381,9 @@ class TradeEnricher:
         enriched.setdefault('otm_pct', 0.0)
         enriched.setdefault('dte', 0)
         
+        # Estimate Greeks from the trade itself (again after a price fallback fetch)
+        self._backfill_greeks(enriched)
+        
         return enriched
     
     def get_stats(self) -> Dict[str, Any]:
@@ -368,6 +393,7 @@ class TradeEnricher:
             'successful': self.successful_enrichments,
             'failed': self.failed_enrichments,
             'timeouts': self.timeouts,
-            'success_rate': self.successful_enrichments / max(1, self.total_enrichments)
+            'success_rate': self.successful_enrichments / max(1, self.total_enrichments),
+            'parse_cache': parse_cache_stats()
         }
 
@@ -4,39 +4,36 @@ Helper functions for options calculations, technical indicators, and probabiliti
 """
 
 import numpy as np
+from scipy.special import ndtr
 from scipy.stats import norm
 from datetime import datetime, timedelta
 import pandas as pd
-from typing import Optional, Tuple, Dict
+from typing import Any, Dict, List, Optional, Tuple
 import math
 
+from src.utils.options_parser import parse_expiration
+
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+# IV search bounds (same range the scalar solver clamps to)
+IV_MIN = 0.001
+IV_MAX = 5.0
+
 def calculate_implied_volatility(option_price: float, stock_price: float, strike: float,
                                time_to_expiry: float, risk_free_rate: float = 0.02,
                                option_type: str = 'CALL', iterations: int = 100) -> float:
     """
-    Calculate implied volatility using Newton-Raphson method
-    """
-    # Initial guess
-    vol = 0.3
+    Calculate implied volatility using Newton-Raphson method (bisection fallback)
     
-    for _ in range(iterations):
-        # Calculate option price and vega
-        price, vega = black_scholes_price_and_vega(
-            stock_price, strike, time_to_expiry, risk_free_rate, vol, option_type
-        )
-        
-        # Newton-Raphson update
-        diff = option_price - price
-        if abs(diff) < 0.001:
-            break
-            
-        if vega == 0:
-            break
-            
-        vol = vol + diff / vega
-        vol = max(0.001, min(5.0, vol))  # Keep IV in reasonable range
-        
-    return vol
+    Returns the 0.3 starting guess when the price admits no solution
+    (expired, or outside the no-arbitrage bounds).
+    """
+    iv = implied_volatility_batch(
+        np.array([option_price], dtype=np.float64), stock_price,
+        np.array([strike], dtype=np.float64), np.array([time_to_expiry], dtype=np.float64),
+        np.array([option_type == 'CALL']), risk_free_rate, max_iter=iterations
+    )[0]
+    return float(iv) if np.isfinite(iv) else 0.3
 
 def black_scholes_price_and_vega(stock_price: float, strike: float, time_to_expiry: float,
                                 risk_free_rate: float, volatility: float, 
@@ -111,6 +108,261 @@ def calculate_all_greeks(stock_price: float, strike: float, time_to_expiry: floa
         'rho': round(rho, 4)
     }
 
+def _as_arrays(*values) -> List[np.ndarray]:
+    return np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in values))
+
+def black_scholes_batch(stock_price, strike, time_to_expiry, is_call,
+                        risk_free_rate: float = 0.02, volatility=0.3) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized black_scholes_price_and_vega over arrays of contracts.
+    
+    Args:
+        stock_price: Spot (scalar or array)
+        strike: Strikes
+        time_to_expiry: Years to expiry (<= 0 prices at intrinsic, vega 0)
+        is_call: Boolean array (True for calls)
+        risk_free_rate: Risk-free rate
+        volatility: Volatility (scalar or array)
+    
+    Returns:
+        (price, vega per 1 vol point) arrays
+    """
+    S, K, T, vol = _as_arrays(stock_price, strike, time_to_expiry, volatility)
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), S.shape)
+    live = (T > 0) & (vol > 0) & (S > 0) & (K > 0)
+    T_safe = np.where(live, T, 1.0)
+    vol_safe = np.where(live, vol, 1.0)
+    sqrt_t = np.sqrt(T_safe)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(np.where(live, S / K, 1.0)) + (risk_free_rate + 0.5 * vol_safe ** 2) * T_safe) / (vol_safe * sqrt_t)
+    d2 = d1 - vol_safe * sqrt_t
+    discount = K * np.exp(-risk_free_rate * T_safe)
+    call = S * ndtr(d1) - discount * ndtr(d2)
+    put = discount * ndtr(-d2) - S * ndtr(-d1)
+    
+    intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+    price = np.where(live, np.where(is_call, call, put), intrinsic)
+    vega = np.where(live, S * _INV_SQRT_2PI * np.exp(-0.5 * d1 * d1) * sqrt_t / 100, 0.0)
+    return price, vega
+
+def implied_volatility_batch(option_price, stock_price, strike, time_to_expiry, is_call,
+                             risk_free_rate: float = 0.02, tolerance: float = 0.001,
+                             max_iter: int = 50) -> np.ndarray:
+    """
+    Implied volatility for arrays of contracts.
+    
+    Vectorized Newton-Raphson from a Corrado-Miller starting guess, iterating
+    only the contracts not yet converged; those still unconverged after
+    max_iter steps (flat vega, deep wings) are finished by vectorized
+    bisection on [IV_MIN, IV_MAX]. Prices are matched to `tolerance` dollars.
+    
+    Returns:
+        IV array, NaN where no volatility reproduces the price (expired,
+        non-positive inputs, or price outside the no-arbitrage bounds)
+    """
+    price, S, K, T = _as_arrays(option_price, stock_price, strike, time_to_expiry)
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), price.shape)
+    iv = np.full(price.shape, np.nan)
+    
+    # Solvable only strictly between the vol bounds' prices
+    ok = (price > 0) & (S > 0) & (K > 0) & (T > 0) & np.isfinite(price)
+    low, _ = black_scholes_batch(S, K, T, is_call, risk_free_rate, IV_MIN)
+    high, _ = black_scholes_batch(S, K, T, is_call, risk_free_rate, IV_MAX)
+    ok &= (price >= low - tolerance) & (price <= high + tolerance)
+    idx = np.flatnonzero(ok)
+    if not len(idx):
+        return iv
+    
+    target, s, k, t, c = price[idx], S[idx], K[idx], T[idx], is_call[idx]
+    vol = _corrado_miller_guess(target, s, k, t, c, risk_free_rate)
+    done = np.zeros(len(idx), dtype=bool)
+    active = np.arange(len(idx))
+    for _ in range(max_iter):
+        model, vega = black_scholes_batch(s[active], k[active], t[active], c[active], risk_free_rate, vol[active])
+        diff = target[active] - model
+        converged = np.abs(diff) < tolerance
+        done[active[converged]] = True
+        stepping = ~converged & (vega > 1e-12)
+        if not stepping.any():
+            break
+        # vega is per vol point: scale back to per unit of volatility
+        rows = active[stepping]
+        vol[rows] = np.clip(vol[rows] + diff[stepping] / (vega[stepping] * 100), IV_MIN, IV_MAX)
+        active = rows
+    
+    rest = np.flatnonzero(~done)
+    if len(rest):
+        lo, hi = np.full(len(rest), IV_MIN), np.full(len(rest), IV_MAX)
+        r_target, r_s, r_k, r_t, r_c = target[rest], s[rest], k[rest], t[rest], c[rest]
+        for _ in range(60):  # 5.0 / 2**60 - far below any tolerance
+            mid = 0.5 * (lo + hi)
+            model, _ = black_scholes_batch(r_s, r_k, r_t, r_c, risk_free_rate, mid)
+            above = model > r_target
+            hi = np.where(above, mid, hi)
+            lo = np.where(above, lo, mid)
+        vol[rest] = 0.5 * (lo + hi)
+    
+    iv[idx] = vol
+    return iv
+
+def _corrado_miller_guess(price, S, K, T, is_call, risk_free_rate: float) -> np.ndarray:
+    """Closed-form IV approximation used to seed Newton (0.3 where it breaks down)"""
+    discounted_k = K * np.exp(-risk_free_rate * T)
+    # Work with the call price (put-call parity) so one formula covers both sides
+    call = np.where(is_call, price, price + S - discounted_k)
+    half_gap = (S - discounted_k) / 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        inner = (call - half_gap) ** 2 - (S - discounted_k) ** 2 / math.pi
+        guess = (math.sqrt(2 * math.pi) / (S + discounted_k)
+                 * (call - half_gap + np.sqrt(np.maximum(inner, 0.0))) / np.sqrt(T))
+    return np.where(np.isfinite(guess) & (guess > 0.01), np.clip(guess, 0.01, 3.0), 0.3)
+
+def greeks_batch(stock_price, strike, time_to_expiry, is_call,
+                 risk_free_rate: float = 0.02, volatility=0.3) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_all_greeks (same units: theta per day, vega and rho
+    per 1%), unrounded.
+    
+    Returns:
+        {'delta', 'gamma', 'theta', 'vega', 'rho'} arrays
+    """
+    S, K, T, vol = _as_arrays(stock_price, strike, time_to_expiry, volatility)
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), S.shape)
+    live = (T > 0) & (vol > 0) & (S > 0) & (K > 0)
+    T_safe = np.where(live, T, 1.0)
+    vol_safe = np.where(live, vol, 1.0)
+    sqrt_t = np.sqrt(T_safe)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(np.where(live, S / K, 1.0)) + (risk_free_rate + 0.5 * vol_safe ** 2) * T_safe) / (vol_safe * sqrt_t)
+    d2 = d1 - vol_safe * sqrt_t
+    pdf = _INV_SQRT_2PI * np.exp(-0.5 * d1 * d1)
+    discount = K * np.exp(-risk_free_rate * T_safe)
+    decay = -(S * pdf * vol_safe) / (2 * sqrt_t)
+    
+    delta = np.where(is_call, ndtr(d1), ndtr(d1) - 1)
+    theta = np.where(is_call, decay - risk_free_rate * discount * ndtr(d2),
+                     decay + risk_free_rate * discount * ndtr(-d2))
+    rho = np.where(is_call, T_safe * discount * ndtr(d2), -T_safe * discount * ndtr(-d2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gamma = pdf / (S * vol_safe * sqrt_t)
+    
+    # Expired / unusable rows follow calculate_all_greeks' expiry convention
+    expired_delta = np.where(is_call & (S > K), 1.0, 0.0)
+    return {
+        'delta': np.where(live, delta, expired_delta),
+        'gamma': np.where(live, gamma, 0.0),
+        'theta': np.where(live, theta / 365, 0.0),
+        'vega': np.where(live, S * pdf * sqrt_t / 100, 0.0),
+        'rho': np.where(live, rho / 100, 0.0),
+    }
+
+def years_to_expiry(expirations: List[Any], now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Years until the 4pm close on each expiration date (YYYY-MM-DD), parsing
+    each distinct date once. Unparseable dates give 0.
+    """
+    now = now or datetime.now()
+    memo: Dict[Any, float] = {}
+    years = np.zeros(len(expirations))
+    for i, expiration in enumerate(expirations):
+        T = memo.get(expiration)
+        if T is None:
+            day = parse_expiration(str(expiration)[:10])
+            if day is None:
+                T = 0.0
+            else:
+                close = day + timedelta(hours=16)
+                T = max((close - now).total_seconds(), 0.0) / (365.25 * 24 * 3600)
+            memo[expiration] = T
+        years[i] = T
+    return years
+
+def _snapshot_float(value: Any) -> float:
+    """Snapshot field as float; 0.0 when missing or non-numeric"""
+    try:
+        value = float(value or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if math.isfinite(value) else 0.0
+
+def _contract_price(contract: Dict) -> float:
+    """Best available option price from a Polygon snapshot contract: mid, last trade, day close"""
+    quote = contract.get('last_quote') or {}
+    bid, ask = _snapshot_float(quote.get('bid')), _snapshot_float(quote.get('ask'))
+    if ask > 0 and 0 <= bid <= ask:
+        return (bid + ask) / 2
+    for value in (quote.get('midpoint'), (contract.get('last_trade') or {}).get('price'),
+                  (contract.get('day') or {}).get('close')):
+        value = _snapshot_float(value)
+        if value > 0:
+            return value
+    return 0.0
+
+def fill_missing_greeks(contracts: List[Dict], spot_price: Optional[float] = None,
+                        risk_free_rate: float = 0.02, now: Optional[datetime] = None) -> int:
+    """
+    Backfill Greeks (and IV) in place for Polygon snapshot contracts that lack them.
+    
+    Contracts without a gamma get delta/gamma/theta/vega from their snapshot
+    IV, or from the IV implied by their mid / last / close price, solved for
+    the whole chain at once. Filled contracts are marked greeks['estimated'].
+    
+    Args:
+        contracts: Polygon /v3/snapshot/options results
+        spot_price: Underlying price (defaults to each contract's underlying_asset)
+        risk_free_rate: Risk-free rate
+        now: Valuation time (defaults to now)
+    
+    Returns:
+        Number of contracts filled
+    """
+    # A reported gamma of 0.0 is real (deep ITM/OTM); only an absent one is missing
+    missing = [c for c in contracts if (c.get('greeks') or {}).get('gamma') is None]
+    if not missing:
+        return 0
+    
+    n = len(missing)
+    S, K, iv = np.zeros(n), np.zeros(n), np.full(n, np.nan)
+    is_call, is_put = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+    expirations = []
+    for i, contract in enumerate(missing):
+        details = contract.get('details') or {}
+        S[i] = _snapshot_float(spot_price or (contract.get('underlying_asset') or {}).get('price'))
+        K[i] = _snapshot_float(details.get('strike_price'))
+        iv[i] = _snapshot_float(contract.get('implied_volatility')) or np.nan
+        contract_type = str(details.get('contract_type', '')).lower()
+        is_call[i] = contract_type == 'call'
+        is_put[i] = contract_type == 'put'
+        expirations.append(details.get('expiration_date', ''))
+    T = years_to_expiry(expirations, now)
+    
+    # Solve IV only where the snapshot has none
+    need_iv = ~(iv > 0)
+    if need_iv.any():
+        rows = np.flatnonzero(need_iv)
+        prices = np.array([_contract_price(missing[i]) for i in rows], dtype=np.float64)
+        iv[rows] = implied_volatility_batch(prices, S[rows], K[rows], T[rows], is_call[rows], risk_free_rate)
+    
+    usable = np.flatnonzero((is_call | is_put) & (iv > 0) & (S > 0) & (K > 0) & (T > 0))
+    if not len(usable):
+        return 0
+    greeks = greeks_batch(S[usable], K[usable], T[usable], is_call[usable], risk_free_rate, iv[usable])
+    
+    columns = zip(usable.tolist(), iv[usable].tolist(), greeks['delta'].tolist(), greeks['gamma'].tolist(),
+                  greeks['theta'].tolist(), greeks['vega'].tolist())
+    for i, vol, delta, gamma, theta, vega in columns:
+        contract = missing[i]
+        contract['greeks'] = {
+            **(contract.get('greeks') or {}),
+            'delta': delta, 'gamma': gamma, 'theta': theta, 'vega': vega,
+            'estimated': True,
+        }
+        if not contract.get('implied_volatility'):
+            contract['implied_volatility'] = vol
+    return len(usable)
+
 def calculate_expected_move(volatility: float, stock_price: float, days: int) -> Tuple[float, float]:
     """
     Calculate expected move based on implied volatility
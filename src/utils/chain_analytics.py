@@ -0,0 +1,494 @@
+"""
+One-pass option chain analytics
+
+ContextManager (net GEX, flip level, walls, G ratio), WallsBot (OI walls)
+and DataFetcher.get_gamma_profile (dollar gamma by strike, expected move)
+all read the same Polygon /v3/snapshot/options payload. Instead of each of
+them walking the nested dicts again and building its own per-strike dicts,
+the snapshot is turned into a ChainFrame (one row per contract) in a single
+pass and every metric is a masked NumPy reduction over those columns.
+
+Each consumer's filtering rules are kept as they were (e.g. GEX books
+unknown contract types on the put side for walls, WallsBot ignores strikes
+under 100 OI), so the numbers match the per-consumer loops they replace.
+OI ties between wall strikes go to the lowest strike, the same rule as
+StrikeExposure, so a wall does not depend on the order of the chain.
+
+Results are cached per symbol and snapshot version. A new version is only
+created when the chain's contents change (column digest), so re-analyzing
+an unchanged chain costs one column pass and a dict lookup. Results also
+carry the minute they were computed in (time to expiry moves even when
+the chain does not), and the raw contract list is never retained.
+"""
+
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.gamma_ratio import expiry_years, gamma_ratio_result, gamma_totals
+
+logger = logging.getLogger(__name__)
+
+CONTRACT_MULTIPLIER = 100
+
+# Results kept per symbol version (different expiry windows / spots)
+RESULTS_PER_VERSION = 8
+
+# Time-to-expiry inputs (gamma ratio, profile) are recomputed at least this often
+RESULT_MAX_AGE_SECONDS = 60
+
+
+def _numbers(values: List[Any], missing: float = 0.0) -> np.ndarray:
+    """JSON numbers -> float array; None and non-numbers become `missing`"""
+    try:
+        column = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        column = np.array([
+            float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+            for v in values
+        ], dtype=np.float64)
+    return np.where(np.isnan(column), missing, column)
+
+
+def _group_sum(keys: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum weights per distinct key.
+
+    Returns:
+        (sorted keys, sums)
+    """
+    if not len(keys):
+        empty = np.zeros(0)
+        return empty, empty
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    return uniq, np.bincount(inverse, weights=weights, minlength=len(uniq))
+
+
+def _max_lowest_key(uniq: np.ndarray, sums: np.ndarray) -> float:
+    """Sorted key with the largest sum; ties go to the lowest key (StrikeExposure rule)"""
+    if not len(uniq):
+        return 0
+    return uniq[np.argmax(sums)].item()
+
+
+class ChainFrame:
+    """
+    Columnar view of a Polygon option chain snapshot.
+
+    Built in one walk over the contract dicts; missing numbers are 0 (or NaN
+    for the per-contract underlying price, which falls back to spot).
+    """
+
+    __slots__ = ('size', 'strike', 'expiration', 'contract_type', 'open_interest',
+                 'gamma', 'iv', 'underlying_price', 'ticker_c', 'ticker_p',
+                 'ticker_upper_c', 'ticker_upper_p', '_digest')
+
+    def __init__(self, contracts: List[Dict]):
+        strikes, expirations, types, ois, gammas, ivs, spots = [], [], [], [], [], [], []
+        ticker_c, ticker_p, upper_c, upper_p = [], [], [], []
+        empty = {}
+
+        for contract in contracts:
+            details = contract.get('details') or empty
+            greeks = contract.get('greeks') or empty
+            underlying = contract.get('underlying_asset') or empty
+
+            strikes.append(details.get('strike_price'))
+            expiration = details.get('expiration_date')
+            expirations.append(expiration if isinstance(expiration, str) else '')
+            contract_type = details.get('contract_type')
+            types.append(contract_type.lower() if isinstance(contract_type, str) else '')
+            ois.append(contract.get('open_interest'))
+            gammas.append(greeks.get('gamma'))
+            ivs.append(contract.get('implied_volatility'))
+            spots.append(underlying.get('price'))
+
+            # Type inference from the OCC ticker (used when details lack it)
+            ticker = contract.get('ticker', '')
+            raw = ticker if isinstance(ticker, str) else ''
+            upper = str(ticker).upper()
+            ticker_c.append('C' in raw)
+            ticker_p.append('P' in raw)
+            upper_c.append('C' in upper)
+            upper_p.append('P' in upper)
+
+        self.size = len(contracts)
+        self.strike = _numbers(strikes)
+        self.expiration = np.array(expirations, dtype=str) if expirations else np.zeros(0, dtype='U10')
+        self.contract_type = np.array(types, dtype=object)
+        self.open_interest = _numbers(ois)
+        self.gamma = _numbers(gammas)
+        self.iv = _numbers(ivs)
+        self.underlying_price = _numbers(spots, missing=np.nan)
+        self.ticker_c = np.array(ticker_c, dtype=bool)
+        self.ticker_p = np.array(ticker_p, dtype=bool)
+        self.ticker_upper_c = np.array(upper_c, dtype=bool)
+        self.ticker_upper_p = np.array(upper_p, dtype=bool)
+        self._digest: Optional[str] = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def digest(self) -> str:
+        """Content fingerprint of every column the analytics read"""
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            for column in (self.strike, self.open_interest, self.gamma, self.iv,
+                           self.underlying_price, self.ticker_c, self.ticker_p,
+                           self.ticker_upper_c, self.ticker_upper_p):
+                h.update(column.tobytes())
+            h.update(self.expiration.tobytes())
+            h.update('\x00'.join(self.contract_type.tolist()).encode())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def in_window(self, max_expiry: Optional[str]) -> np.ndarray:
+        """Rows expiring on or before max_expiry (YYYY-MM-DD); all rows if None"""
+        if not max_expiry:
+            return np.ones(self.size, dtype=bool)
+        return (self.expiration != '') & (self.expiration <= max_expiry)
+
+
+def compute_gex(frame: ChainFrame, rows: np.ndarray, spot: float) -> Dict[str, Any]:
+    """Net GEX, regime, zero-gamma flip level and OI walls (ContextManager rules)"""
+    m = rows & (frame.gamma != 0) & (frame.open_interest != 0) & (frame.strike != 0)
+    strike = frame.strike[m]
+    oi = frame.open_interest[m]
+    contract_type = frame.contract_type[m]
+
+    gex = frame.gamma[m] * oi * 100 * spot
+    gex = np.where(contract_type == 'put', -gex, gex)  # Puts are negative dealer gamma
+    total_gex = float(gex.sum())
+
+    flip_level = 0.0
+    strikes, gex_by_strike = _group_sum(strike, gex)
+    if len(strikes):
+        cumulative = np.cumsum(gex_by_strike)
+        previous = np.concatenate([[0.0], cumulative[:-1]])
+        crossed = ((previous < 0) & (cumulative > 0)) | ((previous > 0) & (cumulative < 0))
+        if crossed.any():
+            flip_level = strikes[np.argmax(crossed)].item()
+        else:
+            # No flip: closest strike to spot
+            flip_level = strikes[np.argmin(np.abs(strikes - spot))].item()
+
+    # Walls: everything that is not a call is booked on the put side
+    is_call = contract_type == 'call'
+    call_wall = _max_lowest_key(*_group_sum(strike[is_call], oi[is_call]))
+    put_wall = _max_lowest_key(*_group_sum(strike[~is_call], oi[~is_call]))
+
+    # Per-strike arrays (sorted by strike) for StrikeExposure
+    slot = np.searchsorted(strikes, strike)
+    by_strike = {
+        'strikes': strikes,
+        'gex': gex_by_strike,
+        'call_oi': np.bincount(slot, weights=np.where(is_call, oi, 0.0), minlength=len(strikes)),
+        'put_oi': np.bincount(slot, weights=np.where(is_call, 0.0, oi), minlength=len(strikes)),
+    }
+
+    return {
+        'regime': "POSITIVE_GAMMA" if total_gex > 0 else "NEGATIVE_GAMMA",
+        'net_gex': total_gex,
+        'flip_level': flip_level,
+        'call_wall': call_wall,
+        'put_wall': put_wall,
+        'by_strike': by_strike,
+    }
+
+
+def compute_oi_walls(frame: ChainFrame, rows: np.ndarray, min_oi: float = 100) -> Optional[Dict[str, Any]]:
+    """Max open interest call and put strikes (WallsBot rules); None if a side is empty"""
+    m = (rows & (frame.open_interest != 0) & (frame.open_interest >= min_oi)
+         & (frame.strike != 0) & (frame.expiration != ''))
+    strike = frame.strike[m]
+    oi = frame.open_interest[m]
+    contract_type = frame.contract_type[m]
+
+    calls = contract_type == 'call'
+    puts = contract_type == 'put'
+    if not calls.any() or not puts.any():
+        return None
+
+    call_strikes, call_oi = _group_sum(strike[calls], oi[calls])
+    put_strikes, put_oi = _group_sum(strike[puts], oi[puts])
+    call_wall = _max_lowest_key(call_strikes, call_oi)
+    put_wall = _max_lowest_key(put_strikes, put_oi)
+
+    # Per-strike OI (sorted by strike) for StrikeExposure queries
+    strikes = np.union1d(call_strikes, put_strikes)
+    by_strike = {
+        'strikes': strikes,
+        'gex': np.zeros(len(strikes)),
+        'call_oi': np.zeros(len(strikes)),
+        'put_oi': np.zeros(len(strikes)),
+    }
+    by_strike['call_oi'][np.searchsorted(strikes, call_strikes)] = call_oi
+    by_strike['put_oi'][np.searchsorted(strikes, put_strikes)] = put_oi
+
+    return {
+        'call_wall': call_wall,
+        'call_oi': int(call_oi[np.searchsorted(call_strikes, call_wall)]),
+        'put_wall': put_wall,
+        'put_oi': int(put_oi[np.searchsorted(put_strikes, put_wall)]),
+        'by_strike': by_strike,
+    }
+
+
+def compute_chain_gamma_ratio(frame: ChainFrame, rows: np.ndarray, spot: float, now: datetime,
+                              r: float = 0.0, v: float = 0.20, min_open_interest: int = 100,
+                              max_otm_pct: float = 0.20) -> Dict[str, Any]:
+    """G ratio with transform_polygon_snapshot + compute_gamma_ratio rules"""
+    if spot <= 0:
+        return gamma_ratio_result(0.0, 0.0, 0)
+
+    # Type: details first, else inferred from the ticker
+    contract_type = frame.contract_type
+    inferred_call = frame.ticker_upper_c & ~frame.ticker_upper_p
+    is_call = np.where(contract_type != '', np.isin(contract_type, ('call', 'c')), inferred_call)
+    is_put = np.where(contract_type != '', np.isin(contract_type, ('put', 'p')),
+                      ~inferred_call & frame.ticker_upper_p)
+
+    oi = np.trunc(frame.open_interest)
+    strike = frame.strike
+    with np.errstate(invalid='ignore'):
+        m = (rows & (is_call | is_put) & (strike > 0) & (frame.expiration != '')
+             & (oi >= min_open_interest) & (np.abs(strike - spot) / spot <= max_otm_pct))
+    idx = np.flatnonzero(m)
+
+    call_gamma, put_gamma, analyzed = gamma_totals(
+        is_call[idx], strike[idx], expiry_years(frame.expiration[idx].tolist(), now), oi[idx], spot, r, v
+    )
+    return gamma_ratio_result(call_gamma, put_gamma, analyzed)
+
+
+def _expiry_datetimes(expirations: List[str]) -> List[Optional[datetime]]:
+    parsed: Dict[str, Optional[datetime]] = {}
+    out = []
+    for expiration in expirations:
+        if expiration not in parsed:
+            try:
+                parsed[expiration] = datetime.fromisoformat(expiration) if expiration else None
+            except ValueError:
+                parsed[expiration] = None
+        out.append(parsed[expiration])
+    return out
+
+
+def compute_profile(frame: ChainFrame, rows: np.ndarray, spot: float, now: datetime,
+                    contract_multiplier: int = CONTRACT_MULTIPLIER) -> Optional[Dict[str, Any]]:
+    """Dollar gamma by strike, gamma walls and expected move (compute_gamma_profile rules)"""
+    if spot <= 0:
+        return None
+
+    contract_type = frame.contract_type
+    typed = np.isin(contract_type, ('call', 'put'))
+    is_call = np.where(typed, contract_type == 'call', frame.ticker_c & ~frame.ticker_p)
+    is_put = np.where(typed, contract_type == 'put', frame.ticker_p & ~frame.ticker_c)
+
+    m = rows & (is_call | is_put) & (frame.strike > 0) & (frame.open_interest > 0) & (frame.gamma != 0)
+    if not m.any():
+        return None
+
+    strike = frame.strike[m]
+    oi = frame.open_interest[m]
+    calls = is_call[m]
+    contract_spot = np.where(np.isnan(frame.underlying_price[m]), spot, frame.underlying_price[m])
+    dollar_gamma = frame.gamma[m] * oi * contract_multiplier * contract_spot ** 2
+    signed = np.where(calls, dollar_gamma, -dollar_gamma)
+
+    strikes, inverse = np.unique(strike, return_inverse=True)
+    n = len(strikes)
+    call_gamma = np.bincount(inverse, weights=np.where(calls, signed, 0.0), minlength=n)
+    put_gamma = np.bincount(inverse, weights=np.where(calls, 0.0, signed), minlength=n)
+    call_oi = np.bincount(inverse, weights=np.where(calls, oi, 0.0), minlength=n)
+    put_oi = np.bincount(inverse, weights=np.where(calls, 0.0, oi), minlength=n)
+
+    strike_list = strikes.tolist()
+    call_list, put_list = call_gamma.tolist(), put_gamma.tolist()
+    call_oi_list, put_oi_list = call_oi.tolist(), put_oi.tolist()
+    strike_breakdown = [
+        {
+            "strike": strike_list[i],
+            "call_gamma": call_list[i],
+            "put_gamma": put_list[i],
+            "net_gamma": call_list[i] + put_list[i],
+            "call_oi": call_oi_list[i],
+            "put_oi": put_oi_list[i],
+        }
+        for i in range(n)
+    ]
+
+    call_wall = None
+    if (call_gamma > 0).any():
+        i = int(np.argmax(np.where(call_gamma > 0, call_gamma, -np.inf)))
+        call_wall = {"strike": strike_list[i], "gamma": call_list[i], "oi": call_oi_list[i]}
+    put_wall = None
+    if (put_gamma < 0).any():
+        i = int(np.argmin(np.where(put_gamma < 0, put_gamma, np.inf)))
+        put_wall = {"strike": strike_list[i], "gamma": put_list[i], "oi": put_oi_list[i]}
+
+    # Expected move from the shortest-dated, nearest-the-money contract with IV
+    expected_move = None
+    expected_move_pct = None
+    iv = frame.iv[m]
+    candidates = np.flatnonzero(iv > 0)
+    if len(candidates):
+        expiries = _expiry_datetimes(frame.expiration[m][candidates].tolist())
+        days, keep = [], []
+        for j, expiry in zip(candidates.tolist(), expiries):
+            if expiry is not None and expiry > now:
+                keep.append(j)
+                days.append((expiry - now).days or 1)
+        if keep:
+            keep = np.array(keep)
+            moneyness = np.abs(strike[keep] - spot)
+            best = keep[np.lexsort((keep, moneyness, np.array(days)))[0]]
+            expected_move = spot * float(iv[best]) * math.sqrt(1 / 365)
+            if expected_move > 0:
+                expected_move_pct = expected_move / spot
+
+    return {
+        "spot_price": spot,
+        "call_gamma_total": float(dollar_gamma[calls].sum()),
+        "put_gamma_total": float(signed[~calls].sum()),
+        "net_gamma_total": float(signed.sum()),
+        "call_wall": call_wall,
+        "put_wall": put_wall,
+        "strike_breakdown": strike_breakdown,
+        "expected_move": expected_move,
+        "expected_move_pct": expected_move_pct,
+        "total_call_oi": float(call_oi.sum()),
+        "total_put_oi": float(put_oi.sum()),
+        "contract_multiplier": contract_multiplier,
+    }
+
+
+class _Version:
+    __slots__ = ('number', 'frame', 'results')
+
+    def __init__(self, number: int, frame: ChainFrame):
+        self.number = number
+        self.frame = frame
+        self.results: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+
+
+class _SymbolEntry:
+    __slots__ = ('versions', 'next_number')
+
+    def __init__(self):
+        # digest -> version; a few are kept because callers fetch different
+        # slices of the same chain (e.g. WallsBot caps contracts and DTE)
+        self.versions: 'OrderedDict[str, _Version]' = OrderedDict()
+        self.next_number = 1
+
+
+class ChainAnalytics:
+    """
+    Per-symbol cache of chain analytics keyed by snapshot version.
+
+    Usage:
+        analytics = chain_analytics.analyze('SPY', contracts, spot, max_expiry='2025-02-14')
+        analytics['gex']['flip_level'], analytics['walls'], analytics['gamma_ratio']['G']
+    """
+
+    def __init__(self, max_symbols: int = 512, versions_per_symbol: int = 4):
+        self.max_symbols = max_symbols
+        self.versions_per_symbol = versions_per_symbol
+        self._entries: 'OrderedDict[str, _SymbolEntry]' = OrderedDict()
+
+        self.frames_built = 0
+        self.versions_created = 0
+        self.result_hits = 0
+        self.result_misses = 0
+
+    def _version_for(self, symbol: str, contracts: List[Dict]) -> _Version:
+        entry = self._entries.get(symbol)
+        if entry is None:
+            entry = self._entries[symbol] = _SymbolEntry()
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_symbols:
+            self._entries.popitem(last=False)
+
+        frame = ChainFrame(contracts)
+        self.frames_built += 1
+        digest = frame.digest()
+        version = entry.versions.get(digest)
+        if version is None:
+            # New chain contents -> new version (results computed on demand)
+            version = _Version(entry.next_number, frame)
+            entry.next_number += 1
+            entry.versions[digest] = version
+            self.versions_created += 1
+            while len(entry.versions) > self.versions_per_symbol:
+                entry.versions.popitem(last=False)
+        entry.versions.move_to_end(digest)
+        return version
+
+    def analyze(self, symbol: str, contracts: List[Dict], spot_price: float,
+                max_expiry: Optional[str] = None) -> Dict[str, Any]:
+        """
+        All chain metrics for a snapshot in one go.
+
+        Args:
+            symbol: Underlying symbol
+            contracts: Polygon chain snapshot (list of contract dicts)
+            spot_price: Current underlying price
+            max_expiry: Only use contracts expiring on/before this date (YYYY-MM-DD)
+
+        Returns:
+            {
+                'symbol', 'version', 'spot_price', 'contracts' (rows in window),
+                'gex': {'regime', 'net_gex', 'flip_level', 'call_wall', 'put_wall',
+                        'by_strike': per-strike arrays for StrikeExposure},
+                'walls': {'call_wall', 'call_oi', 'put_wall', 'put_oi', 'by_strike'} or None,
+                'gamma_ratio': compute_gamma_ratio-shaped dict,
+                'profile': compute_gamma_profile-shaped dict or None
+            }
+            Shared by every caller of the same version - treat as read-only.
+        """
+        version = self._version_for(symbol, contracts)
+        key = (max_expiry, float(spot_price), int(time.time() // RESULT_MAX_AGE_SECONDS))
+        result = version.results.get(key)
+        if result is not None:
+            self.result_hits += 1
+            return result
+        self.result_misses += 1
+
+        frame = version.frame
+        rows = frame.in_window(max_expiry)
+        now = datetime.now()
+        result = {
+            'symbol': symbol,
+            'version': version.number,
+            'spot_price': spot_price,
+            'contracts': int(np.count_nonzero(rows)),
+            'gex': compute_gex(frame, rows, spot_price),
+            'walls': compute_oi_walls(frame, rows),
+            'gamma_ratio': compute_chain_gamma_ratio(frame, rows, spot_price, now),
+            'profile': compute_profile(frame, rows, spot_price, now),
+        }
+
+        version.results[key] = result
+        while len(version.results) > RESULTS_PER_VERSION:
+            version.results.popitem(last=False)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Kernel statistics"""
+        return {
+            'symbols': len(self._entries),
+            'frames_built': self.frames_built,
+            'versions_created': self.versions_created,
+            'result_hits': self.result_hits,
+            'result_misses': self.result_misses,
+        }
+
+
+# Global chain analytics cache
+chain_analytics = ChainAnalytics()
@@ -0,0 +1,325 @@
+"""
+Off-loop chart rendering for ORAKL Bot
+Runs FlowChartGenerator / ProfessionalCharts in a warm process pool so that
+matplotlib savefig and plotly/kaleido export never block the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import Config
+from src.utils.monitoring import cache_hits, cache_misses
+
+logger = logging.getLogger(__name__)
+
+_chart_hits = cache_hits.labels(cache_name='charts')
+_chart_misses = cache_misses.labels(cache_name='charts')
+
+# chart kind -> (module, class, method)
+CHART_METHODS: Dict[str, Tuple[str, str, str]] = {
+    'topflow': ('src.utils.flow_charts', 'FlowChartGenerator', 'create_topflow_chart'),
+    'bigflow': ('src.utils.flow_charts', 'FlowChartGenerator', 'create_bigflow_table'),
+    'flowsum': ('src.utils.flow_charts', 'FlowChartGenerator', 'create_flowsum_dashboard'),
+    'heatmap': ('src.utils.flow_charts', 'FlowChartGenerator', 'create_flow_heatmap'),
+    'darkpool': ('src.utils.flow_charts', 'FlowChartGenerator', 'create_darkpool_table'),
+    'dplevels': ('src.utils.flow_charts', 'FlowChartGenerator', 'create_darkpool_premium_levels'),
+    'srlevels': ('src.utils.flow_charts', 'FlowChartGenerator', 'create_sr_levels_chart'),
+    'srlevels_tv': ('src.utils.flow_charts', 'FlowChartGenerator', 'create_sr_levels_tradingview'),
+    'gamma': ('src.utils.plotly_charts', 'ProfessionalCharts', 'create_gamma_chart'),
+}
+
+# Top-level dict keys that change on every call without changing the picture
+_VOLATILE_KEYS = {'timestamp'}
+
+_FRAME_TAG = '__orakl_frame__'
+
+
+def _pack(obj: Any) -> Any:
+    """
+    Convert DataFrames (at any depth) into a compact column-array payload.
+
+    Only the raw numpy columns and index cross the process boundary, which
+    pickles much smaller and faster than a full DataFrame with its block manager.
+    """
+    if isinstance(obj, pd.DataFrame):
+        return {
+            _FRAME_TAG: True,
+            'columns': list(obj.columns),
+            'data': [obj[col].to_numpy() for col in obj.columns],
+            'index': obj.index.to_numpy(),
+            'index_name': obj.index.name,
+        }
+    if isinstance(obj, dict):
+        return {k: _pack(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_pack(v) for v in obj)
+    return obj
+
+
+def _unpack(obj: Any) -> Any:
+    """Inverse of _pack (runs inside the worker)"""
+    if isinstance(obj, dict):
+        if obj.get(_FRAME_TAG):
+            return pd.DataFrame(
+                dict(zip(obj['columns'], obj['data'])),
+                index=pd.Index(obj['index'], name=obj['index_name']),
+                columns=obj['columns'],
+            )
+        return {k: _unpack(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_unpack(v) for v in obj)
+    return obj
+
+
+def _update_fingerprint(h: 'hashlib._Hash', obj: Any, top_level: bool = False):
+    """Feed a stable representation of chart inputs into a hash"""
+    if isinstance(obj, pd.DataFrame):
+        h.update(b'F')
+        h.update(repr(list(obj.columns)).encode())
+        if not obj.empty:
+            h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(b'A')
+        h.update(str(obj.dtype).encode())
+        h.update(np.ascontiguousarray(obj).tobytes() if obj.dtype != object else repr(obj.tolist()).encode())
+    elif isinstance(obj, dict):
+        h.update(b'D')
+        for key in sorted(obj, key=str):
+            if top_level and key in _VOLATILE_KEYS:
+                continue
+            h.update(str(key).encode())
+            _update_fingerprint(h, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'L')
+        for item in obj:
+            _update_fingerprint(h, item, top_level=top_level)
+    else:
+        h.update(json.dumps(obj, default=str).encode())
+
+
+def fingerprint(*args: Any) -> str:
+    """Short, stable digest of chart inputs (volatile timestamps excluded)"""
+    h = hashlib.blake2b(digest_size=16)
+    for arg in args:
+        _update_fingerprint(h, arg, top_level=True)
+    return h.hexdigest()
+
+
+def _worker_init():
+    """Pre-import the charting stack once per worker process"""
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    import matplotlib
+    matplotlib.use('Agg')
+    import src.utils.flow_charts  # noqa: F401
+    import src.utils.plotly_charts  # noqa: F401
+
+
+def _worker_ping() -> int:
+    return os.getpid()
+
+
+def _render_in_worker(kind: str, packed_args: tuple) -> Optional[bytes]:
+    """Render a chart and return raw PNG bytes (runs inside the worker)"""
+    import importlib
+
+    module_name, class_name, method_name = CHART_METHODS[kind]
+    module = importlib.import_module(module_name)
+    method = getattr(getattr(module, class_name), method_name)
+
+    buf = method(*_unpack(packed_args))
+    if buf is None:
+        return None
+    return buf.getvalue()
+
+
+class ChartRenderer:
+    """
+    Process-pool chart renderer with an LRU of finished PNGs.
+
+    PNGs are keyed by (kind, symbol, data fingerprint) so that repeat
+    commands on unchanged data skip rendering entirely.
+    """
+
+    def __init__(self, max_workers: int = 2, cache_size: int = 64,
+                 cache_ttl: int = 120, render_timeout: float = 30.0):
+        self.max_workers = max(1, max_workers)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.render_timeout = render_timeout
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: 'OrderedDict[Tuple[str, str, str], Tuple[bytes, float]]' = OrderedDict()
+        # Concurrent requests for the same chart share one render
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+
+        self.renders = 0
+        self.render_errors = 0
+        self.total_render_time = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking an asyncio process with live threads/sockets is unsafe
+            ctx = multiprocessing.get_context('spawn')
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=ctx,
+                initializer=_worker_init,
+            )
+            logger.info(f"🖼️ Chart renderer pool started ({self.max_workers} workers)")
+        return self._executor
+
+    async def warm_up(self):
+        """Spawn and pre-import every worker ahead of the first command"""
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            pids = await asyncio.gather(
+                *(loop.run_in_executor(executor, _worker_ping) for _ in range(self.max_workers))
+            )
+            logger.info(f"🖼️ Chart renderer warm ({len(set(pids))} worker processes)")
+        except Exception as e:
+            logger.warning(f"Chart renderer warm-up failed: {e}")
+
+    def _cache_get(self, key: Tuple[str, str, str]) -> Optional[bytes]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        png, created = entry
+        if time.time() - created > self.cache_ttl:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return png
+
+    def _cache_set(self, key: Tuple[str, str, str], png: bytes):
+        self._cache[key] = (png, time.time())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def render(self, kind: str, symbol: str, *args: Any) -> Optional[BytesIO]:
+        """
+        Render a chart off the event loop.
+
+        Args:
+            kind: Chart kind (key of CHART_METHODS)
+            symbol: Symbol the chart is for (cache key component)
+            *args: Positional arguments for the underlying chart method
+
+        Returns:
+            PNG buffer, or None if the chart could not be produced
+        """
+        if kind not in CHART_METHODS:
+            raise ValueError(f"Unknown chart kind: {kind}")
+
+        key = (kind, symbol or '', fingerprint(*args))
+        png = self._cache_get(key)
+        if png is not None:
+            _chart_hits.inc()
+            return BytesIO(png)
+        _chart_misses.inc()
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            png = await asyncio.shield(pending)
+            return BytesIO(png) if png else None
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        png = None
+        try:
+            png = await self._render_png(kind, _pack(args))
+            if png:
+                self._cache_set(key, png)
+        finally:
+            self._inflight.pop(key, None)
+            future.set_result(png)
+
+        return BytesIO(png) if png else None
+
+    async def _render_png(self, kind: str, packed_args: tuple) -> Optional[bytes]:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            png = await asyncio.wait_for(
+                loop.run_in_executor(self._get_executor(), _render_in_worker, kind, packed_args),
+                timeout=self.render_timeout
+            )
+            self.renders += 1
+            return png
+        except BrokenProcessPool:
+            # A worker died (OOM / kaleido crash) - rebuild the pool next time
+            logger.error(f"Chart renderer pool broke while rendering {kind}; restarting")
+            self._reset_executor()
+            self.render_errors += 1
+            return None
+        except asyncio.TimeoutError:
+            # wait_for only abandons the future; the hung worker would keep its
+            # pool slot (and a couple of them wedge the pool), so recycle it
+            logger.error(f"Chart render timed out after {self.render_timeout}s ({kind}); restarting pool")
+            self._reset_executor()
+            self.render_errors += 1
+            return None
+        except Exception as e:
+            logger.error(f"Chart render failed ({kind}): {e}")
+            self.render_errors += 1
+            return None
+        finally:
+            self.total_render_time += time.perf_counter() - start
+
+    def _reset_executor(self):
+        """Drop the pool and terminate its workers (shutdown alone leaves a hung render running)"""
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def shutdown(self):
+        """Stop worker processes"""
+        self._reset_executor()
+        self._cache.clear()
+
+    @property
+    def pending(self) -> int:
+        """Renders currently waiting on the worker pool"""
+        return len(self._inflight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Renderer statistics"""
+        return {
+            'workers': self.max_workers,
+            'pool_running': self._executor is not None,
+            'renders': self.renders,
+            'render_errors': self.render_errors,
+            'avg_render_ms': round(self.total_render_time / self.renders * 1000, 1) if self.renders else 0.0,
+            'cached_charts': len(self._cache),
+            'cache_hits': _chart_hits.value,
+            'cache_misses': _chart_misses.value,
+        }
+
+
+# Global renderer instance
+chart_renderer = ChartRenderer(
+    max_workers=getattr(Config, 'CHART_RENDER_WORKERS', 2),
+    cache_size=getattr(Config, 'CHART_CACHE_SIZE', 64),
+    cache_ttl=getattr(Config, 'CHART_CACHE_TTL', 120),
+    render_timeout=getattr(Config, 'CHART_RENDER_TIMEOUT', 30.0),
+)
@@ -0,0 +1,591 @@
+"""
+Rolling flow aggregates built from the Kafka stream
+
+Every large print that reaches _handle_kafka_event is folded into a
+per-underlying ring of fixed-width time buckets. Each ring keeps running
+window totals, so "today's flow" for a symbol (premium, call/put split,
+sweep count) is an O(1) lookup instead of a chain fetch plus dozens of
+Polygon minute-aggregate calls.
+
+Per underlying we keep:
+- bucketed call/put premium, call/put print counts, call/put contracts, sweeps
+- the largest prints of each bucket (bounded)
+- per-contract running totals (expired once the contract is quiet for a
+  full window)
+
+The whole store can be snapshotted to disk so a restart mid-session does not
+lose the morning's flow.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Column layout of the per-bucket value matrix
+CALL_PREMIUM, PUT_PREMIUM, CALL_PRINTS, PUT_PRINTS, CALL_SIZE, PUT_SIZE, SWEEPS = range(7)
+N_FIELDS = 7
+
+
+def _event_epoch(event: Dict) -> float:
+    """Best-effort event time in epoch seconds (falls back to now)"""
+    raw = event.get('event_timestamp', event.get('timestamp'))
+    if isinstance(raw, (int, float)) and not isinstance(raw, bool) and raw > 0:
+        value = float(raw)
+        # Producers send s / ms / us / ns - normalise by magnitude
+        if value > 1e17:
+            return value / 1e9
+        if value > 1e14:
+            return value / 1e6
+        if value > 1e11:
+            return value / 1e3
+        return value
+    if isinstance(raw, str) and raw:
+        try:
+            return datetime.fromisoformat(raw.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+def _is_truthy(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value)
+
+
+class UnderlyingFlow:
+    """Ring-buffered flow aggregates for a single underlying"""
+
+    def __init__(self, symbol: str, n_buckets: int, bucket_seconds: int, prints_per_bucket: int):
+        self.symbol = symbol
+        self.n_buckets = n_buckets
+        self.bucket_seconds = bucket_seconds
+        self.prints_per_bucket = prints_per_bucket
+
+        self.values = np.zeros((n_buckets, N_FIELDS), dtype=np.float64)
+        self.bucket_ids = np.full(n_buckets, -1, dtype=np.int64)
+        self.totals = np.zeros(N_FIELDS, dtype=np.float64)
+        self.head = -1  # newest bucket id seen
+
+        # slot -> min-heap of (premium, seq, print)
+        self.prints: List[List] = [[] for _ in range(n_buckets)]
+        # contract ticker -> running stats
+        self.contracts: Dict[str, Dict[str, Any]] = {}
+
+        self.underlying_price = 0.0
+        self.last_event_epoch = 0.0
+
+    def advance(self, bucket: int):
+        """Roll the ring forward to `bucket`, expiring buckets that fall out of the window"""
+        if bucket <= self.head:
+            return
+        steps = min(bucket - self.head, self.n_buckets) if self.head >= 0 else self.n_buckets
+        for b in range(bucket - steps + 1, bucket + 1):
+            slot = b % self.n_buckets
+            if self.bucket_ids[slot] >= 0:
+                self.totals -= self.values[slot]
+            self.values[slot] = 0.0
+            self.bucket_ids[slot] = b
+            self.prints[slot] = []
+        self.head = bucket
+
+    def add(self, bucket: int, is_call: bool, premium: float, size: int, sweep: bool,
+            print_row: Dict[str, Any], seq: int) -> bool:
+        self.advance(bucket)
+        if bucket <= self.head - self.n_buckets:
+            return False  # older than the window
+
+        slot = bucket % self.n_buckets
+        row = np.zeros(N_FIELDS, dtype=np.float64)
+        if is_call:
+            row[CALL_PREMIUM] = premium
+            row[CALL_PRINTS] = 1
+            row[CALL_SIZE] = size
+        else:
+            row[PUT_PREMIUM] = premium
+            row[PUT_PRINTS] = 1
+            row[PUT_SIZE] = size
+        if sweep:
+            row[SWEEPS] = 1
+        self.values[slot] += row
+        self.totals += row
+
+        heap = self.prints[slot]
+        entry = (premium, seq, print_row)
+        if len(heap) < self.prints_per_bucket:
+            heapq.heappush(heap, entry)
+        elif premium > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+        return True
+
+    def window_values(self, n_recent: Optional[int] = None) -> np.ndarray:
+        """Totals over the full window (O(1)) or the most recent n buckets"""
+        if n_recent is None or n_recent >= self.n_buckets:
+            return self.totals.copy()
+        live = self.bucket_ids > self.head - n_recent
+        return self.values[live].sum(axis=0)
+
+    def iter_prints(self, n_recent: Optional[int] = None):
+        cutoff = self.head - (n_recent or self.n_buckets)
+        for slot, heap in enumerate(self.prints):
+            if heap and self.bucket_ids[slot] > cutoff:
+                for _, _, row in heap:
+                    yield row
+
+    def prune_contracts(self, cutoff_epoch: float):
+        stale = [c for c, s in self.contracts.items() if s['last_epoch'] < cutoff_epoch]
+        for contract in stale:
+            del self.contracts[contract]
+
+
+class FlowAggregateStore:
+    """
+    In-memory rolling flow store keyed by underlying.
+
+    Usage:
+        flow_aggregates.record(enriched_event)
+        summary = flow_aggregates.get_summary('SPY')
+        sentiment = flow_aggregates.get_sentiment('SPY')
+    """
+
+    def __init__(self, bucket_seconds: int = 60, window_minutes: int = 390,
+                 prints_per_bucket: int = 25, min_events: int = 5,
+                 snapshot_path: Optional[str] = None):
+        self.bucket_seconds = max(1, bucket_seconds)
+        self.n_buckets = max(1, (window_minutes * 60) // self.bucket_seconds)
+        self.prints_per_bucket = prints_per_bucket
+        self.min_events = min_events
+        self.snapshot_path = snapshot_path
+
+        self._flows: Dict[str, UnderlyingFlow] = {}
+        self._seq = itertools.count()
+
+        self.events_recorded = 0
+        self.events_dropped = 0
+
+    @property
+    def window_seconds(self) -> int:
+        return self.n_buckets * self.bucket_seconds
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+    def record(self, event: Dict) -> bool:
+        """
+        Fold a (raw or enriched) Kafka trade event into the store.
+
+        Returns:
+            True if the event was recorded
+        """
+        try:
+            symbol = str(event.get('symbol') or event.get('underlying') or '').upper()
+            premium = float(event.get('premium') or 0.0)
+            contract_type = str(event.get('contract_type') or '').lower()
+            if not symbol or premium <= 0 or contract_type not in ('call', 'put'):
+                self.events_dropped += 1
+                return False
+
+            epoch = _event_epoch(event)
+            bucket = int(epoch // self.bucket_seconds)
+            flow = self._flows.get(symbol)
+            if flow is None:
+                flow = UnderlyingFlow(symbol, self.n_buckets, self.bucket_seconds, self.prints_per_bucket)
+                self._flows[symbol] = flow
+
+            is_call = contract_type == 'call'
+            size = int(event.get('trade_size') or 0)
+            sweep = _is_truthy(event.get('is_sweep'))
+            contract = event.get('contract_ticker', '')
+            price = float(event.get('trade_price') or 0.0)
+            strike = float(event.get('strike_price') or 0.0)
+            expiration = event.get('expiration_date', '')
+
+            print_row = {
+                'symbol': symbol,
+                'contract': contract,
+                'type': 'CALL' if is_call else 'PUT',
+                'strike': strike,
+                'expiration': expiration,
+                'timestamp': epoch,
+                'price': price,
+                'volume': size,
+                'size': size,
+                'premium': premium,
+                'is_sweep': sweep,
+            }
+            if not flow.add(bucket, is_call, premium, size, sweep, print_row, next(self._seq)):
+                self.events_dropped += 1
+                return False
+
+            stats = flow.contracts.get(contract)
+            if stats is None:
+                stats = {
+                    'contract': contract, 'type': print_row['type'], 'strike': strike,
+                    'expiration': expiration, 'premium': 0.0, 'size': 0, 'prints': 0,
+                    'sweeps': 0, 'last_price': 0.0, 'open_interest': 0, 'last_epoch': 0.0,
+                }
+                flow.contracts[contract] = stats
+            stats['premium'] += premium
+            stats['size'] += size
+            stats['prints'] += 1
+            stats['sweeps'] += int(sweep)
+            stats['last_price'] = price or stats['last_price']
+            stats['open_interest'] = int(event.get('open_interest') or stats['open_interest'])
+            stats['last_epoch'] = max(stats['last_epoch'], epoch)
+
+            underlying_price = event.get('underlying_price')
+            if underlying_price:
+                flow.underlying_price = float(underlying_price)
+            flow.last_event_epoch = max(flow.last_event_epoch, epoch)
+
+            self.events_recorded += 1
+            return True
+        except Exception as e:
+            logger.debug(f"Flow aggregate record failed: {e}")
+            self.events_dropped += 1
+            return False
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _current(self, symbol: str) -> Optional[UnderlyingFlow]:
+        flow = self._flows.get(symbol.upper())
+        if flow is None:
+            return None
+        flow.advance(int(time.time() // self.bucket_seconds))
+        return flow
+
+    def has_flow(self, symbol: str, min_events: Optional[int] = None) -> bool:
+        """Whether the stream has seen enough prints for symbol to answer on its own"""
+        flow = self._current(symbol)
+        if flow is None:
+            return False
+        prints = flow.totals[CALL_PRINTS] + flow.totals[PUT_PRINTS]
+        return prints >= (self.min_events if min_events is None else min_events)
+
+    def recent_premium(self, symbol: str, minutes: int = 15) -> float:
+        """Call + put premium over the last `minutes` (0.0 if the symbol has no flow)"""
+        flow = self._current(symbol)
+        if flow is None:
+            return 0.0
+        v = flow.window_values(max(1, (minutes * 60) // self.bucket_seconds))
+        return float(v[CALL_PREMIUM] + v[PUT_PREMIUM])
+
+    def get_summary(self, symbol: str, minutes: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Rolling totals for an underlying.
+
+        Args:
+            symbol: Underlying symbol
+            minutes: Look-back (defaults to the whole window)
+
+        Returns:
+            Summary dict or None if the symbol has no flow
+        """
+        flow = self._current(symbol)
+        if flow is None:
+            return None
+        n_recent = None if minutes is None else max(1, (minutes * 60) // self.bucket_seconds)
+        v = flow.window_values(n_recent)
+        call_premium, put_premium = float(v[CALL_PREMIUM]), float(v[PUT_PREMIUM])
+        call_count, put_count = int(v[CALL_PRINTS]), int(v[PUT_PRINTS])
+        return {
+            'symbol': flow.symbol,
+            'total_premium': call_premium + put_premium,
+            'call_premium': call_premium,
+            'put_premium': put_premium,
+            'call_count': call_count,
+            'put_count': put_count,
+            'trade_count': call_count + put_count,
+            'call_volume': int(v[CALL_SIZE]),
+            'put_volume': int(v[PUT_SIZE]),
+            'sweep_count': int(v[SWEEPS]),
+            'underlying_price': flow.underlying_price,
+            'last_event': datetime.fromtimestamp(flow.last_event_epoch) if flow.last_event_epoch else None,
+        }
+
+    def get_sentiment(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Flow sentiment in the same shape as OptionsAnalyzer.calculate_flow_sentiment.
+
+        Returns None until the symbol has at least `min_events` prints.
+        """
+        if not self.has_flow(symbol):
+            return None
+        s = self.get_summary(symbol)
+        call_premium, put_premium = s['call_premium'], s['put_premium']
+        total_premium = call_premium + put_premium
+        if total_premium > 0:
+            score = ((call_premium - put_premium) / total_premium) * 100
+            volume_factor = (s['call_count'] - s['put_count']) / max(s['trade_count'], 1)
+            score = score * 0.7 + volume_factor * 30
+            confidence = min(100, (total_premium / 100000) * 20)
+        else:
+            score = 0
+            confidence = 0
+
+        if score > 20:
+            sentiment = 'BULLISH'
+        elif score < -20:
+            sentiment = 'BEARISH'
+        else:
+            sentiment = 'NEUTRAL'
+
+        return {
+            'sentiment': sentiment,
+            'score': round(score, 1),
+            'confidence': round(confidence, 1),
+            'call_premium': call_premium,
+            'put_premium': put_premium,
+        }
+
+    def get_top_prints(self, symbol: str, limit: int = 10, minutes: Optional[int] = None) -> List[Dict]:
+        """Largest prints in the window, newest data only"""
+        flow = self._current(symbol)
+        if flow is None:
+            return []
+        n_recent = None if minutes is None else max(1, (minutes * 60) // self.bucket_seconds)
+        return heapq.nlargest(limit, flow.iter_prints(n_recent), key=lambda r: r['premium'])
+
+    def get_top_contracts(self, symbol: str, limit: int = 10) -> List[Dict]:
+        """Contracts with the most premium in the window"""
+        flow = self._current(symbol)
+        if flow is None:
+            return []
+        flow.prune_contracts(time.time() - self.window_seconds)
+        top = heapq.nlargest(limit, flow.contracts.values(), key=lambda c: c['premium'])
+        return [dict(c) for c in top]
+
+    def get_trades_frame(self, symbol: str) -> pd.DataFrame:
+        """
+        Retained prints as a DataFrame shaped like DataFetcher.get_options_trades.
+
+        Only the largest prints of each bucket are retained, so use
+        get_summary()/get_flow_analysis() for exact premium totals.
+        """
+        flow = self._current(symbol)
+        if flow is None:
+            return pd.DataFrame()
+        rows = list(flow.iter_prints())
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame(rows)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+        return df.sort_values('timestamp', ascending=False).reset_index(drop=True)
+
+    def get_contracts_frame(self, symbol: str) -> pd.DataFrame:
+        """
+        Exact per-contract window totals as a DataFrame.
+
+        Columns: contract, type, strike, expiration, premium, volume, prints,
+        sweeps, price (volume-weighted), open_interest.
+        """
+        flow = self._current(symbol)
+        if flow is None:
+            return pd.DataFrame()
+        flow.prune_contracts(time.time() - self.window_seconds)
+        if not flow.contracts:
+            return pd.DataFrame()
+        df = pd.DataFrame(list(flow.contracts.values())).rename(columns={'size': 'volume'})
+        df['price'] = (df['premium'] / (df['volume'].clip(lower=1) * 100)).where(df['volume'] > 0, df['last_price'])
+        return df.drop(columns=['last_price', 'last_epoch'])
+
+    def get_flow_analysis(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Flow analysis in the same shape as OptionsAnalyzer.analyze_flow (exact window totals)"""
+        s = self.get_summary(symbol)
+        if not s or s['trade_count'] == 0:
+            return None
+        top = self.get_top_prints(symbol, limit=1)
+        avg_trade_size = s['total_premium'] / s['trade_count']
+        unusual_trades = sum(1 for r in self._current(symbol).iter_prints() if r['premium'] > avg_trade_size * 3)
+
+        if s['call_premium'] > s['put_premium'] * 1.5:
+            dominant_side = 'BULLISH'
+        elif s['put_premium'] > s['call_premium'] * 1.5:
+            dominant_side = 'BEARISH'
+        else:
+            dominant_side = 'NEUTRAL'
+
+        if s['total_premium'] > 1000000 and unusual_trades > 5:
+            signal_strength = 'STRONG'
+        elif s['total_premium'] > 500000 and unusual_trades > 2:
+            signal_strength = 'MODERATE'
+        else:
+            signal_strength = 'WEAK'
+
+        return {
+            'total_premium': s['total_premium'],
+            'call_premium': s['call_premium'],
+            'put_premium': s['put_premium'],
+            'largest_trade': top[0] if top else None,
+            'avg_trade_size': avg_trade_size,
+            'dominant_side': dominant_side,
+            'unusual_trades': unusual_trades,
+            'signal_strength': signal_strength,
+            'trade_count': s['trade_count'],
+            'call_count': s['call_count'],
+            'put_count': s['put_count'],
+        }
+
+    def get_flow_summary(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Stream-only equivalent of ORAKLFlowScanner.get_flow_summary.
+
+        Returns None when the stream has not seen enough prints for symbol.
+        """
+        if not self.has_flow(symbol):
+            return None
+        flow = self._current(symbol)
+        s = self.get_summary(symbol)
+        flow.prune_contracts(time.time() - self.window_seconds)
+        call_oi = sum(c['open_interest'] for c in flow.contracts.values() if c['type'] == 'CALL')
+        put_oi = sum(c['open_interest'] for c in flow.contracts.values() if c['type'] == 'PUT')
+        return {
+            'symbol': flow.symbol,
+            'timestamp': datetime.now(),
+            'current_price': flow.underlying_price,
+            'flow_analysis': self.get_flow_analysis(symbol),
+            'sentiment': self.get_sentiment(symbol),
+            'snapshot': {
+                'underlying_price': flow.underlying_price,
+                'total_call_volume': s['call_volume'],
+                'total_put_volume': s['put_volume'],
+                'total_call_oi': call_oi,
+                'total_put_oi': put_oi,
+            },
+            'top_trades': self.get_top_prints(symbol, limit=5),
+            'source': 'stream',
+        }
+
+    def get_leaderboard(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Underlyings ranked by window premium"""
+        now_bucket = int(time.time() // self.bucket_seconds)
+        ranked = []
+        for flow in self._flows.values():
+            flow.advance(now_bucket)
+            total = flow.totals[CALL_PREMIUM] + flow.totals[PUT_PREMIUM]
+            if total > 0:
+                ranked.append((total, flow.symbol))
+        return [self.get_summary(sym) for _, sym in heapq.nlargest(limit, ranked)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Store statistics"""
+        return {
+            'underlyings': len(self._flows),
+            'contracts': sum(len(f.contracts) for f in self._flows.values()),
+            'events_recorded': self.events_recorded,
+            'events_dropped': self.events_dropped,
+            'bucket_seconds': self.bucket_seconds,
+            'window_minutes': self.window_seconds // 60,
+        }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _snapshot_payload(self) -> Dict[str, Any]:
+        """Copy the store into plain Python types (runs on the event loop)"""
+        return {
+            'saved_at': time.time(),
+            'bucket_seconds': self.bucket_seconds,
+            'n_buckets': self.n_buckets,
+            'flows': {
+                sym: {
+                    'values': flow.values.tolist(),
+                    'bucket_ids': flow.bucket_ids.tolist(),
+                    'head': flow.head,
+                    'prints': [[row for _, _, row in heap] for heap in flow.prints],
+                    'contracts': {c: dict(stats) for c, stats in flow.contracts.items()},
+                    'underlying_price': flow.underlying_price,
+                    'last_event_epoch': flow.last_event_epoch,
+                }
+                for sym, flow in self._flows.items()
+            },
+        }
+
+    def save_snapshot(self, path: Optional[str] = None, payload: Optional[Dict] = None) -> bool:
+        """Write the store to disk (atomic replace)"""
+        path = path or self.snapshot_path
+        if not path:
+            return False
+        try:
+            if payload is None:
+                payload = self._snapshot_payload()
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(payload, f, default=str)
+            os.replace(tmp_path, path)
+            logger.debug(f"Flow aggregates snapshot saved ({len(payload['flows'])} underlyings)")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to save flow aggregates snapshot: {e}")
+            return False
+
+    def load_snapshot(self, path: Optional[str] = None) -> bool:
+        """Restore the store from disk (ignored if the bucket layout changed)"""
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+            if (payload.get('bucket_seconds') != self.bucket_seconds
+                    or payload.get('n_buckets') != self.n_buckets):
+                logger.info("Flow aggregates snapshot layout changed, starting fresh")
+                return False
+
+            for sym, data in payload.get('flows', {}).items():
+                flow = UnderlyingFlow(sym, self.n_buckets, self.bucket_seconds, self.prints_per_bucket)
+                flow.values = np.asarray(data['values'], dtype=np.float64)
+                flow.bucket_ids = np.asarray(data['bucket_ids'], dtype=np.int64)
+                flow.head = int(data['head'])
+                flow.totals = flow.values[flow.bucket_ids >= 0].sum(axis=0)
+                for slot, rows in enumerate(data['prints']):
+                    heap = [(row['premium'], next(self._seq), row) for row in rows]
+                    heapq.heapify(heap)
+                    flow.prints[slot] = heap
+                flow.contracts = data.get('contracts', {})
+                flow.underlying_price = data.get('underlying_price', 0.0)
+                flow.last_event_epoch = data.get('last_event_epoch', 0.0)
+                # Drop anything that aged out while we were down
+                flow.advance(int(time.time() // self.bucket_seconds))
+                self._flows[sym] = flow
+
+            logger.info(f"📦 Restored flow aggregates for {len(self._flows)} underlyings")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load flow aggregates snapshot: {e}")
+            return False
+
+    async def run_snapshot_loop(self, interval: int = 60):
+        """Periodically persist the store"""
+        while True:
+            await asyncio.sleep(interval)
+            if not self._flows:
+                continue
+            # Copy on the loop, serialize + write off it
+            payload = self._snapshot_payload()
+            await asyncio.to_thread(self.save_snapshot, None, payload)
+
+
+# Global flow aggregate store
+flow_aggregates = FlowAggregateStore(
+    bucket_seconds=getattr(Config, 'FLOW_AGG_BUCKET_SECONDS', 60),
+    window_minutes=getattr(Config, 'FLOW_AGG_WINDOW_MINUTES', 390),
+    prints_per_bucket=getattr(Config, 'FLOW_AGG_PRINTS_PER_BUCKET', 25),
+    min_events=getattr(Config, 'FLOW_AGG_MIN_EVENTS', 5),
+    snapshot_path=getattr(Config, 'FLOW_AGG_SNAPSHOT_PATH', 'state/flow_aggregates.json'),
+)
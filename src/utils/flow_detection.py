@@ -0,0 +1,521 @@
+"""
+Unusual flow detection over Polygon option chain snapshots
+
+Two implementations of the same detector used by
+DataFetcher.detect_unusual_flow:
+
+- detect_flows_columnar: turns the snapshot into NumPy columns once and
+  computes volume deltas, vol/OI and premium filters in vectorized form.
+  Only the (at most FLOW_RESULT_LIMIT) surviving rows are materialized into
+  flow dicts (intensity tier, quotes, Greeks, timestamps).
+- detect_flows_legacy: the original per-contract loop, kept as the reference
+  implementation (see scripts/verify_unusual_flow.py).
+
+Both return identical flows (apart from the wall-clock 'timestamp' field)
+for the same snapshot and volume baseline.
+
+Building ChainColumns is still a Python walk over every contract dict, while
+the legacy loop stops once FLOW_RESULT_LIMIT contracts qualify. The columnar
+path therefore only wins when the legacy loop has to walk far into the chain
+(steady-state scans where few contracts moved). On a first scan of a large
+chain it is slower. scripts/verify_unusual_flow.py measures both.
+
+ChainColumns is also the columnar chain type behind DataFetcher's
+snapshot-based summaries (get_options_snapshot, get_options_trades).
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from src.utils.exceptions import DataValidationException
+from src.utils.validation import DataValidator
+
+logger = logging.getLogger(__name__)
+
+# Legacy behaviour: first N qualifying contracts in snapshot order
+FLOW_RESULT_LIMIT = 25
+
+# Candidate rows gathered per step (bounds work when results fill up early)
+CANDIDATE_CHUNK = 256
+
+# Cap used when a contract has no usable baseline (first scan / session reset)
+FIRST_SCAN_VOLUME_CAP = 5000
+
+TimestampConverter = Callable[[Any], Optional[datetime]]
+
+
+def _num(value: Any) -> float:
+    """Numeric snapshot field as float, NaN when missing or non-numeric"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+def _fallback_price(contract: Dict) -> float:
+    """Price fallbacks used when day.close is missing (same order as legacy)"""
+    day_data = contract.get('day', {}) or {}
+    last_trade = contract.get('last_trade') or {}
+    last_quote = contract.get('last_quote') or {}
+    quote_last = last_quote.get('last')
+
+    candidates = [last_trade.get('price'), last_trade.get('p')]
+    if isinstance(quote_last, dict):
+        candidates.extend([quote_last.get('price'), quote_last.get('p')])
+    candidates.extend([
+        last_quote.get('midpoint'),
+        last_quote.get('bid'),
+        last_quote.get('ask'),
+        day_data.get('open'),
+        day_data.get('high'),
+        day_data.get('low'),
+    ])
+    for candidate in candidates:
+        value = _num(candidate)
+        if value > 0:
+            return value
+    return np.nan
+
+
+def _occ_side(ticker: str) -> str:
+    """'call' / 'put' from an OCC option ticker (O:AAPL250117C00200000), '' if not parseable"""
+    if len(ticker) > 9 and ticker[-8:].isdigit():
+        return {'C': 'call', 'P': 'put'}.get(ticker[-9], '')
+    return ''
+
+
+def _float_column(values: List[Any]) -> np.ndarray:
+    """List of JSON numbers (None allowed) -> float array with NaN for gaps"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([_num(v) for v in values], dtype=np.float64)
+
+
+class ChainColumns:
+    """
+    Columnar view of an option chain snapshot.
+
+    Only the columns every contract needs (ticker, day volume) are gathered
+    eagerly. Price, open interest, strike and type are gathered for the
+    candidate rows that survive the volume-delta filter, and
+    everything downstream reaches back into `contracts` only for final
+    survivors.
+    """
+
+    __slots__ = ('contracts', 'tickers', 'volume')
+
+    def __init__(self, contracts: List[Dict]):
+        self.contracts = contracts
+        tickers, volumes = [], []
+        add_ticker, add_volume = tickers.append, volumes.append
+        empty = {}
+
+        # One fused walk over the JSON; all math happens on the arrays
+        for c in contracts:
+            ticker = c.get('ticker') or (c.get('details') or empty).get('ticker', '')
+            add_ticker(ticker if ticker.__class__ is str else str(ticker))
+            day = c.get('day') or empty
+            add_volume(day.get('volume', 0))
+
+        self.tickers = np.array(tickers, dtype=object)
+        self.volume = np.nan_to_num(_float_column(volumes), nan=0.0).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.contracts)
+
+    def prices(self, rows: np.ndarray) -> np.ndarray:
+        """Last price for rows: day close, else the legacy fallback chain"""
+        contracts = self.contracts
+        price = _float_column([(contracts[i].get('day') or {}).get('close') for i in rows])
+        for j in np.flatnonzero(~(price > 0)):
+            price[j] = _fallback_price(self.contracts[rows[j]])
+        return price
+
+    def details(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(open_interest, oi_valid, strike, is_call) for rows"""
+        contracts = self.contracts
+        oi_raw = [contracts[i].get('open_interest', 0) for i in rows]
+        oi_valid = np.array([isinstance(v, (int, float)) and not isinstance(v, bool) for v in oi_raw], dtype=bool)
+        open_interest = np.array([v if ok else 0.0 for v, ok in zip(oi_raw, oi_valid)], dtype=np.float64)
+
+        row_details = [contracts[i].get('details', {}) or {} for i in rows]
+        strike = _float_column([d.get('strike_price', 0) for d in row_details])
+        # Same (loose) rule as legacy: explicit 'call' or a 'C' anywhere in the ticker
+        is_call = np.array([
+            d.get('contract_type', '') == 'call' or 'C' in t
+            for d, t in zip(row_details, self.tickers[rows])
+        ], dtype=bool)
+        return open_interest, oi_valid, strike, is_call
+
+    def contract_sides(self, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (is_call, is_put) for rows (all rows by default), from details.contract_type
+        or else the OCC type letter in the ticker. Unlike details(), a 'C' elsewhere
+        in the ticker (e.g. O:CRM...P) does not make a put a call.
+        """
+        if rows is None:
+            rows = np.arange(len(self))
+        contracts = self.contracts
+        sides = []
+        for i, ticker in zip(rows.tolist(), self.tickers[rows].tolist()):
+            side = str((contracts[i].get('details') or {}).get('contract_type', '')).lower()
+            if side not in ('call', 'put'):
+                side = _occ_side(ticker)
+            sides.append(side)
+        sides = np.array(sides, dtype=object)
+        return sides == 'call', sides == 'put'
+
+    def open_interest(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Open interest for rows (all rows by default), 0 where missing"""
+        if rows is None:
+            rows = np.arange(len(self))
+        contracts = self.contracts
+        return np.nan_to_num(_float_column([contracts[i].get('open_interest', 0) for i in rows.tolist()]), nan=0.0)
+
+    def top_by_volume(self, n: int) -> np.ndarray:
+        """Rows of the n highest day-volume contracts that traded, highest first (snapshot order on ties)"""
+        traded = np.flatnonzero((self.volume > 0) & (self.tickers != ''))
+        if len(traded) > n:
+            # Partition on volume, then widen to every row tied with the cutoff so ties resolve by position
+            cutoff = np.partition(self.volume[traded], len(traded) - n)[len(traded) - n]
+            traded = traded[self.volume[traded] >= cutoff]
+        order = np.lexsort((traded, -self.volume[traded]))
+        return traded[order][:n]
+
+    def side_totals(self) -> Dict[str, int]:
+        """Day volume and open interest summed per side over the whole chain"""
+        is_call, is_put = self.contract_sides()
+        oi = self.open_interest()
+        return {
+            'call_volume': int(self.volume[is_call].sum()),
+            'put_volume': int(self.volume[is_put].sum()),
+            'call_oi': int(oi[is_call].sum()),
+            'put_oi': int(oi[is_put].sum()),
+        }
+
+    def baseline_from_mapping(self, cached_volumes: Mapping[str, int]) -> np.ndarray:
+        """Previous-scan volumes aligned to this chain"""
+        if not cached_volumes:
+            return np.zeros(len(self), dtype=np.int64)
+        get = cached_volumes.get
+        return np.fromiter((get(t, 0) for t in self.tickers), dtype=np.int64, count=len(self))
+
+    def volume_map(self) -> Dict[str, int]:
+        """{ticker: day volume} for contracts that traded (legacy cache format)"""
+        mask = (self.volume > 0) & (self.tickers != '')
+        return dict(zip(self.tickers[mask].tolist(), self.volume[mask].tolist()))
+
+
+def _intensity(vol_oi_ratio: float) -> str:
+    if vol_oi_ratio >= 0.5:
+        return "AGGRESSIVE"  # 50%+ of OI
+    if vol_oi_ratio >= 0.2:
+        return "STRONG"      # 20-50% of OI
+    if vol_oi_ratio >= 0.1:
+        return "MODERATE"    # 10-20% of OI
+    return "NORMAL"
+
+
+def _materialize_flow(
+    contract: Dict,
+    underlying: str,
+    ticker: str,
+    option_type: str,
+    strike: float,
+    current_day_volume: int,
+    volume_delta: int,
+    open_interest: Any,
+    vol_oi_ratio: float,
+    last_price: float,
+    premium: float,
+    flow_intensity: str,
+    convert_timestamp: TimestampConverter,
+) -> Dict:
+    """Build the flow dict for one surviving contract"""
+    details = contract.get('details', {}) or {}
+    day_data = contract.get('day', {}) or {}
+    last_trade = contract.get('last_trade') or {}
+    last_quote = contract.get('last_quote') or {}
+    greeks = contract.get('greeks', {})
+    underlying_asset = contract.get('underlying_asset', {})
+
+    bid_price = last_quote.get('bid')
+    if isinstance(bid_price, dict):
+        bid_price = bid_price.get('price') or bid_price.get('p') or bid_price.get('midpoint')
+    if bid_price:
+        try:
+            bid_price = DataValidator.validate_price(bid_price, 'bid')
+        except DataValidationException:
+            bid_price = None
+
+    ask_price = last_quote.get('ask')
+    if isinstance(ask_price, dict):
+        ask_price = ask_price.get('price') or ask_price.get('p') or ask_price.get('midpoint')
+    if ask_price:
+        try:
+            ask_price = DataValidator.validate_price(ask_price, 'ask')
+        except DataValidationException:
+            ask_price = None
+
+    bid_size = last_quote.get('bid_size') or last_quote.get('bidSize') or 0
+    ask_size = last_quote.get('ask_size') or last_quote.get('askSize') or 0
+
+    last_trade_timestamp = convert_timestamp(
+        last_trade.get('timestamp') or
+        last_trade.get('sip_timestamp') or
+        last_trade.get('participant_timestamp') or
+        last_trade.get('t')
+    )
+    if not last_trade_timestamp:
+        last_trade_timestamp = convert_timestamp(day_data.get('last_updated'))
+
+    return {
+        'ticker': ticker,
+        'underlying': underlying,
+        'type': option_type,
+        'strike': strike,
+        'expiration': details.get('expiration_date', ''),
+        'volume_delta': volume_delta,
+        'total_volume': current_day_volume,
+        'open_interest': open_interest,
+        'vol_oi_ratio': vol_oi_ratio,
+        'last_price': last_price,
+        'premium': premium,
+        'implied_volatility': contract.get('implied_volatility', 0),
+        'delta': greeks.get('delta', 0),
+        'gamma': greeks.get('gamma', 0),
+        'theta': greeks.get('theta', 0),
+        'vega': greeks.get('vega', 0),
+        'underlying_price': underlying_asset.get('price', 0),
+        'timestamp': datetime.now(),
+        'last_trade_timestamp': last_trade_timestamp,
+        'flow_intensity': flow_intensity,
+        'bid': bid_price or 0,
+        'ask': ask_price or 0,
+        'bid_size': int(bid_size) if isinstance(bid_size, (int, float)) and bid_size is not None else 0,
+        'ask_size': int(ask_size) if isinstance(ask_size, (int, float)) and ask_size is not None else 0,
+    }
+
+
+def detect_flows_columnar(
+    columns: ChainColumns,
+    baseline: np.ndarray,
+    underlying: str,
+    min_premium: float,
+    min_volume_delta: int,
+    convert_timestamp: TimestampConverter,
+    max_results: int = FLOW_RESULT_LIMIT,
+) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Vectorized unusual-flow detection.
+
+    Args:
+        columns: Columnar chain snapshot
+        baseline: Previous-scan day volume per contract, aligned to columns
+        underlying: Underlying symbol
+        min_premium: Minimum premium of the volume delta
+        min_volume_delta: Minimum contracts traded since the last scan
+        convert_timestamp: Polygon timestamp -> datetime converter
+        max_results: Stop after this many qualifying contracts (snapshot order)
+
+    Returns:
+        (flows in snapshot order, diagnostic counters)
+    """
+    volume = columns.volume
+    has_ticker = columns.tickers != ''
+
+    delta = volume - baseline
+    delta = np.where(delta <= 0, np.minimum(volume, FIRST_SCAN_VOLUME_CAP), delta)
+
+    # Cheap filter first; everything below only touches candidate rows
+    candidates = np.flatnonzero(has_ticker & (delta >= min_volume_delta))
+
+    flows = []
+    contracts_with_delta = 0
+    contracts_with_premium = 0
+
+    # Candidates are processed in snapshot-order chunks so that, like the
+    # legacy loop, work stops once max_results flows have been found.
+    for chunk_start in range(0, len(candidates), CANDIDATE_CHUNK):
+        rows = candidates[chunk_start:chunk_start + CANDIDATE_CHUNK]
+        price = columns.prices(rows)
+        priced = (price > 0) & np.isfinite(price)
+        rows, price = rows[priced], price[priced]
+        delta_rows = delta[rows]
+
+        oi, oi_valid, strike, is_call = columns.details(rows)
+        has_oi = oi > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vol_oi = np.where(has_oi, delta_rows / np.where(has_oi, oi, 1.0), 0.0)
+        premium = delta_rows * price * 100
+
+        with_premium = oi_valid & (premium >= min_premium)
+        strike_ok = (strike > 0) & np.isfinite(strike)
+        survivors = np.flatnonzero(with_premium & strike_ok)[:max_results - len(flows)]
+
+        contracts_with_delta += len(rows)
+        contracts_with_premium += int(np.count_nonzero(with_premium))
+
+        for j in survivors:
+            i = rows[j]
+            contract = columns.contracts[i]
+            flows.append(_materialize_flow(
+                contract,
+                underlying,
+                columns.tickers[i],
+                'CALL' if is_call[j] else 'PUT',
+                float(strike[j]),
+                int(volume[i]),
+                int(delta_rows[j]),
+                contract.get('open_interest', 0),
+                float(vol_oi[j]) if has_oi[j] else 0.0,
+                float(price[j]),
+                float(premium[j]),
+                _intensity(vol_oi[j]),
+                convert_timestamp,
+            ))
+        if len(flows) >= max_results:
+            break
+
+    diagnostics = {
+        'total_contracts': len(columns),
+        'contracts_with_trades': int(np.count_nonzero(has_ticker & (volume > 0))),
+        'contracts_with_delta': contracts_with_delta,
+        'contracts_with_premium': contracts_with_premium,
+    }
+    return flows, diagnostics
+
+
+def detect_flows_legacy(
+    current_snapshot: List[Dict],
+    cached_volumes: Mapping[str, int],
+    underlying: str,
+    min_premium: float,
+    min_volume_delta: int,
+    convert_timestamp: TimestampConverter,
+    max_results: int = FLOW_RESULT_LIMIT,
+) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Original per-contract detection loop (reference implementation).
+
+    Returns:
+        (flows in snapshot order, diagnostic counters)
+    """
+    flows = []
+    total_contracts = len(current_snapshot)
+    contracts_with_trades = 0
+    contracts_with_delta = 0
+    contracts_with_premium = 0
+
+    for contract in current_snapshot:
+        ticker = None
+        try:
+            details = contract.get('details', {}) or {}
+            ticker = contract.get('ticker') or details.get('ticker', '')
+            if not ticker:
+                continue
+
+            day_data = contract.get('day', {}) or {}
+            last_trade = contract.get('last_trade') or {}
+            last_quote = contract.get('last_quote') or {}
+            current_day_volume = day_data.get('volume', 0)
+
+            if current_day_volume > 0:
+                contracts_with_trades += 1
+
+            # Derive last traded price with sensible fallbacks
+            last_price = day_data.get('close')
+            if not last_price or last_price <= 0:
+                quote_last = last_quote.get('last')
+
+                price_candidates = [
+                    last_trade.get('price'),
+                    last_trade.get('p'),
+                ]
+
+                if isinstance(quote_last, dict):
+                    price_candidates.extend([
+                        quote_last.get('price'),
+                        quote_last.get('p'),
+                    ])
+
+                price_candidates.extend([
+                    last_quote.get('midpoint'),
+                    last_quote.get('bid'),
+                    last_quote.get('ask'),
+                    day_data.get('open'),
+                    day_data.get('high'),
+                    day_data.get('low'),
+                ])
+
+                for candidate in price_candidates:
+                    if candidate and candidate > 0:
+                        last_price = candidate
+                        break
+
+            if not last_price or last_price <= 0:
+                continue
+            last_price = DataValidator.validate_price(last_price, 'price')
+
+            cached_volume = cached_volumes.get(ticker, 0)
+            volume_delta = current_day_volume - cached_volume
+            if volume_delta <= 0:
+                volume_delta = min(current_day_volume, FIRST_SCAN_VOLUME_CAP)
+
+            if volume_delta < min_volume_delta:
+                continue
+
+            contracts_with_delta += 1
+
+            flow_intensity = "NORMAL"
+            vol_oi_ratio = 0.0
+            open_interest = contract.get('open_interest', 0)
+
+            if open_interest > 0:
+                vol_oi_ratio = volume_delta / open_interest
+                if vol_oi_ratio >= 0.5:
+                    flow_intensity = "AGGRESSIVE"
+                elif vol_oi_ratio >= 0.2:
+                    flow_intensity = "STRONG"
+                elif vol_oi_ratio >= 0.1:
+                    flow_intensity = "MODERATE"
+
+            premium = volume_delta * last_price * 100
+
+            if premium < min_premium:
+                continue
+
+            contracts_with_premium += 1
+
+            if not isinstance(ticker, str):
+                ticker = str(ticker) if ticker else ''
+
+            contract_type = details.get('contract_type', '')
+            option_type = 'CALL' if contract_type == 'call' or (isinstance(ticker, str) and 'C' in ticker) else 'PUT'
+            strike = DataValidator.validate_price(details.get('strike_price', 0), 'strike')
+
+            flows.append(_materialize_flow(
+                contract, underlying, ticker, option_type, strike,
+                current_day_volume, volume_delta, open_interest, vol_oi_ratio,
+                last_price, premium, flow_intensity, convert_timestamp,
+            ))
+            if len(flows) >= max_results:
+                break
+
+        except DataValidationException as e:
+            logger.debug(f"Skipping invalid contract data: {e}")
+            continue
+        except Exception as e:
+            logger.debug(f"Error processing contract {ticker}: {e}")
+            continue
+
+    diagnostics = {
+        'total_contracts': total_contracts,
+        'contracts_with_trades': contracts_with_trades,
+        'contracts_with_delta': contracts_with_delta,
+        'contracts_with_premium': contracts_with_premium,
+    }
+    return flows, diagnostics
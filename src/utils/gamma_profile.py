@@ -7,6 +7,8 @@ from collections import defaultdict
 from datetime import datetime
 from typing import Dict, Iterable, List, Optional, Tuple
 
+from src.utils.options_parser import parse_expiration
+
 
 def _detect_contract_type(contract: Dict) -> Optional[str]:
     """Best-effort detection of contract type from snapshot payload."""
@@ -39,12 +41,9 @@ def _safe_number(value, default: float = 0.0) -> float:
 
 def _parse_expiration(details: Dict) -> Optional[datetime]:
     expiration = details.get("expiration_date")
-    if not expiration:
-        return None
-    try:
-        return datetime.fromisoformat(expiration)
-    except ValueError:
+    if not expiration or not isinstance(expiration, str):
         return None
+    return parse_expiration(expiration)
 
 
 def compute_gamma_profile(
@@ -11,13 +11,19 @@ Measures whether options market is call-driven or put-driven:
 
 from __future__ import annotations
 
+import logging
 import math
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
+from scipy.special import ndtr
 from scipy.stats import norm
 
+from src.utils.options_parser import parse_expiration
+
+logger = logging.getLogger(__name__)
+
 
 def bs_delta(
     cp_flag: str,
@@ -97,6 +103,51 @@ def percent_gamma(
         return abs(delta_shifted - delta_base)
 
 
+def percent_gamma_batch(
+    is_call: np.ndarray,
+    S: float,
+    K: np.ndarray,
+    T: np.ndarray,
+    r: float = 0.0,
+    v: float = 0.20
+) -> np.ndarray:
+    """
+    Vectorized percent_gamma for a whole chain.
+
+    Same definition as percent_gamma: calls shift spot up 1%, puts shift it
+    down 1%. The shifted d1 is d1 + ln(1 +/- 1%) / (v * sqrt(T)), so each
+    contract costs one log, one sqrt and two ndtr evaluations.
+
+    Args:
+        is_call: Boolean array (True for calls, False for puts)
+        S: Spot price
+        K: Strike prices
+        T: Times to expiration in years
+        r: Risk-free rate
+        v: Constant volatility
+
+    Returns:
+        Percent gamma per contract (0 where T, K or S are not positive)
+    """
+    is_call = np.asarray(is_call, dtype=bool)
+    K = np.asarray(K, dtype=np.float64)
+    T = np.asarray(T, dtype=np.float64)
+    if S <= 0 or v <= 0:
+        return np.zeros(K.shape)
+
+    valid = (T > 0) & (K > 0)
+    K_safe = np.where(valid, K, S)
+    vol_sqrt_t = v * np.sqrt(np.where(valid, T, 1.0))
+
+    d1 = (np.log(S / K_safe) + (r + v * v / 2.0) * T) / vol_sqrt_t
+    d1_shifted = d1 + np.where(is_call, math.log1p(0.01), math.log1p(-0.01)) / vol_sqrt_t
+
+    # Put delta is -N(-d1), so compare N(-d1) terms on the put side
+    sign = np.where(is_call, 1.0, -1.0)
+    pg = np.abs(ndtr(sign * d1_shifted) - ndtr(sign * d1))
+    return np.where(valid, pg, 0.0)
+
+
 def filter_options(
     options: List[Dict],
     spot: float,
@@ -154,13 +205,7 @@ def _parse_expiration(expiration_value) -> Optional[datetime]:
         return datetime.now().replace(hour=16, minute=0, second=0, microsecond=0)
     
     if isinstance(expiration_value, str):
-        try:
-            return datetime.fromisoformat(expiration_value.replace('Z', '+00:00').split('+')[0])
-        except ValueError:
-            try:
-                return datetime.strptime(expiration_value, '%Y-%m-%d')
-            except ValueError:
-                return None
+        return parse_expiration(expiration_value)
     
     return None
 
@@ -185,13 +230,97 @@ def _get_time_to_expiry(expiration, now: Optional[datetime] = None) -> float:
     return max(T, 0.0)
 
 
+def _float_array(values: List) -> np.ndarray:
+    """JSON numbers (None allowed) -> float array, NaN for anything else"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([
+            float(x) if isinstance(x, (int, float)) and not isinstance(x, bool) else np.nan
+            for x in values
+        ], dtype=np.float64)
+
+
+def expiry_years(expirations: List, now: datetime) -> np.ndarray:
+    """Time to expiry per contract, parsing each distinct expiration once"""
+    memo: Dict = {}
+    years = np.empty(len(expirations), dtype=np.float64)
+    for i, expiration in enumerate(expirations):
+        try:
+            # type in the key: True/1/1.0 hash alike but parse differently
+            key = (expiration.__class__, expiration)
+            T = memo.get(key)
+            if T is None:
+                T = memo[key] = _get_time_to_expiry(expiration, now)
+        except TypeError:
+            T = _get_time_to_expiry(expiration, now)
+        years[i] = T
+    return years
+
+
+def gamma_ratio_result(call_gamma: float, put_gamma: float, contracts_analyzed: int) -> Dict:
+    """G ratio, bias and totals in the compute_gamma_ratio result shape"""
+    total_gamma = call_gamma + put_gamma
+    
+    # Calculate G ratio
+    if total_gamma == 0:
+        G = 0.5
+    else:
+        G = call_gamma / total_gamma
+    
+    # Determine bias based on thresholds
+    if G >= 0.65:
+        bias = 'CALL_DRIVEN'
+    elif G <= 0.35:
+        bias = 'PUT_DRIVEN'
+    else:
+        bias = 'NEUTRAL'
+    
+    return {
+        'G': round(G, 4),
+        'call_gamma': round(call_gamma, 2),
+        'put_gamma': round(put_gamma, 2),
+        'total_gamma': round(total_gamma, 2),
+        'bias': bias,
+        'contracts_analyzed': contracts_analyzed
+    }
+
+
+def gamma_totals(
+    is_call: np.ndarray,
+    strikes: np.ndarray,
+    expiry_years: np.ndarray,
+    open_interest: np.ndarray,
+    spot: float,
+    r: float = 0.0,
+    v: float = 0.20
+) -> Tuple[float, float, int]:
+    """
+    OI-weighted call and put percent gamma for chain arrays.
+
+    Rows with T <= 0, K <= 0 or OI <= 0 are ignored.
+
+    Returns:
+        (call_gamma, put_gamma, contracts_analyzed)
+    """
+    is_call = np.asarray(is_call, dtype=bool)
+    open_interest = np.asarray(open_interest, dtype=np.float64)
+    live = (np.asarray(expiry_years) > 0) & (np.asarray(strikes) > 0) & (open_interest > 0)
+
+    weighted = percent_gamma_batch(is_call, spot, strikes, expiry_years, r, v) * np.where(live, open_interest, 0.0)
+    call_gamma = float(weighted[is_call].sum())
+    put_gamma = float(weighted[~is_call].sum())
+    return call_gamma, put_gamma, int(np.count_nonzero(live))
+
+
 def compute_gamma_ratio(
     options_chain: List[Dict],
     spot: float,
     r: float = 0.0,
     v: float = 0.20,
     min_open_interest: int = 100,
-    max_otm_pct: float = 0.20
+    max_otm_pct: float = 0.20,
+    now: Optional[datetime] = None
 ) -> Dict:
     """
     Compute gamma ratio from options chain.
@@ -209,6 +338,7 @@ def compute_gamma_ratio(
         v: Constant volatility assumption
         min_open_interest: Minimum OI filter
         max_otm_pct: Maximum OTM distance filter
+        now: Valuation time (default: current time)
     
     Returns:
         {
@@ -230,15 +360,81 @@ def compute_gamma_ratio(
             'contracts_analyzed': 0
         }
     
+    # One pass to pull the fields out (various field names), then array math
+    types, strikes, expirations, ois = [], [], [], []
+    for opt in options_chain:
+        contract_type = (
+            opt.get('type') or 
+            opt.get('contract_type') or 
+            opt.get('option_type', '')
+        )
+        types.append(contract_type.lower() if isinstance(contract_type, str) else '')
+        strikes.append(opt.get('strike'))
+        expirations.append(
+            opt.get('expiration') or 
+            opt.get('expiration_date') or
+            opt.get('exp')
+        )
+        ois.append(opt.get('open_interest', 0))
+    
+    strike = _float_array(strikes)
+    open_interest = _float_array(ois)
+    
+    # Same rules as filter_options
+    with np.errstate(invalid='ignore'):
+        in_filter = (
+            (open_interest >= min_open_interest)
+            & (strike > 0)
+            & (np.abs(strike - spot) / spot <= max_otm_pct)
+        )
+    logger.debug(
+        "[DEBUG_GAMMA] Contract_Filtering | Total=%d | Filtered=%d | MinOI=%s | MaxOTM=%.0f%% | Spot=%.2f",
+        len(options_chain), int(in_filter.sum()), min_open_interest, max_otm_pct * 100, spot
+    )
+    
+    kind = np.array(types, dtype=object)
+    is_call = np.isin(kind, ('call', 'c'))
+    rows = np.flatnonzero(in_filter & (is_call | np.isin(kind, ('put', 'p'))))
+    
+    # Expirations are only parsed for rows that survive the filters
+    years = expiry_years([expirations[i] for i in rows], now or datetime.now())
+    
+    call_gamma, put_gamma, contracts_analyzed = gamma_totals(
+        is_call[rows], strike[rows], years, open_interest[rows], spot, r, v
+    )
+    return gamma_ratio_result(call_gamma, put_gamma, contracts_analyzed)
+
+
+def compute_gamma_ratio_scalar(
+    options_chain: List[Dict],
+    spot: float,
+    r: float = 0.0,
+    v: float = 0.20,
+    min_open_interest: int = 100,
+    max_otm_pct: float = 0.20,
+    now: Optional[datetime] = None
+) -> Dict:
+    """
+    Per-contract reference implementation of compute_gamma_ratio.
+
+    Kept to check the vectorized path against (see scripts/bench_gamma_ratio.py).
+    """
+    if spot <= 0:
+        return {
+            'G': 0.5,
+            'call_gamma': 0.0,
+            'put_gamma': 0.0,
+            'total_gamma': 0.0,
+            'bias': 'NEUTRAL',
+            'contracts_analyzed': 0
+        }
+    
     # Filter options
     filtered = filter_options(options_chain, spot, min_open_interest, max_otm_pct)
-    # #region agent log
-    import logging; logging.getLogger(__name__).info(f"[DEBUG_GAMMA] Contract_Filtering | Total={len(options_chain)} | Filtered={len(filtered)} | MinOI={min_open_interest} | MaxOTM={max_otm_pct*100:.0f}% | Spot={spot:.2f}")
-    # #endregion
     
     call_gamma = 0.0
     put_gamma = 0.0
-    now = datetime.now()
+    now = now or datetime.now()
     contracts_analyzed = 0
     
     for opt in filtered:
@@ -286,30 +482,7 @@ def compute_gamma_ratio(
         
         contracts_analyzed += 1
     
-    total_gamma = call_gamma + put_gamma
-    
-    # Calculate G ratio
-    if total_gamma == 0:
-        G = 0.5
-    else:
-        G = call_gamma / total_gamma
-    
-    # Determine bias based on thresholds
-    if G >= 0.65:
-        bias = 'CALL_DRIVEN'
-    elif G <= 0.35:
-        bias = 'PUT_DRIVEN'
-    else:
-        bias = 'NEUTRAL'
-    
-    return {
-        'G': round(G, 4),
-        'call_gamma': round(call_gamma, 2),
-        'put_gamma': round(put_gamma, 2),
-        'total_gamma': round(total_gamma, 2),
-        'bias': bias,
-        'contracts_analyzed': contracts_analyzed
-    }
+    return gamma_ratio_result(call_gamma, put_gamma, contracts_analyzed)
 
 
 def transform_polygon_snapshot(contracts: List[Dict]) -> List[Dict]:
@@ -0,0 +1,210 @@
+"""
+Cached snapshots behind the HTTP health server.
+
+Subsystems register a status callable once (sync or async, returning a
+dict); the health server serves three snapshots built from them:
+
+    metrics  - utils.monitoring.metrics in Prometheus text format
+    deep     - JSON with every registered source plus an overall status
+    tasks    - live asyncio tasks grouped by coroutine, with their current frame
+
+A snapshot is rebuilt at most once per HEALTH_SNAPSHOT_TTL. A request that
+finds it expired gets the cached body straight away and triggers a single
+background rebuild, so frequent scrapes never stack work on the event loop:
+
+    health_snapshot.register('kafka', kafka_listener.get_health)
+    status, body, content_type = await health_snapshot.get('deep')
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import math
+import time
+from collections import Counter as TallyCounter
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from src.config import Config
+from src.utils.monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+JSON_CONTENT_TYPE = 'application/json'
+
+
+def _jsonable(value: Any) -> Any:
+    """Make a status dict JSON-safe (non-finite floats -> None, objects -> str)"""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _unhealthy(name: str, report: Any) -> List[str]:
+    """Names of reports (top level or one level down) with healthy=False or an error"""
+    if not isinstance(report, dict):
+        return []
+    if report.get('healthy') is False or 'error' in report:
+        return [name]
+    return [
+        f"{name}.{key}" for key, value in report.items()
+        if isinstance(value, dict) and (value.get('healthy') is False or 'error' in value)
+    ]
+
+
+class HealthSnapshot:
+    """
+    Registry of status sources plus TTL-cached response bodies.
+
+    Usage:
+        health_snapshot.register('bots', bot_manager.get_bots_health)
+        status, body, content_type = await health_snapshot.get('metrics')
+    """
+
+    def __init__(self, ttl: float = 5.0, source_timeout: float = 2.0, task_limit: int = 500):
+        self.ttl = ttl
+        self.source_timeout = source_timeout
+        self.task_limit = task_limit
+        self.started = time.time()
+        self._sources: Dict[str, Callable[[], Any]] = {}
+        self._builders: Dict[str, Callable[[], Awaitable[Tuple[int, bytes, str]]]] = {
+            'metrics': self._build_metrics,
+            'deep': self._build_deep,
+            'tasks': self._build_tasks,
+        }
+        self._cache: Dict[str, Tuple[float, int, bytes, str]] = {}   # kind -> (built, status, body, type)
+        self._rebuilds: Dict[str, asyncio.Task] = {}
+        self.builds = 0
+        self.build_errors = 0
+        self.served = 0
+
+    def register(self, name: str, source: Callable[[], Any]):
+        """Add a status callable (sync or coroutine function returning a dict)"""
+        self._sources[name] = source
+
+    def unregister(self, name: str):
+        self._sources.pop(name, None)
+
+    @property
+    def sources(self) -> List[str]:
+        return list(self._sources)
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    async def get(self, kind: str) -> Tuple[int, bytes, str]:
+        """(HTTP status, body, content type) for a snapshot kind, from cache when fresh"""
+        if kind not in self._builders:
+            raise ValueError(f"Unknown snapshot: {kind}")
+        self.served += 1
+        cached = self._cache.get(kind)
+        if cached is None:
+            # First request waits for (and shares) one build
+            await self._rebuild(kind)
+            cached = self._cache[kind]
+        elif time.monotonic() - cached[0] >= self.ttl:
+            self._rebuild(kind)
+        _, status, body, content_type = cached
+        return status, body, content_type
+
+    def _rebuild(self, kind: str) -> asyncio.Task:
+        task = self._rebuilds.get(kind)
+        if task is None or task.done():
+            task = asyncio.create_task(self._build(kind), name=f"health_snapshot:{kind}")
+            self._rebuilds[kind] = task
+        return task
+
+    async def _build(self, kind: str):
+        try:
+            status, body, content_type = await self._builders[kind]()
+            self.builds += 1
+        except Exception as e:
+            self.build_errors += 1
+            logger.warning(f"Health snapshot {kind} failed: {e}")
+            status, body, content_type = 500, json.dumps({'error': str(e)}).encode(), JSON_CONTENT_TYPE
+        self._cache[kind] = (time.monotonic(), status, body, content_type)
+
+    # ------------------------------------------------------------------
+    # Builders
+    # ------------------------------------------------------------------
+
+    async def _build_metrics(self) -> Tuple[int, bytes, str]:
+        return 200, metrics.export_prometheus().encode(), PROMETHEUS_CONTENT_TYPE
+
+    async def _collect(self, name: str, source: Callable[[], Any]) -> Any:
+        try:
+            report = source()
+            if inspect.isawaitable(report):
+                report = await asyncio.wait_for(report, timeout=self.source_timeout)
+            return report
+        except asyncio.TimeoutError:
+            return {'error': f'timed out after {self.source_timeout}s'}
+        except Exception as e:
+            return {'error': f'{type(e).__name__}: {e}'}
+
+    async def _build_deep(self) -> Tuple[int, bytes, str]:
+        started = time.perf_counter()
+        names = list(self._sources)
+        reports = await asyncio.gather(*(self._collect(name, self._sources[name]) for name in names))
+        subsystems = dict(zip(names, reports))
+        unhealthy = [entry for name, report in subsystems.items() for entry in _unhealthy(name, report)]
+        body = {
+            'status': 'degraded' if unhealthy else 'ok',
+            'unhealthy': unhealthy,
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'generated_at': time.time(),
+            'build_ms': round((time.perf_counter() - started) * 1000, 2),
+            'subsystems': subsystems,
+        }
+        return 200, json.dumps(_jsonable(body)).encode(), JSON_CONTENT_TYPE
+
+    async def _build_tasks(self) -> Tuple[int, bytes, str]:
+        tasks = asyncio.all_tasks()
+        current = asyncio.current_task()
+        by_coro = TallyCounter()
+        listed = []
+        for task in tasks:
+            coro = task.get_coro()
+            name = getattr(coro, '__qualname__', None) or type(coro).__name__
+            by_coro[name] += 1
+            if task is current or len(listed) >= self.task_limit:
+                continue
+            frame = None
+            stack = task.get_stack(limit=1)
+            if stack:
+                top = stack[-1]
+                frame = f"{top.f_code.co_filename}:{top.f_lineno} in {top.f_code.co_name}"
+            listed.append({'name': task.get_name(), 'coro': name, 'done': task.done(), 'frame': frame})
+        listed.sort(key=lambda entry: entry['coro'])
+        body = {
+            'total': len(tasks),
+            'by_coro': dict(by_coro.most_common()),
+            'tasks': listed,
+            'truncated': len(tasks) - 1 > len(listed),
+        }
+        return 200, json.dumps(_jsonable(body)).encode(), JSON_CONTENT_TYPE
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'sources': self.sources,
+            'builds': self.builds,
+            'build_errors': self.build_errors,
+            'served': self.served,
+            'ttl': self.ttl,
+        }
+
+
+health_snapshot = HealthSnapshot(
+    ttl=getattr(Config, 'HEALTH_SNAPSHOT_TTL', 5.0),
+    source_timeout=getattr(Config, 'HEALTH_SOURCE_TIMEOUT', 2.0),
+)
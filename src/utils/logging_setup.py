@@ -0,0 +1,175 @@
+"""
+Non-blocking logging for the event loop.
+
+Log calls on the loop only enqueue the record. A QueueListener thread does
+the formatting and the stdout/file writes, so a slow disk or a blocked
+terminal no longer stalls Kafka event handling or a scan.
+
+Per-event and per-symbol messages go through hot-path loggers, which are
+rate limited (token bucket) and sampled once the budget is spent, so a
+burst of events cannot flood the log:
+
+    hot_logger = hot_path_logger(__name__)
+    hot_logger.info("Fetching Snapshot -> Underlying: %s | Contract: %s", underlying, contract_id)
+
+Pass arguments instead of f-strings: records that are filtered out or below
+the level are then never formatted.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+HOT_PATH_SUFFIX = '.hot'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_hot_filters: Dict[str, 'RateLimitFilter'] = {}
+
+
+class _LoopQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the writer thread.
+
+    The stock prepare() runs the full formatter (timestamp, traceback text)
+    on the calling thread. Here only the message is merged with its args,
+    so later mutation of an argument cannot change what gets logged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token-bucket limit for INFO/DEBUG records, with 1-in-N sampling after the
+    budget is spent. WARNING and above always pass.
+
+    The next record that passes carries a "[+N suppressed]" suffix so gaps
+    stay visible in the log.
+
+    Usage:
+        logging.getLogger('src.trade_enricher.hot').addFilter(RateLimitFilter(20, 100, 100))
+    """
+
+    def __init__(self, rate: float, burst: int, sample_every: int):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.sample_every = max(1, sample_every)
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.over_budget = 0
+        self.suppressed = 0
+        self.total_suppressed = 0
+        self.passed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+            else:
+                self.over_budget += 1
+                if self.over_budget % self.sample_every:
+                    self.suppressed += 1
+                    self.total_suppressed += 1
+                    return False
+            self.passed += 1
+            if self.suppressed:
+                # Merge now: the suffix must not be taken as a format directive
+                record.msg = f"{record.getMessage()} [+{self.suppressed} suppressed]"
+                record.args = None
+                self.suppressed = 0
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'passed': self.passed, 'suppressed': self.total_suppressed}
+
+
+def hot_path_logger(name: str) -> logging.Logger:
+    """
+    Rate-limited, sampled child logger for per-event / per-symbol messages.
+
+    Returns logging.getLogger(f"{name}.hot"), which propagates to the normal
+    handlers. Limits come from LOG_HOT_PATH_RATE / _BURST / _SAMPLE.
+    """
+    hot_name = name + HOT_PATH_SUFFIX
+    hot_logger = logging.getLogger(hot_name)
+    if hot_name not in _hot_filters:
+        rate_filter = RateLimitFilter(
+            rate=getattr(Config, 'LOG_HOT_PATH_RATE', 20.0),
+            burst=getattr(Config, 'LOG_HOT_PATH_BURST', 100),
+            sample_every=getattr(Config, 'LOG_HOT_PATH_SAMPLE', 100),
+        )
+        hot_logger.addFilter(rate_filter)
+        _hot_filters[hot_name] = rate_filter
+    return hot_logger
+
+
+def setup_logging(handlers: List[logging.Handler], level: int = logging.INFO,
+                  fmt: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s') -> None:
+    """
+    Configure the root logger.
+
+    With LOG_QUEUE_ENABLED the given handlers are driven by a background
+    QueueListener and the root logger only gets a queue handler; otherwise
+    they are attached directly (synchronous writes, the old behaviour).
+    """
+    global _listener
+
+    formatter = logging.Formatter(fmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    stop_logging()
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if not getattr(Config, 'LOG_QUEUE_ENABLED', True):
+        for handler in handlers:
+            root.addHandler(handler)
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(_LoopQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Runs before logging's own atexit flush (registered earlier, so called later)
+    atexit.unregister(stop_logging)
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Drain the queue and stop the writer thread (safe to call twice)"""
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
+
+
+def queue_depth() -> int:
+    """Records waiting for the writer thread (0 when logging is synchronous)"""
+    return _listener.queue.qsize() if _listener is not None else 0
+
+
+def get_logging_stats() -> Dict[str, Dict[str, int]]:
+    """Passed / suppressed counts per hot-path logger"""
+    return {name: rate_filter.get_stats() for name, rate_filter in _hot_filters.items()}
@@ -0,0 +1,246 @@
+"""
+Event-loop saturation monitor.
+
+Answers "was the loop stalled when that alert was missed?":
+
+- scheduling lag: a probe sleeps LOOP_MONITOR_INTERVAL and records how late
+  it wakes up (p50/p95/p99/max over a rolling window)
+- live tasks grouped by coroutine name
+- slow callbacks: every loop callback (task step, call_soon, timer) is timed
+  and the ones over LOOP_SLOW_CALLBACK_MS are kept with their source
+- depth of each queue the pipeline owns (registered by name)
+
+Everything is exported through utils.monitoring.metrics and summarized in
+the main.py heartbeat:
+
+    loop_monitor.register_queue('kafka_dispatch', lambda: listener.pending_dispatches)
+    loop_monitor.start()
+    logger.info(loop_monitor.summary_line())
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter as TallyCounter
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.config import Config
+from src.utils.monitoring import loop_lag, loop_tasks, queue_depth, slow_callbacks
+
+logger = logging.getLogger(__name__)
+
+_original_handle_run = asyncio.events.Handle._run
+
+
+def _callback_name(handle: asyncio.Handle) -> str:
+    """Readable source of a loop callback; task steps are named by coroutine"""
+    callback = getattr(handle, '_callback', None)
+    owner = getattr(callback, '__self__', None)
+    if isinstance(owner, asyncio.Task):
+        return f"task:{_coro_name(owner)}"
+    name = getattr(callback, '__qualname__', None)
+    if name is None:
+        name = type(callback).__name__
+    return name
+
+
+def _coro_name(task: asyncio.Task) -> str:
+    coro = task.get_coro()
+    return getattr(coro, '__qualname__', None) or type(coro).__name__
+
+
+class LoopMonitor:
+    """
+    Samples loop lag, task counts and queue depths; times loop callbacks.
+
+    Usage:
+        loop_monitor.start()           # inside the running loop
+        loop_monitor.get_stats()       # lag percentiles, tasks, slow callbacks, queues
+        await loop_monitor.stop()
+    """
+
+    def __init__(self, interval: float = 0.5, slow_callback_ms: float = 100.0, window: int = 600):
+        self.interval = interval
+        self.slow_callback_s = slow_callback_ms / 1000.0
+        self._lags: Deque[float] = deque(maxlen=window)
+        self._slow: Deque[Tuple[float, float, str]] = deque(maxlen=200)  # (wall time, seconds, callback)
+        self._queues: Dict[str, Tuple[Callable[[], int], Any]] = {}   # name -> (depth fn, bound gauge)
+        self._task_counts: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._timer_installed = False
+        self.slow_callback_total = 0
+        self.max_lag = 0.0
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register_queue(self, name: str, depth: Callable[[], int]):
+        """Report depth() as pipeline_queue_depth{queue=name} on every sample"""
+        self._queues[name] = (depth, queue_depth.labels(queue=name))
+
+    def unregister_queue(self, name: str):
+        self._queues.pop(name, None)
+        queue_depth.set(0, {'queue': name})
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the lag probe on the running loop and install the callback timer"""
+        if self._task and not self._task.done():
+            return
+        if self.slow_callback_s > 0:
+            self._install_callback_timer()
+        self._task = asyncio.create_task(self._probe_loop(), name='loop_monitor')
+        logger.info(
+            f"⏱️ Loop monitor started (probe every {self.interval}s, "
+            f"slow callback >= {self.slow_callback_s * 1000:.0f}ms)"
+        )
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._remove_callback_timer()
+
+    def _install_callback_timer(self):
+        if self._timer_installed:
+            return
+        monitor = self
+
+        def _timed_run(handle):
+            start = time.perf_counter()
+            _original_handle_run(handle)
+            elapsed = time.perf_counter() - start
+            if elapsed >= monitor.slow_callback_s:
+                monitor._record_slow(handle, elapsed)
+
+        asyncio.events.Handle._run = _timed_run
+        self._timer_installed = True
+
+    def _remove_callback_timer(self):
+        if self._timer_installed:
+            asyncio.events.Handle._run = _original_handle_run
+            self._timer_installed = False
+
+    def _record_slow(self, handle: asyncio.Handle, elapsed: float):
+        try:
+            name = _callback_name(handle)
+        except Exception:
+            name = 'unknown'
+        self._slow.append((time.time(), elapsed, name))
+        self.slow_callback_total += 1
+        slow_callbacks.inc(labels={'callback': name})
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+
+    async def _probe_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self._lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            loop_lag.observe(lag)
+            try:
+                self._sample_tasks()
+                self._sample_queues()
+            except Exception as e:
+                logger.debug(f"Loop monitor sample error: {e}")
+
+    def _sample_tasks(self):
+        counts = TallyCounter(_coro_name(task) for task in asyncio.all_tasks())
+        # Groups that emptied out since the last sample drop to zero
+        for name in self._task_counts.keys() - counts.keys():
+            loop_tasks.set(0, {'coro': name})
+        for name, count in counts.items():
+            loop_tasks.set(count, {'coro': name})
+        self._task_counts = dict(counts)
+
+    def _sample_queues(self):
+        for name, (depth, gauge) in self._queues.items():
+            try:
+                gauge.set(depth())
+            except Exception as e:
+                logger.debug(f"Queue depth for {name} failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def lag_percentiles(self) -> Dict[str, float]:
+        """Lag p50/p95/p99/max in milliseconds over the rolling window"""
+        if not self._lags:
+            return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0, 'samples': 0}
+        values = sorted(self._lags)
+        n = len(values)
+
+        def pick(q: float) -> float:
+            return round(values[min(n - 1, int(q * n))] * 1000, 2)
+
+        return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99),
+                'max': round(values[-1] * 1000, 2), 'samples': n}
+
+    def slowest_callbacks(self, limit: int = 5, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Slowest recent callbacks (optionally only those after `since`, wall time)"""
+        recent = [entry for entry in self._slow if since is None or entry[0] >= since]
+        recent.sort(key=lambda entry: entry[1], reverse=True)
+        return [
+            {'callback': name, 'ms': round(elapsed * 1000, 1), 'at': at}
+            for at, elapsed, name in recent[:limit]
+        ]
+
+    def queue_depths(self) -> Dict[str, int]:
+        depths = {}
+        for name, (depth, _) in self._queues.items():
+            try:
+                depths[name] = int(depth())
+            except Exception:
+                depths[name] = -1
+        return depths
+
+    def get_stats(self) -> Dict[str, Any]:
+        tasks = sorted(self._task_counts.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'lag_ms': self.lag_percentiles(),
+            'max_lag_ms_since_start': round(self.max_lag * 1000, 2),
+            'tasks_total': sum(self._task_counts.values()),
+            'tasks_by_coro': dict(tasks),
+            'slow_callbacks_total': self.slow_callback_total,
+            'slowest_callbacks': self.slowest_callbacks(),
+            'queues': self.queue_depths(),
+        }
+
+    def summary_line(self, since: Optional[float] = None) -> str:
+        """One-line heartbeat summary"""
+        lag = self.lag_percentiles()
+        top_tasks = sorted(self._task_counts.items(), key=lambda item: item[1], reverse=True)[:3]
+        slow = self.slowest_callbacks(1, since=since)
+        parts = [
+            f"Loop lag p50/p95/p99/max {lag['p50']:.1f}/{lag['p95']:.1f}/{lag['p99']:.1f}/{lag['max']:.1f}ms",
+            f"tasks {sum(self._task_counts.values())} ("
+            + ", ".join(f"{name} {count}" for name, count in top_tasks) + ")",
+        ]
+        if slow:
+            parts.append(f"slowest callback {slow[0]['callback']} {slow[0]['ms']:.0f}ms")
+        depths = self.queue_depths()
+        if depths:
+            parts.append("queues " + ", ".join(f"{name}={depth}" for name, depth in depths.items()))
+        return " | ".join(parts)
+
+
+loop_monitor = LoopMonitor(
+    interval=getattr(Config, 'LOOP_MONITOR_INTERVAL', 0.5),
+    slow_callback_ms=getattr(Config, 'LOOP_SLOW_CALLBACK_MS', 100.0),
+)
@@ -1,194 +1,406 @@
 """
 Monitoring utilities for ORAKL Bot
 Implements metrics collection and Prometheus integration
+
+Each distinct label set resolves once to a bound child holding plain
+numeric accumulators; hot paths can keep the child and skip the lookup:
+
+    hits = cache_hits.labels(cache_name='charts')
+    hits.inc()
+
+Histograms keep fixed Prometheus buckets plus a streaming quantile sketch
+(relative-error log buckets) for p50/p95/p99, so no raw samples are kept
+or sorted. Metrics are written and read on the event loop thread; there
+are no locks on the observation path.
 """
 
 import time
 import asyncio
-from typing import Dict, Any, Optional, List, Callable
-from datetime import datetime, timedelta
-from collections import defaultdict, deque
-from dataclasses import dataclass, field
+import math
+from typing import Dict, Any, Optional, List, Callable, Tuple
 import logging
 from functools import wraps
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    """Format labels for Prometheus"""
+    if not labels:
+        return ""
+    label_parts = [f'{k}="{_escape_label_value(v)}"' for k, v in sorted(labels.items())]
+    return "{" + ",".join(label_parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class QuantileSketch:
+    """
+    Streaming quantile estimate with bounded relative error.
+
+    Positive values land in logarithmic buckets of width (1 + accuracy) /
+    (1 - accuracy), so any quantile is within `accuracy` (relative) of the
+    true sample. Values at or below min_value (including negatives) are
+    counted as min_value. Memory is one dict entry per occupied bucket.
+    """
+
+    __slots__ = ('accuracy', 'min_value', '_gamma', '_inv_log_gamma', '_bins', '_low', 'count')
+
+    def __init__(self, accuracy: float = 0.01, min_value: float = 1e-9):
+        self.accuracy = accuracy
+        self.min_value = min_value
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._inv_log_gamma = 1.0 / math.log(self._gamma)
+        self._bins: Dict[int, int] = {}
+        self._low = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= self.min_value:
+            self._low += 1
+            return
+        index = math.floor(math.log(value) * self._inv_log_gamma)
+        self._bins[index] = self._bins.get(index, 0) + 1
+
+    def add_array(self, values: np.ndarray):
+        """Fold a batch of observations (vectorized)"""
+        self.count += values.size
+        positive = values[values > self.min_value]
+        self._low += values.size - positive.size
+        if not positive.size:
+            return
+        indexes, counts = np.unique(
+            np.floor(np.log(positive) * self._inv_log_gamma).astype(np.int64), return_counts=True
+        )
+        bins = self._bins
+        for index, count in zip(indexes.tolist(), counts.tolist()):
+            bins[index] = bins.get(index, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated value at quantile q (0..1), or None when empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self._low
+        if rank < seen:
+            return self.min_value
+        index = None
+        for index in sorted(self._bins):
+            seen += self._bins[index]
+            if rank < seen:
+                break
+        # Bucket [gamma^i, gamma^(i+1)): its midpoint in relative terms
+        return 2 * self._gamma ** (index + 1) / (self._gamma + 1)
+
+
+class _CounterChild:
+    __slots__ = ('labels', 'value')
+
+    def __init__(self, labels: Dict[str, Any]):
+        self.labels = labels
+        self.value = 0.0
+
+    def inc(self, value: float = 1.0):
+        """Increment counter"""
+        if value < 0:
+            raise ValueError("Counter can only increase")
+        self.value += value
+
+
+class _GaugeChild:
+    __slots__ = ('labels', 'value')
+
+    def __init__(self, labels: Dict[str, Any]):
+        self.labels = labels
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, value: float = 1.0):
+        self.value += value
+
+    def dec(self, value: float = 1.0):
+        self.value -= value
+
+
+class _HistogramChild:
+    """
+    Observations are appended to a small buffer and folded into the bucket
+    counts and the sketch in vectorized batches (every FOLD_EVERY values or
+    on read), which keeps observe() to a list append.
+    """
+
+    __slots__ = ('labels', 'bounds', '_bounds', '_counts', '_sum', '_count', '_pending', 'sketch')
 
-@dataclass
-class MetricPoint:
-    """Single metric data point"""
-    timestamp: float
-    value: float
-    labels: Dict[str, str] = field(default_factory=dict)
+    FOLD_EVERY = 1024
+
+    def __init__(self, labels: Dict[str, Any], bounds: List[float]):
+        self.labels = labels
+        self.bounds = bounds
+        self._bounds = np.asarray(bounds, dtype=float)
+        self._counts = np.zeros(len(bounds) + 1, dtype=np.int64)   # per bucket, last slot is +Inf (not cumulative)
+        self._sum = 0.0
+        self._count = 0
+        self._pending: List[float] = []
+        self.sketch = QuantileSketch()
+
+    def observe(self, value: float):
+        """Record histogram observation"""
+        pending = self._pending
+        pending.append(value)
+        if len(pending) >= self.FOLD_EVERY:
+            self._fold()
+
+    def _fold(self):
+        if not self._pending:
+            return
+        values = np.asarray(self._pending, dtype=float)
+        self._pending = []
+        # side='left': a value equal to a bound belongs to that bucket (le is inclusive)
+        self._counts += np.bincount(np.searchsorted(self._bounds, values, side='left'),
+                                    minlength=len(self._counts))
+        self._sum += float(values.sum())
+        self._count += values.size
+        self.sketch.add_array(values)
+
+    @property
+    def count(self) -> int:
+        self._fold()
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        self._fold()
+        return self._sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._fold()
+        return self.sketch.quantile(q)
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(upper bound, cumulative count) pairs ending with +Inf"""
+        self._fold()
+        totals = np.cumsum(self._counts).tolist()
+        return list(zip(self.bounds + [math.inf], totals))
 
 
 class MetricCollector:
-    """Base metric collector"""
-    
+    """Base metric collector: maps label sets to bound children"""
+
+    kind = 'untyped'
+
     def __init__(self, name: str, description: str, labels: List[str] = None):
         self.name = name
         self.description = description
-        self.labels = labels or []
-        self._values = defaultdict(lambda: deque(maxlen=1000))
-    
-    def observe(self, value: float, labels: Dict[str, str] = None):
-        """Record a metric observation"""
-        label_key = self._make_label_key(labels or {})
-        self._values[label_key].append(MetricPoint(
-            timestamp=time.time(),
-            value=value,
-            labels=labels or {}
-        ))
-    
+        self.labelnames = tuple(labels or [])
+        self._children: Dict[tuple, Any] = {}
+        self._unlabeled = self._new_child({})
+
+    def _new_child(self, labels: Dict[str, Any]):
+        raise NotImplementedError
+
+    def labels(self, *values, **labels):
+        """
+        Bound child for one label set (resolve once, reuse on hot paths).
+
+        Accepts label values positionally in declaration order, or by name.
+        """
+        if values:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            labels = dict(zip(self.labelnames, values))
+        return self._child(labels)
+
+    def _key(self, labels: Dict[str, Any]) -> tuple:
+        if len(labels) == len(self.labelnames):
+            try:
+                return tuple([labels[name] for name in self.labelnames])
+            except KeyError:
+                pass
+        # Labels not declared up front: key on the sorted pairs
+        return tuple(sorted(labels.items()))
+
+    def _child(self, labels: Optional[Dict[str, Any]]):
+        if not labels:
+            return self._unlabeled
+        key = self._key(labels)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child(dict(labels))
+        return child
+
+    def children(self) -> List[Any]:
+        """Children with data, unlabeled first (always included when no labels are declared)"""
+        out = [self._unlabeled] if not self.labelnames or self._has_data(self._unlabeled) else []
+        return out + list(self._children.values())
+
+    def _has_data(self, child) -> bool:
+        return bool(child.value)
+
     def get_current(self, labels: Dict[str, str] = None) -> Optional[float]:
         """Get most recent value"""
-        label_key = self._make_label_key(labels or {})
-        if label_key in self._values and self._values[label_key]:
-            return self._values[label_key][-1].value
-        return None
-    
-    def get_all(self) -> Dict[str, List[MetricPoint]]:
-        """Get all metric points"""
-        return dict(self._values)
-    
-    def _make_label_key(self, labels: Dict[str, str]) -> str:
-        """Create consistent key from labels"""
-        if not labels:
-            return ""
-        return ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+        if labels and self._lookup(labels) is None:
+            return None
+        return self._child(labels).value
+
+    def _lookup(self, labels: Dict[str, Any]):
+        """Existing child for labels, or None (does not create one)"""
+        return self._children.get(self._key(labels))
+
+    def export_lines(self) -> List[str]:
+        return [f"{self.name}{_format_labels(child.labels)} {_format_value(child.value)}" for child in self.children()]
 
 
 class Counter(MetricCollector):
     """Counter metric (monotonically increasing)"""
-    
-    def __init__(self, name: str, description: str, labels: List[str] = None):
-        super().__init__(name, description, labels)
-        self._totals = defaultdict(float)
-    
+
+    kind = 'counter'
+
+    def _new_child(self, labels: Dict[str, Any]) -> _CounterChild:
+        return _CounterChild(labels)
+
     def inc(self, value: float = 1.0, labels: Dict[str, str] = None):
         """Increment counter"""
-        if value < 0:
-            raise ValueError("Counter can only increase")
-        
-        label_key = self._make_label_key(labels or {})
-        self._totals[label_key] += value
-        self.observe(self._totals[label_key], labels)
-    
+        self._child(labels).inc(value)
+
     def get_total(self, labels: Dict[str, str] = None) -> float:
         """Get current total"""
-        label_key = self._make_label_key(labels or {})
-        return self._totals.get(label_key, 0.0)
+        child = self._lookup(labels) if labels else self._unlabeled
+        return child.value if child is not None else 0.0
 
 
 class Gauge(MetricCollector):
     """Gauge metric (can go up or down)"""
-    
+
+    kind = 'gauge'
+
+    def _new_child(self, labels: Dict[str, Any]) -> _GaugeChild:
+        return _GaugeChild(labels)
+
     def set(self, value: float, labels: Dict[str, str] = None):
         """Set gauge value"""
-        self.observe(value, labels)
-    
+        self._child(labels).value = value
+
     def inc(self, value: float = 1.0, labels: Dict[str, str] = None):
         """Increment gauge"""
-        current = self.get_current(labels) or 0
-        self.set(current + value, labels)
-    
+        self._child(labels).value += value
+
     def dec(self, value: float = 1.0, labels: Dict[str, str] = None):
         """Decrement gauge"""
-        current = self.get_current(labels) or 0
-        self.set(current - value, labels)
+        self._child(labels).value -= value
+
+    def children(self) -> List[Any]:
+        # An unlabeled gauge that was never set is not reported on labeled metrics
+        if self.labelnames and not self._unlabeled.value:
+            return list(self._children.values())
+        return [self._unlabeled] + list(self._children.values())
 
 
 class Histogram(MetricCollector):
     """Histogram metric for distributions"""
-    
+
+    kind = 'histogram'
+
     def __init__(self, name: str, description: str, buckets: List[float] = None, labels: List[str] = None):
+        bounds = sorted(float(b) for b in (buckets or DEFAULT_BUCKETS) if b != math.inf)
+        self.buckets = bounds
         super().__init__(name, description, labels)
-        self.buckets = buckets or [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
-        self._bucket_counts = defaultdict(lambda: defaultdict(int))
-        self._sums = defaultdict(float)
-        self._counts = defaultdict(int)
-    
+
+    def _new_child(self, labels: Dict[str, Any]) -> _HistogramChild:
+        return _HistogramChild(labels, self.buckets)
+
+    def _has_data(self, child) -> bool:
+        return child.count > 0
+
     def observe(self, value: float, labels: Dict[str, str] = None):
         """Record histogram observation"""
-        super().observe(value, labels)
-        
-        label_key = self._make_label_key(labels or {})
-        
-        # Update buckets
-        for bucket in self.buckets:
-            if value <= bucket:
-                self._bucket_counts[label_key][bucket] += 1
-        
-        # Update sum and count
-        self._sums[label_key] += value
-        self._counts[label_key] += 1
-    
+        self._child(labels).observe(value)
+
+    def get_current(self, labels: Dict[str, str] = None) -> Optional[float]:
+        """Histograms keep no last value; use get_summary()"""
+        return None
+
+    def _existing(self, labels: Optional[Dict[str, str]]) -> Optional[_HistogramChild]:
+        return self._lookup(labels) if labels else self._unlabeled
+
     def get_percentile(self, percentile: float, labels: Dict[str, str] = None) -> Optional[float]:
-        """Get percentile value"""
+        """Get percentile value (sketch estimate, ~1% relative error)"""
         if not 0 <= percentile <= 100:
             raise ValueError("Percentile must be between 0 and 100")
-        
-        label_key = self._make_label_key(labels or {})
-        values = [p.value for p in self._values.get(label_key, [])]
-        
-        if not values:
+        child = self._existing(labels)
+        if child is None or not child.count:
             return None
-        
-        sorted_values = sorted(values)
-        index = int(len(sorted_values) * (percentile / 100))
-        return sorted_values[min(index, len(sorted_values) - 1)]
-    
+        return child.quantile(percentile / 100)
+
     def get_summary(self, labels: Dict[str, str] = None) -> Dict[str, float]:
         """Get summary statistics"""
-        label_key = self._make_label_key(labels or {})
-        
-        if label_key not in self._counts or self._counts[label_key] == 0:
+        child = self._existing(labels)
+        if child is None or not child.count:
             return {}
-        
         return {
-            'count': self._counts[label_key],
-            'sum': self._sums[label_key],
-            'mean': self._sums[label_key] / self._counts[label_key],
-            'p50': self.get_percentile(50, labels) or 0,
-            'p95': self.get_percentile(95, labels) or 0,
-            'p99': self.get_percentile(99, labels) or 0
+            'count': child.count,
+            'sum': child.sum,
+            'mean': child.sum / child.count,
+            'p50': child.quantile(0.50) or 0,
+            'p95': child.quantile(0.95) or 0,
+            'p99': child.quantile(0.99) or 0
         }
 
+    def export_lines(self) -> List[str]:
+        lines = []
+        for child in self.children():
+            if not child.count and self.labelnames:
+                continue
+            for bound, cumulative in child.cumulative():
+                bucket_labels = _format_labels({**child.labels, 'le': _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_str = _format_labels(child.labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{label_str} {child.count}")
+        return lines
+
 
 class MetricsRegistry:
     """Central metrics registry"""
     
     def __init__(self):
-        self._metrics = {}
-        self._collectors = {}
+        self._metrics: Dict[str, MetricCollector] = {}
+    
+    def _register(self, metric: MetricCollector) -> MetricCollector:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
     
     def register_counter(self, name: str, description: str, labels: List[str] = None) -> Counter:
         """Register a counter metric"""
-        if name in self._metrics:
-            raise ValueError(f"Metric {name} already registered")
-        
-        counter = Counter(name, description, labels)
-        self._metrics[name] = counter
-        return counter
+        return self._register(Counter(name, description, labels))
     
     def register_gauge(self, name: str, description: str, labels: List[str] = None) -> Gauge:
         """Register a gauge metric"""
-        if name in self._metrics:
-            raise ValueError(f"Metric {name} already registered")
-        
-        gauge = Gauge(name, description, labels)
-        self._metrics[name] = gauge
-        return gauge
+        return self._register(Gauge(name, description, labels))
     
     def register_histogram(self, name: str, description: str, buckets: List[float] = None, labels: List[str] = None) -> Histogram:
         """Register a histogram metric"""
-        if name in self._metrics:
-            raise ValueError(f"Metric {name} already registered")
-        
-        histogram = Histogram(name, description, buckets, labels)
-        self._metrics[name] = histogram
-        return histogram
+        return self._register(Histogram(name, description, buckets, labels))
     
     def get_metric(self, name: str) -> Optional[MetricCollector]:
         """Get metric by name"""
@@ -199,73 +411,15 @@ class MetricsRegistry:
         return self._metrics.copy()
     
     def export_prometheus(self) -> str:
-        """Export metrics in Prometheus format"""
+        """Export metrics in Prometheus text format (histogram buckets cumulative)"""
         lines = []
-        
         for name, metric in self._metrics.items():
-            # Add help text
-            lines.append(f"# HELP {name} {metric.description}")
-            
-            # Add type
-            if isinstance(metric, Counter):
-                lines.append(f"# TYPE {name} counter")
-            elif isinstance(metric, Gauge):
-                lines.append(f"# TYPE {name} gauge")
-            elif isinstance(metric, Histogram):
-                lines.append(f"# TYPE {name} histogram")
-            
-            # Add metric values
-            if isinstance(metric, (Counter, Gauge)):
-                for label_key, points in metric.get_all().items():
-                    if points:
-                        latest = points[-1]
-                        label_str = self._format_labels(latest.labels)
-                        lines.append(f"{name}{label_str} {latest.value}")
-            
-            elif isinstance(metric, Histogram):
-                for label_key, summary in metric._counts.items():
-                    if summary > 0:
-                        labels = self._parse_label_key(label_key)
-                        label_str = self._format_labels(labels)
-                        
-                        # Bucket counts
-                        for bucket, count in sorted(metric._bucket_counts[label_key].items()):
-                            bucket_labels = {**labels, 'le': str(bucket)}
-                            bucket_label_str = self._format_labels(bucket_labels)
-                            lines.append(f"{name}_bucket{bucket_label_str} {count}")
-                        
-                        # +Inf bucket
-                        inf_labels = {**labels, 'le': '+Inf'}
-                        inf_label_str = self._format_labels(inf_labels)
-                        lines.append(f"{name}_bucket{inf_label_str} {metric._counts[label_key]}")
-                        
-                        # Sum and count
-                        lines.append(f"{name}_sum{label_str} {metric._sums[label_key]}")
-                        lines.append(f"{name}_count{label_str} {metric._counts[label_key]}")
-            
-            lines.append("")  # Empty line between metrics
-        
+            help_text = metric.description.replace('\\', '\\\\').replace('\n', '\\n')
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.export_lines())
+        lines.append("")
         return "\n".join(lines)
-    
-    def _format_labels(self, labels: Dict[str, str]) -> str:
-        """Format labels for Prometheus"""
-        if not labels:
-            return ""
-        
-        label_parts = [f'{k}="{v}"' for k, v in sorted(labels.items())]
-        return "{" + ",".join(label_parts) + "}"
-    
-    def _parse_label_key(self, label_key: str) -> Dict[str, str]:
-        """Parse label key back to dict"""
-        if not label_key:
-            return {}
-        
-        labels = {}
-        for part in label_key.split(","):
-            if "=" in part:
-                k, v = part.split("=", 1)
-                labels[k] = v
-        return labels
 
 
 # Global metrics registry
@@ -314,35 +468,78 @@ cache_misses = metrics.register_counter(
     labels=["cache_name"]
 )
 
+loop_lag = metrics.register_histogram(
+    "orakl_event_loop_lag_seconds",
+    "Event loop scheduling lag (sleep overshoot) in seconds",
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+)
+
+loop_tasks = metrics.register_gauge(
+    "orakl_event_loop_tasks",
+    "Live asyncio tasks by coroutine",
+    labels=["coro"]
+)
+
+slow_callbacks = metrics.register_counter(
+    "orakl_event_loop_slow_callbacks_total",
+    "Event loop callbacks slower than LOOP_SLOW_CALLBACK_MS",
+    labels=["callback"]
+)
+
+queue_depth = metrics.register_gauge(
+    "orakl_pipeline_queue_depth",
+    "Items waiting in pipeline-owned queues",
+    labels=["queue"]
+)
+
+kafka_events = metrics.register_counter(
+    "orakl_kafka_events_total",
+    "Enriched Kafka events through the dispatch graph",
+    labels=["outcome"]
+)
+
+dispatch_latency = metrics.register_histogram(
+    "orakl_dispatch_consumer_seconds",
+    "Time one dispatch consumer spent on an event",
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],
+    labels=["consumer"]
+)
+
+dispatch_alerts = metrics.register_counter(
+    "orakl_dispatch_alerts_total",
+    "Alerts returned by dispatch consumers",
+    labels=["consumer"]
+)
+
 
 def timed(metric: Histogram = None):
     """Decorator to time function execution"""
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = time.perf_counter()
             try:
                 result = await func(*args, **kwargs)
                 return result
             finally:
-                duration = time.time() - start_time
+                duration = time.perf_counter() - start_time
                 if metric:
                     metric.observe(duration)
                 else:
-                    logger.debug(f"{func.__name__} took {duration:.3f}s")
+                    logger.debug("%s took %.3fs", func.__name__, duration)
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = time.perf_counter()
             try:
                 result = func(*args, **kwargs)
                 return result
             finally:
-                duration = time.time() - start_time
+                duration = time.perf_counter() - start_time
                 if metric:
                     metric.observe(duration)
                 else:
-                    logger.debug(f"{func.__name__} took {duration:.3f}s")
+                    logger.debug("%s took %.3fs", func.__name__, duration)
         
         return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
     
@@ -352,16 +549,19 @@ def timed(metric: Histogram = None):
 def counted(metric: Counter = None, labels: Dict[str, str] = None):
     """Decorator to count function calls"""
     def decorator(func: Callable) -> Callable:
+        # Labels are fixed at decoration time: resolve the child once
+        child = metric.labels(**labels) if metric and labels else metric
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            if metric:
-                metric.inc(labels=labels)
+            if child:
+                child.inc()
             return await func(*args, **kwargs)
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            if metric:
-                metric.inc(labels=labels)
+            if child:
+                child.inc()
             return func(*args, **kwargs)
         
         return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
@@ -6,14 +6,27 @@ Polygon option tickers follow the format:
 
 Example:
     O:SPY251115P00677000  → SPY 2025-11-15 Put 677.00 strike
+
+Parsing is memoized: the same contracts and expirations come through the
+Kafka stream and chain snapshots over and over, so every distinct ticker and
+expiration string is parsed once into immutable (frozen) components with
+interned strings. Hit rates are reported by parse_cache_stats().
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, datetime
+from functools import lru_cache
 import re
-from typing import Optional
+import sys
+from typing import Dict, Optional
+
+from src.utils.ticker_translation import translate_ticker
+
+# Distinct contracts seen in a session run to tens of thousands; expirations to hundreds
+TICKER_CACHE_SIZE = 65536
+EXPIRATION_CACHE_SIZE = 4096
 
 
 OPTION_TICKER_REGEX = re.compile(
@@ -40,7 +53,7 @@ class OptionTickerComponents:
     @classmethod
     def parse(cls, ticker: str) -> "OptionTickerComponents":
         """
-        Parse a Polygon option ticker string.
+        Parse a Polygon option ticker string (cached per distinct ticker).
 
         Args:
             ticker: Ticker string (with or without the leading 'O:' prefix)
@@ -55,32 +68,43 @@ class OptionTickerComponents:
         if not ticker:
             raise ValueError("Ticker cannot be empty")
 
-        ticker = ticker.strip().upper()
-        match = OPTION_TICKER_REGEX.match(ticker)
-        if not match:
-            raise ValueError(f"Invalid Polygon option ticker format: {ticker}")
+        components = _parse_components(ticker)
+        if components is None:
+            raise ValueError(f"Invalid Polygon option ticker format: {ticker.strip().upper()}")
+        return components
+
 
-        groups = match.groupdict()
-        root = groups["root"]
-        expiry_raw = groups["expiry"]
-        option_type = groups["type"]
-        strike_raw = groups["strike"]
+@lru_cache(maxsize=TICKER_CACHE_SIZE)
+def _parse_components(ticker: str) -> Optional[OptionTickerComponents]:
+    """Strict OCC decode; None (cached too) when the ticker does not match"""
+    match = OPTION_TICKER_REGEX.match(ticker.strip().upper())
+    if not match:
+        return None
+
+    groups = match.groupdict()
+    root = groups["root"]
+    expiry_raw = groups["expiry"]
+    option_type = groups["type"]
+    strike_raw = groups["strike"]
 
-        # Convert expiration YYMMDD → YYYY-MM-DD
-        year = int(expiry_raw[:2])
-        year += 2000 if year < 70 else 1900  # Support far-dated expirations
-        month = int(expiry_raw[2:4])
-        day = int(expiry_raw[4:6])
+    # Convert expiration YYMMDD → YYYY-MM-DD
+    year = int(expiry_raw[:2])
+    year += 2000 if year < 70 else 1900  # Support far-dated expirations
+    month = int(expiry_raw[2:4])
+    day = int(expiry_raw[4:6])
 
+    try:
         expiration = date(year, month, day)
-        strike = int(strike_raw) / 1000.0
+    except ValueError:
+        return None
+    strike = int(strike_raw) / 1000.0
 
-        return cls(
-            underlying=root.replace("-", "."),
-            expiration=expiration,
-            option_type="CALL" if option_type == "C" else "PUT",
-            strike=strike,
-        )
+    return OptionTickerComponents(
+        underlying=sys.intern(root.replace("-", ".")),
+        expiration=expiration,
+        option_type="CALL" if option_type == "C" else "PUT",
+        strike=strike,
+    )
 
 
 def try_parse_option_ticker(ticker: str) -> Optional[OptionTickerComponents]:
@@ -90,8 +114,91 @@ def try_parse_option_ticker(ticker: str) -> Optional[OptionTickerComponents]:
     Returns the decoded components or None if parsing fails.
     """
 
+    if not ticker:
+        return None
+    return _parse_components(ticker)
+
+
+# Option roots whose API underlying is an index (SPX and SPXW both trade on I:SPX)
+INDEX_UNDERLYINGS = {
+    'SPX': 'I:SPX', 'SPXW': 'I:SPX',
+    'VIX': 'I:VIX', 'VIXW': 'I:VIX',
+    'NDX': 'I:NDX', 'NDXW': 'I:NDX', 'NQX': 'I:NDX', 'NDXP': 'I:NDX',
+    'DJX': 'I:DJX', 'DJXW': 'I:DJX',
+    'RUT': 'I:RUT', 'RUTW': 'I:RUT',
+    'XSP': 'I:XSP',
+    'OEX': 'I:OEX',
+}
+
+_ROOT_REGEX = re.compile(r"[A-Z]+")
+
+
+@dataclass(frozen=True)
+class ContractTicker:
+    """
+    Routing view of a contract ticker as it arrives from Kafka.
+
+    Unlike OptionTickerComponents this never rejects a ticker: root is the
+    leading letters (None when there are none), underlying is the symbol to
+    query Polygon with (translated, index roots mapped to I:...), and the
+    OCC fields are filled only when the ticker is well formed.
+    """
+
+    contract_id: str               # With the O: prefix
+    root: Optional[str]            # Raw root letters, e.g. SPXW
+    underlying: Optional[str]      # Polygon underlying, e.g. I:SPX
+    components: Optional[OptionTickerComponents]
+
+
+@lru_cache(maxsize=TICKER_CACHE_SIZE)
+def parse_contract_ticker(ticker: str) -> ContractTicker:
+    """
+    Parse a raw contract ticker ("O:SPXW240216C04500000" or "GS241220C00500000").
+
+    Cached per distinct ticker; the returned object is shared, so treat it
+    as read-only (it is frozen).
+    """
+    contract_id = sys.intern(ticker if ticker.startswith("O:") else f"O:{ticker}")
+    match = _ROOT_REGEX.match(contract_id, 2)
+    if not match:
+        return ContractTicker(contract_id, None, None, None)
+
+    root = sys.intern(match.group(0))
+    translated = translate_ticker(root)
+    underlying = sys.intern(INDEX_UNDERLYINGS.get(translated, translated))
+    return ContractTicker(contract_id, root, underlying, _parse_components(contract_id))
+
+
+@lru_cache(maxsize=EXPIRATION_CACHE_SIZE)
+def parse_expiration(value: str) -> Optional[datetime]:
+    """
+    Parse an expiration string ("2025-01-17", ISO timestamps, trailing Z or
+    offset dropped) into a naive datetime. Cached per distinct string;
+    None when unparseable.
+    """
     try:
-        return OptionTickerComponents.parse(ticker)
+        return datetime.fromisoformat(value.replace('Z', '+00:00').split('+')[0])
     except ValueError:
-        return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            return None
+
+
+def parse_cache_stats() -> Dict[str, Dict[str, float]]:
+    """Hit/miss counts and hit rate of each parse cache"""
+    stats = {}
+    for name, cached in (('option_components', _parse_components),
+                         ('contract_tickers', parse_contract_ticker),
+                         ('expirations', parse_expiration)):
+        info = cached.cache_info()
+        lookups = info.hits + info.misses
+        stats[name] = {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'maxsize': info.maxsize,
+            'hit_rate': info.hits / lookups if lookups else 0.0,
+        }
+    return stats
 
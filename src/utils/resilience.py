@@ -12,6 +12,8 @@ from typing import Optional, Callable, Any, TypeVar, Union
 from collections import deque
 import random
 
+from src.config import Config
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
@@ -384,8 +386,8 @@ class BoundedDeque:
 
 # Polygon API specific rate limiter (5 calls per second for free tier)
 polygon_rate_limiter = RateLimiter(
-    calls_per_second=5,
-    burst_capacity=10
+    calls_per_second=getattr(Config, 'POLYGON_RATE_LIMIT', 5),
+    burst_capacity=getattr(Config, 'POLYGON_RATE_BURST', 10)
 )
 
 # Circuit breaker for API calls
@@ -0,0 +1,158 @@
+"""
+Priority-ordered, work-stealing symbol scans for REST-mode bots.
+
+Bots used to scan their watchlist as one gather behind a semaphore (or, in
+BaseAutoBot, in lockstep slices of concurrency_limit where one slow symbol
+held up the whole slice). ScanQueue keeps concurrency_limit workers busy
+pulling the next symbol off a priority heap as soon as they finish one, so
+a slow symbol only occupies its own worker.
+
+A symbol's priority is the sum of:
+
+- age: cycles since it was last scanned (never scanned ranks first), which
+  keeps partial cycles starvation-free
+- flow: log10 of the Kafka premium seen on it over the last
+  SCAN_PRIORITY_FLOW_MINUTES, in $100K units
+- hit rate: EWMA of scans that produced a signal
+
+With SCAN_WATCHLIST_FRACTION < 1 (or a bot's scan_batch_size) only the top
+of the heap is scanned each cycle, so hot names come round every cycle and
+cold ones as their age catches up, for the same number of requests.
+
+    results = await bot.scan_queue.run(bot.watchlist, bot._scan_symbol, concurrency=20)
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from src.config import Config
+from src.utils.flow_aggregates import flow_aggregates
+
+logger = logging.getLogger(__name__)
+
+_HIT_ALPHA = 0.2
+_NEVER_SCANNED_AGE = 1_000.0
+
+
+class SymbolScanStats:
+    """Scan history for one symbol"""
+
+    __slots__ = ('last_scanned', 'scans', 'hits', 'hit_rate')
+
+    def __init__(self):
+        self.last_scanned: Optional[float] = None
+        self.scans = 0
+        self.hits = 0
+        self.hit_rate = 0.0
+
+
+class ScanQueue:
+    """
+    Symbol priorities and a fixed pool of scan workers for one bot.
+
+    Usage:
+        queue = ScanQueue('Sweeps Bot')
+        results = await queue.run(watchlist, scan_symbol, concurrency=30, limit=200, cycle=600)
+        queue.get_stats()
+    """
+
+    def __init__(self, name: str, flow_minutes: int = 15, flow_weight: float = 1.0, hit_weight: float = 2.0):
+        self.name = name
+        self.flow_minutes = max(1, flow_minutes)
+        self.flow_weight = flow_weight
+        self.hit_weight = hit_weight
+        self._symbols: Dict[str, SymbolScanStats] = {}
+        self.runs = 0
+        self.scanned = 0
+        self.skipped = 0
+
+    def priority(self, symbol: str, now: float, cycle: float) -> float:
+        stats = self._symbols.get(symbol)
+        if stats is None or stats.last_scanned is None:
+            age = _NEVER_SCANNED_AGE
+            hit_rate = 0.0
+        else:
+            age = (now - stats.last_scanned) / max(cycle, 1.0)
+            hit_rate = stats.hit_rate
+        premium = flow_aggregates.recent_premium(symbol, self.flow_minutes)
+        flow = math.log10(1.0 + premium / 100_000.0) if premium > 0 else 0.0
+        return age + self.flow_weight * flow + self.hit_weight * hit_rate
+
+    def record(self, symbol: str, result: Any, now: Optional[float] = None):
+        stats = self._symbols.get(symbol)
+        if stats is None:
+            stats = self._symbols[symbol] = SymbolScanStats()
+        hit = not isinstance(result, BaseException) and bool(result)
+        stats.last_scanned = time.monotonic() if now is None else now
+        stats.scans += 1
+        stats.hits += hit
+        stats.hit_rate += _HIT_ALPHA * (float(hit) - stats.hit_rate)
+
+    async def run(self, symbols: Iterable[str], scan: Callable[[str], Awaitable[Any]], concurrency: int,
+                  limit: Optional[int] = None, cycle: float = 60.0) -> List[Any]:
+        """
+        Scan symbols highest priority first with `concurrency` workers.
+
+        Args:
+            symbols: Candidate symbols (duplicates are scanned once)
+            scan: Coroutine function scanning one symbol
+            concurrency: Symbol scans in flight at once
+            limit: Scan only the top `limit` symbols (None or 0 = all)
+            cycle: Seconds per scan cycle, the unit of the age term
+
+        Returns:
+            One result per scanned symbol in completion order (exceptions
+            are returned, not raised, like gather(return_exceptions=True))
+        """
+        now = time.monotonic()
+        unique = list(dict.fromkeys(symbols))
+        heap = [(-self.priority(symbol, now, cycle), i, symbol) for i, symbol in enumerate(unique)]
+        if limit and limit < len(heap):
+            heap = heapq.nsmallest(limit, heap)
+        heapq.heapify(heap)
+        self.runs += 1
+        self.skipped += len(unique) - len(heap)
+
+        if len(self._symbols) > 2 * max(len(unique), 1):
+            current = set(unique)
+            self._symbols = {s: stats for s, stats in self._symbols.items() if s in current}
+
+        results: List[Any] = []
+
+        async def worker():
+            while heap:
+                _, _, symbol = heapq.heappop(heap)
+                try:
+                    result = await scan(symbol)
+                except Exception as e:
+                    result = e
+                self.record(symbol, result)
+                results.append(result)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(heap))))))
+        self.scanned += len(results)
+        return results
+
+    def get_stats(self, top: int = 5) -> Dict[str, Any]:
+        hottest = sorted(self._symbols.items(), key=lambda item: -item[1].hit_rate)[:top]
+        return {
+            'runs': self.runs,
+            'scanned': self.scanned,
+            'skipped': self.skipped,
+            'symbols_tracked': len(self._symbols),
+            'top_hit_rate': {symbol: round(stats.hit_rate, 3) for symbol, stats in hottest if stats.hits},
+        }
+
+
+def scan_queue_for(name: str) -> ScanQueue:
+    """ScanQueue configured from Config"""
+    return ScanQueue(
+        name,
+        flow_minutes=getattr(Config, 'SCAN_PRIORITY_FLOW_MINUTES', 15),
+        flow_weight=getattr(Config, 'SCAN_PRIORITY_FLOW_WEIGHT', 1.0),
+        hit_weight=getattr(Config, 'SCAN_PRIORITY_HIT_WEIGHT', 2.0),
+    )
@@ -0,0 +1,352 @@
+"""
+Shared Polygon budget accounting and adaptive intervals for REST scans.
+
+Every bot's scan loop draws on the same client-side Polygon rate
+(POLYGON_RATE_LIMIT req/s), but each one used to sleep a fixed interval
+with no idea what the others were doing - right after the open several
+state bots could start full chain scans together. The scheduler sits
+between BaseAutoBot._scan_loop and DataFetcher:
+
+- cost: requests made inside a scan are attributed to the bot through a
+  context variable (child tasks inherit it), so each bot carries an EWMA of
+  requests and seconds per scan
+- phase: a bot's first scan waits a stable, jittered offset derived from
+  its name, so bots sharing an interval do not start in lockstep
+- admission: a scan starts only while the expected requests of the scans in
+  flight plus its own fit in SCAN_BUDGET_SECONDS of Polygon rate (one scan
+  is always admitted, however expensive)
+- interval: the configured interval is stretched when the rate is nearly
+  used up or Polygon answered 429 recently, shrunk when there is headroom,
+  shortened while the market is busy (open / close, heavy Kafka flow) and
+  lengthened when it is quiet, then clamped and jittered
+
+    await scan_scheduler.wait_phase(bot.name, bot.scan_interval)
+    async with scan_scheduler.scan(bot.name, bot.scan_interval):
+        await bot._perform_scan()
+    await asyncio.sleep(scan_scheduler.next_interval(bot.name))
+"""
+
+import asyncio
+import logging
+import random
+import time
+import zlib
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from src.config import Config
+from src.utils.flow_aggregates import flow_aggregates
+from src.utils.market_hours import MarketHours
+from src.utils.monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+_scan_owner: ContextVar[Optional['ScanCost']] = ContextVar('scan_owner', default=None)
+
+scan_requests = metrics.register_counter(
+    "orakl_scan_requests_total",
+    "Polygon requests made inside a bot's scheduled scan",
+    labels=["bot"]
+)
+
+scan_interval = metrics.register_gauge(
+    "orakl_scan_interval_seconds",
+    "Adaptive interval before a bot's next scan",
+    labels=["bot"]
+)
+
+# Regular-session windows (minutes since midnight ET) treated as busy
+_OPEN_WINDOW = (570, 600)
+_CLOSE_WINDOW = (930, 960)
+
+_RATE_WINDOW_SECONDS = 60
+_RATE_LIMITED_HOLD_SECONDS = 120.0
+_EWMA_ALPHA = 0.3
+
+
+class ScanCost:
+    """Request and duration accounting for one bot's scans"""
+
+    __slots__ = ('name', 'base_interval', 'phase', 'scans', 'avg_requests', 'avg_duration',
+                 'last_requests', 'last_duration', 'total_requests', 'current_requests',
+                 'factor', 'interval', 'admission_wait', 'in_flight')
+
+    def __init__(self, name: str, base_interval: float, phase: float):
+        self.name = name
+        self.base_interval = base_interval
+        self.phase = phase
+        self.scans = 0
+        self.avg_requests = 0.0
+        self.avg_duration = 0.0
+        self.last_requests = 0
+        self.last_duration = 0.0
+        self.total_requests = 0
+        self.current_requests = 0
+        self.factor = 1.0
+        self.interval = base_interval
+        self.admission_wait = 0.0
+        self.in_flight = False
+
+    def record_scan(self, duration: float):
+        requests = self.current_requests
+        if self.scans == 0:
+            self.avg_requests = float(requests)
+            self.avg_duration = duration
+        else:
+            self.avg_requests += _EWMA_ALPHA * (requests - self.avg_requests)
+            self.avg_duration += _EWMA_ALPHA * (duration - self.avg_duration)
+        self.scans += 1
+        self.last_requests = requests
+        self.last_duration = duration
+        self.current_requests = 0
+
+
+class ScanScheduler:
+    """
+    Phase offsets, budget admission and adaptive intervals for bot scans.
+
+    Usage:
+        async with scan_scheduler.scan(name, base_interval):
+            ...                                  # requests here are billed to `name`
+        scan_scheduler.record_request()          # DataFetcher, once per Polygon request
+        scan_scheduler.record_rate_limited()     # DataFetcher, on a 429
+        delay = scan_scheduler.next_interval(name)
+    """
+
+    def __init__(self, enabled: bool = True, requests_per_second: float = 5.0, budget_seconds: float = 120.0,
+                 phase_max: float = 90.0, min_factor: float = 0.5, max_factor: float = 3.0,
+                 jitter: float = 0.1, active_flow_per_min: float = 300.0, quiet_flow_per_min: float = 20.0):
+        self.enabled = enabled
+        self.requests_per_second = max(0.1, requests_per_second)
+        self.budget = self.requests_per_second * max(1.0, budget_seconds)
+        self.phase_max = max(0.0, phase_max)
+        self.min_factor = min(min_factor, 1.0)
+        self.max_factor = max(max_factor, 1.0)
+        self.jitter = max(0.0, min(jitter, 0.5))
+        self.active_flow_per_min = active_flow_per_min
+        self.quiet_flow_per_min = quiet_flow_per_min
+
+        self._bots: Dict[str, ScanCost] = {}
+        self._in_flight_cost = 0.0
+        self._admission: Optional[asyncio.Condition] = None
+
+        # Requests per second over the last minute, as a ring of one-second buckets
+        self._buckets = [0] * _RATE_WINDOW_SECONDS
+        self._bucket_second = int(time.monotonic())
+
+        self._last_rate_limited: Optional[float] = None
+        self.rate_limited = 0
+        self.unattributed_requests = 0
+        self.admission_waits = 0
+
+        self._flow_sample = (time.monotonic(), 0)
+        self._flow_per_min: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Registration and phase
+    # ------------------------------------------------------------------
+    def register(self, name: str, base_interval: float) -> ScanCost:
+        cost = self._bots.get(name)
+        if cost is None:
+            span = min(float(base_interval), self.phase_max)
+            position = zlib.crc32(name.encode()) / 2 ** 32
+            position = (position + random.uniform(-self.jitter, self.jitter)) % 1.0
+            cost = self._bots[name] = ScanCost(name, float(base_interval), span * position)
+        else:
+            cost.base_interval = float(base_interval)
+        return cost
+
+    async def wait_phase(self, name: str, base_interval: float):
+        """Delay a bot's first scan by its phase offset"""
+        cost = self.register(name, base_interval)
+        if self.enabled and cost.scans == 0 and cost.phase > 0:
+            logger.info(f"🗓️ {name} first scan in {cost.phase:.0f}s (phase offset)")
+            await asyncio.sleep(cost.phase)
+
+    # ------------------------------------------------------------------
+    # Admission and attribution
+    # ------------------------------------------------------------------
+    @asynccontextmanager
+    async def scan(self, name: str, base_interval: float):
+        """Admit a scan against the shared budget and bill its requests to `name`"""
+        cost = self.register(name, base_interval)
+        expected = cost.avg_requests
+        if self.enabled:
+            if self._admission is None:
+                self._admission = asyncio.Condition()
+            waited = time.monotonic()
+            async with self._admission:
+                if self._in_flight_cost > 0 and self._in_flight_cost + expected > self.budget:
+                    self.admission_waits += 1
+                    await self._admission.wait_for(
+                        lambda: self._in_flight_cost <= 0 or self._in_flight_cost + expected <= self.budget
+                    )
+                self._in_flight_cost += expected
+            cost.admission_wait = time.monotonic() - waited
+        cost.in_flight = True
+        cost.current_requests = 0
+        token = _scan_owner.set(cost)
+        started = time.monotonic()
+        try:
+            yield cost
+        finally:
+            _scan_owner.reset(token)
+            cost.in_flight = False
+            cost.record_scan(time.monotonic() - started)
+            if self.enabled:
+                async with self._admission:
+                    self._in_flight_cost = max(0.0, self._in_flight_cost - expected)
+                    self._admission.notify_all()
+
+    def _advance(self) -> int:
+        """Zero the buckets for seconds that passed since the last request"""
+        now = int(time.monotonic())
+        if now != self._bucket_second:
+            for second in range(self._bucket_second + 1, min(now, self._bucket_second + _RATE_WINDOW_SECONDS) + 1):
+                self._buckets[second % _RATE_WINDOW_SECONDS] = 0
+            self._bucket_second = now
+        return now
+
+    def record_request(self):
+        """Count one Polygon request against the rate window and the scanning bot"""
+        now = self._advance()
+        self._buckets[now % _RATE_WINDOW_SECONDS] += 1
+
+        owner = _scan_owner.get()
+        if owner is None:
+            self.unattributed_requests += 1
+            return
+        owner.current_requests += 1
+        owner.total_requests += 1
+        scan_requests.labels(bot=owner.name).inc()
+
+    def record_rate_limited(self):
+        self.rate_limited += 1
+        self._last_rate_limited = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Adaptive interval
+    # ------------------------------------------------------------------
+    def utilization(self) -> float:
+        """Requests over the last minute as a fraction of the Polygon rate"""
+        self._advance()
+        return sum(self._buckets) / (self.requests_per_second * _RATE_WINDOW_SECONDS)
+
+    def recently_rate_limited(self) -> bool:
+        return (self._last_rate_limited is not None
+                and time.monotonic() - self._last_rate_limited < _RATE_LIMITED_HOLD_SECONDS)
+
+    def market_activity(self) -> str:
+        """'busy', 'quiet' or 'normal' from the session clock and Kafka flow"""
+        now = time.monotonic()
+        sampled_at, recorded = self._flow_sample
+        if now - sampled_at >= 30:
+            self._flow_per_min = (flow_aggregates.events_recorded - recorded) * 60.0 / (now - sampled_at)
+            self._flow_sample = (now, flow_aggregates.events_recorded)
+
+        minute = MarketHours.minutes_since_midnight()
+        if _OPEN_WINDOW[0] <= minute < _OPEN_WINDOW[1] or _CLOSE_WINDOW[0] <= minute < _CLOSE_WINDOW[1]:
+            return 'busy'
+        if self._flow_per_min is not None and flow_aggregates.events_recorded:
+            if self._flow_per_min >= self.active_flow_per_min:
+                return 'busy'
+            if self._flow_per_min <= self.quiet_flow_per_min:
+                return 'quiet'
+        return 'normal'
+
+    def next_interval(self, name: str) -> float:
+        """Seconds until the bot's next scan"""
+        cost = self._bots.get(name)
+        if cost is None:
+            return 0.0
+        if not self.enabled:
+            cost.interval = cost.base_interval
+            return cost.interval
+
+        utilization = self.utilization()
+        if self.recently_rate_limited():
+            target = self.max_factor
+        elif utilization > 0.8:
+            target = 1.0 + (utilization - 0.8) * 5.0
+        elif utilization < 0.3:
+            target = 0.8
+        else:
+            target = 1.0
+
+        activity = self.market_activity()
+        if activity == 'busy':
+            target *= 0.75
+        elif activity == 'quiet':
+            target *= 1.25
+
+        # A scan that costs more than the budget window cannot come round faster than the rate allows
+        floor = cost.avg_requests / self.requests_per_second / max(cost.base_interval, 1.0)
+        target = max(target, floor)
+
+        # Move halfway towards the target so one noisy minute does not whipsaw the schedule
+        cost.factor = min(self.max_factor, max(self.min_factor, (cost.factor + target) / 2.0))
+        cost.interval = cost.base_interval * cost.factor * (1.0 + random.uniform(-self.jitter, self.jitter))
+        scan_interval.labels(bot=name).set(cost.interval)
+        return cost.interval
+
+    def current_interval(self, name: str, default: float) -> float:
+        """Last interval handed out for the bot (its configured one before the first)"""
+        cost = self._bots.get(name)
+        return max(cost.interval, default) if cost is not None else default
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'utilization': round(self.utilization(), 3),
+            'budget_requests': self.budget,
+            'in_flight_cost': round(self._in_flight_cost, 1),
+            'rate_limited': self.rate_limited,
+            'recently_rate_limited': self.recently_rate_limited(),
+            'admission_waits': self.admission_waits,
+            'unattributed_requests': self.unattributed_requests,
+            'activity': self.market_activity(),
+            'bots': {
+                name: {
+                    'scans': cost.scans,
+                    'in_flight': cost.in_flight,
+                    'avg_requests': round(cost.avg_requests, 1),
+                    'last_requests': cost.last_requests,
+                    'total_requests': cost.total_requests,
+                    'avg_duration': round(cost.avg_duration, 2),
+                    'last_duration': round(cost.last_duration, 2),
+                    'last_admission_wait': round(cost.admission_wait, 2),
+                    'phase': round(cost.phase, 1),
+                    'base_interval': cost.base_interval,
+                    'factor': round(cost.factor, 2),
+                    'interval': round(cost.interval, 1),
+                }
+                for name, cost in self._bots.items()
+            },
+        }
+
+    def summary_line(self) -> str:
+        """One heartbeat line: utilization and per-bot cost"""
+        bots = ", ".join(
+            f"{name} {cost.avg_requests:.0f}req/{cost.avg_duration:.0f}s every {cost.interval:.0f}s"
+            for name, cost in sorted(self._bots.items(), key=lambda item: -item[1].avg_requests)
+            if cost.scans
+        )
+        flag = " | 429 hold" if self.recently_rate_limited() else ""
+        return f"Scan budget {self.utilization():.0%} used{flag} | {bots or 'no scans yet'}"
+
+
+scan_scheduler = ScanScheduler(
+    enabled=getattr(Config, 'SCAN_SCHEDULER_ENABLED', True),
+    requests_per_second=getattr(Config, 'POLYGON_RATE_LIMIT', 5.0),
+    budget_seconds=getattr(Config, 'SCAN_BUDGET_SECONDS', 120.0),
+    phase_max=getattr(Config, 'SCAN_PHASE_MAX_SECONDS', 90.0),
+    min_factor=getattr(Config, 'SCAN_INTERVAL_MIN_FACTOR', 0.5),
+    max_factor=getattr(Config, 'SCAN_INTERVAL_MAX_FACTOR', 3.0),
+    jitter=getattr(Config, 'SCAN_INTERVAL_JITTER', 0.1),
+    active_flow_per_min=getattr(Config, 'SCAN_ACTIVE_FLOW_PER_MIN', 300.0),
+    quiet_flow_per_min=getattr(Config, 'SCAN_QUIET_FLOW_PER_MIN', 20.0),
+)
@@ -0,0 +1,326 @@
+"""
+Per-strike gamma exposure profile with logarithmic updates and queries.
+
+A ticker's chain snapshot is collapsed into arrays sorted by strike (net GEX,
+call OI and put OI per strike). Live prints are applied as point updates and
+the regime, zero-gamma flip level and OI walls are re-read without touching
+the full chain:
+
+    exposure = StrikeExposure(strikes, gex, call_oi, put_oi)
+    exposure.add(505.0, gex=+1.2e6, call_oi=300)
+    exposure.net_gex, exposure.flip_level(spot), exposure.call_wall
+    exposure.wall_above(spot, 'call'), exposure.top_strikes('put', 5)
+
+Point updates, the flip level, walls, nearest wall above/below a price and
+the top-K OI strikes are all logarithmic in the number of strikes (top-K is
+O(k log n)).
+
+The flip level follows the ContextManager rule (first strike where the running
+sum of GEX from the lowest strike changes sign, else the strike closest to
+spot). Walls break OI ties towards the lower strike.
+"""
+
+import bisect
+import heapq
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _PrefixTree:
+    """
+    Segment tree over per-strike values keeping (sum, min prefix, max prefix)
+    per node, so point updates and "first prefix with a given sign" searches
+    are O(log n).
+    """
+
+    def __init__(self, values: Sequence[float]):
+        self.n = len(values)
+        size = 1
+        while size < max(1, self.n):
+            size *= 2
+        self.size = size
+        self.sum = [0.0] * (2 * size)
+        self.lo = [0.0] * (2 * size)  # min prefix within the node (empty prefix excluded)
+        self.hi = [0.0] * (2 * size)  # max prefix within the node
+        for i, value in enumerate(values):
+            v = float(value)
+            self.sum[size + i] = self.lo[size + i] = self.hi[size + i] = v
+        for node in range(size - 1, 0, -1):
+            self._pull(node)
+
+    def _pull(self, node: int):
+        left, right = 2 * node, 2 * node + 1
+        s = self.sum[left]
+        self.sum[node] = s + self.sum[right]
+        self.lo[node] = min(self.lo[left], s + self.lo[right])
+        self.hi[node] = max(self.hi[left], s + self.hi[right])
+
+    def add(self, index: int, delta: float):
+        node = self.size + index
+        v = self.sum[node] + delta
+        self.sum[node] = self.lo[node] = self.hi[node] = v
+        node //= 2
+        while node:
+            self._pull(node)
+            node //= 2
+
+    @property
+    def total(self) -> float:
+        return self.sum[1]
+
+    def prefix(self, index: int) -> float:
+        """Sum of values[0..index] inclusive (0.0 for index < 0)"""
+        total = 0.0
+        lo, hi = self.size, self.size + index + 1
+        while lo < hi:
+            if lo & 1:
+                total += self.sum[lo]
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                total += self.sum[hi]
+            lo //= 2
+            hi //= 2
+        return total
+
+    def first_prefix(self, start: int, sign: int) -> int:
+        """Smallest k >= start whose prefix sum is strictly negative (sign<0) / positive (sign>0), or -1"""
+        if start >= self.n:
+            return -1
+        return self._descend(1, 0, self.size, start, self.prefix(start - 1) if start else 0.0, sign)[0]
+
+    def _descend(self, node: int, node_lo: int, node_hi: int, start: int, offset: float, sign: int):
+        # Returns (index or -1, prefix at the end of the part of the node at/after start)
+        if node_hi <= start:
+            return -1, offset
+        if node_lo >= start:
+            extreme = self.lo[node] if sign < 0 else self.hi[node]
+            if (offset + extreme >= 0) if sign < 0 else (offset + extreme <= 0):
+                return -1, offset + self.sum[node]
+            if node >= self.size:
+                return node - self.size, offset + self.sum[node]
+        mid = (node_lo + node_hi) // 2
+        found, offset = self._descend(2 * node, node_lo, mid, start, offset, sign)
+        if found >= 0:
+            return found, offset
+        return self._descend(2 * node + 1, mid, node_hi, start, offset, sign)
+
+
+class _MaxTree:
+    """Segment tree of per-strike values answering argmax (lowest index on ties)"""
+
+    def __init__(self, values: Sequence[float]):
+        self.n = len(values)
+        size = 1
+        while size < max(1, self.n):
+            size *= 2
+        self.size = size
+        self.value = [0.0] * size + [float(v) for v in values] + [float('-inf')] * (size - self.n)
+        self.arg = [0] * size + list(range(size))
+        for node in range(size - 1, 0, -1):
+            self._pull(node)
+
+    def _pull(self, node: int):
+        left, right = 2 * node, 2 * node + 1
+        best = left if self.value[left] >= self.value[right] else right
+        self.value[node] = self.value[best]
+        self.arg[node] = self.arg[best]
+
+    def add(self, index: int, delta: float):
+        node = self.size + index
+        self.value[node] += delta
+        node //= 2
+        while node:
+            self._pull(node)
+            node //= 2
+
+    def argmax(self) -> int:
+        """Index of the largest positive value, or -1 if none is positive"""
+        return self.arg[1] if self.n and self.value[1] > 0 else -1
+
+    def range_argmax(self, lo: int, hi: int) -> int:
+        """Index of the largest positive value in [lo, hi), or -1"""
+        best = -1
+        left, right = lo + self.size, hi + self.size
+        right_nodes = []
+        while left < right:
+            if left & 1:
+                best = self._better(best, left)
+                left += 1
+            if right & 1:
+                right -= 1
+                right_nodes.append(right)
+            left //= 2
+            right //= 2
+        # Right-hand nodes come out right-to-left; visit them in index order for the tie rule
+        for node in reversed(right_nodes):
+            best = self._better(best, node)
+        if best < 0 or self.value[best] <= 0:
+            return -1
+        return self.arg[best]
+
+    def _better(self, best: int, node: int) -> int:
+        return node if best < 0 or self.value[node] > self.value[best] else best
+
+    def top(self, k: int) -> List[int]:
+        """Indices of the k largest positive values, largest first (lower index on ties)"""
+        found: List[int] = []
+        heap = [(-self.value[1], self.arg[1], 1)] if self.n else []
+        while heap and len(found) < k:
+            value, index, node = heapq.heappop(heap)
+            if -value <= 0:
+                break
+            if node >= self.size:
+                found.append(index)
+                continue
+            for child in (2 * node, 2 * node + 1):
+                heapq.heappush(heap, (-self.value[child], self.arg[child], child))
+        return found
+
+
+class StrikeExposure:
+    """
+    Sorted per-strike GEX / OI profile for one ticker.
+
+    Usage:
+        exposure = StrikeExposure.from_arrays(by_strike)  # chain_analytics 'by_strike' arrays
+        exposure.add(strike, gex=delta_gex, put_oi=size)
+        exposure.summary(spot)  # regime, net_gex, flip_level, call_wall, put_wall
+    """
+
+    def __init__(self, strikes: Sequence[float], gex: Sequence[float],
+                 call_oi: Sequence[float], put_oi: Sequence[float]):
+        self.strikes: List[float] = [float(s) for s in strikes]
+        self._gex_values = [float(v) for v in gex]
+        self._call_values = [float(v) for v in call_oi]
+        self._put_values = [float(v) for v in put_oi]
+        self._build()
+
+    @classmethod
+    def from_arrays(cls, by_strike: dict) -> 'StrikeExposure':
+        return cls(by_strike['strikes'], by_strike['gex'], by_strike['call_oi'], by_strike['put_oi'])
+
+    def _build(self):
+        self._gex = _PrefixTree(self._gex_values)
+        self._call = _MaxTree(self._call_values)
+        self._put = _MaxTree(self._put_values)
+
+    def __len__(self) -> int:
+        return len(self.strikes)
+
+    def _index(self, strike: float) -> int:
+        i = bisect.bisect_left(self.strikes, strike)
+        if i < len(self.strikes) and self.strikes[i] == strike:
+            return i
+        # Strike not in the snapshot: insert it (O(n), rare between refreshes)
+        self.strikes.insert(i, strike)
+        self._gex_values.insert(i, 0.0)
+        self._call_values.insert(i, 0.0)
+        self._put_values.insert(i, 0.0)
+        self._build()
+        return i
+
+    def add(self, strike: float, gex: float = 0.0, call_oi: float = 0.0, put_oi: float = 0.0):
+        """Apply a point update at strike (inserting the strike if it is new)"""
+        i = self._index(float(strike))
+        if gex:
+            self._gex_values[i] += gex
+            self._gex.add(i, gex)
+        if call_oi:
+            self._call_values[i] += call_oi
+            self._call.add(i, call_oi)
+        if put_oi:
+            self._put_values[i] += put_oi
+            self._put.add(i, put_oi)
+
+    @property
+    def net_gex(self) -> float:
+        return self._gex.total if self.strikes else 0.0
+
+    @property
+    def call_wall(self) -> float:
+        i = self._call.argmax()
+        return self.strikes[i] if i >= 0 else 0
+
+    @property
+    def put_wall(self) -> float:
+        i = self._put.argmax()
+        return self.strikes[i] if i >= 0 else 0
+
+    def _side(self, side: str) -> Tuple[_MaxTree, List[float]]:
+        if side == 'call':
+            return self._call, self._call_values
+        if side == 'put':
+            return self._put, self._put_values
+        raise ValueError(f"side must be 'call' or 'put', got {side!r}")
+
+    def wall(self, side: str) -> Optional[Tuple[float, float]]:
+        """(strike, OI) of the largest OI strike on one side, or None"""
+        tree, values = self._side(side)
+        i = tree.argmax()
+        return (self.strikes[i], values[i]) if i >= 0 else None
+
+    def wall_above(self, price: float, side: str) -> Optional[Tuple[float, float]]:
+        """(strike, OI) of the largest OI strike at or above price, or None"""
+        tree, values = self._side(side)
+        i = tree.range_argmax(bisect.bisect_left(self.strikes, price), len(self.strikes))
+        return (self.strikes[i], values[i]) if i >= 0 else None
+
+    def wall_below(self, price: float, side: str) -> Optional[Tuple[float, float]]:
+        """(strike, OI) of the largest OI strike at or below price, or None"""
+        tree, values = self._side(side)
+        i = tree.range_argmax(0, bisect.bisect_right(self.strikes, price))
+        return (self.strikes[i], values[i]) if i >= 0 else None
+
+    def top_strikes(self, side: str, k: int = 5) -> List[Tuple[float, float]]:
+        """The k largest OI strikes on one side as (strike, OI), largest first"""
+        tree, values = self._side(side)
+        return [(self.strikes[i], values[i]) for i in tree.top(k)]
+
+    def oi_at(self, strike: float, side: str) -> float:
+        """Open interest booked at strike on one side (0 if the strike is unknown)"""
+        _, values = self._side(side)
+        i = bisect.bisect_left(self.strikes, strike)
+        return values[i] if i < len(self.strikes) and self.strikes[i] == strike else 0.0
+
+    def flip_level(self, spot: float) -> float:
+        """First strike where cumulative GEX crosses zero, else the strike closest to spot"""
+        if not self.strikes:
+            return 0.0
+        tree = self._gex
+        # A crossing needs a strictly signed previous sum, so start at the first non-zero prefix
+        starts = [k for k in (tree.first_prefix(0, -1), tree.first_prefix(0, 1)) if k >= 0]
+        if starts:
+            k = min(starts)
+            sign = 1 if tree.prefix(k) > 0 else -1
+            while True:
+                k = tree.first_prefix(k + 1, -sign)
+                if k < 0:
+                    break
+                previous = tree.prefix(k - 1)
+                if previous * sign > 0:
+                    return self.strikes[k]
+                # Previous sum was exactly zero - not a crossing, keep walking from here
+                sign = -sign
+
+        # No flip: closest strike to spot (lower strike on ties)
+        i = bisect.bisect_left(self.strikes, spot)
+        nearby = [j for j in (i - 1, i) if 0 <= j < len(self.strikes)]
+        return self.strikes[min(nearby, key=lambda j: abs(self.strikes[j] - spot))]
+
+    def summary(self, spot: float) -> dict:
+        """Regime, net GEX, flip level and walls in the ContextManager state shape"""
+        net_gex = self.net_gex
+        resistance = self.wall_above(spot, 'call')
+        support = self.wall_below(spot, 'put')
+        return {
+            'regime': "POSITIVE_GAMMA" if net_gex > 0 else "NEGATIVE_GAMMA",
+            'net_gex': net_gex,
+            'flip_level': self.flip_level(spot),
+            'call_wall': self.call_wall,
+            'put_wall': self.put_wall,
+            'resistance': resistance[0] if resistance else 0,
+            'support': support[0] if support else 0,
+        }
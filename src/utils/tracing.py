@@ -0,0 +1,287 @@
+"""
+Per-event latency tracing from Kafka print to Discord post.
+
+A trace is started when KafkaFlowListener parses a message and is carried
+by a context variable, so every task spawned for the event (enrichment,
+dispatch, each bot, the webhook post) sees it without threading it through
+call signatures. Each stage records a timestamp; a stage's latency is the
+time since the previous mark:
+
+    ingest          producer timestamp -> message received (clock skew clamped)
+    parsed          JSON decode + field mapping
+    filtered        pre-filter
+    scheduled       wait for the dispatch task to start
+    polygon         contract snapshot fetch (TradeEnricher)
+    enriched        merge / greeks fill after the fetch
+    ingested        dispatch ingest folds (aggregates, baselines, live GEX)
+    gated           normalization + index blocklist (BotManager.prepare_event)
+    --- forked per consumer (bot) ---
+    slot            wait for the consumer's concurrency limit
+    hedge_check     HedgeHunter stock-print lookup
+    evaluated       bot logic until it asks to post
+    queued          handing the embed to the webhook delivery queue
+    done            remaining bot work after the enqueue
+    --- reported by utils.webhook_delivery when Discord answers ---
+    delivered       queue wait, pacing / 429 waits and the round trip until the 204
+
+Shared stages are emitted once per event as orakl_event_stage_seconds
+{bot="pipeline"}; a consumer's own stages are emitted with its name, and
+print-to-alert (producer timestamp -> 204) as orakl_print_to_alert_seconds.
+Alerts slower than TRACE_SLOW_MS are logged with their stage breakdown
+(rate limited and sampled).
+
+    trace = event_tracer.begin(raw.get('timestamp'), symbol, contract)
+    mark('polygon')
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import Config
+from src.utils.logging_setup import hot_path_logger
+from src.utils.monitoring import metrics
+
+logger = logging.getLogger(__name__)
+hot_logger = hot_path_logger(__name__)
+
+PIPELINE = 'pipeline'
+
+_current_trace: ContextVar[Optional['EventTrace']] = ContextVar('event_trace', default=None)
+
+stage_latency = metrics.register_histogram(
+    "orakl_event_stage_seconds",
+    "Latency of one pipeline stage for a Kafka event",
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0],
+    labels=["bot", "stage"]
+)
+
+print_to_alert = metrics.register_histogram(
+    "orakl_print_to_alert_seconds",
+    "Producer timestamp of the print to Discord 204 for posted alerts",
+    buckets=[0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0],
+    labels=["bot"]
+)
+
+
+def source_time(value: Any) -> Optional[float]:
+    """
+    Producer timestamp as epoch seconds.
+
+    Accepts epoch seconds / ms / us / ns (number or numeric string) and ISO
+    8601 strings (naive ones are taken as UTC). Returns None if unreadable.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is not None:
+        if number <= 0:
+            return None
+        for scale in (1e9, 1e6, 1e3):
+            if number > 1e9 * scale / 10:
+                return number / scale
+        return number
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class EventTrace:
+    """Stage marks for one event (or one consumer's fork of it)"""
+
+    __slots__ = ('owner', 'symbol', 'contract', 'source_ts', 'received_wall', 'marks', 'forked_at')
+
+    def __init__(self, symbol: str = '', contract: str = '', source_ts: Optional[float] = None,
+                 owner: str = PIPELINE):
+        self.owner = owner
+        self.symbol = symbol
+        self.contract = contract
+        self.source_ts = source_ts
+        self.received_wall = time.time()
+        self.marks: List[Tuple[str, float]] = [('received', time.perf_counter())]
+        self.forked_at: Optional[int] = None
+
+    def mark(self, stage: str):
+        self.marks.append((stage, time.perf_counter()))
+
+    def fork(self, owner: str) -> 'EventTrace':
+        """Child trace for one consumer; shared stages end at the first fork"""
+        if self.forked_at is None:
+            self.forked_at = len(self.marks)
+        child = EventTrace.__new__(EventTrace)
+        child.owner = owner
+        child.symbol = self.symbol
+        child.contract = self.contract
+        child.source_ts = self.source_ts
+        child.received_wall = self.received_wall
+        child.marks = self.marks[:self.forked_at]
+        child.forked_at = self.forked_at
+        return child
+
+    def stages(self, start: int = 1, end: Optional[int] = None) -> List[Tuple[str, float]]:
+        """(stage, seconds since previous mark) for marks[start:end]"""
+        marks = self.marks
+        end = len(marks) if end is None else end
+        return [(marks[i][0], marks[i][1] - marks[i - 1][1]) for i in range(max(1, start), end)]
+
+    @property
+    def ingest_lag(self) -> Optional[float]:
+        if self.source_ts is None:
+            return None
+        return max(0.0, self.received_wall - self.source_ts)
+
+    def wall_time(self, index: int = -1) -> float:
+        """Wall-clock time of a mark"""
+        return self.received_wall + (self.marks[index][1] - self.marks[0][1])
+
+
+def current_trace() -> Optional[EventTrace]:
+    return _current_trace.get()
+
+
+def mark(stage: str):
+    """Mark a stage on the active trace (no-op outside a traced event)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.mark(stage)
+
+
+class EventTracer:
+    """
+    Starts traces, activates consumer forks and emits stage latencies.
+
+    Usage:
+        event_tracer.begin(raw.get('timestamp'), symbol, contract)   # in the parse path
+        child = event_tracer.fork(consumer_name)                      # inside the consumer task
+        event_tracer.finish(child)
+        event_tracer.finish_delivery(child)                           # when the webhook answers 204
+    """
+
+    def __init__(self, enabled: bool = True, slow_ms: float = 3000.0):
+        self.enabled = enabled
+        self.slow_s = slow_ms / 1000.0
+        self._stage_children: Dict[Tuple[str, str], Any] = {}
+        self._alert_children: Dict[str, Any] = {}
+        self.traces = 0
+        self.posted = 0
+        self.slow = 0
+
+    def begin(self, timestamp: Any = None, symbol: str = '', contract: str = '') -> Optional[EventTrace]:
+        """Start a trace and make it the active one for this context"""
+        if not self.enabled:
+            return None
+        trace = EventTrace(symbol, contract, source_time(timestamp))
+        _current_trace.set(trace)
+        self.traces += 1
+        return trace
+
+    def detach(self):
+        """Clear the active trace (the consumer loop, once the event is handed off)"""
+        _current_trace.set(None)
+
+    def fork(self, owner: str) -> Optional[EventTrace]:
+        """Activate a child of the current trace (call inside the consumer's own task)"""
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        child = trace.fork(owner)
+        _current_trace.set(child)
+        return child
+
+    def _observe(self, owner: str, stage: str, seconds: float):
+        child = self._stage_children.get((owner, stage))
+        if child is None:
+            child = self._stage_children[(owner, stage)] = stage_latency.labels(bot=owner, stage=stage)
+        child.observe(seconds)
+
+    def finish_pipeline(self, trace: Optional[EventTrace]):
+        """Emit the shared stages (up to the first fork) once per event"""
+        if trace is None:
+            return
+        lag = trace.ingest_lag
+        if lag is not None:
+            self._observe(PIPELINE, 'ingest', lag)
+        for stage, seconds in trace.stages(end=trace.forked_at):
+            self._observe(PIPELINE, stage, seconds)
+
+    def finish(self, trace: Optional[EventTrace]):
+        """Emit a consumer fork's own stages (delivery is reported separately)"""
+        if trace is None or trace.forked_at is None:
+            return
+        trace.mark('done')
+        for stage, seconds in trace.stages(start=trace.forked_at):
+            self._observe(trace.owner, stage, seconds)
+
+    def finish_delivery(self, trace: Optional[EventTrace]):
+        """Emit 'delivered' (enqueue -> 204) and print-to-alert for a posted alert"""
+        if trace is None or trace.forked_at is None:
+            return
+        queued_index = next((i for i, (stage, _) in enumerate(trace.marks) if stage == 'queued'), None)
+        if queued_index is None:
+            return
+        delivered = max(0.0, time.perf_counter() - trace.marks[queued_index][1])
+        self._observe(trace.owner, 'delivered', delivered)
+
+        self.posted += 1
+        start = trace.source_ts if trace.source_ts is not None else trace.received_wall
+        total = max(0.0, trace.wall_time(queued_index) + delivered - start)
+        child = self._alert_children.get(trace.owner)
+        if child is None:
+            child = self._alert_children[trace.owner] = print_to_alert.labels(bot=trace.owner)
+        child.observe(total)
+
+        if total >= self.slow_s:
+            self.slow += 1
+            breakdown = [('ingest', trace.ingest_lag)] if trace.ingest_lag is not None else []
+            breakdown += trace.stages(end=queued_index + 1) + [('delivered', delivered)]
+            hot_logger.info(
+                "🐢 Slow alert %s %s: %.2fs print-to-alert | %s",
+                trace.owner, trace.symbol, total,
+                ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in breakdown),
+            )
+
+    def stage_summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """owner -> stage -> count and p50/p95/p99 seconds, for every stage observed"""
+        summary: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (owner, stage), child in self._stage_children.items():
+            if child.count:
+                summary.setdefault(owner, {})[stage] = {
+                    'count': child.count,
+                    'p50': child.quantile(0.50),
+                    'p95': child.quantile(0.95),
+                    'p99': child.quantile(0.99),
+                }
+        return summary
+
+    def get_stats(self) -> Dict[str, Any]:
+        summaries = {}
+        for owner, child in self._alert_children.items():
+            if child.count:
+                summaries[owner] = {
+                    'count': child.count,
+                    'p50': child.quantile(0.50),
+                    'p95': child.quantile(0.95),
+                    'p99': child.quantile(0.99),
+                }
+        return {
+            'enabled': self.enabled,
+            'traces': self.traces,
+            'posted': self.posted,
+            'slow': self.slow,
+            'print_to_alert': summaries,
+        }
+
+
+event_tracer = EventTracer(
+    enabled=getattr(Config, 'TRACE_ENABLED', True),
+    slow_ms=getattr(Config, 'TRACE_SLOW_MS', 3000.0),
+)
@@ -1,198 +1,411 @@
 """
-Volume Cache - In-memory volume tracking for options flow detection
-Tracks volume changes across polling intervals to detect unusual flow
+Volume Baseline Store - Columnar per-underlying volume tracking for flow detection
+Tracks day volume per contract between scans so unusual flow is a volume delta
+
+Per underlying we keep a sorted array of contract tickers with a parallel
+int64 array of the day volume seen at the last scan. A new chain snapshot is
+aligned against it with one searchsorted, so the delta for every contract is
+a single array subtraction. Kafka prints between REST scans are folded in
+incrementally, and the whole store is written to a compact .npz file so a
+restart mid-session keeps its baselines.
 """
 
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Optional
-from collections import defaultdict
+import os
+import time
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from src.config import Config
 
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_VERSION = 1
+
+
+def _encode(tickers: Sequence[str]) -> np.ndarray:
+    """Contract tickers as a fixed-width bytes array (OCC tickers are ASCII)"""
+    try:
+        return np.asarray(tickers, dtype='S')
+    except UnicodeEncodeError:
+        return np.array([str(t).encode('utf-8') for t in tickers], dtype='S')
+
 
-class VolumeCache:
+def _chain_key(tickers: Sequence[str]) -> int:
+    """Cheap identity of a chain's ticker order (str hashes are cached)"""
+    return hash(tuple(tickers))
+
+
+class UnderlyingVolumes:
     """
-    In-memory cache for tracking options contract volume changes.
+    Sorted contract tickers with parallel day volumes for one underlying.
 
-    Purpose:
-    - Store previous volume snapshots for comparison
-    - Calculate volume deltas to detect unusual flow
-    - Automatic cleanup of stale entries
+    Polygon returns a chain in the same order scan after scan, so the row ->
+    slot mapping of the last chain is kept; when the next chain has the same
+    order, alignment is a plain gather instead of a search.
+    """
 
-    Architecture:
-    - Multi-level cache: Ticker → Contract → Volume data
-    - Time-based expiration (2-5 minute TTL)
-    - Thread-safe async operations
+    __slots__ = ('ids', 'volumes', 'updated_at', 'chain_key', 'rows')
+
+    def __init__(self, ids: np.ndarray, volumes: np.ndarray, updated_at: float,
+                 chain_key: Optional[int] = None, rows: Optional[np.ndarray] = None):
+        self.ids = ids
+        self.volumes = volumes
+        self.updated_at = updated_at
+        self.chain_key = chain_key
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def locate(self, encoded: np.ndarray) -> np.ndarray:
+        """Slot of each (encoded) ticker in the sorted arrays, -1 if absent"""
+        if not len(self.ids):
+            return np.full(len(encoded), -1, dtype=np.int64)
+        idx = np.minimum(np.searchsorted(self.ids, encoded), len(self.ids) - 1)
+        return np.where(self.ids[idx] == encoded, idx, -1)
+
+    def rows_for(self, tickers: Sequence[str]) -> np.ndarray:
+        """Slots for a chain, reusing the last mapping when the order matches"""
+        key = _chain_key(tickers)
+        if key != self.chain_key or self.rows is None:
+            self.chain_key, self.rows = key, self.locate(_encode(tickers))
+        return self.rows
+
+    def lookup(self, tickers: Sequence[str]) -> np.ndarray:
+        """Baseline volume for each ticker (0 for contracts not seen before)"""
+        rows = self.rows_for(tickers)
+        if not len(rows):
+            return np.zeros(0, dtype=np.int64)
+        return np.where(rows >= 0, self.volumes[rows], 0)
+
+    def add(self, encoded: np.ndarray, sizes: np.ndarray):
+        """Add traded size to contracts (tickers must be unique)"""
+        rows = self.locate(encoded)
+        hit = rows >= 0
+        self.volumes[rows[hit]] += sizes[hit]
+        if not hit.all():
+            ids = np.concatenate([self.ids, encoded[~hit]])
+            volumes = np.concatenate([self.volumes, sizes[~hit]])
+            order = np.argsort(ids, kind='stable')
+            self.ids, self.volumes = ids[order], volumes[order]
+            # Slots moved; the next scan re-locates its chain
+            self.chain_key = self.rows = None
+
+    def traded(self) -> Dict[str, int]:
+        """{contract: volume} for contracts with volume"""
+        mask = self.volumes > 0
+        return {t.decode('utf-8'): v for t, v in zip(self.ids[mask].tolist(), self.volumes[mask].tolist())}
+
+
+def _chain_volumes(tickers: Sequence[str], volumes: np.ndarray,
+                   previous: Optional[UnderlyingVolumes] = None) -> UnderlyingVolumes:
+    """Build a baseline from a chain's (ticker, day volume) columns"""
+    # Reuse the last slots only if every contract in the chain already has one;
+    # baseline_for() stamps the key of a chain with new contracts (rows == -1),
+    # and those must be added to ids here or they would re-alert every scan
+    if (previous is not None and previous.rows is not None and previous.chain_key == _chain_key(tickers)
+            and (previous.rows >= 0).all()):
+        ids, rows, key = previous.ids, previous.rows, previous.chain_key
+    else:
+        encoded = _encode(tickers)
+        ids = np.unique(encoded[encoded != b''])
+        rows = UnderlyingVolumes(ids, np.zeros(len(ids), dtype=np.int64), 0.0).locate(encoded)
+        key = _chain_key(tickers)
+
+    traded = (rows >= 0) & (volumes > 0)
+    vols = np.zeros(len(ids), dtype=np.int64)
+    # Duplicate tickers: the last one that traded wins, like the dict baseline
+    vols[rows[traded]] = volumes[traded]
+    return UnderlyingVolumes(ids, vols, time.time(), key, rows)
+
+
+class VolumeBaselineStore:
     """
+    Columnar store of previous-scan option volumes.
 
-    def __init__(self, ttl_seconds: int = 360, cleanup_interval: int = 300):
+    Usage:
+        baseline = volume_cache.baseline_for('SPY', columns.tickers)
+        delta = columns.volume - baseline
+        volume_cache.update('SPY', columns.tickers, columns.volume)
+    """
+
+    def __init__(self, ttl_seconds: int = 14400, cleanup_interval: int = 300,
+                 snapshot_path: Optional[str] = None, stream_updates: bool = True):
         """
-        Initialize volume cache.
+        Initialize baseline store.
 
         Args:
-            ttl_seconds: Time-to-live for cache entries (default: 6 minutes)
-            cleanup_interval: Cleanup task interval (default: 5 minutes)
+            ttl_seconds: Baselines older than this are treated as missing
+            cleanup_interval: Maintenance task interval (expiry + snapshot)
+            snapshot_path: .npz file for warm restarts (None disables)
+            stream_updates: Fold Kafka print sizes into baselines between scans
         """
-        # Cache structure: {ticker: {contract_ticker: {volume, timestamp}}}
-        self.cache: Dict[str, Dict[str, Dict]] = defaultdict(dict)
-
-        # Timestamps for each ticker's last update
-        self.timestamps: Dict[str, datetime] = {}
-
-        # Configuration
         self.ttl_seconds = ttl_seconds
         self.cleanup_interval = cleanup_interval
+        self.snapshot_path = snapshot_path
+        self.stream_updates = stream_updates
+
+        self._entries: Dict[str, UnderlyingVolumes] = {}
+        # Kafka sizes since the last fold: {underlying: {contract: size}}
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._dirty = False
+        self._loaded = False
 
         # Statistics
         self.hits = 0
         self.misses = 0
         self.sets = 0
         self.cleanups = 0
+        self.stream_prints = 0
 
-        # Cleanup task reference
         self._cleanup_task: Optional[asyncio.Task] = None
 
-        logger.info(f"VolumeCache initialized (TTL: {ttl_seconds}s, Cleanup: {cleanup_interval}s)")
+        logger.info(f"VolumeBaselineStore initialized (TTL: {ttl_seconds}s, Cleanup: {cleanup_interval}s)")
+
+    def _fresh(self, underlying: str) -> Optional[UnderlyingVolumes]:
+        entry = self._entries.get(underlying)
+        if entry is None:
+            return None
+        if time.time() - entry.updated_at > self.ttl_seconds:
+            self._remove(underlying)
+            return None
+        self._fold(underlying, entry)
+        return entry
+
+    def _fold(self, underlying: str, entry: UnderlyingVolumes):
+        """Apply buffered Kafka sizes to the arrays"""
+        pending = self._pending.pop(underlying, None)
+        if pending:
+            entry.add(_encode(list(pending)),
+                      np.fromiter(pending.values(), dtype=np.int64, count=len(pending)))
 
-    async def get(self, ticker: str) -> Optional[Dict[str, Dict]]:
+    def _remove(self, underlying: str):
+        self._entries.pop(underlying, None)
+        self._pending.pop(underlying, None)
+
+    def has(self, underlying: str) -> bool:
+        """Whether a fresh baseline exists for the underlying"""
+        return self._fresh(underlying) is not None
+
+    def baseline_for(self, underlying: str, tickers: np.ndarray) -> np.ndarray:
         """
-        Get previous volume snapshot for a ticker.
+        Previous-scan volumes aligned to a chain.
 
         Args:
-            ticker: Underlying ticker symbol (e.g., 'AAPL')
+            underlying: Underlying ticker symbol
+            tickers: Contract tickers of the current chain, in chain order
 
         Returns:
-            Dict mapping contract tickers to volume data, or None if not cached
-
-        Example:
-            {
-                'O:AAPL250117C00200000': {'volume': 1500, 'timestamp': ...},
-                'O:AAPL250117P00200000': {'volume': 800, 'timestamp': ...}
-            }
+            int64 array (zeros on first scan or expired baseline)
         """
-        if ticker not in self.cache:
+        entry = self._fresh(underlying)
+        if entry is None:
             self.misses += 1
-            logger.debug(f"Volume cache MISS for {ticker}")
-            return None
+            return np.zeros(len(tickers), dtype=np.int64)
+        self.hits += 1
+        return entry.lookup(tickers.tolist() if isinstance(tickers, np.ndarray) else list(tickers))
+
+    def get_volumes(self, underlying: str) -> Dict[str, int]:
+        """Baseline as {contract: volume} (empty if none)"""
+        entry = self._fresh(underlying)
+        if entry is None:
+            self.misses += 1
+            return {}
+        self.hits += 1
+        return entry.traded()
 
-        # Check if cache is still fresh
-        if ticker in self.timestamps:
-            age_seconds = (datetime.now() - self.timestamps[ticker]).total_seconds()
-
-            if age_seconds < self.ttl_seconds:
-                self.hits += 1
-                logger.debug(f"Volume cache HIT for {ticker} (age: {age_seconds:.1f}s)")
-                return self.cache[ticker]
-            else:
-                # Expired - remove and return None
-                logger.debug(f"Volume cache EXPIRED for {ticker} (age: {age_seconds:.1f}s)")
-                self._remove_ticker(ticker)
-                self.misses += 1
-                return None
-
-        # Ticker in cache but no timestamp (shouldn't happen)
-        self.misses += 1
-        return None
-
-    async def set(self, ticker: str, snapshot: Dict[str, Dict]):
+    def update(self, underlying: str, tickers: Sequence[str], volumes: Sequence[int]):
         """
-        Store volume snapshot for a ticker.
+        Replace the baseline with a fresh chain scan.
 
         Args:
-            ticker: Underlying ticker symbol
-            snapshot: Dict mapping contract tickers to volume data
-
-        Example:
-            await cache.set('AAPL', {
-                'O:AAPL250117C00200000': {'volume': 1500},
-                'O:AAPL250117P00200000': {'volume': 800}
-            })
+            underlying: Underlying ticker symbol
+            tickers: Contract tickers of the chain
+            volumes: Day volume per contract (same order)
         """
-        if not snapshot:
-            logger.debug(f"Skipping empty snapshot for {ticker}")
+        tickers = list(tickers) if not isinstance(tickers, np.ndarray) else tickers.tolist()
+        volumes = np.asarray(volumes, dtype=np.int64)
+        entry = _chain_volumes(tickers, volumes, self._entries.get(underlying))
+        # The REST snapshot already includes the prints buffered before it
+        self._pending.pop(underlying, None)
+        if not entry.volumes.any():
+            logger.debug(f"Skipping empty volume baseline for {underlying}")
             return
-
-        # Add timestamp to each contract if not present
-        current_time = datetime.now()
-        for contract_ticker, data in snapshot.items():
-            if 'timestamp' not in data:
-                data['timestamp'] = current_time
-
-        # Store snapshot
-        self.cache[ticker] = snapshot
-        self.timestamps[ticker] = current_time
+        self._entries[underlying] = entry
+        self._dirty = True
         self.sets += 1
+        logger.debug(f"Stored volume baseline for {underlying} ({len(entry)} contracts)")
 
-        logger.debug(f"Stored volume snapshot for {ticker} ({len(snapshot)} contracts)")
+    def update_from_mapping(self, underlying: str, volumes: Mapping[str, int]):
+        """Replace the baseline from a {contract: volume} dict"""
+        self.update(underlying, list(volumes.keys()), list(volumes.values()))
 
-    def _remove_ticker(self, ticker: str):
-        """Remove ticker from cache"""
-        if ticker in self.cache:
-            del self.cache[ticker]
-        if ticker in self.timestamps:
-            del self.timestamps[ticker]
-
-    async def cleanup(self):
+    def record_print(self, event: Dict) -> bool:
         """
-        Remove stale entries from cache.
+        Fold a Kafka trade print into the baseline of its underlying.
 
-        Removes entries older than TTL + grace period (2x TTL).
-        """
-        cutoff_time = datetime.now() - timedelta(seconds=self.ttl_seconds * 2)
-        stale_tickers = []
+        Only underlyings that already have a REST baseline are tracked: a
+        baseline built from prints alone would not be a day volume.
 
-        for ticker, timestamp in self.timestamps.items():
-            if timestamp < cutoff_time:
-                stale_tickers.append(ticker)
-
-        for ticker in stale_tickers:
-            logger.debug(f"Removing stale cache entry for {ticker}")
-            self._remove_ticker(ticker)
-
-        if stale_tickers:
+        Returns:
+            True if the print was applied
+        """
+        if not self.stream_updates:
+            return False
+        try:
+            underlying = str(event.get('symbol') or event.get('underlying') or '').upper()
+            contract = event.get('contract_ticker') or ''
+            size = int(event.get('trade_size') or 0)
+            if size <= 0 or not contract or underlying not in self._entries:
+                return False
+            pending = self._pending.setdefault(underlying, {})
+            pending[contract] = pending.get(contract, 0) + size
+            self.stream_prints += 1
+            self._dirty = True
+            return True
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Volume baseline print ignored: {e}")
+            return False
+
+    async def cleanup(self) -> int:
+        """Remove baselines older than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        stale = [u for u, entry in self._entries.items() if entry.updated_at < cutoff]
+        for underlying in stale:
+            logger.debug(f"Removing stale volume baseline for {underlying}")
+            self._remove(underlying)
+
+        if stale:
             self.cleanups += 1
-            logger.info(f"Cleaned up {len(stale_tickers)} stale cache entries")
-
-        return len(stale_tickers)
+            self._dirty = True
+            logger.info(f"Cleaned up {len(stale)} stale volume baselines")
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _snapshot_payload(self) -> Dict[str, np.ndarray]:
+        """Concatenate every baseline into flat arrays (copies; runs on the loop)"""
+        for underlying, entry in list(self._entries.items()):
+            self._fold(underlying, entry)
+        symbols = list(self._entries)
+        entries = [self._entries[s] for s in symbols]
+        sizes = np.array([len(e) for e in entries], dtype=np.int64)
+        return {
+            'version': np.array([SNAPSHOT_VERSION]),
+            'symbols': np.array(symbols, dtype=str),
+            'offsets': np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64),
+            'updated_at': np.array([e.updated_at for e in entries], dtype=np.float64),
+            'ids': np.concatenate([e.ids for e in entries]) if entries else np.array([], dtype='S'),
+            'volumes': np.concatenate([e.volumes for e in entries]) if entries else np.array([], dtype=np.int64),
+        }
 
+    def save_snapshot(self, path: Optional[str] = None, payload: Optional[Dict] = None) -> bool:
+        """Write the store to disk (atomic replace)"""
+        path = path or self.snapshot_path
+        if not path:
+            return False
+        try:
+            if payload is None:
+                payload = self._snapshot_payload()
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **payload)
+            os.replace(tmp_path, path)
+            self._dirty = False
+            logger.debug(f"Volume baseline snapshot saved ({len(payload['symbols'])} underlyings)")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to save volume baseline snapshot: {e}")
+            return False
+
+    def load_snapshot(self, path: Optional[str] = None) -> bool:
+        """Restore baselines from disk (expired ones are skipped)"""
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['version'][0]) != SNAPSHOT_VERSION:
+                    logger.info("Volume baseline snapshot layout changed, starting fresh")
+                    return False
+                symbols = data['symbols'].tolist()
+                offsets = data['offsets']
+                updated_at = data['updated_at']
+                ids = data['ids']
+                volumes = data['volumes']
+
+            cutoff = time.time() - self.ttl_seconds
+            restored = 0
+            for i, underlying in enumerate(symbols):
+                if updated_at[i] < cutoff or underlying in self._entries:
+                    continue
+                lo, hi = offsets[i], offsets[i + 1]
+                self._entries[underlying] = UnderlyingVolumes(
+                    ids[lo:hi].copy(), volumes[lo:hi].copy(), float(updated_at[i])
+                )
+                restored += 1
+
+            logger.info(f"📦 Restored volume baselines for {restored} underlyings")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load volume baseline snapshot: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Maintenance task
+    # ------------------------------------------------------------------
     async def start_cleanup_task(self):
-        """Start background cleanup task"""
+        """Restore the last snapshot once, then start background maintenance"""
+        if not self._loaded:
+            self._loaded = True
+            self.load_snapshot()
+
         if self._cleanup_task and not self._cleanup_task.done():
-            logger.warning("Cleanup task already running")
+            logger.debug("Volume baseline maintenance already running")
             return
 
         self._cleanup_task = asyncio.create_task(self._cleanup_loop())
-        logger.info("Volume cache cleanup task started")
+        logger.info("Volume baseline maintenance task started")
 
     async def stop_cleanup_task(self):
-        """Stop background cleanup task"""
+        """Stop background maintenance and persist the store"""
         if self._cleanup_task and not self._cleanup_task.done():
             self._cleanup_task.cancel()
             try:
                 await self._cleanup_task
             except asyncio.CancelledError:
                 pass
-            logger.info("Volume cache cleanup task stopped")
+            logger.info("Volume baseline maintenance task stopped")
+        if self._entries:
+            self.save_snapshot()
 
     async def _cleanup_loop(self):
-        """Background cleanup loop"""
+        """Expire stale baselines and snapshot changes"""
         while True:
             try:
                 await asyncio.sleep(self.cleanup_interval)
                 await self.cleanup()
+                if self._dirty and self.snapshot_path:
+                    # Copy on the loop, serialize + write off it
+                    payload = self._snapshot_payload()
+                    self._dirty = False
+                    await asyncio.to_thread(self.save_snapshot, None, payload)
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error in volume cache cleanup: {e}")
+                logger.error(f"Error in volume baseline maintenance: {e}")
 
-    def get_stats(self) -> Dict:
+    def get_stats(self) -> Dict[str, Any]:
         """
-        Get cache statistics.
+        Get store statistics.
 
         Returns:
-            Dict with cache performance metrics
+            Dict with store performance metrics
         """
         total_requests = self.hits + self.misses
         hit_rate = self.hits / total_requests if total_requests > 0 else 0
@@ -202,27 +415,38 @@ class VolumeCache:
             'misses': self.misses,
             'sets': self.sets,
             'cleanups': self.cleanups,
+            'stream_prints': self.stream_prints,
             'hit_rate': hit_rate,
-            'cached_tickers': len(self.cache),
-            'total_contracts': sum(len(contracts) for contracts in self.cache.values()),
+            'cached_tickers': len(self._entries),
+            'total_contracts': sum(len(e) for e in self._entries.values()),
+            'memory_bytes': sum(
+                e.ids.nbytes + e.volumes.nbytes + (e.rows.nbytes if e.rows is not None else 0)
+                for e in self._entries.values()
+            ),
             'ttl_seconds': self.ttl_seconds
         }
 
     def clear(self):
-        """Clear all cache entries"""
-        count = len(self.cache)
-        self.cache.clear()
-        self.timestamps.clear()
-        logger.info(f"Cleared volume cache ({count} tickers)")
+        """Clear all baselines"""
+        count = len(self._entries)
+        self._entries.clear()
+        self._pending.clear()
+        self._dirty = True
+        logger.info(f"Cleared volume baselines ({count} tickers)")
 
     def __repr__(self):
         stats = self.get_stats()
         return (
-            f"VolumeCache(tickers={stats['cached_tickers']}, "
+            f"VolumeBaselineStore(tickers={stats['cached_tickers']}, "
             f"contracts={stats['total_contracts']}, "
             f"hit_rate={stats['hit_rate']:.1%})"
         )
 
 
-# Global volume cache instance
-volume_cache = VolumeCache()
+# Global volume baseline store
+volume_cache = VolumeBaselineStore(
+    ttl_seconds=getattr(Config, 'VOLUME_BASELINE_TTL', 14400),
+    cleanup_interval=getattr(Config, 'VOLUME_BASELINE_SNAPSHOT_INTERVAL', 60),
+    snapshot_path=getattr(Config, 'VOLUME_BASELINE_SNAPSHOT_PATH', 'state/volume_baselines.npz'),
+    stream_updates=getattr(Config, 'VOLUME_BASELINE_STREAM_UPDATES', True),
+)
@@ -0,0 +1,416 @@
+"""
+Discord webhook delivery: one queue and worker per webhook URL.
+
+BaseAutoBot.post_to_discord used to hold a per-bot lock across pacing
+sleeps, 429 waits and up to five attempts, so a rate-limited webhook
+stalled the process_event caller behind it. Bots now enqueue and return;
+the delivery service owns the HTTP session and, per webhook:
+
+- paces posts by DISCORD_WEBHOOK_MIN_INTERVAL_SECONDS and by the rate-limit
+  bucket Discord reports (X-RateLimit-Bucket / -Remaining / -Reset-After);
+  a global 429 pauses every queue
+- packs queued embeds for the same username into one message (up to
+  WEBHOOK_MAX_EMBEDS, 10 on Discord, and 6000 embed characters)
+- retries 429s, 5xx and connection errors up to WEBHOOK_MAX_ATTEMPTS, and
+  drops the oldest entry when a queue reaches WEBHOOK_QUEUE_MAX
+- splits a packed message Discord rejects (other 4xx) back into its embeds,
+  each then posted on its own, so only the bad embed fails
+
+Delivery outcomes reach the bot through its on_result callback; queue depth
+and enqueue -> 204 latency are exported as orakl_webhook_queue_depth and
+orakl_webhook_delivery_seconds.
+
+    webhook_delivery.enqueue(bot.webhook_url, embed, username, name=bot.name,
+                             on_result=bot._record_delivery)
+    await webhook_delivery.stop()   # flushes what is queued
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import aiohttp
+
+from src.config import Config
+from src.utils.monitoring import metrics
+from src.utils.tracing import current_trace, event_tracer
+
+logger = logging.getLogger(__name__)
+
+MAX_EMBED_CHARS = 6000
+
+webhook_queue_depth = metrics.register_gauge(
+    "orakl_webhook_queue_depth",
+    "Embeds waiting for delivery per webhook",
+    labels=["webhook"]
+)
+
+webhook_delivery_latency = metrics.register_histogram(
+    "orakl_webhook_delivery_seconds",
+    "Enqueue to Discord 204 for delivered embeds",
+    buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0],
+    labels=["webhook"]
+)
+
+
+def embed_chars(embed: Dict) -> int:
+    """Characters Discord counts against the 6000-per-message embed limit"""
+    total = len(str(embed.get('title') or '')) + len(str(embed.get('description') or ''))
+    for field in embed.get('fields') or []:
+        total += len(str(field.get('name') or '')) + len(str(field.get('value') or ''))
+    total += len(str((embed.get('footer') or {}).get('text') or ''))
+    total += len(str((embed.get('author') or {}).get('name') or ''))
+    return total
+
+
+def retry_after_seconds(headers, body: str, default: float = 1.0) -> float:
+    """Wait requested by a 429 (Discord sends fractional seconds in a header or the body)"""
+    for header in ('X-RateLimit-Reset-After', 'Retry-After'):
+        value = headers.get(header)
+        if value:
+            try:
+                return max(float(value), 0.1)
+            except ValueError:
+                pass
+    try:
+        return max(float(json.loads(body).get('retry_after', default)), 0.1)
+    except (ValueError, TypeError, AttributeError):
+        return default
+
+
+class DeliveryItem:
+    """One embed waiting to be posted"""
+
+    __slots__ = ('embed', 'username', 'on_result', 'trace', 'enqueued', 'attempts', 'chars', 'solo')
+
+    def __init__(self, embed: Dict, username: str, on_result: Optional[Callable[[bool], Any]], trace):
+        self.embed = embed
+        self.username = username
+        self.on_result = on_result
+        self.trace = trace
+        self.enqueued = time.monotonic()
+        self.attempts = 0
+        self.chars = embed_chars(embed)
+        self.solo = False   # post alone (set after a packed message was rejected)
+
+
+class RateLimitBucket:
+    """Discord's view of one rate-limit bucket"""
+
+    __slots__ = ('remaining', 'reset_at')
+
+    def __init__(self):
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+
+    def wait(self, now: float) -> float:
+        if self.remaining is not None and self.remaining <= 0 and self.reset_at > now:
+            return self.reset_at - now
+        return 0.0
+
+
+class WebhookQueue:
+    """Pending embeds, worker and counters for one webhook URL"""
+
+    def __init__(self, url: str, name: str):
+        self.url = url
+        self.name = name
+        self.items: Deque[DeliveryItem] = deque()
+        self.wakeup = asyncio.Event()
+        self.worker: Optional[asyncio.Task] = None
+        self.bucket_id = url
+        self.last_post = 0.0
+        self.posting = False
+        self.messages = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.depth_gauge = webhook_queue_depth.labels(webhook=name)
+        self.latency = webhook_delivery_latency.labels(webhook=name)
+
+
+class WebhookDelivery:
+    """
+    Non-blocking Discord webhook posting with per-webhook queues.
+
+    Usage:
+        accepted = webhook_delivery.enqueue(url, embed, "ORAKL Sweeps Bot", name="Sweeps Bot",
+                                            on_result=callback)
+        await webhook_delivery.drain()
+        webhook_delivery.get_stats()
+    """
+
+    def __init__(self, min_interval: float = 0.25, max_embeds: int = 10, queue_max: int = 500,
+                 max_attempts: int = 5, timeout: float = 10.0):
+        self.min_interval = max(0.0, min_interval)
+        self.max_embeds = max(1, min(max_embeds, 10))
+        self.queue_max = max(1, queue_max)
+        self.max_attempts = max(1, max_attempts)
+        self.timeout = timeout
+        self._queues: Dict[str, WebhookQueue] = {}
+        self._buckets: Dict[str, RateLimitBucket] = {}
+        self._global_until = 0.0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._running = True
+
+    # ------------------------------------------------------------------
+    # Enqueue
+    # ------------------------------------------------------------------
+    def enqueue(self, url: str, embed: Dict, username: str, name: Optional[str] = None,
+                on_result: Optional[Callable[[bool], Any]] = None) -> bool:
+        """
+        Queue an embed for the webhook and return immediately.
+
+        Returns:
+            False if the service is stopped or the URL is empty; True otherwise
+            (delivery is reported later through on_result)
+        """
+        if not url or not self._running:
+            return False
+        queue = self._queues.get(url)
+        if queue is None:
+            queue = self._queues[url] = WebhookQueue(url, name or username)
+        if len(queue.items) >= self.queue_max:
+            dropped = queue.items.popleft()
+            queue.dropped += 1
+            logger.warning(f"{queue.name} webhook queue full ({self.queue_max}); dropping oldest alert")
+            self._resolve(dropped, False)
+
+        queue.items.append(DeliveryItem(embed, username, on_result, current_trace()))
+        queue.depth_gauge.set(len(queue.items))
+        queue.wakeup.set()
+        if queue.worker is None or queue.worker.done():
+            # Fresh context: the worker must not inherit the enqueuing event's trace or scan owner
+            queue.worker = asyncio.create_task(self._run(queue), name=f"webhook:{queue.name}",
+                                               context=contextvars.Context())
+        return True
+
+    @property
+    def depth(self) -> int:
+        return sum(len(queue.items) for queue in self._queues.values())
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    def _bucket(self, queue: WebhookQueue) -> RateLimitBucket:
+        bucket = self._buckets.get(queue.bucket_id)
+        if bucket is None:
+            bucket = self._buckets[queue.bucket_id] = RateLimitBucket()
+        return bucket
+
+    def _take_batch(self, queue: WebhookQueue) -> List[DeliveryItem]:
+        first = queue.items.popleft()
+        batch, chars = [first], first.chars
+        while (not first.solo and queue.items and len(batch) < self.max_embeds
+               and not queue.items[0].solo
+               and queue.items[0].username == first.username
+               and chars + queue.items[0].chars <= MAX_EMBED_CHARS):
+            item = queue.items.popleft()
+            batch.append(item)
+            chars += item.chars
+        return batch
+
+    async def _run(self, queue: WebhookQueue):
+        while True:
+            if not queue.items:
+                queue.wakeup.clear()
+                try:
+                    await asyncio.wait_for(queue.wakeup.wait(), timeout=60)
+                except asyncio.TimeoutError:
+                    if not queue.items:
+                        return   # idle worker exits; enqueue restarts it
+                continue
+
+            now = time.monotonic()
+            wait = max(self._bucket(queue).wait(now), self._global_until - now,
+                       queue.last_post + self.min_interval - now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            batch = self._take_batch(queue)
+            queue.depth_gauge.set(len(queue.items))
+            queue.posting = True
+            try:
+                await self._post(queue, batch)
+            except asyncio.CancelledError:
+                queue.items.extendleft(reversed(batch))
+                raise
+            except Exception as e:
+                logger.error(f"{queue.name} webhook delivery error: {e}")
+                self._retry(queue, batch, 1.0)
+            finally:
+                queue.posting = False
+
+    async def _post(self, queue: WebhookQueue, batch: List[DeliveryItem]):
+        session = await self._ensure_session()
+        payload = {"embeds": [item.embed for item in batch], "username": batch[0].username}
+        for item in batch:
+            item.attempts += 1
+        try:
+            async with session.post(queue.url, json=payload) as response:
+                queue.last_post = time.monotonic()
+                self._update_bucket(queue, response.headers)
+                if response.status in (200, 204):
+                    queue.messages += 1
+                    for item in batch:
+                        queue.delivered += 1
+                        queue.latency.observe(queue.last_post - item.enqueued)
+                        event_tracer.finish_delivery(item.trace)
+                        self._resolve(item, True)
+                    return
+
+                body = await response.text()
+                if response.status == 429:
+                    queue.rate_limited += 1
+                    retry_after = retry_after_seconds(response.headers, body)
+                    scope = response.headers.get('X-RateLimit-Scope', '')
+                    if response.headers.get('X-RateLimit-Global') or scope == 'global':
+                        self._global_until = time.monotonic() + retry_after
+                    logger.warning(f"{queue.name} rate limited by Discord; retrying in {retry_after:.2f}s")
+                    self._retry(queue, batch, retry_after)
+                elif response.status >= 500:
+                    logger.error(f"{queue.name} webhook error {response.status}: {body[:200]}")
+                    self._retry(queue, batch, 1.0)
+                elif len(batch) > 1:
+                    logger.warning(f"{queue.name} webhook rejected a {len(batch)}-embed message "
+                                   f"({response.status}); posting them one by one")
+                    self._split(queue, batch)
+                else:
+                    logger.error(f"{queue.name} webhook error {response.status}: {body[:200]}")
+                    self._fail(queue, batch)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"{queue.name} webhook connection error: {e}")
+            self._retry(queue, batch, 1.0)
+
+    def _update_bucket(self, queue: WebhookQueue, headers):
+        bucket_id = headers.get('X-RateLimit-Bucket')
+        if bucket_id and bucket_id != queue.bucket_id:
+            queue.bucket_id = bucket_id
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+        if remaining is None or reset_after is None:
+            return
+        try:
+            bucket = self._bucket(queue)
+            bucket.remaining = int(remaining)
+            bucket.reset_at = time.monotonic() + float(reset_after)
+        except ValueError:
+            pass
+
+    def _retry(self, queue: WebhookQueue, batch: List[DeliveryItem], delay: float):
+        """Put the batch back at the head of the queue, or fail items out of attempts"""
+        keep = [item for item in batch if item.attempts < self.max_attempts]
+        self._fail(queue, [item for item in batch if item.attempts >= self.max_attempts])
+        if keep:
+            queue.items.extendleft(reversed(keep))
+            queue.depth_gauge.set(len(queue.items))
+            bucket = self._bucket(queue)
+            bucket.remaining = 0
+            bucket.reset_at = max(bucket.reset_at, time.monotonic() + delay)
+
+    def _split(self, queue: WebhookQueue, batch: List[DeliveryItem]):
+        """Requeue a rejected packed message as solo items, without using up an attempt"""
+        for item in batch:
+            item.solo = True
+            item.attempts -= 1
+        queue.items.extendleft(reversed(batch))
+        queue.depth_gauge.set(len(queue.items))
+
+    def _fail(self, queue: WebhookQueue, items: List[DeliveryItem]):
+        for item in items:
+            queue.failed += 1
+            self._resolve(item, False)
+
+    @staticmethod
+    def _resolve(item: DeliveryItem, ok: bool):
+        if item.on_result is None:
+            return
+        try:
+            item.on_result(ok)
+        except Exception as e:
+            logger.debug(f"Webhook delivery callback error: {e}")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def drain(self, timeout: float = 30.0) -> bool:
+        """Wait until every queue is empty and no post is in flight"""
+        deadline = time.monotonic() + timeout
+        while any(q.items or q.posting for q in self._queues.values()):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def stop(self, timeout: float = 10.0):
+        """Flush queued alerts (up to timeout), then stop the workers and close the session"""
+        if not await self.drain(timeout):
+            logger.warning(f"Webhook delivery stopped with {self.depth} alert(s) undelivered")
+        self._running = False
+        workers = [q.worker for q in self._queues.values() if q.worker and not q.worker.done()]
+        for worker in workers:
+            worker.cancel()
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def start(self):
+        """Accept alerts again after stop()"""
+        self._running = True
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def get_stats(self) -> Dict[str, Any]:
+        webhooks = {}
+        for queue in self._queues.values():
+            latency = queue.latency
+            webhooks[queue.name] = {
+                'depth': len(queue.items),
+                'messages': queue.messages,
+                'delivered': queue.delivered,
+                'embeds_per_message': round(queue.delivered / queue.messages, 2) if queue.messages else 0.0,
+                'failed': queue.failed,
+                'dropped': queue.dropped,
+                'rate_limited': queue.rate_limited,
+                'latency_p50': latency.quantile(0.50) if latency.count else None,
+                'latency_p95': latency.quantile(0.95) if latency.count else None,
+            }
+        return {
+            'depth': self.depth,
+            'global_rate_limited': self._global_until > time.monotonic(),
+            'webhooks': webhooks,
+        }
+
+    def summary_line(self) -> str:
+        stats = self.get_stats()
+        parts = ", ".join(
+            f"{name} {w['delivered']}/{w['messages']}msg"
+            + (f" p95 {w['latency_p95']:.1f}s" if w['latency_p95'] is not None else "")
+            + (f" q{w['depth']}" if w['depth'] else "")
+            + (f" {w['failed']} failed" if w['failed'] else "")
+            for name, w in stats['webhooks'].items()
+        )
+        return f"Webhooks: {stats['depth']} queued | {parts}"
+
+
+webhook_delivery = WebhookDelivery(
+    min_interval=getattr(Config, 'DISCORD_WEBHOOK_MIN_INTERVAL_SECONDS', 0.25),
+    max_embeds=getattr(Config, 'WEBHOOK_MAX_EMBEDS', 10),
+    queue_max=getattr(Config, 'WEBHOOK_QUEUE_MAX', 500),
+    max_attempts=getattr(Config, 'WEBHOOK_MAX_ATTEMPTS', 5),
+    timeout=getattr(Config, 'WEBHOOK_TIMEOUT', 10.0),
+)